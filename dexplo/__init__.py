@@ -1,5 +1,6 @@
 from ._frame import DataFrame
 from . import testing
-from ._functions import read_csv
+from ._functions import read_csv, read_dxf
+from ._string_pool import string_pool
 
 __version__ = '0.0.13'
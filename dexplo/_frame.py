@@ -1,6 +1,6 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from math import ceil
-from copy import deepcopy
+import json
 from typing import (Union, Dict, List, Optional, Tuple, Callable, overload,
                     NoReturn, Set, Iterable, Any, TypeVar, Type, Generator)
 import warnings
@@ -24,6 +24,8 @@ from ._libs import (groupby as _gb,
                     join as _join)
 from ._strings import StringClass
 from . import _stat_funcs as _sf
+from . import _string_pool as _sp
+from ._libs.string_buffer import StringBuffer
 from ._arithmetic_ops import Operations2D
 
 DataC = Union[Dict[str, Union[ndarray, List]], ndarray]
@@ -116,6 +118,8 @@ class DataFrame(object):
         self._data: Dict[str, ndarray] = {}
         self._column_info: ColInfoT = {}
         self._hasnans: DictListArr = {}
+        self._version: int = 0
+        self._group_cache: OrderedDict = OrderedDict()
 
         if isinstance(data, dict):
             self._columns = init.columns_from_dict(columns, data)
@@ -160,6 +164,7 @@ class DataFrame(object):
 
         self._column_info = new_column_info
         self._columns = new_columns2
+        self._data_changed()
 
     def _get_col_dtype_loc(self, col):
         col_info = self._column_info[col]
@@ -705,10 +710,16 @@ class DataFrame(object):
             if arr.ndim == 1:
                 arr = arr[:, np.newaxis]
 
+            arr = np.asfortranarray(arr)
             if dtype == 'S':
-                new_str_reverse_map, arr = _va.bool_selection_str_mapping(arr, new_str_reverse_map)
+                # the selection shares the categories of the parent and only drops the
+                # unused ones once the rows are few compared to the categories
+                fraction = options.options_dict['str_compact_fraction']
+                locs = [i for i, srm in new_str_reverse_map.items()
+                        if len(arr) < fraction * (len(srm) - 1) and _sp.pool_of(srm) is None]
+                _compact_str_columns(arr, new_str_reverse_map, locs)
 
-            new_data[dtype] = np.asfortranarray(arr)
+            new_data[dtype] = arr
 
         return self._construct_from_new(new_data, new_column_info, new_columns, new_str_reverse_map)
 
@@ -832,9 +843,100 @@ class DataFrame(object):
         new_data: Dict[str, ndarray] = {dt: arr.copy() for dt, arr in self._data.items()}
         new_columns: ColumnT = self._columns.copy()
         new_column_info: ColInfoT = self._copy_column_info()
-        new_str_reverse_map = deepcopy(self._str_reverse_map)
+        new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                               for loc, srm in self._str_reverse_map.items()}
         return self._construct_from_new(new_data, new_column_info, new_columns, new_str_reverse_map)
 
+    def compact_categories(self) -> 'DataFrame':
+        """
+        Drops the categories of the string columns that no row uses any more
+
+        Selecting rows keeps all the categories of the original DataFrame so that chained
+        selections do not have to remap the strings each time. They are only dropped
+        when the number of rows falls below `options.options_dict['str_compact_fraction']`
+        times the number of categories.
+
+        Returns
+        -------
+        A copy of the DataFrame with only the used categories. Columns in a string pool
+        are left in it.
+
+        """
+        df = self.copy()
+        locs = [loc for loc, srm in df._str_reverse_map.items() if _sp.pool_of(srm) is None]
+        _compact_str_columns(df._data.get('S'), df._str_reverse_map, locs)
+        return df
+
+    def to_string_pool(self, name: str = 'default') -> 'DataFrame':
+        """
+        Encodes the string columns into the shared string pool `name`. All columns of
+        the same pool, in this or any other DataFrame, have the same code for the same
+        string, so comparing, joining and appending them only looks at the codes.
+
+        The pool only ever grows. Use it for strings that repeat across many columns
+        or DataFrames.
+
+        Parameters
+        ----------
+        name : str
+            Name of the pool. See `dexplo.string_pool`.
+
+        Returns
+        -------
+        A copy of the DataFrame with its string columns in the pool
+
+        """
+        pool = _sp.string_pool(name)
+        df = self.copy()
+        for loc, srm in self._str_reverse_map.items():
+            df._data['S'][:, loc] = pool.encode(self._data['S'][:, loc], srm)
+            df._str_reverse_map[loc] = pool.strings
+        return df
+
+    def to_string_buffer(self, columns: Optional[Union[str, List[str]]] = None) -> 'DataFrame':
+        """
+        Stores the categories of string columns as one buffer of UTF-8 bytes and the
+        offsets of each string into it instead of a list of Python strings. This costs
+        the length of each string plus 8 bytes rather than more than 50 bytes per string
+        and suits columns of mostly unique strings such as ids or urls.
+
+        New string columns with at least `options.options_dict['str_buffer_min_unique']`
+        distinct values are stored this way automatically.
+
+        Parameters
+        ----------
+        columns : str or list of str, default None
+            String columns to convert. When None, all string columns are converted.
+
+        Returns
+        -------
+        A copy of the DataFrame with the string columns in buffers
+
+        """
+        if columns is None:
+            locs = list(self._str_reverse_map)
+        else:
+            if isinstance(columns, str):
+                columns = [columns]
+            self._validate_column_name_list(columns)
+            locs = []
+            for col in columns:
+                dtype, loc = self._get_col_dtype_loc(col)
+                if dtype != 'S':
+                    raise TypeError(f'Column {col} is not a string column')
+                locs.append(loc)
+
+        # keep the blocks in column-major order like the DataFrames that are constructed
+        new_data = {dt: arr.copy('F') for dt, arr in self._data.items()}
+        new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                               for loc, srm in self._str_reverse_map.items()}
+        for loc in locs:
+            srm = new_str_reverse_map[loc]
+            if not isinstance(srm, StringBuffer):
+                new_str_reverse_map[loc] = StringBuffer.from_strings(srm)
+        return self._construct_from_new(new_data, self._copy_column_info(), self._columns.copy(),
+                                        new_str_reverse_map)
+
     def select_dtypes(self, include: Optional[Union[str, List[str]]] = None,
                       exclude: Optional[Union[str, List[str]]] = None, copy=False) -> 'DataFrame':
         """
@@ -893,7 +995,8 @@ class DataFrame(object):
         if 'S' in include_final:
             new_str_reverse_map = self._str_reverse_map
             if copy:
-                new_str_reverse_map = deepcopy(new_str_reverse_map)
+                new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                                       for loc, srm in new_str_reverse_map.items()}
         new_columns = np.asarray(new_columns, dtype='O')
         return self._construct_from_new(new_data, new_column_info, new_columns, new_str_reverse_map)
 
@@ -907,8 +1010,34 @@ class DataFrame(object):
         df_new._columns = columns
         df_new._hasnans = {}
         df_new._str_reverse_map = str_reverse_map
+        df_new._version = 0
+        df_new._group_cache = OrderedDict()
         return df_new
 
+    def _data_changed(self) -> None:
+        # called by every method that modifies the DataFrame in-place
+        self._version += 1
+        self._group_cache.clear()
+
+    def _get_cached_groups(self, key: Tuple) -> Optional[Tuple]:
+        """
+        Returns the group assignment saved for `key` or None. The key ends with the version
+        of the data so a group assignment is never reused after the DataFrame is modified.
+        """
+        groups = self._group_cache.get(key)
+        if groups is not None:
+            self._group_cache.move_to_end(key)
+        return groups
+
+    def _cache_groups(self, key: Tuple, groups: Tuple) -> None:
+        # keep the `group_cache_size` most recently used group assignments
+        if key[-1] != self._version:
+            return
+        self._group_cache[key] = groups
+        self._group_cache.move_to_end(key)
+        while len(self._group_cache) > options.options_dict['group_cache_size']:
+            self._group_cache.popitem(last=False)
+
     def _op_scalar_eval(self, other: Any, op_string: str) -> Tuple[DictListArr, ColInfoT]:
         data_dict: DictListArr = defaultdict(list)
         kind_shape: Dict[str, Tuple[str, int]] = {}
@@ -1197,6 +1326,7 @@ class DataFrame(object):
         Removes column from _colum_dtype, and _data
         Keeps column name in _columns
         """
+        self._data_changed()
         dtype, loc, order = self._column_info.pop(column).values
         self._data[dtype] = np.delete(self._data[dtype], loc, axis=1)
         if self._data[dtype].shape[1] == 0:
@@ -1212,6 +1342,7 @@ class DataFrame(object):
         Adds data to _data, the data type info but does not
         append name to columns
         """
+        self._data_changed()
         if new_kind not in self._data:
             loc = 0
         else:
@@ -1254,6 +1385,7 @@ class DataFrame(object):
 
     def __setitem__(self, key: Any, value: Any) -> None:
         utils.validate_selection_size(key)
+        self._data_changed()
 
         # row selection and column selection
         rs, cs = key  # type: RowSel, ColSel
@@ -1307,9 +1439,15 @@ class DataFrame(object):
             old_code_exists = old_code in old_codes[:rs] or old_code in old_codes[rs + 1:]
             new_value = False
             try:
+                # a hash lookup for StringBuffers
                 value = old_srm.index(value)
             except ValueError:
                 new_value = True
+            if old_code_exists and not new_value:
+                old_codes[rs] = value
+                return
+            # the list of categories may be shared with other DataFrames
+            old_srm = self._str_reverse_map[loc] = old_srm.copy()
             if old_code_exists:
                 if new_value:
                     old_srm.append(value)
@@ -1798,17 +1936,20 @@ class DataFrame(object):
         dtypes: Set[str] = self._get_stat_dtypes_axis0(name, include_strings)
         keep = name in ['cumsum', 'cummin', 'cummax', 'cumprod']
         new_str_reverse_map = {}
+        n_threads: int = utils.get_n_threads()
 
         for kind, arr in self._data.items():  # type: str, ndarray
             if kind in dtypes:
                 func_name: str = utils.get_stat_func_name(name, kind)
                 func: Callable = getattr(_math, func_name)
                 hasnans = self._hasnans_dtype(kind)
-                kwargs.update({'hasnans': hasnans})
                 if kind == 'S':
-                    return_obj = func(arr, self._str_reverse_map, axis=0, **kwargs)
+                    return_obj = func(arr, self._str_reverse_map, axis=0, hasnans=hasnans,
+                                      **kwargs)
+                elif kind in 'ifb':
+                    return_obj = _stat_func_columns(func, arr, hasnans, n_threads, kwargs)
                 else:
-                    return_obj = func(arr, axis=0, **kwargs)
+                    return_obj = func(arr, axis=0, hasnans=hasnans, **kwargs)
                 if isinstance(return_obj, tuple):
                     arr, new_str_reverse_map = return_obj
                     new_kind: str = 'S'
@@ -2096,15 +2237,24 @@ class DataFrame(object):
     def describe(self, percentiles: List[float] = [.25, .5, .75],
                  summary_type: str = 'numeric') -> 'DataFrame':
         """
-        Provides several summary statistics for each column
+        Provides several summary statistics for each column. All the statistics are computed
+        together in a single pass over each block of data.
+
         Parameters
         ----------
-        percentiles
-        summary_type
+        percentiles : list of floats between 0 and 1
+            Only used for the numeric summary
+
+        summary_type : 'numeric' or 'non-numeric'
+            The numeric summary of the int and float columns has the count, percentage of
+            missing values, mean, standard deviation, minimum, percentiles and maximum.
+            The non-numeric summary of the str, bool and datetime columns has the count,
+            percentage of missing values, number of unique values and the most frequent
+            value and its frequency.
 
         Returns
         -------
-
+        A DataFrame with one row per column summarized
         """
         if summary_type == 'numeric':
             df = self.select_dtypes('number')
@@ -2112,52 +2262,74 @@ class DataFrame(object):
             df = self.select_dtypes(['str', 'bool', 'datetime'])
         else:
             raise ValueError('`summary_type` must be either "numeric" or "non-numeric"')
-        data_dict: DictListArr = defaultdict(list)
-        new_column_info: ColInfoT = {}
-        new_columns: List[str] = []
-
-        if summary_type == 'numeric':
-
-            data_dict['S'].append(df._columns.copy('F'))
-            new_column_info['Column Name'] = utils.Column('S', 0, 0)
-            new_columns.append('Column Name')
-
-            dtypes = df._get_dtype_list()
-            data_dict['S'].append(dtypes)
-            new_column_info['Data Type'] = utils.Column('S', 1, 1)
-            new_columns.append('Data Type')
 
-            funcs: List[Tuple[str, Tuple[str, Dict]]] = [('count', ('i', {})),
-                                                         ('_null_pct', ('f', {})),
-                                                         ('mean', ('f', {})),
-                                                         ('std', ('f', {})),
-                                                         ('min', ('f', {}))]
-
-            for perc in percentiles:
-                funcs.append(('quantile', ('f', {'q': perc})))
-
-            funcs.append(('max', ('f', {})))
-
-            change_name: Dict[str, Callable] = {'_null_pct': lambda x: 'null %',
-                                                'quantile': lambda x: f"{x['q'] * 100:.2g}%"}
-
-            order: int = 1
-            for func_name, (dtype, kwargs) in funcs:
-                loc: int = len(data_dict[dtype])
-                order += 1
-                value: ndarray = getattr(df, func_name)(**kwargs).values[0]
-                data_dict[dtype].append(value)
-                name = change_name.get(func_name, lambda x: func_name)(kwargs)
-                new_column_info[name] = utils.Column(dtype, loc, order)
-                new_columns.append(name)
-
-            new_data: Dict[str, ndarray] = init.concat_arrays(data_dict)
+        n_rows: int = len(df)
+        new_data: Dict[str, ndarray] = {'Column Name': df._columns.copy(),
+                                        'Data Type': df._get_dtype_list()}
 
+        if summary_type == 'numeric':
+            percentiles = np.asarray(percentiles, dtype='float64')
+            if percentiles.ndim != 1 or ((percentiles < 0) | (percentiles > 1)).any():
+                raise ValueError('`percentiles` must be a list of numbers between 0 and 1')
+
+            n_threads: int = utils.get_n_threads()
+            stats: Dict[str, ndarray] = {}
+            for kind, arr in df._data.items():
+                func: Callable = getattr(_math, 'describe_' + utils.convert_kind_to_dtype_generic(kind))
+                stats[kind] = _stat_func_columns(func, arr, df._hasnans_dtype(kind), n_threads,
+                                                 {'percentiles': percentiles})
+
+            values: ndarray = np.empty((5 + len(percentiles), len(df._columns)), dtype='float64')
+            for i, col in enumerate(df._columns):
+                kind, loc, _ = df._column_info[col].values
+                values[:, i] = stats[kind][:, loc]
+
+            count: ndarray = values[0].astype('int64')
+            new_data['count'] = count
+            new_data['null %'] = 1 - count / n_rows if n_rows else np.full(len(count), nan)
+            new_data['mean'] = values[1]
+            new_data['std'] = values[2]
+            new_data['min'] = values[3]
+            for i, perc in enumerate(percentiles):
+                new_data[f'{perc * 100:.2g}%'] = values[5 + i]
+            new_data['max'] = values[4]
         else:
-            raise NotImplementedError('non-numeric summary not available yet')
-
-        return self._construct_from_new(new_data, new_column_info,
-                                        np.asarray(new_columns, dtype='O'))
+            stats = {}
+            labels: Dict[str, Dict[int, List]] = defaultdict(dict)
+            for kind, arr in df._data.items():
+                if kind == 'S':
+                    codes = arr
+                    labels[kind] = df._str_reverse_map
+                elif kind == 'b':
+                    # -1 is missing so shifting the booleans by one gives codes with 0 missing
+                    codes = (arr + 1).astype('uint32', order='F')
+                    labels[kind] = {loc: [None, False, True] for loc in range(arr.shape[1])}
+                else:
+                    codes = np.zeros(arr.shape, dtype='uint32', order='F')
+                    for loc in range(arr.shape[1]):
+                        not_na = ~np.isnat(arr[:, loc])
+                        uniques, inverse = np.unique(arr[not_na, loc], return_inverse=True)
+                        codes[not_na, loc] = inverse + 1
+                        labels[kind][loc] = [None] + list(uniques)
+                n_codes = np.array([len(labels[kind][loc]) for loc in range(arr.shape[1])],
+                                   dtype='int64')
+                stats[kind] = _math.describe_codes(codes, n_codes)
+
+            new_data['count'] = np.empty(len(df._columns), dtype='int64')
+            new_data['null %'] = np.empty(len(df._columns), dtype='float64')
+            new_data['unique'] = np.empty(len(df._columns), dtype='int64')
+            new_data['top'] = np.empty(len(df._columns), dtype='O')
+            new_data['freq'] = np.empty(len(df._columns), dtype='int64')
+            for i, col in enumerate(df._columns):
+                kind, loc, _ = df._column_info[col].values
+                count, unique, top, freq = stats[kind][:, loc]
+                new_data['count'][i] = count
+                new_data['null %'][i] = 1 - count / n_rows if n_rows else nan
+                new_data['unique'][i] = unique
+                new_data['top'][i] = None if top == 0 else str(labels[kind][loc][top])
+                new_data['freq'][i] = freq
+
+        return DataFrame(new_data, columns=list(new_data))
 
     def dropna(self, axis: str = 'rows', how: str = 'any', thresh: Union[int, float] = None,
                subset: List[IntStr] = None) -> 'DataFrame':
@@ -2868,68 +3040,52 @@ class DataFrame(object):
             col_arr = self._data[dtype][:, loc]
             hasnans: ndarray = self._hasnans.get(col, True)
             asc = ascending[0]
-            col_arr = self._replace_nans(dtype, col_arr, asc, hasnans)
-            count_sort: bool = False
             if dtype == 'S':
-                if len(col_arr) > 1000 and len(set(np.random.choice(col_arr, 100))) <= 70:
-                    d: ndarray = _sr.sort_str_map(col_arr, asc)
-                    arr: ndarray = _sr.replace_str_int(col_arr, d)
-                    counts: ndarray = _sr.count_int_ordered(arr, len(d))
-                    new_order: ndarray = _sr.get_idx(arr, counts)
-                    count_sort = True
-                else:
-                    col_arr = col_arr.astype('U')
-                    if asc:
-                        new_order = np.argsort(col_arr, kind='mergesort')
-                    else:
-                        new_order = np.argsort(col_arr[::-1], kind='mergesort')
+                col_arr = _str_sort_ranks(col_arr, self._str_reverse_map[loc], asc)
             else:
-                if asc:
-                    new_order = np.argsort(col_arr, kind='mergesort')
-                else:
-                    new_order = np.argsort(col_arr[::-1], kind='mergesort')
+                col_arr = self._replace_nans(dtype, col_arr, asc, hasnans)
+            if asc:
+                new_order = np.argsort(col_arr, kind='mergesort')
+            else:
+                new_order = np.argsort(col_arr[::-1], kind='mergesort')
 
             new_data: Dict[str, ndarray] = {}
             for dtype, arr in self._data.items():
                 np_dtype = utils.convert_kind_to_numpy(dtype)
                 arr_final = np.empty(arr.shape, dtype=np_dtype, order='F')
                 for i in range(arr.shape[1]):
-                    if asc or count_sort:
+                    if asc:
                         arr_final[:, i] = arr[:, i][new_order]
                     else:
                         arr_final[:, i] = arr[::-1, i][new_order[::-1]]
                 new_data[dtype] = arr_final
             new_column_info = self._copy_column_info()
             new_columns = self._columns.copy()
+            new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                                   for loc, srm in self._str_reverse_map.items()}
 
-            return self._construct_from_new(new_data, new_column_info, new_columns)
+            return self._construct_from_new(new_data, new_column_info, new_columns,
+                                            new_str_reverse_map)
         else:
             single_cols: List[ndarray] = []
             for col, asc in zip(by, ascending):
                 dtype, loc = self._get_col_dtype_loc(col)  # type: str, int
                 col_arr = self._data[dtype][:, loc]
                 hasnans = self._hasnans.get(col, True)
-                col_arr = self._replace_nans(dtype, col_arr, asc, hasnans)
+                if dtype == 'S':
+                    col_arr = _str_sort_ranks(col_arr, self._str_reverse_map[loc], asc)
+                else:
+                    col_arr = self._replace_nans(dtype, col_arr, asc, hasnans)
 
                 if not asc:
                     if dtype == 'b':
                         col_arr = ~col_arr
-                    elif dtype == 'S':
-                        # TODO: how to avoid mapping to ints for mostly unique string columns?
-                        d = _sr.sort_str_map(col_arr, asc)
-                        col_arr = _sr.replace_str_int(col_arr, d)
                     elif dtype == 'M':
                         col_arr = (-(col_arr.view('int64') + 1)).astype('datetime64[ns]')
                     elif dtype == 'm':
                         col_arr = (-(col_arr.view('int64') + 1)).astype('timedelta64[ns]')
                     else:
                         col_arr = -col_arr
-                elif dtype == 'S':
-                    if len(col_arr) > 1000 and len(set(np.random.choice(col_arr, 100))) <= 70:
-                        d = _sr.sort_str_map(col_arr, asc)
-                        col_arr = _sr.replace_str_int(col_arr, d)
-                    else:
-                        col_arr = col_arr.astype('U')
 
                 single_cols.append(col_arr)
 
@@ -2944,8 +3100,11 @@ class DataFrame(object):
             new_data[dtype] = arr_final
         new_column_info = self._copy_column_info()
         new_columns = self._columns.copy()
+        new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                               for loc, srm in self._str_reverse_map.items()}
 
-        return self._construct_from_new(new_data, new_column_info, new_columns)
+        return self._construct_from_new(new_data, new_column_info, new_columns,
+                                        new_str_reverse_map)
 
     def _get_all_dtype_info(self) -> Tuple[Dict[str, List[str]],
                                            Dict[str, List[int]],
@@ -3116,7 +3275,29 @@ class DataFrame(object):
 
         return self._construct_from_new(new_data, new_column_info, new_columns)
 
-    def groupby(self, columns: Union[str, List[str]]) -> 'Grouper':
+    def groupby(self, columns: Union[str, List[str]], sort: bool = False,
+                engine: str = 'hash') -> 'Grouper':
+        """
+        Groups the rows by the unique values of one or more columns
+
+        Parameters
+        ----------
+        columns: str or list of str
+            Column names to group by
+
+        sort: bool, default False
+            Whether to order the groups by their values. When False, the groups are in the
+            order they first appear.
+
+        engine: 'hash' or 'sort', default 'hash'
+            'hash' finds the groups with a hash table. 'sort' sorts the rows by their group
+            once and aggregates each group as a contiguous block of rows. Its groups are
+            always sorted and it is faster for median, quantile and nunique.
+
+        Returns
+        -------
+        A Grouper object
+        """
         from ._groupby import Grouper
 
         if isinstance(columns, list):
@@ -3126,7 +3307,7 @@ class DataFrame(object):
             columns = [columns]
         else:
             raise ValueError('Must pass in grouping column(s) as a string or list of strings')
-        return Grouper(self, columns)
+        return Grouper(self, columns, sort, engine)
 
     def streak(self, column: Optional[str] = None, value: Optional[Scalar] = None,
                group: bool = False) -> ndarray:
@@ -3281,14 +3462,20 @@ class DataFrame(object):
                 new_data[dtype] = arr.copy('F')
             else:
                 locs = dtype_drop_info[dtype]
-                if locs == arr.shape[1]:
+                if len(locs) == arr.shape[1]:
                     continue
                 keep = np.ones(arr.shape[1], dtype='bool')
                 keep[locs] = False
                 new_data[dtype] = arr[:, keep]
 
+        new_str_reverse_map = {}
+        for col, dtype, loc in self._col_info_iter():  # type: str, str, int
+            if dtype == 'S' and col not in column_strings:
+                new_loc = new_column_info[col].loc
+                new_str_reverse_map[new_loc] = self._str_reverse_map[loc]
+
         return self._construct_from_new(new_data, new_column_info,
-                                        np.asarray(new_columns, dtype='O'))
+                                        np.asarray(new_columns, dtype='O'), new_str_reverse_map)
 
     def _drop_just_rows(self, rows):
         if isinstance(rows, int):
@@ -3496,6 +3683,11 @@ class DataFrame(object):
         self._validate_column_name(column)
         dtype, loc = self._get_col_dtype_loc(column)  # type: str, int
         col_arr = self._data[dtype][:, loc]
+        if dtype == 'S':
+            srm = self._str_reverse_map[loc]
+            groups, first_pos = _gb.get_group_assignment_str_1d(col_arr, len(srm))
+            uniques = [srm[code] if code else None for code in col_arr[first_pos]]
+            return groups, np.array(uniques, dtype='O')
         if dtype in 'mM':
             col_arr = col_arr.view('int64')
             dtype = 'i'
@@ -4003,6 +4195,7 @@ class DataFrame(object):
                     new_cols.append(col_name)
 
             new_columns = np.append(self._columns, new_cols)
+            new_str_reverse_map = df_new._str_reverse_map
 
         elif isinstance(objs, (DataFrame, list)):
             if isinstance(objs, DataFrame):
@@ -4056,11 +4249,13 @@ class DataFrame(object):
                 data_pieces = defaultdict(list)
                 loc_count = defaultdict(int)
                 final_col_dtypes = []
+                new_str_reverse_map = {}
 
                 for i in range(nc):
                     col_dtype = set()
                     piece = []
                     has_appended_column = False
+                    piece_srms = []
                     for ncol, obj in zip(ncs, objs):
                         if i < ncol:
                             col = obj._columns[i]
@@ -4070,12 +4265,21 @@ class DataFrame(object):
                             dtype, loc = obj._get_col_dtype_loc(col)  # type: str, int
                             col_dtype.add(dtype)
                             piece.append(obj._data[dtype][:, loc])
+                            if dtype == 'S':
+                                piece_srms.append(obj._str_reverse_map[loc])
                         else:
                             piece.append(None)
                             col_dtype.add(None)
                     dtype = get_final_dtype(col_dtype)
                     final_col_dtypes.append(dtype)
                     data_pieces[dtype].append(piece)
+                    if dtype == 'S':
+                        # codes of columns sharing their categories are appended as they are
+                        codes, srm = _sp.merge_categories([p for p in piece if p is not None],
+                                                          piece_srms)
+                        codes = iter(codes)
+                        piece[:] = [p if p is None else next(codes) for p in piece]
+                        new_str_reverse_map[loc_count[dtype]] = srm
                     loc = loc_count[dtype]
                     new_column_info[new_columns[-1]] = utils.Column(dtype, loc, i)
                     loc_count[dtype] += 1
@@ -4098,7 +4302,7 @@ class DataFrame(object):
                         else:
                             new_data[dtype] = np.full((nr, ct), nan, dtype='float64', order='F')
                     elif dtype == 'S':
-                        new_data[dtype] = np.empty((nr, ct), dtype='O', order='F')
+                        new_data[dtype] = np.zeros((nr, ct), dtype='uint32', order='F')
                     elif dtype == 'm':
                         if make_fast_empty:
                             new_data[dtype] = np.empty((nr, ct), dtype='timedelta64[ns]', order='F')
@@ -4156,12 +4360,15 @@ class DataFrame(object):
                 loc_count = defaultdict(int)
                 new_column_info = {}
                 new_data = {}
+                new_str_reverse_map = {}
 
                 i = 0
                 for nrow, obj, col_map in zip(nrs, objs, col_maps):
                     for col, dtype, loc, col_arr in obj._col_info_iter(with_arr=True):  # type: str, str, int, int
                         if nrow < nr and dtype in 'bi':
                             dtype = 'f'
+                        if dtype == 'S':
+                            new_str_reverse_map[len(data_dict[dtype])] = obj._str_reverse_map[loc]
                         loc = len(data_dict[dtype])
                         data_dict[dtype].append(col_arr)
                         new_column_info[col_map[col]] = utils.Column(dtype, loc, i)
@@ -4175,7 +4382,7 @@ class DataFrame(object):
                     elif dtype == 'f':
                         new_data[dtype] = np.full((nr, len(data)), nan, dtype='float64', order='F')
                     elif dtype == 'S':
-                        new_data[dtype] = np.empty((nr, len(data)), dtype='O', order='F')
+                        new_data[dtype] = np.zeros((nr, len(data)), dtype='uint32', order='F')
                     elif dtype == 'm':
                         new_data[dtype] = np.full((nr, len(data)), NaT, dtype='timedelta64[ns]',
                                                   order='F')
@@ -4191,7 +4398,8 @@ class DataFrame(object):
                             'a DataFrame or a list of DataFrames. '
                             f'You passed in a {type(objs).__name__}')
 
-        return self._construct_from_new(new_data, new_column_info, new_columns)
+        return self._construct_from_new(new_data, new_column_info, new_columns,
+                                        new_str_reverse_map)
 
     def replace(self, replace_dict):
         if not isinstance(replace_dict, dict):
@@ -4506,10 +4714,12 @@ class DataFrame(object):
         while temp_col_name in col_set:
             temp_col_name = '____TEMP____' + str(i)
             i += 1
+        # the groups come out sorted so the rows of the pivot table need no sorting
         if aggfunc is None:
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore")
-                df_group = self.groupby(group).size()
+                grouper = self.groupby(group, sort=True)
+                df_group = grouper.size()
             size_col = df_group._columns[-1]
             dtype, loc = df_group._get_col_dtype_loc(size_col)  # type: str, int
             max_size = df_group._data[dtype][:, loc].max()
@@ -4517,13 +4727,13 @@ class DataFrame(object):
                 raise ValueError('You did not provide an `aggfunc` which means that each '
                                  f'combination of {row} and {column} must have at most one '
                                  'value')
-            df_group = self[:, [row, column, value]]
+            df_group = self[grouper._group_position, [row, column, value]]
             temp_col_name = value
         elif aggfunc == 'size':
-            df_group = self.groupby(group).size()
+            df_group = self.groupby(group, sort=True).size()
             temp_col_name = df_group.columns[-1]
         else:
-            df_group = self.groupby(group).agg((aggfunc, value, temp_col_name))
+            df_group = self.groupby(group, sort=True).agg((aggfunc, value, temp_col_name))
 
         row_idx, row_names = df_group.factorize(row)
         col_idx, col_names = df_group.factorize(column)
@@ -4531,41 +4741,22 @@ class DataFrame(object):
         dtype, loc = df_group._get_col_dtype_loc(temp_col_name)  # type: str, int
         value_arr = df_group._data[dtype][:, loc]
 
-        new_data = {}
         if dtype in 'ib':
             if aggfunc != 'size' and len(row_idx) != len(row_names) * len(col_names):
                 value_arr = value_arr.astype('float64')
                 dtype = 'f'
 
         func_name = 'pivot_' + utils.convert_dtype_to_func_name(dtype)
-        row_name_dtype = row_names.dtype.kind
         pivot_result = getattr(_pivot, func_name)(row_idx, len(row_names),
                                                   col_idx, len(col_names), value_arr)
-        pivot_result_dtype = pivot_result.dtype.kind
-        loc_add = 0
-        if row_name_dtype == pivot_result_dtype:
-            new_data[dtype] = np.column_stack((row_names, pivot_result))
-            loc_add += 1
-        else:
-            new_data[row_name_dtype] = row_names[:, np.newaxis]
-            new_data[pivot_result_dtype] = pivot_result
 
         if col_names.dtype.kind != 'S':
             col_names = col_names.astype('U').astype('O')
 
-        # avoid row names collision
-        new_column_info = {row: utils.Column(row_name_dtype, 0, 0)}
-
-        for i, col in enumerate(col_names):
-            new_column_info[col] = utils.Column(dtype, i + loc_add, i + 1)
-
-        new_columns = np.concatenate(([row], col_names))
-
-        # TODO: Optimize this
-        df_unsorted = self._construct_from_new(new_data, new_column_info, new_columns)
-        df_unsorted = df_unsorted.sort_values(row)
-        sorted_cols = np.concatenate(([new_columns[0]], np.sort(new_columns[1:])))
-        return df_unsorted[:, sorted_cols]
+        new_data = {row: row_names}
+        for i in np.argsort(col_names):
+            new_data[col_names[i]] = pivot_result[:, i]
+        return DataFrame(new_data)
 
     def melt(self, id_vars=None, value_vars=None, var_name='variable', value_name='value'):
 
@@ -4748,41 +4939,199 @@ class DataFrame(object):
             new_data[dtype] = arr
         return self._construct_from_new(new_data, new_column_info, new_columns)
 
-    def to_csv(self, fp, sep=','):
+    def to_csv(self, fp, sep=',', n_threads=None, chunksize=2 ** 16):
+        """
+        Write the DataFrame to a delimited text file
 
+        Each column of a batch of `chunksize` rows is formatted into a byte buffer without
+        creating any Python objects. The buffers are then joined into lines and written to
+        the file at once. Missing values are written as empty fields.
+
+        Parameters
+        ----------
+        fp : str
+            Path of the file
+
+        sep : str, default ','
+            Single character separating the fields of each line
+
+        n_threads : int, default None
+            Number of threads formatting batches of rows simultaneously. When None, the
+            'n_threads' option is used.
+
+        chunksize : int, default 65536
+            Number of rows formatted and written at a time
+
+        Returns
+        -------
+        None
+        """
         if not isinstance(sep, str) or len(sep) != 1:
             raise TypeError('`sep` must be a one-character string')
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
+        n_threads = utils.get_n_threads(n_threads)
+
+        # encode each category only once, StringBuffers already hold the bytes
+        str_cats = {}
+        for loc, srm in self._str_reverse_map.items():
+            if not isinstance(srm, StringBuffer):
+                srm = StringBuffer.from_strings(srm)
+            cats = srm.data if len(srm.data) else np.zeros(1, dtype='uint8')
+            str_cats[loc] = cats, srm.offsets, np.diff(srm.offsets)
+
+        col_info = list(self._col_info_iter())
+        nrows = len(self)
+
+        # each thread keeps its buffers from one batch to the next
+        slot_buffers = [{} for _ in range(n_threads)]
+
+        def get_buffer(slot, key, size, dtype='uint8'):
+            buf = slot_buffers[slot].get(key)
+            if buf is None or len(buf) < size:
+                buf = slot_buffers[slot][key] = np.empty(size, dtype=dtype)
+            return buf
+
+        def format_rows(start, slot):
+            end = min(start + chunksize, nrows)
+            bufs = []
+            offsets = []
+            for j, (col, dtype, loc) in enumerate(col_info):
+                arr = np.ascontiguousarray(self._data[dtype][start:end, loc])
+                offset = get_buffer(slot, ('offset', j), chunksize + 1, 'int64')[:end - start + 1]
+                if dtype == 'S':
+                    cats, cat_offsets, lengths = str_cats[loc]
+                    buf = get_buffer(slot, j, lengths[arr].sum() + 1)
+                    _of.format_str(arr, cats, cat_offsets, buf, offset)
+                elif dtype in 'mM':
+                    values = arr.astype('S')
+                    values[np.isnat(arr)] = b''
+                    values = values.view('uint8').reshape(len(arr), -1)
+                    buf = get_buffer(slot, j, values.size + 1)
+                    _of.format_fixed(values, buf, offset)
+                else:
+                    width = {'i': 20, 'f': 32, 'b': 5}[dtype]
+                    buf = get_buffer(slot, j, len(arr) * width + 1)
+                    func = getattr(_of, 'format_' + utils.convert_kind_to_dtype(dtype))
+                    func(arr, buf, offset)
+                bufs.append(buf)
+                offsets.append(offset)
+
+            size = sum(offset[-1] for offset in offsets) + (end - start) * len(col_info)
+            out = get_buffer(slot, 'out', size)
+            n = _of.join_columns(bufs, offsets, ord(sep), out)
+            return out[:n]
+
+        with open(fp, 'wb') as f:
+            f.write((sep.join(self._columns) + '\n').encode())
+            if not col_info:
+                return
+
+            # format `n_threads` batches at a time and write them in order
+            starts = range(0, nrows, chunksize)
+            for i in range(0, len(starts), n_threads):
+                cur_starts = starts[i:i + n_threads]
+                for out in utils.thread_map(format_rows, cur_starts, range(len(cur_starts)),
+                                            n_threads=n_threads):
+                    f.write(out.data)
+
+    def to_dxf(self, fp):
+        """
+        Write the DataFrame to a binary columnar file that can be read back with `read_dxf`.
+
+        The file begins with a small JSON header describing the columns and string
+        categories followed by the raw Fortran-ordered array of each data type. Reading the
+        file memory maps these arrays so no parsing of the values is necessary.
+
+        Parameters
+        ----------
+        fp : str
+            Path of the file
+
+        Returns
+        -------
+        None
+        """
+        nrows = len(self)
+        blocks = {}
+        offset = 0
+        for kind, arr in self._data.items():
+            blocks[kind] = {'offset': offset, 'ncols': arr.shape[1]}
+            size = arr.shape[1] * nrows * arr.itemsize
+            offset += -(-size // utils.DXF_ALIGN) * utils.DXF_ALIGN
+
+        header = {'version': utils.DXF_VERSION,
+                  'nrows': nrows,
+                  'columns': [[col, dtype, loc] for col, dtype, loc in self._col_info_iter()],
+                  'blocks': blocks,
+                  'str_reverse_map': {str(loc): srm[1:]
+                                      for loc, srm in self._str_reverse_map.items()}}
+        header_bytes = json.dumps(header).encode()
+        header_size = len(utils.DXF_MAGIC) + 8 + len(header_bytes)
+        data_start = -(-header_size // utils.DXF_ALIGN) * utils.DXF_ALIGN
+
+        with open(fp, 'wb') as f:
+            f.write(utils.DXF_MAGIC)
+            f.write(np.uint64(len(header_bytes)).tobytes())
+            f.write(header_bytes)
+            for kind, arr in self._data.items():
+                f.write(b'\x00' * (data_start + blocks[kind]['offset'] - f.tell()))
+                # the transpose of a Fortran array is C-contiguous and is written as is
+                np.asfortranarray(arr).T.tofile(f)
+            f.write(b'\x00' * (data_start + offset - f.tell()))
+
+    def join(self, right, how='inner', on=None, left_on=None, right_on=None, algorithm='auto'):
+        """
+        Join the rows of two DataFrames on the equality of one or more columns
+
+        Parameters
+        ----------
+        right : DataFrame
+
+        how : str {'inner', 'left', 'right', 'outer', 'semi', 'anti'}, default 'inner'
+            * inner - only rows with keys in both DataFrames
+            * left - all rows of the calling DataFrame
+            * right - all rows of `right`
+            * outer - all rows of both DataFrames
+            * semi - rows of the calling DataFrame with a match in `right`. Only the columns
+              of the calling DataFrame are returned
+            * anti - rows of the calling DataFrame without a match in `right`. Only the
+              columns of the calling DataFrame are returned
+
+        on : str or list of str, default None
+            Column names in both DataFrames to join on. When `on`, `left_on` and `right_on`
+            are all None, the columns with the same name in both DataFrames are used
+
+        left_on, right_on : str or list of str, default None
+            Column names to join on when they differ between the DataFrames
+
+        algorithm : str {'auto', 'hash', 'merge'}, default 'auto'
+            * hash - build a hash table of the keys of `right`
+            * merge - stream through the sorted keys of both DataFrames. Unsorted keys are
+              sorted first and the result is returned in order of the keys
+            * auto - use 'merge' when the keys of both DataFrames are already sorted,
+              otherwise 'hash'
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if not isinstance(right, DataFrame):
+            raise TypeError('`right` must be a DataFrame')
 
-        def get_dtype_arr():
-            arr = np.empty(self.shape[1], dtype='int64')
-
-            for i, (col, col_obj) in enumerate(self._column_info.items()):
-                if col_obj.dtype == 'f':
-                    arr[i] = 0
-                elif col_obj.dtype == 'S':
-                    arr[i] = 1
-                elif col_obj.dtype in 'mM':
-                    arr[i] = 2
-                elif col_obj.dtype in 'ib':
-                    arr[i] = 3
-            return arr
-
-        dtypes_arr = get_dtype_arr()
-        values = self.values
-        columns = self._columns.astype('O')
-        _of.to_csv(values, columns, dtypes_arr, fp, sep)
-
-    def join(self, right, how='inner', on=None, left_on=None, right_on=None):
-        # if not isinstance(right, DataFrame):
-        #     raise TypeError('`right` must be a DataFrame')
+        if how not in ('inner', 'left', 'right', 'outer', 'semi', 'anti'):
+            raise ValueError("`how` must be one of 'inner', 'left', 'right', 'outer', 'semi' "
+                             "or 'anti'")
+
+        if algorithm not in ('auto', 'hash', 'merge'):
+            raise ValueError("`algorithm` must be one of 'auto', 'hash' or 'merge'")
 
         def check_cols(df, on_cols, name):
             if isinstance(on_cols, str):
                 df._validate_column_name(on_cols)
                 on_cols = [on_cols]
             elif isinstance(on_cols, list):
-                num_cols = len(on_cols)
-                self._validate_column_name_list(on_cols)
+                df._validate_column_name_list(on_cols)
             else:
                 raise TypeError(f'`{name}` must be either a string or a list of strings')
             return on_cols
@@ -4791,7 +5140,8 @@ class DataFrame(object):
             if left_on is None:
                 if right_on is None:
                     # default to all columns with same names
-                    left_cols = right_cols = self._column_info.keys() & right._column_info.keys()
+                    left_cols = [col for col in self._columns if col in right._column_info]
+                    right_cols = left_cols
                     if not left_cols:
                         raise ValueError('You did not provide any column names for joining and '
                                          'there are no common column names')
@@ -4807,7 +5157,7 @@ class DataFrame(object):
                     right_cols = check_cols(right, right_on, 'right_on')
                     if len(left_cols) != len(right_cols):
                         raise ValueError('The number of columns in `left_on` and `right_on` are '
-                                         'not equal. {len(left_cols)} != {len(right_cols)}')
+                                         f'not equal. {len(left_cols)} != {len(right_cols)}')
         else:
             if left_on is not None or right_on is not None:
                 raise ValueError('When providing a value for `on`, you cannot provide a value for '
@@ -4815,27 +5165,156 @@ class DataFrame(object):
             left_cols = check_cols(self, on, 'on')
             right_cols = check_cols(right, on, 'on')
 
-        # they both have same number of columns so it doesn't matter which one we use here
-        num_cols = len(left_cols)
-        has_multiple_join_cols = num_cols > 1
-
-        if num_cols == 0:
+        if len(left_cols) == 0:
             raise ValueError('You must provide at least one column to join on')
 
-        if num_cols == 1:
-            left_col = left_cols[0]
-            left_dtype, left_loc, _ = self._column_info[left_col].values
+        left_keys, right_keys, right_str_keys = self._get_join_keys(right, left_cols, right_cols)
+
+        left_order = np.arange(len(self))
+        right_order = np.arange(len(right))
+        if algorithm == 'hash':
+            join_func = _join.hash_join
+        else:
+            left_sorted = _join.is_sorted(left_keys)
+            right_sorted = _join.is_sorted(right_keys)
+            if algorithm == 'auto' and not (left_sorted and right_sorted):
+                join_func = _join.hash_join
+            else:
+                join_func = _join.merge_join
+                if not left_sorted:
+                    left_order = np.lexsort(left_keys.T[::-1])
+                    left_keys = left_keys[left_order]
+                if not right_sorted:
+                    right_order = np.lexsort(right_keys.T[::-1])
+                    right_keys = right_keys[right_order]
+
+        def original_rows(idx, order):
+            return np.where(idx == -1, -1, order[idx])
+
+        # gather indices of the rows of each DataFrame where -1 represents a missing row
+        if how == 'right':
+            right_rep, left_idx, n_rows = join_func(right_keys, left_keys, 'left')
+            right_idx = np.repeat(right_order, right_rep)
+            left_idx = original_rows(left_idx, left_order)
+        else:
+            left_rep, right_idx, n_rows = join_func(left_keys, right_keys, how)
+            left_idx = np.repeat(left_order, left_rep)
+            right_idx = original_rows(right_idx, right_order)
+            if n_rows > len(left_idx):
+                # right rows of an outer join without a match
+                extra = np.full(n_rows - len(left_idx), -1, dtype='int64')
+                left_idx = np.concatenate((left_idx, extra))
+
+        new_column_info = self._copy_column_info()
+        new_column_list = self.columns
+        new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                               for loc, srm in self._str_reverse_map.items()}
+
+        # number of columns of each data type in the result and the right locations
+        dtype_cur_loc = {kind: data.shape[1] for kind, data in self._data.items()}
+        dtype_right_locs = defaultdict(list)
+
+        if how not in ('semi', 'anti'):
+            subtract_common_cols = left_cols == right_cols
+            cur_order = len(self._columns)
+            for col in right._columns:
+                if subtract_common_cols and col in right_cols:
+                    continue
 
-            right_col = right_cols[0]
-            right_dtype, right_loc, _ = right._column_info[right_col].values
+                dtype, loc = right._get_col_dtype_loc(col)  # type: str, int
+                cur_loc = dtype_cur_loc.get(dtype, 0)
+                col_y = col
+                if col in self._column_info:
+                    col_y = col + '_y'
+                    col_x = col + '_x'
+                    left_col_idx = new_column_list.index(col)
+                    new_column_list[left_col_idx] = col_x
+                    new_column_info[col_x] = new_column_info[col]
+                    del new_column_info[col]
+
+                new_column_info[col_y] = utils.Column(dtype, cur_loc, cur_order)
+                if dtype == 'S':
+                    new_str_reverse_map[cur_loc] = utils.copy_str_reverse_list(right._str_reverse_map[loc])
+                dtype_cur_loc[dtype] = cur_loc + 1
+                cur_order += 1
+                new_column_list.append(col_y)
+                dtype_right_locs[dtype].append(loc)
+
+        # gather the rows of both DataFrames straight into the final arrays
+        new_data = {}
+        for kind, ncols in dtype_cur_loc.items():
+            arr = utils.create_empty_arr(kind, (n_rows, ncols))
+            func = getattr(_join, 'take_' + utils.convert_kind_to_dtype_generic(kind))
+            start = 0
+            if kind in self._data:
+                left_data = self._data[kind]
+                func(left_data, np.arange(left_data.shape[1]), left_idx, arr, 0)
+                start = left_data.shape[1]
+            if kind in dtype_right_locs:
+                locs = np.array(dtype_right_locs[kind], dtype='int64')
+                func(right._data[kind], locs, right_idx, arr, start)
+            new_data[kind] = arr
+
+        if how in ('semi', 'anti'):
+            new_columns = np.array(new_column_list, dtype='O')
+            return self._construct_from_new(new_data, new_column_info, new_columns,
+                                            new_str_reverse_map)
+
+        if how in ('right', 'outer') and subtract_common_cols:
+            # the join columns of rows only in `right` come from `right`
+            is_right_only = left_idx == -1
+            rows = right_idx[is_right_only]
+            for i, col in enumerate(left_cols):
+                kind, loc = new_column_info[col].dtype, new_column_info[col].loc
+                if i in right_str_keys:
+                    codes, srm = right_str_keys[i]
+                    new_data[kind][is_right_only, loc] = codes[rows]
+                    new_str_reverse_map[loc] = srm
+                else:
+                    right_kind, right_loc = right._get_col_dtype_loc(right_cols[i])
+                    values = right._data[right_kind][rows, right_loc]
+                    new_kind = _common_number_kind(kind, right_kind)
+                    if new_kind != kind:
+                        # so that the right values are not truncated
+                        _promote_column(new_data, new_column_info, col, new_kind)
+                        kind, loc = new_kind, new_column_info[col].loc
+                    if right_kind != kind:
+                        is_missing = utils.isna_array(values, right_kind)
+                        values = values.astype(new_data[kind].dtype)
+                        values[is_missing] = utils.get_missing_value_code(kind)
+                    new_data[kind][is_right_only, loc] = values
+
+        new_columns = np.array(new_column_list, dtype='O')
+        return self._construct_from_new(new_data, new_column_info, new_columns,
+                                        new_str_reverse_map)
+
+    def _get_join_keys(self, right, left_cols, right_cols):
+        """
+        Encodes the join columns of both DataFrames as int64 so that any combination of them
+        can be hashed together. The encoding preserves the order of the values so that
+        sorted columns have sorted keys. Strings are encoded as the rank of their category
+        among the categories of both DataFrames.
+
+        Returns
+        -------
+        The left and right keys as C-contiguous 2D arrays and a dictionary mapping the
+        position of each string join column to its right codes and combined categories
+        """
+        left_keys = np.empty((len(self), len(left_cols)), dtype='int64')
+        right_keys = np.empty((len(right), len(right_cols)), dtype='int64')
+        right_str_keys = {}
+
+        for i, (left_col, right_col) in enumerate(zip(left_cols, right_cols)):
+            left_dtype, left_loc = self._get_col_dtype_loc(left_col)  # type: str, int
+            right_dtype, right_loc = right._get_col_dtype_loc(right_col)  # type: str, int
 
             if left_dtype != right_dtype:
-                if left_dtype in 'OmM':
+                if left_dtype in 'SmM':
                     dtype_name = utils.convert_dtype_to_func_name(left_dtype)
                     raise TypeError(f'The calling DataFrame join column is a {dtype_name} while '
                                     'the `right` DataFrame join column is not. They both must be '
                                     f'{dtype_name} or other compatible types')
-                elif right_dtype in 'OmM':
+                elif right_dtype in 'SmM':
                     dtype_name = utils.convert_dtype_to_func_name(right_dtype)
                     raise TypeError(f'The `right` DataFrame join column is a {dtype_name} while '
                                     'the calling DataFrame join column is not. They both must be '
@@ -4845,187 +5324,156 @@ class DataFrame(object):
             right_arr = right._data[right_dtype][:, right_loc]
 
             if left_dtype == 'S':
-                func_name = 'join_str_1d'
+                srm = self._str_reverse_map[left_loc]
+                right_srm = right._str_reverse_map[right_loc]
+                if right_srm is srm:
+                    # both columns use the same categories, e.g. the same string pool
+                    right_codes = right_arr
+                else:
+                    srm = srm.copy()
+                    codes = {val: code for code, val in enumerate(srm)}
+                    new_codes = np.zeros(len(right_srm), dtype='int64')
+                    for code, val in enumerate(right_srm[1:], 1):
+                        new_code = codes.get(val)
+                        if new_code is None:
+                            new_code = codes[val] = len(srm)
+                            srm.append(val)
+                        new_codes[code] = new_code
+                    right_codes = new_codes[right_arr]
+                right_str_keys[i] = right_codes, srm
+
+                ranks = np.zeros(len(srm), dtype='int64')
+                ranks[1:] = np.argsort(utils.argsort_str_reverse_list(srm)) + 1
+                left_keys[:, i] = ranks[left_arr]
+                right_keys[:, i] = ranks[right_codes]
             elif left_dtype in 'mM':
-                func_name = 'join_float_1d'
-                is_nat = np.isnat(left_arr)
-                left_arr = left_arr.astype('float64')
-                left_arr[is_nat] = nan
-                right_arr = right_arr.view('float64')
-                right_arr[is_nat] = nan
+                left_keys[:, i] = left_arr.view('int64')
+                right_keys[:, i] = right_arr.view('int64')
             elif left_dtype == 'f' or right_dtype == 'f':
-                func_name = 'join_float_1d'
-                if left_dtype != 'f':
-                    left_arr = left_arr.astype('float64')
-                if right_dtype != 'f':
-                    right_arr = right_arr.astype('float64')
-            elif left_dtype == 'i' or right_dtype == 'i':
-                func_name = 'join_int_1d'
-                if left_dtype != 'i':
-                    left_arr = left_arr.astype('int64')
-                if right_dtype != 'i':
-                    right_arr = right_arr.astype('int64')
+                left_keys[:, i] = _float_join_key(left_arr, left_dtype)
+                right_keys[:, i] = _float_join_key(right_arr, right_dtype)
             else:
-                func_name = 'join_bool_1d'
-        else:
-            # multiple join columns
-            left_dtype_locs = defaultdict(list)
-            right_dtype_locs = defaultdict(list)
-            for left_col, right_col in zip(left_cols, right_cols):
-                left_dtype, left_loc, _ = self._column_info[left_col].values
-                right_dtype, right_loc, _ = right._column_info[right_col].values
-
-                if left_dtype != right_dtype:
-                    if left_dtype in 'OmM':
-                        dtype_name = utils.convert_dtype_to_func_name(left_dtype)
-                        raise TypeError(
-                            f'The calling DataFrame join column is a {dtype_name} while '
-                            'the `right` DataFrame join column is not. They both must be '
-                            f'{dtype_name} or other compatible types')
-                    elif right_dtype in 'OmM':
-                        dtype_name = utils.convert_dtype_to_func_name(right_dtype)
-                        raise TypeError(
-                            f'The `right` DataFrame join column is a {dtype_name} while '
-                            'the calling DataFrame join column is not. They both must be '
-                            f'{dtype_name} or other compatible types.')
-
-                left_dtype_locs[left_dtype].append(left_loc)
-                right_dtype_locs[right_dtype].append(right_loc)
-
-            if 'f' in left_dtype_locs or 'f' in right_dtype_locs:
-                final_num_dtype = 'f'
-            # for time or date, if its in one its in the other
-            elif 'm' in left_dtype_locs or 'M' in left_dtype_locs:
-                final_num_dtype = 'f'
-            elif 'i' in left_dtype_locs or 'i' in left_dtype_locs:
-                final_num_dtype = 'i'
-            elif 'b' in left_dtype_locs or 'b' in right_dtype_locs:
-                final_num_dtype = 'b'
-            else:
-                final_num_dtype = ''
+                left_keys[:, i] = _int_join_key(left_arr, left_dtype)
+                right_keys[:, i] = _int_join_key(right_arr, right_dtype)
 
-            if final_num_dtype:
-                ncol_number = 0
-                for dtype, locs in left_dtype_locs.items():
-                    if dtype == 'S':
-                        continue
-                    ncol_number += len(locs)
-                dtype_word = utils.convert_kind_to_numpy(final_num_dtype)
-                left_arr_number = np.empty((len(self), ncol_number), dtype=dtype_word)
-                right_arr_number = np.empty((len(right), ncol_number), dtype=dtype_word)
-
-                i_col = 0
-                for dtype, locs in left_dtype_locs.items():
-                    for loc in locs:
-                        left_arr_number[:, i_col] = self._data[dtype][:, loc]
-                        i_col += 1
-
-                i_col = 0
-                for dtype, locs in right_dtype_locs.items():
-                    for loc in locs:
-                        right_arr_number[:, i_col] = right._data[dtype][:, loc]
-                        i_col += 1
-
-            has_str_join_columns = 'S' in left_dtype_locs
-
-            if has_str_join_columns:
-                if final_num_dtype:
-                    pass
-                else:
-                    # only has string columns
-                    func_name = 'join_str_2d'
+        return left_keys, right_keys, right_str_keys
 
-        subtract_common_cols = left_cols == right_cols
-        left_col_ct = defaultdict(int)
-        right_col_ct = defaultdict(int)
-        for col in left_cols:
-            dtype = self._column_info[col].dtype
-            left_col_ct[dtype] += 1
 
-        for col in right_cols:
-            dtype = right._column_info[col].dtype
-            right_col_ct[dtype] += 1
+def _common_number_kind(kind1: str, kind2: str) -> str:
+    """
+    The kind that holds the values of both kinds. Kinds other than bool, int and float
+    are only compatible with themselves.
+    """
+    if kind1 == kind2 or kind1 not in 'bif' or kind2 not in 'bif':
+        return kind1
+    return 'f' if 'f' in (kind1, kind2) else 'i'
 
-        # get number of columns for each dtype
-        new_column_info = self._copy_column_info()
-        new_column_list = self.columns
-        dtype_col_nums = defaultdict(int)
-        dtype_cur_loc = defaultdict(int)
 
-        for dtype, data in self._data.items():
-            dtype_col_nums[dtype] += data.shape[1]
-            dtype_cur_loc[dtype] += data.shape[1]
+def _promote_column(data: Dict[str, ndarray], column_info: ColInfoT, col: str,
+                    new_kind: str) -> None:
+    """
+    Moves the number column `col` to the end of the `new_kind` array, converting its values
+    and missing values. Both `data` and `column_info` are changed in place.
+    """
+    kind, loc = column_info[col].dtype, column_info[col].loc
+    arr = data[kind]
+    values = arr[:, loc]
+    is_missing = utils.isna_array(values, kind)
+    values = values.astype(utils.convert_kind_to_numpy(new_kind))
+    values[is_missing] = utils.get_missing_value_code(new_kind)
+
+    if arr.shape[1] == 1:
+        del data[kind]
+    else:
+        data[kind] = np.asfortranarray(np.delete(arr, loc, axis=1))
+    for col_obj in column_info.values():
+        if col_obj.dtype == kind and col_obj.loc > loc:
+            col_obj.loc -= 1
+
+    if new_kind in data:
+        new_loc = data[new_kind].shape[1]
+        data[new_kind] = np.asfortranarray(np.column_stack((data[new_kind], values)))
+    else:
+        new_loc = 0
+        data[new_kind] = np.asfortranarray(values[:, np.newaxis])
+    column_info[col] = utils.Column(new_kind, new_loc, column_info[col].order)
+
+
+def _str_sort_ranks(codes: ndarray, srm: List, asc: bool) -> ndarray:
+    """
+    Replaces the codes of a string column with the sorted position of their category.
+    Missing values get a rank that sorts them last.
+    """
+    ranks = np.empty(len(srm), dtype='int64')
+    ranks[0] = len(srm) if asc else -1
+    ranks[1 + utils.argsort_str_reverse_list(srm)] = np.arange(len(srm) - 1)
+    return ranks[codes]
 
-        for dtype, data in right._data.items():
-            dtype_col_nums[dtype] += data.shape[1]
-            if subtract_common_cols:
-                dtype_col_nums[dtype] -= right_col_ct[dtype]
 
-        cur_order = len(self._columns)
-        dtype_right_locs = defaultdict(list)
-        for col in right._columns:
-            if subtract_common_cols and col in right_cols:
-                continue
+def _compact_str_columns(arr: ndarray, str_reverse_map: StrRevMap, locs: List[int]) -> None:
+    """
+    Renumbers the codes of the string columns `locs` of `arr` so that their reverse maps
+    only hold the categories that are used. Both are changed in place
+    """
+    buffer_locs = [loc for loc in locs if isinstance(str_reverse_map[loc], StringBuffer)]
+    for loc in buffer_locs:
+        # renumber with the bytes of the buffer rather than the strings
+        srm = str_reverse_map[loc]
+        used = np.bincount(arr[:, loc], minlength=len(srm)) > 0
+        used[0] = True
+        positions = np.flatnonzero(used)
+        mapping = np.zeros(len(srm), dtype='uint32')
+        mapping[positions] = np.arange(len(positions), dtype='uint32')
+        arr[:, loc] = mapping[arr[:, loc]]
+        str_reverse_map[loc] = srm.take(positions.astype('int64'))
+
+    locs = [loc for loc in locs if loc not in buffer_locs]
+    if not locs:
+        return
+    srm = {i: str_reverse_map[loc] for i, loc in enumerate(locs)}
+    new_srm, codes = _va.bool_selection_str_mapping(arr[:, locs], srm)
+    arr[:, locs] = codes
+    for i, loc in enumerate(locs):
+        str_reverse_map[loc] = new_srm[i]
+
+
+def _float_join_key(arr: ndarray, kind: str) -> ndarray:
+    """
+    Bits of the float values with a single representation of zero and of missing values.
+    The bits of negative numbers are flipped so that the keys compare like the floats.
+    """
+    if kind == 'f':
+        arr = arr + 0.
+    else:
+        is_missing = utils.isna_array(arr, kind)
+        arr = arr.astype('float64')
+        arr[is_missing] = nan
+    arr[np.isnan(arr)] = nan
+    bits = arr.view('int64')
+    return np.where(bits < 0, bits ^ np.int64(2 ** 63 - 1), bits)
 
-            dtype, loc = right._get_col_dtype_loc(col)  # type: str, int
-            cur_loc = dtype_cur_loc[dtype]
-            col_y = col
-            if col in self._column_info:
-                col_y = col + '_y'
-                col_x = col + '_x'
-                left_col_idx = new_column_list.index(col)
-                new_column_list[left_col_idx] = col_x
-                new_column_info[col_x] = new_column_info[col]
-                del new_column_info[col]
-
-            new_column_info[col_y] = utils.Column(dtype, cur_loc, cur_order)
-            dtype_cur_loc[dtype] += 1
-            cur_order += 1
-            new_column_list.append(col_y)
-            dtype_right_locs[dtype].append(loc)
 
-        if has_multiple_join_cols:
-            if final_num_dtype:
-                pass
-            else:
-                # must have str join columns
-                left_arr = self._data['S']
-                right_arr = right._data['S']
-                left_locs = left_dtype_locs['S']
-                right_locs = right_dtype_locs['S']
-                left_rep, right_idx, n_rows = _join.join_str_2d(left_arr, right_arr, left_locs,
-                                                                right_locs)
-        else:
-            left_rep, right_idx, n_rows = getattr(_join, func_name)(left_arr, right_arr)
+def _int_join_key(arr: ndarray, kind: str) -> ndarray:
+    if kind == 'b':
+        # missing booleans are -1
+        return np.where(arr == -1, utils.MIN_INT, arr)
+    return arr
 
-        new_data = {}
 
-        for dtype, ncol in dtype_col_nums.items():
-            if ncol == 0:
-                continue
-            if dtype not in right._data:
-                data = self._data[dtype]
-                arr = np.repeat(data, left_rep, axis=0)
-            elif dtype not in self._data:
-                data = right._data[dtype]
-                locs = dtype_right_locs[dtype]
-                arr = data[np.ix_(right_idx, locs)]
-            else:
-                dtype_word = utils.convert_kind_to_numpy(dtype)
-                arr = np.empty((n_rows, ncol), dtype=dtype_word)
-                data = np.repeat(self._data[dtype], left_rep, axis=0)
-                if data.ndim == 1:
-                    data = data[:, np.newaxis]
-                arr[:, :data.shape[1]] = data
+def _stat_func_columns(func, arr, hasnans, n_threads, kwargs):
+    """
+    Runs the column reduction `func` on `n_threads` contiguous groups of columns of `arr` at
+    the same time and joins the results back together
+    """
+    nc = arr.shape[1]
+    n_groups = min(n_threads, nc)
+    if n_groups <= 1:
+        return func(arr, axis=0, hasnans=hasnans, **kwargs)
 
-                locs = dtype_right_locs[dtype]
-                if locs:
-                    data = right._data[dtype][:, locs]
-                    arr[:, data.shape[1]:] = data[right_idx]
+    bounds = np.linspace(0, nc, n_groups + 1).astype('int64')
 
-            if arr.ndim == 1:
-                arr = arr[:, np.newaxis]
-            new_data[dtype] = arr
+    def reduce(start, end):
+        return func(arr[:, start:end], axis=0, hasnans=hasnans[start:end], **kwargs)
 
-        new_columns = np.array(new_column_list, dtype='O')
-        return self._construct_from_new(new_data, new_column_info, new_columns)
+    results = utils.thread_map(reduce, bounds[:-1], bounds[1:], n_threads=n_groups)
+    return np.concatenate(results, axis=-1)
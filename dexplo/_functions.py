@@ -1,12 +1,55 @@
 from collections import defaultdict
+import json
+import mmap
 import numpy as np
 
 import dexplo._utils as utils
 from dexplo._libs import read_files as _rf
+from dexplo._libs.string_buffer import merge_string_buffers
 from dexplo._frame import DataFrame
 
 
-def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None):
+def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None, n_threads=None,
+             chunksize=None):
+    """
+    Read a delimited text file into a DataFrame
+
+    Blank lines are skipped. Fields missing from the end of a short line are missing
+    values.
+
+    Parameters
+    ----------
+    fp : str
+        Path to the file
+
+    sep : str, default ','
+        Single character separating the fields of each line
+
+    header : int, default 0
+        Line number of the column names. Use -1 when the file has no column names
+
+    skiprows : int or sequence of int, default None
+        Number of lines to skip at the start of the file or line numbers to skip
+
+    usecols : list of int or str, default None
+        Subset of the columns to read
+
+    n_threads : int, default None
+        Number of threads used to parse the file. The file is split into chunks at line
+        boundaries and the chunks are parsed simultaneously. When None, the 'n_threads'
+        option is used.
+
+    chunksize : int, default None
+        Return an iterator of DataFrames with at most `chunksize` rows each instead of
+        reading the entire file at once. The data type of a column is kept from one chunk
+        to the next and only ever promoted: bool or int columns that encounter floats
+        become float and columns that encounter strings become str. The file is only
+        opened once iteration begins.
+
+    Returns
+    -------
+    A DataFrame or an iterator of DataFrames when `chunksize` is given
+    """
     if not isinstance(sep, str):
         raise TypeError('`sep` must be a string')
     if len(sep) != 1:
@@ -22,7 +65,13 @@ def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None):
     elif usecols is not None:
         raise TypeError('`usecols` must be a list of integers or column names')
 
-    nrows = _get_file_legnth(fp)
+    n_threads = utils.get_n_threads(n_threads)
+
+    if chunksize is not None:
+        if not isinstance(chunksize, (int, np.integer)) or isinstance(chunksize, bool):
+            raise TypeError('`chunksize` must be a positive integer')
+        if chunksize < 1:
+            raise ValueError('`chunksize` must be a positive integer')
 
     skiprows_set = set()
     skiprows_int = 0
@@ -48,10 +97,130 @@ def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None):
                 header = kept_rows[header]
                 skiprows_set = set(skiprows_arr[skiprows_arr > header])
 
-    tuple_return = _rf.read_csv(fp, nrows, ord(sep), header, skiprows_int, skiprows_set, usecols)
+    if chunksize is not None:
+        return _iter_chunks(fp, ord(sep), header, skiprows_int, skiprows_set, usecols,
+                            chunksize, n_threads)
+
+    buf = _map_file(fp)
+    try:
+        pos, data_line, columns, field_idx = _read_header(buf, ord(sep), header, skiprows_int,
+                                                         skiprows_set, usecols)
+        skip_lines = _relative_skip_lines(skiprows_set, data_line)
+        tuple_return = _parse_chunks(buf, pos, len(buf), ord(sep), field_idx, skip_lines,
+                                     n_threads)
+    finally:
+        _close_file(buf)
+    a_bool, a_int, a_float, a_str_cat, str_map, dtypes, dtype_loc = tuple_return
+    return _construct_frame((a_bool, a_int, a_float, a_str_cat), str_map, columns,
+                            dtypes, dtype_loc)
+
+
+def _map_file(fp):
+    """
+    Memory maps the file so that it is parsed directly from the page cache without being
+    copied. Empty files cannot be mapped.
+    """
+    with open(fp, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''
+
+
+def _close_file(buf):
+    if isinstance(buf, mmap.mmap):
+        buf.close()
+
+
+def read_dxf(fp, columns=None):
+    """
+    Read a file written by `DataFrame.to_dxf`
+
+    The array of each data type is memory mapped in copy-on-write mode, so only the pages
+    that are accessed are read from disk and modifying the DataFrame never changes the file.
+
+    Parameters
+    ----------
+    fp : str
+        Path to the file
+
+    columns : list of str, default None
+        Subset of the columns to read. Only the portions of the file holding these columns
+        are mapped.
 
-    a_bool, a_int, a_float, a_str_cat, str_map, columns, dtypes, dtype_loc = tuple_return
+    Returns
+    -------
+    A DataFrame
+    """
+    with open(fp, 'rb') as f:
+        if f.read(len(utils.DXF_MAGIC)) != utils.DXF_MAGIC:
+            raise ValueError(f'{fp} is not a dxf file')
+        header_len = int(np.frombuffer(f.read(8), dtype='uint64')[0])
+        header = json.loads(f.read(header_len).decode())
 
+    if header['version'] > utils.DXF_VERSION:
+        raise ValueError(f'{fp} was written by a newer version of dexplo')
+
+    header_size = len(utils.DXF_MAGIC) + 8 + header_len
+    data_start = -(-header_size // utils.DXF_ALIGN) * utils.DXF_ALIGN
+    nrows = header['nrows']
+    all_columns = header['columns']
+
+    if columns is not None:
+        if isinstance(columns, str):
+            columns = [columns]
+        elif not isinstance(columns, list):
+            raise TypeError('`columns` must be a column name or a list of column names')
+        col_positions = {col: i for i, (col, _, _) in enumerate(all_columns)}
+        for col in columns:
+            if col not in col_positions:
+                raise KeyError(f'Column {col} does not exist in {fp}')
+        utils.check_duplicate_column(columns)
+        all_columns = [all_columns[col_positions[col]] for col in columns]
+
+    kind_locs = defaultdict(list)
+    for col, kind, loc in all_columns:
+        kind_locs[kind].append(loc)
+
+    new_data = {}
+    new_locs = {}
+    for kind, locs in kind_locs.items():
+        dtype = np.dtype(utils.convert_kind_to_numpy(kind))
+        block = header['blocks'][kind]
+        first, last = min(locs), max(locs)
+
+        # each column of a Fortran array is contiguous so only the range of requested
+        # columns needs to be mapped
+        offset = data_start + block['offset'] + first * nrows * dtype.itemsize
+        shape = (nrows, last - first + 1)
+        if nrows == 0:
+            arr = np.empty(shape, dtype=dtype, order='F')
+        else:
+            arr = np.memmap(fp, dtype=dtype, mode='c', offset=offset, shape=shape, order='F')
+            arr = arr.view(np.ndarray)
+
+        sorted_locs = sorted(locs)
+        if sorted_locs == list(range(first, last + 1)):
+            new_data[kind] = arr
+            new_locs[kind] = {loc: loc - first for loc in locs}
+        else:
+            new_data[kind] = np.asfortranarray(arr[:, [loc - first for loc in sorted_locs]])
+            new_locs[kind] = {loc: i for i, loc in enumerate(sorted_locs)}
+
+    new_column_info = {}
+    str_reverse_map = {}
+    for i, (col, kind, loc) in enumerate(all_columns):
+        new_loc = new_locs[kind][loc]
+        new_column_info[col] = utils.Column(kind, new_loc, i)
+        if kind == 'S':
+            srm = [False] + header['str_reverse_map'][str(loc)]
+            str_reverse_map[new_loc] = utils.maybe_string_buffer(srm)
+
+    new_columns = np.array([col for col, _, _ in all_columns], dtype='O')
+    return DataFrame._construct_from_new(new_data, new_column_info, new_columns, str_reverse_map)
+
+
+def _construct_frame(arrs, str_map, columns, dtypes, dtype_loc):
     new_column_info = {}
     dtype_map = {1: 'b', 2: 'i', 3: 'f', 4: 'S'}
     final_dtype_locs = defaultdict(list)
@@ -61,7 +230,7 @@ def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None):
 
     new_data = {}
     loc_order_changed = set()
-    for arr, dtype in zip((a_bool, a_int, a_float, a_str_cat), ('b', 'i', 'f', 'S')):
+    for arr, dtype in zip(arrs, ('b', 'i', 'f', 'S')):
         num_cols = arr.shape[1]
         if num_cols != 0:
             locs = final_dtype_locs[dtype]
@@ -79,18 +248,263 @@ def read_csv(fp, sep=',', header=0, skiprows=None, usecols=None):
                 new_column_info[col].loc = cur_dtype_loc[dtype]
                 cur_dtype_loc[dtype] += 1
     new_columns = np.array(columns, dtype='O')
-    str_reverse_map = {k: list(v.keys()) for k, v in str_map.items()}
-    return DataFrame._construct_from_new(new_data, new_column_info, new_columns, str_reverse_map)
+    str_map = {loc: utils.maybe_string_buffer(srm) for loc, srm in str_map.items()}
+    return DataFrame._construct_from_new(new_data, new_column_info, new_columns, str_map)
+
+
+def _next_line(buf, pos):
+    end = buf.find(b'\n', pos)
+    if end == -1:
+        return len(buf)
+    return end + 1
+
+
+def _read_header(buf, sep, header, skiprows_int, skiprows_set, usecols):
+    """
+    Finds the column names and the beginning of the data
+
+    Returns
+    -------
+    Tuple of the byte position of the first data line, its line number, the column names
+    and the position of each used column within a line
+    """
+    pos = 0
+    line = 0
+    for _ in range(skiprows_int):
+        pos = _next_line(buf, pos)
+
+    if header == -1:
+        first_pos = pos
+        while line in skiprows_set:
+            first_pos = _next_line(buf, first_pos)
+            line += 1
+        first_line = buf[first_pos:_next_line(buf, first_pos)].rstrip(b'\r\n')
+        nc = first_line.count(bytes([sep])) + 1
+        columns = ['a' + str(i) for i in range(nc)]
+    else:
+        for _ in range(header):
+            pos = _next_line(buf, pos)
+            line += 1
+        end = _next_line(buf, pos)
+        columns = []
+        col_set = set()
+        for i, v in enumerate(buf[pos:end].rstrip(b'\r\n').split(bytes([sep]))):
+            v = v.decode()
+            if v == '':
+                col_name = col_base = 'a' + str(i)
+            else:
+                col_name = col_base = v
+
+            k = 0
+            while col_name in col_set:
+                col_name = col_base + '_' + str(k)
+                k += 1
+            columns.append(col_name)
+            col_set.add(col_name)
+        pos = end
+        line += 1
+
+    nc = len(columns)
+    if usecols:
+        if isinstance(usecols[0], (int, np.integer)):
+            try:
+                field_idx = np.arange(nc)[usecols]
+            except IndexError:
+                raise IndexError('The integer values in `usecols` cannot must be used to '
+                                 f'select columns in a {nc}-item sequence')
+        else:
+            field_idx = [columns.index(col) for col in usecols]
+        field_idx = np.unique(field_idx)
+        columns = [columns[i] for i in field_idx]
+    else:
+        field_idx = np.arange(nc)
+
+    return pos, line, columns, field_idx.astype('int64')
+
+
+def _split_chunks(buf, start, end, n_chunks):
+    """
+    Splits the buffer into roughly equal chunks that begin at the start of a line.
+    Offsets within a chunk are stored as 32 bit integers which limits the chunk size.
+    """
+    n_chunks = max(n_chunks, (end - start) // 2 ** 31 + 1)
+    size = (end - start) // n_chunks + 1
+    bounds = [start]
+    while bounds[-1] < end:
+        bounds.append(min(_next_line(buf, bounds[-1] + size - 1), end))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _kept_rows(skip_lines, first_line, n):
+    keep = np.ones(n, dtype='bool')
+    if len(skip_lines):
+        skip = skip_lines[(skip_lines >= first_line) & (skip_lines < first_line + n)]
+        keep[skip - first_line] = False
+    return keep
+
+
+def _alloc_arrays(nr, dtypes):
+    """
+    Allocates the arrays for each data type and returns the location of each column
+    within its array. Columns containing only missing values are floats.
+    """
+    dtypes[dtypes == 0] = 3
+    dtype_loc = np.empty(len(dtypes), dtype='int64')
+    for code in range(1, 5):
+        is_code = dtypes == code
+        dtype_loc[is_code] = np.arange(is_code.sum())
+
+    counts = np.bincount(dtypes, minlength=5)
+    a_bool = np.empty((nr, counts[1]), dtype='int8', order='F')
+    a_int = np.empty((nr, counts[2]), dtype='int64', order='F')
+    a_float = np.empty((nr, counts[3]), dtype='float64', order='F')
+    a_str_cat = np.empty((nr, counts[4]), dtype='uint32', order='F')
+    return a_bool, a_int, a_float, a_str_cat, dtype_loc
+
+
+def _merge_string_mappings(chunk_maps, chunk_rows):
+    """
+    Combines the StringBuffer of each chunk into one per column. Returns the final
+    mapping and a list of (loc, start, end, new_codes) for each chunk that must have
+    its codes translated.
+    """
+    col_buffers = defaultdict(list)
+    col_rows = defaultdict(list)
+    for cur_map, rows in zip(chunk_maps, chunk_rows):
+        for loc, buffer in cur_map.items():
+            col_buffers[loc].append(buffer)
+            col_rows[loc].append(rows)
+
+    str_map = {}
+    remaps = []
+    for loc, buffers in col_buffers.items():
+        if len(buffers) == 1:
+            str_map[loc] = buffers[0]
+            continue
+        str_map[loc], all_codes = merge_string_buffers(buffers)
+        for (start, end), new_codes in zip(col_rows[loc], all_codes):
+            if not (new_codes == np.arange(len(new_codes))).all():
+                remaps.append((loc, start, end, new_codes))
+    return str_map, remaps
+
+
+def _relative_skip_lines(skiprows_set, data_line):
+    skip_lines = np.array(sorted(skiprows_set), dtype='int64') - data_line
+    return skip_lines[skip_lines >= 0]
+
+
+def _split_rows(start, row_starts, ends, keep, n_pieces):
+    """
+    Splits tokenized rows into pieces that can be inferred and parsed independently
+    """
+    n = len(row_starts)
+    bounds = np.linspace(0, n, min(n_pieces, n) + 1).astype('int64')
+    return [(start, row_starts[i:j], ends[i:j], keep[i:j])
+            for i, j in zip(bounds[:-1], bounds[1:])]
+
+
+def _infer_masks(buf, pieces, field_idx, n_threads):
+    """
+    Combines the kinds of values found in each column of all the pieces
+    """
+    def infer(piece):
+        start, row_starts, ends, keep = piece
+        masks = np.zeros(len(field_idx), dtype='uint8')
+        return _rf.infer_chunk(buf, start, row_starts, ends, field_idx, keep, masks)
+
+    masks = utils.thread_map(infer, pieces, n_threads=n_threads)
+    return np.bitwise_or.reduce([np.zeros(len(field_idx), dtype='uint8')] + masks)
+
+
+def _parse_pieces(buf, pieces, field_idx, dtypes, n_threads):
+    """
+    Parses each piece into a single set of arrays and merges their string mappings
+    """
+    n_kept = [piece[3].sum() for piece in pieces]
+    out_rows = np.concatenate(([0], np.cumsum(n_kept))).astype('int64')
+    a_bool, a_int, a_float, a_str_cat, dtype_loc = _alloc_arrays(out_rows[-1], dtypes)
+
+    def parse(piece, out_row):
+        start, row_starts, ends, keep = piece
+        return _rf.parse_chunk(buf, start, row_starts, ends, field_idx, keep, dtypes, dtype_loc,
+                               a_bool, a_int, a_float, a_str_cat, out_row)
+
+    chunk_maps = utils.thread_map(parse, pieces, out_rows[:-1], n_threads=n_threads)
+    str_map, remaps = _merge_string_mappings(chunk_maps, zip(out_rows[:-1], out_rows[1:]))
+
+    def remap(args):
+        loc, start, end, new_codes = args
+        _rf.remap_str_codes(a_str_cat, loc, start, end, new_codes)
+
+    utils.thread_map(remap, remaps, n_threads=n_threads)
+    return a_bool, a_int, a_float, a_str_cat, str_map, dtype_loc
+
+
+def _parse_chunks(buf, start, end, sep, field_idx, skip_lines, n_threads):
+    chunks = _split_chunks(buf, start, end, n_threads)
+    nf = field_idx.max() + 1 if len(field_idx) else 0
+
+    def tokenize(bounds):
+        return _rf.tokenize_lines(buf, bounds[0], bounds[1], sep, nf)
+
+    tokens = utils.thread_map(tokenize, chunks, n_threads=n_threads)
+
+    # the line number of the start of each chunk is only known once every chunk is tokenized
+    pieces = []
+    first_line = 0
+    for bounds, (row_starts, ends, blank) in zip(chunks, tokens):
+        keep = _kept_rows(skip_lines, first_line, len(row_starts)) & ~blank
+        pieces.append((bounds[0], row_starts, ends, keep))
+        first_line += len(row_starts)
+    dtypes = _rf.combine_masks(_infer_masks(buf, pieces, field_idx, n_threads))
+    a_bool, a_int, a_float, a_str_cat, str_map, dtype_loc = _parse_pieces(buf, pieces, field_idx,
+                                                                         dtypes, n_threads)
+    return a_bool, a_int, a_float, a_str_cat, str_map, dtypes, dtype_loc
+
+
+def _iter_chunks(fp, sep, header, skiprows_int, skiprows_set, usecols, chunksize, n_threads):
+    """
+    Yields a DataFrame for every `chunksize` kept rows. The kinds of values seen in each
+    column accumulate so that a column's data type can only be promoted. The file is only
+    mapped once iteration begins and is closed when the generator finishes or is closed.
+    """
+    buf = _map_file(fp)
+    try:
+        pos, data_line, columns, field_idx = _read_header(buf, sep, header, skiprows_int,
+                                                         skiprows_set, usecols)
+        skip_lines = _relative_skip_lines(skiprows_set, data_line)
+        nf = field_idx.max() + 1 if len(field_idx) else 0
+        seen_masks = np.zeros(len(field_idx), dtype='uint8')
+        end = len(buf)
+        line = 0
 
+        while pos < end:
+            # lines that are skipped do not count towards the chunk size
+            n = chunksize
+            for skip_line in skip_lines[skip_lines >= line]:
+                if skip_line >= line + n:
+                    break
+                n += 1
 
-def _make_gen(reader):
-    b = reader(1024 * 1024)
-    while b:
-        yield b
-        b = reader(1024 * 1024)
+            row_starts = np.empty(n, dtype='uint32')
+            ends = np.empty((n, nf), dtype='uint32')
+            blank = np.empty(n, dtype='bool')
+            chunk_end = min(end, pos + 2 ** 32 - 1)
+            n, new_pos = _rf.tokenize(buf, pos, chunk_end, sep, row_starts, ends, blank)
+            keep = _kept_rows(skip_lines, line, n) & ~blank[:n]
+            pieces = _split_rows(pos, row_starts[:n], ends[:n], keep, n_threads)
 
+            seen_masks |= _infer_masks(buf, pieces, field_idx, n_threads)
+            dtypes = _rf.combine_masks(seen_masks)
+            # columns of only missing values are floats and must remain so
+            seen_masks[dtypes == 0] |= 4
 
-def _get_file_legnth(filename):
-    f = open(filename, 'rb')
-    f_gen = _make_gen(f.raw.read)
-    return sum( buf.count(b'\n') for buf in f_gen )
+            arrs = _parse_pieces(buf, pieces, field_idx, dtypes, n_threads)
+            a_bool, a_int, a_float, a_str_cat, str_map, dtype_loc = arrs
+            pos = new_pos
+            line += n
+            if keep.any():
+                yield _construct_frame((a_bool, a_int, a_float, a_str_cat), str_map, columns,
+                                       dtypes, dtype_loc)
+    finally:
+        _close_file(buf)
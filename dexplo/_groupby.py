@@ -2,13 +2,22 @@ from dexplo._frame import DataFrame
 import dexplo._utils as utils
 from collections import defaultdict, OrderedDict
 import numpy as np
-from numpy import ndarray
-from typing import Union, Dict, List, Tuple, Callable
+from numpy import nan, ndarray
+from typing import Union, Dict, List, Tuple, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
 from dexplo._libs import groupby as _gb
+from dexplo import _string_pool as _sp
 import warnings
 
 ColInfoT = Dict[str, utils.Column]
 
+# aggregations of integer and float columns that `Grouper.agg` computes in a single pass
+FUSED_FUNCS = {'count', 'sum', 'mean', 'var', 'min', 'max'}
+
+# `Grouper.transform` functions that use the group aggregation kernels
+TRANSFORM_AGG_FUNCS = {'count', 'sum', 'prod', 'mean', 'max', 'min', 'var', 'any', 'all'}
+TRANSFORM_CUM_FUNCS = {'cumsum', 'cumprod', 'cummax', 'cummin', 'cumcount'}
+
 
 def get_func_kwargs(name):
     if name in {'sum', 'prod', 'mean', 'median', 'size'}:
@@ -27,16 +36,38 @@ def get_func_kwargs(name):
 
 class Grouper(object):
 
-    def __init__(self, df: DataFrame, columns: List[str]) -> None:
+    def __init__(self, df: DataFrame, columns: List[str], sort: bool = False,
+                 engine: str = 'hash') -> None:
+        if engine not in ('hash', 'sort'):
+            raise ValueError("`engine` must be either 'hash' or 'sort'")
+        if not isinstance(sort, (bool, np.bool_)):
+            raise TypeError('`sort` must be a boolean')
         self._df = df
-        self._group_labels, self._group_position = self._create_groups(columns)
+        self._engine = engine
+        # the row order that puts the groups next to one another and where each group starts
+        self._segments: Tuple[ndarray, ndarray] = None
+        self._set_group_column_info(columns)
+
+        # the sort engine always sorts
+        self._cache_key = tuple(columns), sort or engine == 'sort', engine, df._version
+        groups = df._get_cached_groups(self._cache_key)
+        if groups is not None:
+            self._group_labels, self._group_position, self._segments = groups
+        else:
+            if engine == 'sort':
+                self._group_labels, self._group_position = self._create_groups_sorted(columns)
+            else:
+                self._group_labels, self._group_position = self._create_groups(columns)
+                if sort:
+                    self._sort_groups(columns)
+            self._cache_groups()
         self._group_columns = columns
 
         if len(self._group_position) == self._df.shape[0]:
             warnings.warn("Each group contains exactly one row of data. "
                           "Are you sure you are grouping correctly?")
 
-    def _create_groups(self, columns: Union[str, List[str]]) -> Tuple[ndarray, ndarray]:
+    def _set_group_column_info(self, columns: List[str]) -> None:
         self._group_dtype_loc: Dict[str, List[int]] = defaultdict(list)
         self._column_info: ColInfoT = {}
         for i, col in enumerate(columns):
@@ -45,19 +76,31 @@ class Grouper(object):
             self._group_dtype_loc[dtype].append(loc)
             self._column_info[col] = utils.Column(dtype, cur_loc, i)
 
+    def _create_groups(self, columns: List[str]) -> Tuple[ndarray, ndarray]:
+        n_threads = utils.get_n_threads()
+        if 'S' in self._group_dtype_loc:
+            return self._create_groups_str(columns, n_threads)
+        elif n_threads > 1:
+            return self._create_groups_hashed(self._get_group_keys(columns), n_threads)
+
         if len(columns) == 1:
-            # since there is just one column, dtype is from the for-loop
+            dtype, loc = self._df._get_col_dtype_loc(columns[0])  # type: str, int
             final_arr = self._df._data[dtype][:, loc]
             if dtype in 'mM':
                 final_arr = final_arr.view('int64')
             dtype = final_arr.dtype.kind
             func_name = 'get_group_assignment_' + utils.convert_kind_to_dtype(dtype) + '_1d'
             return getattr(_gb, func_name)(final_arr)
-        elif len(self._group_dtype_loc) == 1 or 'S' not in self._group_dtype_loc:
+        else:
             arrs = []
             for dtype, locs in self._group_dtype_loc.items():
                 arr = self._df._data[dtype][:, locs]
-                if dtype in 'mM':
+                if dtype == 'f':
+                    # rows are hashed by their bytes so use the same zero and missing
+                    # value as the partitioned assignment
+                    arr = arr + 0.
+                    arr[np.isnan(arr)] = nan
+                elif dtype in 'mM':
                     arr = arr.view('int64')
                 arrs.append(arr)
             if len(arrs) == 1:
@@ -69,33 +112,143 @@ class Grouper(object):
             func_name = 'get_group_assignment_' + utils.convert_kind_to_dtype(dtype) + '_2d'
             final_arr = np.ascontiguousarray(final_arr)
             return getattr(_gb, func_name)(final_arr)
-        else:
-            arrs = []
-            for dtype, locs in self._group_dtype_loc.items():
-                if dtype == 'S':
-                    arr_str = self._df._data['S'][:, locs]
-                else:
-                    arr = self._df._data[dtype][:, locs]
-                    if dtype in 'mM':
-                        arr = arr.view('int64')
-                    arrs.append(arr)
-            if len(arrs) == 1:
-                arr_numbers = arrs[0]
-            else:
-                arr_numbers = np.column_stack(arrs)
 
-            dtype = arr_numbers.dtype.kind
-            if arr_str.shape[1] == 1:
-                arr_str = arr_str[:, 0]
-            if arr_numbers.shape[1] == 1:
-                arr_numbers = arr_numbers[:, 0]
-
-            str_ndim = str(arr_str.ndim) + 'd_'
-            num_ndim = str(arr_numbers.ndim) + 'd'
-            dtype_str = utils.convert_kind_to_dtype(dtype) + '_'
-            func_name = 'get_group_assignment_str_' + str_ndim + dtype_str + num_ndim
-            arr_numbers = np.ascontiguousarray(arr_numbers)
-            return getattr(_gb, func_name)(arr_str, arr_numbers)
+    def _create_groups_str(self, columns: List[str], n_threads: int) -> Tuple[ndarray, ndarray]:
+        """
+        Groups on the category codes of the string columns. A single string column, or
+        several whose number of combinations is small, is grouped with a dense lookup table
+        and all other combinations by hashing the codes along with the other columns.
+        """
+        if len(columns) == 1:
+            loc = self._df._column_info[columns[0]].loc
+            n_codes = len(self._df._str_reverse_map[loc])
+            # the column is strided when the block is C-ordered
+            codes = np.ascontiguousarray(self._df._data['S'][:, loc])
+            return _gb.get_group_assignment_str_1d(codes, n_codes)
+
+        if len(self._group_dtype_loc) == 1:
+            locs = self._group_dtype_loc['S']
+            n_codes = [len(self._df._str_reverse_map[loc]) for loc in locs]
+            if np.prod(n_codes, dtype='float64') < 10_000_000:
+                codes = np.zeros(self._df.shape[0], dtype='int64')
+                for loc, n in zip(locs, n_codes):
+                    codes = codes * n + self._df._data['S'][:, loc]
+                return _gb.get_group_assignment_int_bounded(codes, 0, int(np.prod(n_codes)) - 1)
+
+        return self._create_groups_hashed(self._get_group_keys(columns), n_threads)
+
+    def _get_group_keys(self, columns: List[str]) -> ndarray:
+        """
+        Encodes the grouping columns as a single C-contiguous int64 array
+        """
+        keys = np.empty((self._df.shape[0], len(columns)), dtype='int64')
+        for i, col in enumerate(columns):
+            dtype, loc = self._df._get_col_dtype_loc(col)  # type: str, int
+            arr = self._df._data[dtype][:, loc]
+            if dtype == 'f':
+                # a single representation of zero and of missing values
+                arr = arr + 0.
+                arr[np.isnan(arr)] = nan
+                arr = arr.view('int64')
+            elif dtype in 'mM':
+                arr = arr.view('int64')
+            # string columns use their category codes
+            keys[:, i] = arr
+        return keys
+
+    def _get_sort_keys(self, columns: List[str]) -> ndarray:
+        """
+        Encodes the grouping columns as int64 keys that sort in the same order as the values.
+        Strings are ranked by their category and missing values sort last.
+        """
+        keys = np.empty((self._df.shape[0], len(columns)), dtype='int64')
+        for i, col in enumerate(columns):
+            dtype, loc = self._df._get_col_dtype_loc(col)  # type: str, int
+            arr = self._df._data[dtype][:, loc]
+            if dtype == 'f':
+                arr = arr + 0.
+                nans = np.isnan(arr)
+                arr = arr.view('int64')
+                # flip the bits of the negative numbers so that they order as integers
+                arr = np.where(arr < 0, arr ^ np.iinfo('int64').max, arr)
+                arr[nans] = np.iinfo('int64').max
+            elif dtype == 'S':
+                srm = self._df._str_reverse_map[loc]
+                ranks = np.empty(len(srm), dtype='int64')
+                ranks[0] = len(srm)
+                ranks[1 + utils.argsort_str_reverse_list(srm)] = np.arange(len(srm) - 1)
+                arr = ranks[arr]
+            elif dtype == 'b':
+                arr = np.where(arr == -1, 2, arr)
+            elif dtype in 'mM':
+                arr = arr.view('int64').copy()
+                arr[arr == np.iinfo('int64').min] = np.iinfo('int64').max
+            keys[:, i] = arr
+        return keys
+
+    def _create_groups_sorted(self, columns: List[str]) -> Tuple[ndarray, ndarray]:
+        """
+        Sorts the rows by their keys once. Each run of equal keys is a group so the groups
+        are numbered in sorted order and the sort is kept for the segment aggregations.
+        """
+        keys = self._get_sort_keys(columns)
+        n = len(keys)
+        order = np.lexsort(keys.T[::-1])
+        sorted_keys = keys[order]
+        is_start = np.ones(n, dtype='bool')
+        is_start[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(1)
+        starts = np.flatnonzero(is_start)
+        labels = np.empty(n, dtype='int64')
+        labels[order] = np.cumsum(is_start) - 1
+        self._segments = order, np.append(starts, n)
+        return labels, order[starts]
+
+    def _sort_groups(self, columns: List[str]) -> None:
+        # renumber the groups in the sorted order of their keys
+        keys = self._get_sort_keys(columns)[self._group_position]
+        group_order = np.lexsort(keys.T[::-1])
+        new_labels = np.empty(len(group_order), dtype='int64')
+        new_labels[group_order] = np.arange(len(group_order))
+        self._group_labels = new_labels[self._group_labels]
+        self._group_position = self._group_position[group_order]
+
+    def _get_segments(self) -> Tuple[ndarray, ndarray]:
+        if self._segments is None:
+            # a stable sort keeps the rows of each group in their original order
+            order = np.argsort(self._group_labels, kind='mergesort')
+            starts = np.zeros(len(self) + 1, dtype='int64')
+            np.cumsum(np.bincount(self._group_labels, minlength=len(self)), out=starts[1:])
+            self._segments = order, starts
+            self._cache_groups()
+        return self._segments
+
+    def _cache_groups(self) -> None:
+        self._df._cache_groups(self._cache_key,
+                               (self._group_labels, self._group_position, self._segments))
+
+    def _create_groups_hashed(self, keys: ndarray, n_threads: int) -> Tuple[ndarray, ndarray]:
+        hashes, rows, offsets = _gb.partition_group_keys(keys, n_threads)
+        labels = np.empty(len(keys), dtype='int64')
+        part_rows = [rows[offsets[p]:offsets[p + 1]] for p in range(n_threads)]
+
+        def group(cur_rows):
+            return _gb.group_partition(keys, hashes, cur_rows, labels)
+
+        group_firsts = utils.thread_map(group, part_rows, n_threads=n_threads)
+
+        # number the groups by their first row, the same as the serial assignment
+        group_position = np.concatenate(group_firsts)
+        order = np.argsort(group_position)
+        new_labels = np.empty(len(order), dtype='int64')
+        new_labels[order] = np.arange(len(order))
+        bounds = np.cumsum([0] + [len(firsts) for firsts in group_firsts])
+        mappings = [new_labels[bounds[p]:bounds[p + 1]] for p in range(n_threads)]
+
+        def relabel(cur_rows, mapping):
+            _gb.relabel_partition(labels, cur_rows, mapping)
+
+        utils.thread_map(relabel, part_rows, mappings, n_threads=n_threads)
+        return labels, group_position[order]
 
     def _get_group_col_data(self) -> Dict[str, List[ndarray]]:
         data_dict: Dict[str, List[ndarray]] = defaultdict(list)
@@ -116,6 +269,16 @@ class Grouper(object):
             data_dict[dtype].append(arr)
         return data_dict
 
+    def _get_group_str_reverse_map(self) -> Dict[int, List]:
+        # the group columns in the result keep their category codes
+        new_str_reverse_map = {}
+        for col, col_obj in self._column_info.items():
+            if col_obj.dtype == 'S':
+                loc = self._df._column_info[col].loc
+                srm = self._df._str_reverse_map[loc]
+                new_str_reverse_map[col_obj.loc] = utils.copy_str_reverse_list(srm)
+        return new_str_reverse_map
+
     def _get_agg_name(self, name: str) -> str:
         i = 1
         while name in self._group_columns:
@@ -142,7 +305,7 @@ class Grouper(object):
 
     def _group_agg(self, name: str, ignore_str: bool = True, add_positions: bool = False,
                    keep_group_cols: bool = True, ignore_date: bool = True,
-                   keep_date_type: bool = True, **kwargs) -> DataFrame:
+                   keep_date_type: bool = True, broadcast: bool = False, **kwargs) -> DataFrame:
         labels = self._group_labels
         size = len(self._group_position)
 
@@ -155,10 +318,12 @@ class Grouper(object):
             data_dict = self._get_group_col_data()
             new_column_info = self._get_new_column_info()
             new_columns = self._group_columns.copy()
+            new_str_reverse_map = self._get_group_str_reverse_map()
         else:
             data_dict = defaultdict(list)
             new_column_info = {}
             new_columns = []
+            new_str_reverse_map = {}
 
         for dtype, data in self._df._data.items():
             if ignore_str and dtype == 'S':
@@ -185,6 +350,9 @@ class Grouper(object):
                 arr = arr.astype(utils.convert_kind_to_dtype(dtype))
             else:
                 new_kind = arr.dtype.kind
+            if broadcast:
+                # give each row the result of its group
+                arr = arr[labels]
             cur_loc = utils.get_num_cols(data_dict.get(new_kind, []))
             data_dict[new_kind].append(arr)
 
@@ -211,8 +379,9 @@ class Grouper(object):
             i += 1
 
         new_data = utils.concat_data_arrays(data_dict)
-
-        return DataFrame._construct_from_new(new_data, new_column_info, new_columns)
+        new_columns = np.array(new_columns, dtype='O')
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             new_str_reverse_map)
 
     def size(self):
         name = self._get_agg_name('size')
@@ -224,7 +393,8 @@ class Grouper(object):
         new_column_info = self._get_new_column_info()
         new_column_info[name] = utils.Column('i', new_data['i'].shape[1] - 1,
                                              len(new_columns) - 1)
-        return DataFrame._construct_from_new(new_data, new_column_info, new_columns)
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             self._get_group_str_reverse_map())
 
     def count(self) -> DataFrame:
         return self._group_agg('count', ignore_str=False, ignore_date=False, keep_date_type=False)
@@ -240,7 +410,8 @@ class Grouper(object):
         new_column_info = self._get_new_column_info()
         new_column_info[name] = utils.Column('i', new_data['i'].shape[1] - 1,
                                              len(new_columns) - 1)
-        return DataFrame._construct_from_new(new_data, new_column_info, new_columns)
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             self._get_group_str_reverse_map())
 
     def sum(self) -> DataFrame:
         return self._group_agg('sum')
@@ -304,9 +475,12 @@ class Grouper(object):
         num_group_cols = len(self._group_columns)
         new_columns = self._group_columns.copy()
 
+        new_str_reverse_map = self._get_group_str_reverse_map()
         cur_obj_loc = utils.get_num_cols(data_dict_final.get('S', []))
-        column_name_array = np.tile(calc_columns, len(self))[:, np.newaxis]
+        column_codes = np.arange(1, len(calc_columns) + 1, dtype='uint32')
+        column_name_array = np.tile(column_codes, len(self))[:, np.newaxis]
         data_dict_final['S'].append(column_name_array)
+        new_str_reverse_map[cur_obj_loc] = [False] + calc_columns
         new_columns.append('Column Name')
         new_column_info['Column Name'] = utils.Column('S', cur_obj_loc, num_group_cols)
 
@@ -318,8 +492,9 @@ class Grouper(object):
 
         data_dict_final['f'].append(result)
         new_data = utils.concat_data_arrays(data_dict_final)
-
-        return DataFrame._construct_from_new(new_data, new_column_info, new_columns)
+        new_columns = np.array(new_columns, dtype='O')
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             new_str_reverse_map)
 
     def any(self) -> DataFrame:
         return self._group_agg('any', False, ignore_date=False, keep_date_type=False)
@@ -328,10 +503,191 @@ class Grouper(object):
         return self._group_agg('all', False, ignore_date=False, keep_date_type=False)
 
     def median(self) -> DataFrame:
-        return self._group_agg('median')
+        return self._segment_agg('quantile', q=.5)
+
+    def quantile(self, q: float = .5) -> DataFrame:
+        if not isinstance(q, (int, float)) or not 0 <= q <= 1:
+            raise ValueError('`q` must be a number between 0 and 1')
+        return self._segment_agg('quantile', q=q)
 
     def nunique(self) -> DataFrame:
-        return self._group_agg('nunique', False, ignore_date=False, keep_date_type=False)
+        return self._segment_agg('nunique')
+
+    def _segment_agg(self, name: str, broadcast: bool = False, **kwargs) -> DataFrame:
+        """
+        Aggregates each group as one contiguous segment of its rows. `quantile` works on the
+        numeric and boolean columns and `nunique` on all of them. Missing values are skipped.
+        With `broadcast`, every row gets the result of its group and the grouping columns
+        are left out.
+        """
+        order, starts = self._get_segments()
+        if broadcast:
+            data_dict: Dict[str, List[ndarray]] = defaultdict(list)
+            new_column_info: ColInfoT = {}
+            new_columns: List[str] = []
+            new_str_reverse_map = {}
+        else:
+            data_dict = self._get_group_col_data()
+            new_column_info = self._get_new_column_info()
+            new_columns = self._group_columns.copy()
+            new_str_reverse_map = self._get_group_str_reverse_map()
+
+        calc_columns: List[str] = []
+        arrs: List[ndarray] = []
+        for col, dtype, loc in self._df._col_info_iter():  # type: str, str, int
+            if col in self._group_columns:
+                continue
+            arr = self._df._data[dtype][:, loc]
+            if name == 'quantile':
+                if dtype not in 'ifb':
+                    continue
+                arr = arr.astype('float64')
+                if dtype == 'b':
+                    arr[arr == -1] = nan
+            elif dtype == 'f':
+                nans = np.isnan(arr)
+                arr = (arr + 0.).view('int64')
+                arr[nans] = np.iinfo('int64').min
+            elif dtype == 'b':
+                arr = np.where(arr == -1, np.iinfo('int64').min, arr)
+            elif dtype == 'S':
+                arr = np.where(arr == 0, np.iinfo('int64').min, arr)
+            elif dtype in 'mM':
+                arr = arr.view('int64')
+            calc_columns.append(col)
+            arrs.append(arr)
+
+        if calc_columns:
+            np_dtype = 'float64' if name == 'quantile' else 'int64'
+            values = np.empty((len(order), len(arrs)), dtype=np_dtype, order='F')
+            for i, arr in enumerate(arrs):
+                values[:, i] = arr[order]
+
+            if name == 'quantile':
+                result = _gb.quantile_segments(values, starts, kwargs['q'])
+            else:
+                result = _gb.nunique_segments(values, starts)
+
+            if broadcast:
+                result = result[self._group_labels]
+            new_kind = result.dtype.kind
+            cur_loc = utils.get_num_cols(data_dict.get(new_kind, []))
+            data_dict[new_kind].append(result)
+            for i, col in enumerate(calc_columns):
+                new_column_info[col] = utils.Column(new_kind, cur_loc + i, len(new_columns))
+                new_columns.append(col)
+
+        new_data = utils.concat_data_arrays(data_dict)
+        new_columns = np.array(new_columns, dtype='O')
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             new_str_reverse_map)
+
+    def transform(self, name: str, **kwargs) -> DataFrame:
+        """
+        Computes the aggregation `name` of each group and gives every row the result of its
+        group. The returned DataFrame has the same rows as the original, without the
+        grouping columns.
+
+        Parameters
+        ----------
+        name: str
+            One of 'size', 'count', 'sum', 'prod', 'mean', 'max', 'min', 'first', 'last',
+            'var', 'std', 'any', 'all', 'median', 'quantile', 'nunique' or 'rank'.
+            The cumulative functions 'cumsum', 'cumprod', 'cummax', 'cummin' and
+            'cumcount' already return one row per row and are also accepted.
+
+        kwargs
+            Passed to the aggregation. `ddof` for var and std, `q` for quantile and
+            `method` and `ascending` for rank.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        if name in TRANSFORM_CUM_FUNCS:
+            return getattr(self, name)(**kwargs)
+        elif name in TRANSFORM_AGG_FUNCS:
+            func_kwargs = get_func_kwargs(name)
+            func_kwargs.update(kwargs)
+            return self._group_agg(name, keep_group_cols=False, broadcast=True, **func_kwargs)
+        elif name == 'std':
+            df = self._group_agg('var', add_positions=True, keep_group_cols=False,
+                                 broadcast=True, **kwargs)
+            if 'f' in df._data:
+                df._data['f'] = np.sqrt(df._data['f'])
+            return df
+        elif name in ('median', 'quantile'):
+            q = kwargs.get('q', .5)
+            if not isinstance(q, (int, float)) or not 0 <= q <= 1:
+                raise ValueError('`q` must be a number between 0 and 1')
+            return self._segment_agg('quantile', broadcast=True, q=q)
+        elif name == 'nunique':
+            return self._segment_agg('nunique', broadcast=True)
+        elif name in ('first', 'last'):
+            order, starts = self._get_segments()
+            if name == 'first':
+                positions = self._group_position
+            else:
+                positions = order[starts[1:] - 1]
+            columns = [col for col in self._df._columns if col not in self._group_columns]
+            return self._df[positions[self._group_labels], columns]
+        elif name == 'size':
+            size = _gb.size(self._group_labels, len(self))[self._group_labels]
+            return DataFrame({self._get_agg_name('size'): size})
+        elif name == 'rank':
+            return self._rank(**kwargs)
+        raise ValueError(f'`{name}` is not an aggregation that can be used with `transform`')
+
+    def _rank(self, method: str = 'min', ascending: bool = True) -> DataFrame:
+        """
+        Ranks each column within its group. Missing values have a missing rank.
+        """
+        if method not in ('min', 'max', 'dense', 'first', 'average'):
+            raise ValueError("`method` must be either 'min', 'max', 'dense', 'first', or 'average'")
+        columns = [col for col in self._df._columns if col not in self._group_columns]
+        labels = self._group_labels
+        n = len(labels)
+        idx = np.arange(n)
+        keys = self._get_sort_keys(columns)
+        data = {}
+        for i, col in enumerate(columns):
+            dtype, loc = self._df._get_col_dtype_loc(col)  # type: str, int
+            nas = utils.isna_array(self._df._data[dtype][:, loc], dtype)
+            key = keys[:, i] if ascending else ~keys[:, i]
+            # missing values go last so they do not change the ranks of the others
+            key = np.where(nas, np.iinfo('int64').max, key)
+            order = np.lexsort((key, labels))
+            sorted_key = key[order]
+            sorted_labels = labels[order]
+
+            new_group = np.ones(n, dtype='bool')
+            new_group[1:] = sorted_labels[1:] != sorted_labels[:-1]
+            # a run is a set of tied values within a group
+            new_run = new_group.copy()
+            new_run[1:] |= sorted_key[1:] != sorted_key[:-1]
+            group_first = np.maximum.accumulate(np.where(new_group, idx, 0))
+            run_first = np.maximum.accumulate(np.where(new_run, idx, 0))
+            run_ids = np.cumsum(new_run) - 1
+            run_last = np.append(np.flatnonzero(new_run)[1:], n)[run_ids] - 1
+
+            if method == 'min':
+                sorted_rank = run_first - group_first + 1
+            elif method == 'max':
+                sorted_rank = run_last - group_first + 1
+            elif method == 'average':
+                sorted_rank = (run_first + run_last) / 2 - group_first + 1
+            elif method == 'first':
+                sorted_rank = idx - group_first + 1
+            else:
+                sorted_rank = run_ids - run_ids[group_first] + 1
+
+            rank = np.empty(n, dtype=sorted_rank.dtype)
+            rank[order] = sorted_rank
+            if nas.any():
+                rank = rank.astype('float64')
+                rank[nas] = nan
+            data[col] = rank
+        return DataFrame(data, columns=columns)
 
     def head(self, n=5) -> DataFrame:
         row_idx = _gb.head(self._group_labels, len(self), n=n)
@@ -364,6 +720,9 @@ class Grouper(object):
         new_column_info = self._get_new_column_info()
         new_columns = self._group_columns.copy() + [''] * num_agg_cols
 
+        agg_cols, new_names, new_order, func_kwargs = self._fused_agg(
+            agg_cols, new_names, new_order, func_kwargs, data_dict, new_column_info, new_columns)
+
         for name, agg_cols in agg_cols.items():
 
             agg_dtype_locs = defaultdict(list)
@@ -455,7 +814,77 @@ class Grouper(object):
 
         new_data = utils.concat_data_arrays(data_dict)
         new_columns = np.array(new_columns, dtype='O')
-        return DataFrame._construct_from_new(new_data, new_column_info, new_columns)
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             self._get_group_str_reverse_map())
+
+    def _fused_agg(self, agg_cols: Dict, new_names: Dict, new_order: Dict, func_kwargs: Dict,
+                   data_dict: Dict[str, List[ndarray]], new_column_info: ColInfoT,
+                   new_columns: List[str]) -> Tuple[Dict, Dict, Dict, Dict]:
+        """
+        Computes every count, sum, mean, var, min and max of the integer and float columns
+        from one pass over each column and adds them to the result. Returns the
+        aggregations that are left over in the same form as they were passed in.
+        """
+        plans: Dict[str, List[Tuple]] = defaultdict(list)
+        rest_cols: Dict = OrderedDict()
+        rest_names: Dict = OrderedDict()
+        rest_order: Dict = OrderedDict()
+        rest_kwargs: Dict = OrderedDict()
+        for name, cols in agg_cols.items():
+            for agg in zip(cols, new_names[name], new_order[name], func_kwargs[name]):
+                col, new_name, order, kwargs = agg
+                dtype = self._df._column_info[col].dtype
+                if isinstance(name, str) and name in FUSED_FUNCS and dtype in 'if':
+                    plans[dtype].append((name, col, new_name, order, kwargs or {}))
+                else:
+                    rest_cols.setdefault(name, []).append(col)
+                    rest_names.setdefault(name, []).append(new_name)
+                    rest_order.setdefault(name, []).append(order)
+                    rest_kwargs.setdefault(name, []).append(kwargs)
+
+        num_group_cols = len(self._group_columns)
+        for dtype, plan in plans.items():
+            names = {agg[0] for agg in plan}
+            cols = list(OrderedDict.fromkeys(agg[1] for agg in plan))
+            locs = np.array([self._df._column_info[col].loc for col in cols], dtype='int64')
+            func = getattr(_gb, 'fused_agg_' + utils.convert_kind_to_dtype_generic(dtype))
+            count, total, dev, dev2, mins, maxs = func(self._group_labels, len(self),
+                                                       np.asfortranarray(self._df._data[dtype]),
+                                                       locs, 'var' in names,
+                                                       bool(names & {'min', 'max'}))
+
+            new_kind_arrs: Dict[str, List[ndarray]] = defaultdict(list)
+            new_kind_names: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+            for name, col, new_name, order, kwargs in plan:
+                i = cols.index(col)
+                if name == 'count':
+                    arr = count[:, i]
+                elif name == 'sum':
+                    arr = total[:, i]
+                elif name == 'mean':
+                    with np.errstate(invalid='ignore'):
+                        arr = total[:, i] / count[:, i]
+                elif name == 'var':
+                    ct = count[:, i]
+                    ddof = kwargs.get('ddof', 1)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        arr = (dev2[:, i] - dev[:, i] ** 2 / ct) / (ct - ddof)
+                    arr[ct <= ddof] = nan
+                elif name == 'min':
+                    arr = mins[:, i]
+                else:
+                    arr = maxs[:, i]
+                new_kind_arrs[arr.dtype.kind].append(arr)
+                new_kind_names[arr.dtype.kind].append((new_name, num_group_cols + order))
+
+            for new_kind, arrs in new_kind_arrs.items():
+                cur_loc = utils.get_num_cols(data_dict.get(new_kind, []))
+                data_dict[new_kind].append(np.column_stack(arrs))
+                for i, (new_name, order) in enumerate(new_kind_names[new_kind]):
+                    new_column_info[new_name] = utils.Column(new_kind, cur_loc + i, order)
+                    new_columns[order] = new_name
+
+        return rest_cols, rest_names, rest_order, rest_kwargs
 
     def agg(self, *args):
         func_cols = OrderedDict()
@@ -517,62 +946,212 @@ class Grouper(object):
                                 new_order=func_order, num_agg_cols=i + 1,
                                 func_kwargs=func_kwargs)
 
-    def filter(self, func, *args, **kwargs):
+    def _get_group_order_data(self) -> Tuple[Dict[str, ndarray], ndarray]:
+        # a copy of the data with the rows of each group next to one another
+        order, starts = self._get_segments()
+        data = {kind: np.asfortranarray(arr[order]) for kind, arr in self._df._data.items()}
+        return data, starts
+
+    def _call_groups(self, func: Callable, args: Tuple, kwargs: Dict,
+                     n_processes: Optional[int]) -> List:
+        """
+        Calls `func` on a DataFrame of each group in the order of the group labels. The rows
+        are reordered once and each DataFrame holds views of its slice of rows.
+        """
         if not isinstance(func, Callable):
-            raise TypeError('The `func` varialbe must a function or any callable object')
-        labels = self._group_labels
-        size = len(self._group_position)
-        result = _gb.filter(labels, size, self._df, func, *args, **kwargs)
+            raise TypeError('The `func` variable must be a function or any callable object')
+        if n_processes is not None:
+            if not isinstance(n_processes, (int, np.integer)) or isinstance(n_processes, bool):
+                raise TypeError('`n_processes` must be a positive integer')
+            if n_processes < 1:
+                raise ValueError('`n_processes` must be a positive integer')
+
+        data, starts = self._get_group_order_data()
+        df = self._df
+        if n_processes is None or n_processes == 1:
+            return _call_group_frames(func, args, kwargs, data, df._column_info, df._columns,
+                                      df._str_reverse_map, starts)
+
+        # send a few chunks of consecutive groups to each process
+        bounds = np.unique(np.linspace(0, len(self), n_processes * 4 + 1).astype('int64'))
+        results: List = []
+        with ProcessPoolExecutor(n_processes) as executor:
+            futures = []
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                row_lo, row_hi = starts[lo], starts[hi]
+                chunk = {kind: arr[row_lo:row_hi] for kind, arr in data.items()}
+                futures.append(executor.submit(_call_group_frames, func, args, kwargs, chunk,
+                                               df._column_info, df._columns,
+                                               df._str_reverse_map, starts[lo:hi + 1] - row_lo))
+            for future in futures:
+                results.extend(future.result())
+        return results
+
+    def filter(self, func: Callable, *args, n_processes: Optional[int] = None,
+               **kwargs) -> DataFrame:
+        """
+        Keeps the rows of the groups for which `func` returns True
+
+        Parameters
+        ----------
+        func: callable
+            Called with a DataFrame of each group followed by `args` and `kwargs`. It must
+            return a boolean. The DataFrame is a view of the group's rows and must not be
+            modified.
+
+        n_processes: int, optional
+            Calls `func` in a pool of this many processes. `func` must be picklable.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        results = self._call_groups(func, args, kwargs, n_processes)
+        keep_group = np.zeros(len(self), dtype='bool')
+        for i, result in enumerate(results):
+            if isinstance(result, (DataFrame, ndarray)):
+                if result.size != 1:
+                    raise TypeError('When calling `filter`, you must return a scalar boolean value')
+                if isinstance(result, DataFrame):
+                    result = result[0, 0]
+                else:
+                    result = result.flat[0]
+
+            if not isinstance(result, (bool, np.bool_)):
+                raise TypeError('When calling `filter`, you must return a scalar boolean value')
+            keep_group[i] = result
 
-        new_data = {kind: data[result] for kind, data in self._df._data.items()}
+        keep = keep_group[self._group_labels]
+        new_data = {kind: data[keep] for kind, data in self._df._data.items()}
         new_col_info = self._df._copy_column_info()
         columns = self._df._columns.copy()
+        new_str_reverse_map = {loc: utils.copy_str_reverse_list(srm)
+                               for loc, srm in self._df._str_reverse_map.items()}
+        return self._df._construct_from_new(new_data, new_col_info, columns, new_str_reverse_map)
+
+    def apply(self, func: Callable, *args, n_processes: Optional[int] = None,
+              **kwargs) -> DataFrame:
+        """
+        Calls `func` on each group and stacks the results along with the grouping columns
+
+        Parameters
+        ----------
+        func: callable
+            Called with a DataFrame of each group followed by `args` and `kwargs`. It must
+            return either a DataFrame, a 1 or 2 dimensional array or a scalar, the same kind
+            for every group. The DataFrame is a view of the group's rows and must not be
+            modified.
+
+        n_processes: int, optional
+            Calls `func` in a pool of this many processes. `func` must be picklable.
+
+        Returns
+        -------
+        A DataFrame
+        """
+        results = self._call_groups(func, args, kwargs, n_processes)
+        if isinstance(results[0], DataFrame):
+            for result in results:
+                if not isinstance(result, DataFrame):
+                    raise TypeError('The first value returned from your apply function was a '
+                                    'DataFrame. All subsequent objects returned must also '
+                                    f'be DataFrames. This group returned a {type(result)}')
+            result_df = _stack_frames(results)
+            group_repeats = [len(result) for result in results]
+        else:
+            arrs = []
+            for result in results:
+                if isinstance(result, (int, float, str, np.number, np.bool_, type(None))):
+                    result = np.array([[result]])
+                elif not isinstance(result, ndarray):
+                    raise TypeError(f'The result from your apply function is {type(result)} '
+                                    'which is not supported. Return a DataFrame, NumPy array '
+                                    'or scalar value')
+                elif result.ndim == 1:
+                    result = result[:, np.newaxis]
+                elif result.ndim != 2:
+                    raise ValueError('You returned an array with more than 2 dimensions')
+                if arrs and result.shape[1] != arrs[0].shape[1]:
+                    raise ValueError('Your first returned array from the `apply` groupby '
+                                     f'method had {arrs[0].shape[1]} columns. Your current '
+                                     f'returned array has {result.shape[1]} columns')
+                arrs.append(result)
+            arr = np.concatenate(arrs)
+            result_df = DataFrame(arr, columns=['a' + str(i) for i in range(arr.shape[1])])
+            group_repeats = [len(arr) for arr in arrs]
+
+        rows = np.repeat(self._group_position, group_repeats)
+        group_df = self._df[rows, self._group_columns]
 
-        return self._df._construct_from_new(new_data, new_col_info, columns)
-
-    def apply(self, func, *args, **kwargs):
-        if not isinstance(func, Callable):
-            raise TypeError('The `func` variable must be a function or any callable object')
-        labels = self._group_labels
-        size = len(self._group_position)
-        new_data, new_column_info, new_columns, group_repeats = _gb.apply(labels, size, self._df, func, *args, **kwargs)
-
-        grouped_data_dict = self._get_group_col_data()
-        grouped_column_info = self._get_new_column_info()
-        grouped_columns = self._group_columns.copy()
-        order_add = len(grouped_columns)
-
-        new_column_info_final = {}
-        for col in new_columns:
-            dtype, loc, order = new_column_info[col].values
-            loc_add = grouped_data_dict.get(dtype, 0)
-            if loc_add != 0:
-                loc_add = loc_add[0].shape[1]
-            new_column_info_final[col] = utils.Column(dtype, loc + loc_add, order + order_add)
-
-        new_grouped_columns = []
-        for col in grouped_columns:
-            if col in new_column_info_final:
-                new_grouped_columns.append(col + '_group')
-            else:
-                new_grouped_columns.append(col)
-
-        dtype_loc = defaultdict(int)
-        for i, col in enumerate(grouped_columns):
-            dtype = grouped_column_info[col].dtype
-            loc = dtype_loc[dtype]
-            new_col = new_grouped_columns[i]
-            new_column_info_final[new_col] = utils.Column(dtype, loc, i)
-            dtype_loc[dtype] += 1
-
-        new_columns = np.concatenate((new_grouped_columns, new_columns))
-
-        for dtype, data_list in grouped_data_dict.items():
-            data = np.concatenate(data_list, 1)
-            data = np.repeat(data, group_repeats, axis=0)
-            if dtype not in new_data:
-                new_data[dtype] = data
-            else:
-                new_data[dtype] = np.concatenate((data, new_data[dtype]), 1)
+        data_dict: Dict[str, List[ndarray]] = defaultdict(list)
+        new_column_info: ColInfoT = {}
+        new_str_reverse_map = {}
+        new_columns = []
+        for df in (group_df, result_df):
+            for col, dtype, loc in df._col_info_iter():  # type: str, str, int
+                new_col = col
+                if df is group_df and col in result_df._column_info:
+                    new_col = col + '_group'
+                new_loc = len(data_dict[dtype])
+                data_dict[dtype].append(df._data[dtype][:, loc])
+                if dtype == 'S':
+                    srm = df._str_reverse_map[loc]
+                    new_str_reverse_map[new_loc] = utils.copy_str_reverse_list(srm)
+                new_column_info[new_col] = utils.Column(dtype, new_loc, len(new_columns))
+                new_columns.append(new_col)
 
-        return DataFrame._construct_from_new(new_data, new_column_info_final, new_columns)
+        new_data = utils.concat_data_arrays(data_dict)
+        new_columns = np.array(new_columns, dtype='O')
+        return DataFrame._construct_from_new(new_data, new_column_info, new_columns,
+                                             new_str_reverse_map)
+
+
+def _call_group_frames(func: Callable, args: Tuple, kwargs: Dict, data: Dict[str, ndarray],
+                       column_info: ColInfoT, columns: ndarray, str_reverse_map: Dict,
+                       starts: ndarray) -> List:
+    # module level so that it can be sent to a worker process
+    results = []
+    for start, end in zip(starts[:-1], starts[1:]):
+        group_data = {kind: arr[start:end] for kind, arr in data.items()}
+        group_df = DataFrame._construct_from_new(group_data, column_info, columns,
+                                                 str_reverse_map)
+        results.append(func(group_df, *args, **kwargs))
+    return results
+
+
+def _stack_frames(dfs: List[DataFrame]) -> DataFrame:
+    """
+    Stacks DataFrames with the same columns and data types on top of one another. The
+    string columns are recoded to a single list of categories unless they already share one.
+    """
+    first = dfs[0]
+    data_dict: Dict[str, List[ndarray]] = defaultdict(list)
+    new_column_info: ColInfoT = {}
+    new_str_reverse_map = {}
+    for col, dtype, loc, order in first._col_info_iter(with_order=True):
+        arrs = []
+        for df in dfs:
+            if col not in df._column_info or len(df._columns) != len(first._columns):
+                raise ValueError('Every DataFrame returned from your apply function must have '
+                                 'the same columns')
+            cur_dtype, cur_loc = df._get_col_dtype_loc(col)  # type: str, int
+            if cur_dtype != dtype:
+                raise TypeError(f'Column `{col}` must have the same data type in every '
+                                'DataFrame returned from your apply function')
+            arr = df._data[dtype][:, cur_loc]
+            if dtype == 'S':
+                arr = (df._str_reverse_map[cur_loc], arr)
+            arrs.append(arr)
+
+        new_loc = len(data_dict[dtype])
+        if dtype == 'S':
+            # the groups usually share the categories of the grouped DataFrame
+            srms = [srm for srm, _ in arrs]
+            arrs, srm = _sp.merge_categories([arr for _, arr in arrs], srms)
+            new_str_reverse_map[new_loc] = utils.copy_str_reverse_list(srm)
+        data_dict[dtype].append(np.concatenate(arrs))
+        new_column_info[col] = utils.Column(dtype, new_loc, order)
+
+    new_data = utils.concat_data_arrays(data_dict)
+    return DataFrame._construct_from_new(new_data, new_column_info, first._columns.copy(),
+                                         new_str_reverse_map)
@@ -130,7 +130,7 @@ def data_from_dict(data: DataC) -> TupleReturn:
         loc: int = len(data_dict.get(kind, []))
         data_dict[kind].append(arr)
         if kind == 'S':
-            str_reverse_map[loc] = srm
+            str_reverse_map[loc] = _utils.maybe_string_buffer(srm)
         column_info[col] = _utils.Column(kind, loc, i)
 
         if i == 0:
@@ -170,7 +170,7 @@ def data_from_typed_array(data: ndarray, columns: ndarray) -> TupleReturn:
     if kind in 'OSU':
         kind = 'S'
         data, col_str_map = _va.convert_str_to_cat_2d(data)
-        str_reverse_map = {0: list(col_str_map)}
+        str_reverse_map = {0: _utils.maybe_string_buffer(list(col_str_map))}
     elif kind == 'M':
         data = data.astype('datetime64[ns]')
     elif kind == 'm':
@@ -208,7 +208,7 @@ def data_from_object_array(data: ndarray, columns: ndarray) -> TupleReturn:
         arr, kind, srm = _va.convert_object_array(data[:, i], col)
         loc: int = len(data_dict[kind])
         if kind == 'S':
-            str_reverse_map[loc] = srm
+            str_reverse_map[loc] = _utils.maybe_string_buffer(srm)
         data_dict[kind].append(arr)
         column_info[col] = _utils.Column(kind, loc, i)
 
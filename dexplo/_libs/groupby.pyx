@@ -5,15 +5,14 @@ cimport numpy as np
 from numpy cimport ndarray
 import cython
 from cpython cimport set, list, tuple
-from libc.math cimport isnan, sqrt
+from libc.math cimport isnan, sqrt, NAN
 
 from numpy import nan
 from .math import min_max_int, min_max_int2, get_first_non_nan, quick_select_int2, quick_select_float2
-from libc.stdlib cimport malloc, free
+from libc.stdlib cimport malloc, free, qsort
 from cpython.bytes cimport PyBytes_FromStringAndSize
 from cpython cimport dict
 from dexplo import _utils
-from collections import defaultdict
 
 try:
     import bottleneck as bn
@@ -30,74 +29,33 @@ MAX_CHAR = chr(1_000_000)
 MIN_CHAR = chr(0)
 
 
-cdef extern from "numpy/npy_math.h":
+cdef extern from "numpy/npy_math.h" nogil:
     bint npy_isnan(double x)
 
 
-def get_group_assignment_str_1d(ndarray[object] a):
+def get_group_assignment_str_1d(ndarray[np.uint32_t, mode='c'] a, Py_ssize_t n_codes):
+    """
+    Groups the category codes of a string column. Every code is below `n_codes`, the length
+    of the column's reverse map, so the groups are found with a dense lookup table.
+    """
     cdef:
-        Py_ssize_t i
-        int nr = a.shape[0], count = 0
-        ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-        ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-        dict d = {}
-
-    for i in range(nr):
-        group[i] = d.get(a[i], -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[a[i]] = count
-            count += 1
-
-    return group, group_position[:count]
-
-def get_group_assignment_str_1d_idx(ndarray[object] a):
-    cdef:
-        Py_ssize_t i, j, k
-        int group_num, nr = a.shape[0], nc = a.shape[1], count = 0
-        ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-        ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-        ndarray[object] group_idx = np.empty(nr, dtype='O')
-        dict d = {}
-
-    for i in range(nr):
-        group_idx[i] = []
-
-    for i in range(nr):
-        group_num = d.get(a[i], -1)
-        if group_num == -1:
-            group_position[count] = i
-            group[i] = count
-            d[a[i]] = count
-            count += 1
-        else:
-            group[i] = group_num
-            group_idx[group_num].append(i)
-
-    return group, group_position[:count], group_idx[:count]
-
-def get_group_assignment_str_2d(ndarray[object, ndim=2] a):
-    cdef:
-        Py_ssize_t i, j, k
-        int nr = a.shape[0], nc = a.shape[1], count = 0
-        ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-        ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-        dict d = {}
-        list v = list(range(nc))
-        tuple t
-
-    for i in range(nr):
-        for j in range(nc):
-            v[j] = a[i, j]
-        t = tuple(v)
+        Py_ssize_t i, n = len(a), count = 0
+        np.uint32_t *arr = <np.uint32_t *> a.data
+        ndarray[np.int64_t] group = np.empty(n, dtype=np.int64)
+        ndarray[np.int64_t] group_position = np.empty(n, dtype=np.int64)
+        ndarray[np.int64_t] unique = np.full(n_codes, -1, dtype=np.int64)
+        np.int64_t *g = <np.int64_t *> group.data
+        np.int64_t *gp = <np.int64_t *> group_position.data
+        np.int64_t *u = <np.int64_t *> unique.data
 
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+    with nogil:
+        for i in range(n):
+            if u[arr[i]] == -1:
+                # first time a group appears
+                u[arr[i]] = count
+                gp[count] = i
+                count += 1
+            g[i] = u[arr[i]]
 
     return group, group_position[:count]
 
@@ -299,298 +257,359 @@ def get_group_assignment_bool_2d(ndarray[np.uint8_t, cast=True, ndim=2] a):
 
     return group, group_position[:count]
 
-def get_group_assignment_str_1d_int_1d(ndarray[object] a, ndarray[np.int64_t] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-
-    for i in range(nr):
-        t = (a[i], b[i])
+# Partitioned group assignment
+#
+# The grouping columns are encoded by the caller as one C-contiguous (nrows, nkeys) int64
+# array. The rows are bucketed by the hash of their keys into one partition per thread so that
+# a group never spans two partitions. Each partition is then grouped on its own without the
+# GIL and the local group numbers are renumbered by the first row of each group so that the
+# labels match the ones from the serial functions above.
 
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+cdef inline np.uint64_t _mix(np.uint64_t x) nogil:
+    # splitmix64 finalizer
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL
+    return x ^ (x >> 31)
 
-    return group, group_position[:count]
 
-def get_group_assignment_str_1d_float_1d(ndarray[object] a, ndarray[np.float64_t] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-
-    for i in range(nr):
-        if isnan(b[i]):
-            t = (a[i], None)
-        else:
-            t = (a[i], b[i])
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
-
-def get_group_assignment_str_1d_bool_1d(ndarray[object] a, ndarray[np.uint8_t, cast=True] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-
-    for i in range(nr):
-        t = (a[i], b[i])
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
-
-def get_group_assignment_str_2d_int_1d(ndarray[object, ndim=2] a, ndarray[np.int64_t] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-
-    for i in range(nr):
-        for j in range(nc):
-            v[j] = a[i, j]
-        v[nc] = b[i]
-        t = tuple(v)
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
-
-def get_group_assignment_str_2d_float_1d(ndarray[object, ndim=2] a, ndarray[np.float64_t] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-
-    for i in range(nr):
-        for j in range(nc):
-            v[j] = a[i, j]
-        if isnan(b[i]):
-            v[nc] = None
-        else:
-            v[nc] = b[i]
-        t = tuple(v)
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
-
-def get_group_assignment_str_2d_bool_1d(ndarray[object, ndim=2] a, ndarray[np.uint8_t, cast=True] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-
-    for i in range(nr):
-        for j in range(nc):
-            v[j] = a[i, j]
-        v[nc] = b[i]
-        t = tuple(v)
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
+cdef inline np.uint64_t _hash_row(np.int64_t *keys, Py_ssize_t nk) nogil:
+    cdef:
+        Py_ssize_t j
+        np.uint64_t h = 0x9e3779b97f4a7c15ULL
+    for j in range(nk):
+        h = _mix(h ^ <np.uint64_t> keys[j])
+    return h
+
+
+cdef inline bint _keys_equal(np.int64_t *a, np.int64_t *b, Py_ssize_t nk) nogil:
+    cdef Py_ssize_t j
+    for j in range(nk):
+        if a[j] != b[j]:
+            return False
+    return True
+
+
+def partition_group_keys(ndarray[np.int64_t, ndim=2] keys, Py_ssize_t n_parts):
+    """
+    Returns
+    -------
+    hashes : hash of the keys of each row
+    rows : the row numbers ordered by partition and in their original order within each one
+    offsets : the rows of partition p are rows[offsets[p]:offsets[p + 1]]
+    """
+    cdef:
+        Py_ssize_t i, p, n = keys.shape[0], nk = keys.shape[1]
+        np.int64_t *k = <np.int64_t *> keys.data
+        ndarray[np.uint64_t] hashes = np.empty(n, dtype='uint64')
+        ndarray[np.int64_t] rows = np.empty(n, dtype='int64')
+        ndarray[np.int64_t] offsets = np.zeros(n_parts + 1, dtype='int64')
+        ndarray[np.int64_t] pos = np.empty(n_parts, dtype='int64')
+        np.uint64_t *h = <np.uint64_t *> hashes.data
+        np.int64_t *r = <np.int64_t *> rows.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        np.int64_t *ps = <np.int64_t *> pos.data
+
+    with nogil:
+        for i in range(n):
+            h[i] = _hash_row(k + i * nk, nk)
+            # the high bits pick the partition, the low bits the slot within it
+            offs[(h[i] >> 32) % n_parts + 1] += 1
+        for p in range(n_parts):
+            offs[p + 1] += offs[p]
+            ps[p] = offs[p]
+        for i in range(n):
+            p = (h[i] >> 32) % n_parts
+            r[ps[p]] = i
+            ps[p] += 1
 
+    return hashes, rows, offsets
 
-def get_group_assignment_str_1d_int_2d(ndarray[object] a, ndarray[np.int64_t, ndim=2] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-    cdef int size = sizeof(np.int64_t) * b.shape[1]
 
-    for i in range(nr):
-        t = (a[i], PyBytes_FromStringAndSize(<char*>&b[i, 0], size))
+def group_partition(ndarray[np.int64_t, ndim=2] keys, ndarray[np.uint64_t] hashes,
+                    ndarray[np.int64_t] rows, ndarray[np.int64_t] labels):
+    """
+    Groups the rows of one partition, writing the local group number of each row to `labels`
 
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+    Returns
+    -------
+    The first row of each local group
+    """
+    cdef:
+        Py_ssize_t i, row, g, n = len(rows), nk = keys.shape[1], n_groups = 0, cap = 1
+        np.uint64_t slot, mask
+        np.int64_t *k = <np.int64_t *> keys.data
+        np.uint64_t *h = <np.uint64_t *> hashes.data
+        np.int64_t *r = <np.int64_t *> rows.data
+        np.int64_t *lab = <np.int64_t *> labels.data
+        ndarray[np.int64_t] table
+        ndarray[np.int64_t] group_first = np.empty(n, dtype='int64')
+        np.int64_t *tbl
+        np.int64_t *gf = <np.int64_t *> group_first.data
+
+    while cap < 2 * n:
+        cap *= 2
+    mask = cap - 1
+    table = np.full(cap, -1, dtype='int64')
+    tbl = <np.int64_t *> table.data
+
+    with nogil:
+        for i in range(n):
+            row = r[i]
+            slot = h[row] & mask
+            while True:
+                g = tbl[slot]
+                if g == -1:
+                    g = n_groups
+                    tbl[slot] = g
+                    gf[g] = row
+                    n_groups += 1
+                    break
+                if _keys_equal(k + gf[g] * nk, k + row * nk, nk):
+                    break
+                slot = (slot + 1) & mask
+            lab[row] = g
 
-    return group, group_position[:count]
+    return group_first[:n_groups]
 
-def get_group_assignment_str_1d_float_2d(ndarray[object] a, ndarray[np.float64_t, ndim=2] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-    cdef int size = sizeof(np.float64_t) * b.shape[1]
 
-    for i in range(nr):
-        t = (a[i], PyBytes_FromStringAndSize(<char*>&b[i, 0], size))
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+def relabel_partition(ndarray[np.int64_t] labels, ndarray[np.int64_t] rows,
+                      ndarray[np.int64_t] mapping):
+    cdef:
+        Py_ssize_t i, n = len(rows)
+        np.int64_t *lab = <np.int64_t *> labels.data
+        np.int64_t *r = <np.int64_t *> rows.data
+        np.int64_t *m = <np.int64_t *> mapping.data
 
-    return group, group_position[:count]
+    with nogil:
+        for i in range(n):
+            lab[r[i]] = m[lab[r[i]]]
 
-def get_group_assignment_str_1d_bool_2d(ndarray[object] a, ndarray[np.uint8_t, ndim=2, cast=True] b):
-    cdef int i
-    cdef int nr = len(a)
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef tuple t
-    cdef int size = sizeof(np.uint8_t) * b.shape[1]
 
-    for i in range(nr):
-        t = (a[i], PyBytes_FromStringAndSize(<char*>&b[i, 0], size))
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+# Aggregation over contiguous segments
+#
+# After the rows are put in group order, group g occupies rows starts[g]:starts[g + 1] of the
+# (nrows, ncols) Fortran-ordered array of values. Each segment is copied to a scratch buffer
+# and sorted on its own, which makes order statistics and distinct counts cheap.
 
-    return group, group_position[:count]
+cdef int _cmp_float(const void *a, const void *b) nogil:
+    cdef double x = (<double *> a)[0], y = (<double *> b)[0]
+    return (x > y) - (x < y)
 
-def get_group_assignment_str_2d_int_2d(ndarray[object, ndim=2] a, ndarray[np.int64_t, ndim=2] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-    cdef int size = sizeof(np.int64_t) * b.shape[1]
 
-    for i in range(nr):
-        for j in range(nc):
-            v[j] = a[i, j]
-        v[nc] = PyBytes_FromStringAndSize(<char*>&b[i, 0], size)
-        t = tuple(v)
+cdef int _cmp_int(const void *a, const void *b) nogil:
+    cdef np.int64_t x = (<np.int64_t *> a)[0], y = (<np.int64_t *> b)[0]
+    return (x > y) - (x < y)
 
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
-
-    return group, group_position[:count]
 
-def get_group_assignment_str_2d_float_2d(ndarray[object, ndim=2] a, ndarray[np.float64_t, ndim=2] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-    cdef int size = sizeof(np.float64_t) * b.shape[1]
-
-    for i in range(nr):
+def quantile_segments(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] starts, double q):
+    """
+    The `q` quantile of the non-missing values of each segment and column, interpolating
+    linearly between the two closest values like numpy
+    """
+    cdef:
+        Py_ssize_t i, j, k, m, nr = a.shape[0], nc = a.shape[1], ng = len(starts) - 1
+        double *arr = <double *> a.data
+        np.int64_t *st = <np.int64_t *> starts.data
+        double *buf = <double *> malloc(max(nr, 1) * sizeof(double))
+        double pos, frac
+        ndarray[np.float64_t, ndim=2] result = np.empty((ng, nc), dtype='float64', order='F')
+        double *res = <double *> result.data
+
+    if buf == NULL:
+        raise MemoryError()
+
+    with nogil:
         for j in range(nc):
-            v[j] = a[i, j]
-        v[nc] = PyBytes_FromStringAndSize(<char*>&b[i, 0], size)
-        t = tuple(v)
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+            for i in range(ng):
+                m = 0
+                for k in range(st[i], st[i + 1]):
+                    if not npy_isnan(arr[j * nr + k]):
+                        buf[m] = arr[j * nr + k]
+                        m += 1
+                if m == 0:
+                    res[j * ng + i] = NAN
+                    continue
+                qsort(buf, m, sizeof(double), _cmp_float)
+                pos = q * (m - 1)
+                k = <Py_ssize_t> pos
+                frac = pos - k
+                if k + 1 < m:
+                    res[j * ng + i] = buf[k] + (buf[k + 1] - buf[k]) * frac
+                else:
+                    res[j * ng + i] = buf[k]
 
-    return group, group_position[:count]
+    free(buf)
+    return result
 
-def get_group_assignment_str_2d_bool_2d(ndarray[object, ndim=2] a, ndarray[np.uint8_t, ndim=2, cast=True] b):
-    cdef int i, j
-    cdef int nr = len(a)
-    cdef int nc = a.shape[1]
-    cdef int count = 0
-    cdef ndarray[np.int64_t] group = np.empty(nr, dtype=np.int64)
-    cdef ndarray[np.int64_t] group_position = np.empty(nr, dtype=np.int64)
-    cdef dict d = {}
-    cdef list v = list(range(nc + 1))
-    cdef tuple t
-    cdef int size = sizeof(np.uint8_t) * b.shape[1]
 
-    for i in range(nr):
+def nunique_segments(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] starts):
+    """
+    The number of distinct values of each segment and column. MIN_INT marks a missing value
+    and is not counted.
+    """
+    cdef:
+        Py_ssize_t i, j, k, m, nr = a.shape[0], nc = a.shape[1], ng = len(starts) - 1
+        np.int64_t *arr = <np.int64_t *> a.data
+        np.int64_t *st = <np.int64_t *> starts.data
+        np.int64_t *buf = <np.int64_t *> malloc(max(nr, 1) * sizeof(np.int64_t))
+        np.int64_t count
+        ndarray[np.int64_t, ndim=2] result = np.empty((ng, nc), dtype='int64', order='F')
+        np.int64_t *res = <np.int64_t *> result.data
+
+    if buf == NULL:
+        raise MemoryError()
+
+    with nogil:
         for j in range(nc):
-            v[j] = a[i, j]
-        v[nc] = PyBytes_FromStringAndSize(<char*>&b[i, 0], size)
-        t = tuple(v)
-
-        group[i] = d.get(t, -1)
-        if group[i] == -1:
-            group_position[count] = i
-            group[i] = count
-            d[t] = count
-            count += 1
+            for i in range(ng):
+                m = 0
+                for k in range(st[i], st[i + 1]):
+                    if arr[j * nr + k] != MIN_INT:
+                        buf[m] = arr[j * nr + k]
+                        m += 1
+                count = m > 0
+                if m > 1:
+                    qsort(buf, m, sizeof(np.int64_t), _cmp_int)
+                    for k in range(1, m):
+                        count += buf[k] != buf[k - 1]
+                res[j * ng + i] = count
+
+    free(buf)
+    return result
+
+
+# Fused aggregation
+#
+# `Grouper.agg` derives count, sum, mean, var, min and max of the numeric columns from the
+# accumulators below, which are filled in a single pass over the labels and each column. The
+# deviations from the first value of each group keep the variance accurate. Every result is a
+# (ngroups, len(locs)) Fortran-ordered array.
+
+def fused_agg_float(ndarray[np.int64_t] labels, Py_ssize_t size,
+                    ndarray[np.float64_t, ndim=2] data, ndarray[np.int64_t] locs,
+                    bint moments, bint minmax):
+    """
+    Returns the count, sum, sum of deviations, sum of squared deviations, min and max of
+    the non-missing values of each group. The deviations are None unless `moments` is set
+    and the min and max are None unless `minmax` is set.
+    """
+    cdef:
+        Py_ssize_t i, j, g, nr = data.shape[0], nl = len(locs)
+        double x, d
+        np.int64_t *lab = <np.int64_t *> labels.data
+        np.int64_t *loc = <np.int64_t *> locs.data
+        double *arr = <double *> data.data
+        double *col
+        ndarray[np.int64_t, ndim=2] count = np.zeros((size, nl), dtype='int64', order='F')
+        ndarray[np.float64_t, ndim=2] total = np.zeros((size, nl), dtype='float64', order='F')
+        ndarray[np.float64_t, ndim=2] dev = np.zeros((size, nl), dtype='float64', order='F')
+        ndarray[np.float64_t, ndim=2] dev2 = np.zeros((size, nl), dtype='float64', order='F')
+        ndarray[np.float64_t, ndim=2] mins = np.full((size, nl), nan, dtype='float64', order='F')
+        ndarray[np.float64_t, ndim=2] maxs = np.full((size, nl), nan, dtype='float64', order='F')
+        ndarray[np.float64_t] first = np.empty(size, dtype='float64')
+        np.int64_t *ct
+        double *tot
+        double *dv
+        double *dv2
+        double *mn
+        double *mx
+        double *fst = <double *> first.data
+
+    with nogil:
+        for j in range(nl):
+            col = arr + loc[j] * nr
+            ct = <np.int64_t *> count.data + j * size
+            tot = <double *> total.data + j * size
+            dv = <double *> dev.data + j * size
+            dv2 = <double *> dev2.data + j * size
+            mn = <double *> mins.data + j * size
+            mx = <double *> maxs.data + j * size
+            for i in range(nr):
+                x = col[i]
+                if npy_isnan(x):
+                    continue
+                g = lab[i]
+                if ct[g] == 0:
+                    fst[g] = x
+                    mn[g] = x
+                    mx[g] = x
+                ct[g] += 1
+                tot[g] += x
+                if moments:
+                    d = x - fst[g]
+                    dv[g] += d
+                    dv2[g] += d * d
+                if minmax:
+                    if x < mn[g]:
+                        mn[g] = x
+                    elif x > mx[g]:
+                        mx[g] = x
+
+    return (count, total, dev if moments else None, dev2 if moments else None,
+            mins if minmax else None, maxs if minmax else None)
+
+
+def fused_agg_int(ndarray[np.int64_t] labels, Py_ssize_t size,
+                  ndarray[np.int64_t, ndim=2] data, ndarray[np.int64_t] locs,
+                  bint moments, bint minmax):
+    """
+    Same as `fused_agg_float` for integer columns, which have no missing values. The sum,
+    min and max are integers.
+    """
+    cdef:
+        Py_ssize_t i, j, g, nr = data.shape[0], nl = len(locs)
+        np.int64_t x
+        double d
+        np.int64_t *lab = <np.int64_t *> labels.data
+        np.int64_t *loc = <np.int64_t *> locs.data
+        np.int64_t *arr = <np.int64_t *> data.data
+        np.int64_t *col
+        ndarray[np.int64_t, ndim=2] count = np.zeros((size, nl), dtype='int64', order='F')
+        ndarray[np.int64_t, ndim=2] total = np.zeros((size, nl), dtype='int64', order='F')
+        ndarray[np.float64_t, ndim=2] dev = np.zeros((size, nl), dtype='float64', order='F')
+        ndarray[np.float64_t, ndim=2] dev2 = np.zeros((size, nl), dtype='float64', order='F')
+        ndarray[np.int64_t, ndim=2] mins = np.zeros((size, nl), dtype='int64', order='F')
+        ndarray[np.int64_t, ndim=2] maxs = np.zeros((size, nl), dtype='int64', order='F')
+        ndarray[np.int64_t] first = np.empty(size, dtype='int64')
+        np.int64_t *ct
+        np.int64_t *tot
+        double *dv
+        double *dv2
+        np.int64_t *mn
+        np.int64_t *mx
+        np.int64_t *fst = <np.int64_t *> first.data
+
+    with nogil:
+        for j in range(nl):
+            col = arr + loc[j] * nr
+            ct = <np.int64_t *> count.data + j * size
+            tot = <np.int64_t *> total.data + j * size
+            dv = <double *> dev.data + j * size
+            dv2 = <double *> dev2.data + j * size
+            mn = <np.int64_t *> mins.data + j * size
+            mx = <np.int64_t *> maxs.data + j * size
+            for i in range(nr):
+                x = col[i]
+                g = lab[i]
+                if ct[g] == 0:
+                    fst[g] = x
+                    mn[g] = x
+                    mx[g] = x
+                ct[g] += 1
+                tot[g] += x
+                if moments:
+                    d = <double> (x - fst[g])
+                    dv[g] += d
+                    dv2[g] += d * d
+                if minmax:
+                    if x < mn[g]:
+                        mn[g] = x
+                    elif x > mx[g]:
+                        mx[g] = x
+
+    return (count, total, dev if moments else None, dev2 if moments else None,
+            mins if minmax else None, maxs if minmax else None)
 
-    return group, group_position[:count]
 
 def value_counts_int(ndarray[np.int64_t] a):
     cdef int i, group_num
@@ -824,7 +843,7 @@ def count_float(ndarray[np.int64_t] labels, int size, ndarray[np.float64_t, ndim
                 result[labels[j], i - k] += 1
     return result
 
-def count_str(ndarray[np.int64_t] labels, int size, ndarray[object, ndim=2] data, list group_locs):
+def count_str(ndarray[np.int64_t] labels, int size, ndarray[np.uint32_t, ndim=2] data, list group_locs):
     cdef int i, j
     cdef int nr = data.shape[0]
     cdef int nc = data.shape[1]
@@ -835,7 +854,8 @@ def count_str(ndarray[np.int64_t] labels, int size, ndarray[object, ndim=2] data
             k += 1
             continue
         for j in range(nr):
-            if data[j, i] is not None:
+            # code 0 is a missing value
+            if data[j, i] != 0:
                 result[labels[j], i - k] += 1
     return result
 
@@ -2801,249 +2821,3 @@ def custom_bool(ndarray[np.int64_t] labels, int size, ndarray[np.uint8_t, ndim=2
 
         start = end
     return result
-
-def filter(ndarray[np.int64_t] labels, int size, df, func, *args, **kwargs):
-    cdef int i, j
-    cdef long start=0, end
-    cdef int nr = df.shape[0]
-    cdef int nc = df.shape[1]
-    cdef ndarray[np.int64_t] label_count = np.zeros(size, dtype='int64')
-    cdef ndarray[np.int64_t] label_cumsum = np.empty(size, dtype='int64')
-    cdef ndarray[np.int64_t] label_locs = np.empty(nr, dtype='int64')
-    cdef ndarray[np.int64_t] label_count_cur = np.zeros(size, dtype='int64')
-    cdef ndarray[np.uint8_t, cast=True] result = np.zeros(nr, dtype='bool')
-
-    from dexplo._frame import DataFrame
-
-    for i in range(nr):
-        label_count[labels[i]] += 1
-
-    label_cumsum = np.roll(label_count, 1)
-    label_cumsum[0] = 0
-    label_cumsum = label_cumsum.cumsum()
-
-    for i in range(nr):
-        label_locs[label_cumsum[labels[i]] + label_count_cur[labels[i]]] = i
-        label_count_cur[labels[i]] += 1
-
-    for i in range(size):
-        end = start + label_count[i]
-
-        locs = label_locs[start:end]
-        new_data = {kind: data[locs] for kind, data in df._data.items()}
-        col_info = df._column_info
-        columns = df._columns
-        cur_df = DataFrame._construct_from_new(new_data, col_info, columns)
-
-        next_result = func(cur_df, *args, **kwargs)
-
-        if isinstance(next_result, (DataFrame, ndarray)):
-            if next_result.size != 1:
-                raise TypeError('When calling `filter`, you must return a scalar boolean value')
-
-            if isinstance(next_result, DataFrame):
-                next_result = next_result[0, 0]
-            else:
-                next_result = next_result.flat[0]
-
-        if not isinstance(next_result, (bool, np.bool_)):
-            raise TypeError('When calling `filter`, you must return a scalar boolean value')
-
-        if next_result:
-            result[locs] = True
-
-        start = end
-    return result
-
-def apply(ndarray[np.int64_t] labels, int size, df, func, *args, **kwargs):
-    cdef int i, j
-    cdef long start=0, end
-    cdef int nr = df.shape[0]
-    cdef int nc = df.shape[1]
-    cdef ndarray[np.int64_t] label_count = np.zeros(size, dtype='int64')
-    cdef ndarray[np.int64_t] label_cumsum = np.empty(size, dtype='int64')
-    cdef ndarray[np.int64_t] label_locs = np.empty(nr, dtype='int64')
-    cdef ndarray[np.int64_t] label_count_cur = np.zeros(size, dtype='int64')
-    cdef ndarray[np.uint8_t, cast=True] result = np.zeros(nr, dtype='bool')
-    cdef int result_nc
-    cdef ndarray result_columns
-    cdef bint returns_df = False
-    cdef bint all_dfs_same = True
-    cdef list return_items = []
-    cdef list column_dtype_final
-    cdef ndarray[np.int64_t] group_repeats = np.zeros(size, dtype='int64')
-
-    from dexplo._frame import DataFrame
-
-    for i in range(nr):
-        label_count[labels[i]] += 1
-
-    label_cumsum = np.roll(label_count, 1)
-    label_cumsum[0] = 0
-    label_cumsum = label_cumsum.cumsum()
-
-    for i in range(nr):
-        label_locs[label_cumsum[labels[i]] + label_count_cur[labels[i]]] = i
-        label_count_cur[labels[i]] += 1
-
-    for i in range(size):
-        end = start + label_count[i]
-        locs = label_locs[start:end]
-        new_data = {kind: data[locs] for kind, data in df._data.items()}
-        col_info = df._column_info
-        columns = df._columns
-        cur_df = DataFrame._construct_from_new(new_data, col_info, columns)
-
-        if i == 0:
-            next_result = func(cur_df, *args, **kwargs)
-            if isinstance(next_result, DataFrame):
-                group_repeats[i] = next_result.shape[0]
-                result_nc = next_result.shape[1]
-                result_columns = next_result._columns
-                returns_df = True
-                column_dtype_final = [(col, next_result._column_info[col].dtype)
-                                      for col in next_result._columns]
-            elif isinstance(next_result, ndarray):
-                if result.ndim == 2:
-                    result_nc = next_result.shape[1]
-                elif result.ndim == 1:
-                    next_result = next_result[:, np.newaxis]
-                    result_nc = 1
-                else:
-                    raise ValueError('You returned an array with more than 2 dimensions')
-                group_repeats[i] = next_result.shape[0]
-                dtype = next_result.dtype.kind
-            elif isinstance(next_result, (int, np.integer)):
-                group_repeats[i] = 1
-                result_nc = 1
-                next_result = np.array([[next_result]])
-                dtype = 'i'
-
-            elif isinstance(next_result, (bool, np.bool_)):
-                group_repeats[i] = 1
-                result_nc = 1
-                next_result = np.array([[next_result]])
-                dtype = 'b'
-            elif isinstance(next_result, (float, np.floating)):
-                group_repeats[i] = 1
-                result_nc = 1
-                next_result = np.array([[next_result]])
-                dtype = 'f'
-            elif isinstance(next_result, (str, type(None))):
-                group_repeats[i] = 1
-                result_nc = 1
-                next_result = np.array([[next_result]])
-                dtype = 'O'
-            else:
-                raise TypeError(f'The result from your apply function is {type(next_result)} '
-                                'which is not supported. Return a DataFrane, NumPy array or '
-                                'scalar value')
-            return_items.append(next_result)
-        else:
-            next_result = func(cur_df, *args, **kwargs)
-            if returns_df:
-                if not isinstance(next_result, DataFrame):
-                    raise TypeError('The first value returned from your apply function was a '
-                                    'DataFrame. All subsequent objects returned must also '
-                                    f'be DataFrames. This group returned a {type(next_result)}')
-                if next_result.shape[1] != result_nc:
-                    raise ValueError('The first DataFrame returned from your apply function '
-                                     f'had {result_nc} columns, while the current group had '
-                                     f'{next_result.shape[1]}. They must be equivalent')
-
-                group_repeats[i] = next_result.shape[0]
-                # compare the _column_info of next_result to first one
-                first_column_info = return_items[0]._column_info
-                cur_column_info = next_result._column_info
-                if first_column_info != cur_column_info:
-                    all_dfs_same = False
-                    for i, col in enumerate(next_result._columns):
-                        cur_dtype = next_result._column_info[col].dtype
-                        final_dtype = column_dtype_final[i][1]
-                        if final_dtype == 'O':
-                            continue
-                        if cur_dtype == 'b':
-                            continue
-                        if cur_dtype == 'i':
-                            if final_dtype == 'b':
-                                final_dtype == 'i'
-                        if cur_dtype == 'f':
-                            if final_dtype in 'ib':
-                                final_dtype = 'f'
-
-            elif isinstance(next_result, ndarray):
-                if result.ndim == 2:
-                    if next_result.shape[1] != result_nc:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has {next_result.shape[1]} columns')
-                elif result.ndim == 1:
-                    if result_nc != 1:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has 1 column')
-                    next_result = next_result[:, np.newaxis]
-                else:
-                    raise ValueError('You returned an array with more than 2 dimensions')
-                group_repeats[i] = next_result.shape[0]
-            elif isinstance(next_result, (int, np.integer)):
-                if result_nc != 1:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has 1 column')
-                next_result = np.array([[next_result]])
-                group_repeats[i] = 1
-            elif isinstance(next_result, (bool, np.bool_)):
-                if result_nc != 1:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has 1 column')
-                next_result = np.array([[next_result]])
-                group_repeats[i] = 1
-            elif isinstance(next_result, (float, np.floating)):
-                if result_nc != 1:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has 1 column')
-                next_result = np.array([[next_result]])
-                group_repeats[i] = 1
-            elif isinstance(next_result, (str, type(None))):
-                if result_nc != 1:
-                        raise ValueError('Your first returned array from the `apply` groupby '
-                                         f'method had {result_nc} columns. Your current returned '
-                                         f'array has 1 column')
-                next_result = np.array([[next_result]])
-                group_repeats[i] = 1
-            else:
-                raise TypeError(f'The result from your apply function is {type(next_result)} '
-                                'which is not supported. Return a DataFrane, NumPy array or '
-                                'scalar value')
-
-            return_items.append(next_result)
-        start = end
-    if returns_df:
-        if all_dfs_same:
-            data_dict = defaultdict(list)
-            for df in return_items:
-                for dtype, data in df._data.items():
-                    data_dict[dtype].append(data)
-            new_data = {dtype: np.concatenate(data) for dtype, data in data_dict.items()}
-            new_column_info = df._copy_column_info()
-            new_columns = df._columns.copy()
-    else:
-        # we have a list of arrays
-        for item in return_items:
-            data = np.concatenate(return_items)
-        if data.ndim == 1:
-            data = data[:, np.newaxis]
-        dtype = data.dtype.kind
-        new_data = {dtype: data}
-        new_columns = []
-        for i in range(result_nc):
-            new_columns.append('a' + str(i))
-
-        new_column_info = {}
-        for i in range(result_nc):
-            new_column_info[new_columns[i]] = _utils.Column(dtype, i, i)
-
-    return new_data, new_column_info, new_columns, group_repeats
\ No newline at end of file
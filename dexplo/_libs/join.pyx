@@ -1,250 +1,391 @@
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from numpy import nan
-from cython cimport list
-from collections import defaultdict
 cimport cython
+from libc.math cimport NAN
 
+cdef np.int64_t MIN_INT = np.iinfo('int64').min
 
-# def join_str_1d(ndarray[object] left, ndarray[object] right):
-#     cdef:
-#         Py_ssize_t i, n_right=len(right), n_left=len(left), n_new=0, idx, ct=0, cur_len
-#         ndarray[np.int64_t] right_idx
-#         ndarray[np.int64_t] left_rep = np.empty(n_left, dtype=np.int64)
-#
-#     right_idx_list = defaultdict(list)
-#
-#     for i in range(n_right):
-#         right_idx_list[right[i]].append(i)
-#
-#     for i in range(n_left):
-#         cur_len = len(right_idx_list[left[i]])
-#         left_rep[i] = cur_len
-#         n_new += cur_len
-#
-#     right_idx = np.empty(n_new, dtype='int64')
-#
-#     for i in range(n_left):
-#         for idx in right_idx_list[left[i]]:
-#             right_idx[ct] = idx
-#             ct += 1
-#
-#     return left_rep, right_idx, n_new
+
+# Hash join on composite keys
 #
-# @cython.wraparound(False)
-# @cython.boundscheck(False)
-def join_str_1d(ndarray[object] left, ndarray[object] right):
+# Every join column is encoded by the caller as an int64 column (string category codes
+# translated to a common code space, the bits of floats, the int64 view of dates) so that any
+# combination of join columns becomes one C-contiguous (nrows, nkeys) int64 array. The rows of
+# the right keys are grouped by a hash table and the left keys probe it.
+
+cdef enum:
+    JOIN_INNER = 0
+    JOIN_LEFT = 1
+    JOIN_OUTER = 2
+    JOIN_SEMI = 3
+    JOIN_ANTI = 4
+
+
+cdef int _get_join_kind(str how) except -1:
+    if how == 'inner':
+        return JOIN_INNER
+    elif how == 'left':
+        return JOIN_LEFT
+    elif how == 'outer':
+        return JOIN_OUTER
+    elif how == 'semi':
+        return JOIN_SEMI
+    elif how == 'anti':
+        return JOIN_ANTI
+    raise ValueError(f'Unknown join type {how}')
+
+
+cdef inline np.uint64_t _mix(np.uint64_t x) nogil:
+    # splitmix64 finalizer
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL
+    return x ^ (x >> 31)
+
+
+cdef inline np.uint64_t _hash_row(np.int64_t *keys, Py_ssize_t nk) nogil:
     cdef:
-        Py_ssize_t i, j, n_right=len(right), n_left=len(left), n_new=0, ct=0, cur_ct, count=0, max_ct, g
-        ndarray[np.int64_t] left_rep = np.empty(n_left, dtype=np.int64)
-        ndarray[np.int64_t] group_right = np.empty(n_right, dtype=np.int64)
-        ndarray[np.int64_t] group_left = np.empty(n_left, dtype=np.int64)
-        ndarray[np.int64_t] group_cts = np.empty(n_right, dtype=np.int64)
-        ndarray[np.int64_t] right_idx = np.empty(n_right, dtype=np.int64)
-        ndarray[np.int64_t] right_cur_ct
-        ndarray[np.int64_t, ndim=2] right_idx_matrix
-        dict d = {}
-
-    for i in range(n_right):
-        group_right[i] = d.get(right[i], -1)
-        if group_right[i] == -1:
-            group_right[i] = count
-            d[right[i]] = count
-            group_cts[count] = 1
-            count += 1
-        else:
-            group_cts[group_right[i]] += 1
-
-    right_cur_ct = np.zeros(count, dtype='int64')
-    max_ct = group_cts[:count].max()
-    right_idx_matrix = np.empty((count, max_ct), dtype='int64')
-
-    for i in range(n_right):
-        j = right_cur_ct[group_right[i]]
-        right_idx_matrix[group_right[i], j] = i
-        right_cur_ct[group_right[i]] += 1
-
-    for i in range(n_left):
-        group_left[i] = d.get(left[i], -1)
-        if group_left[i] != -1:
-            left_rep[i] = group_cts[group_left[i]]
-            n_new += left_rep[i]
-        else:
-            left_rep[i] = 0
-
-    right_idx = np.empty(n_new, dtype='int64')
-
-    for i in range(n_left):
-        g = group_left[i]
-        if g != -1:
-            cur_ct = group_cts[g]
-            for j in range(cur_ct):
-                right_idx[ct] = right_idx_matrix[g, j]
-                ct += 1
-
-    return left_rep, right_idx, n_new
-
-
-def join_int_1d(ndarray[np.int64_t] left, ndarray[np.int64_t] right):
+        Py_ssize_t j
+        np.uint64_t h = 0x9e3779b97f4a7c15ULL
+    for j in range(nk):
+        h = _mix(h ^ <np.uint64_t> keys[j])
+    return h
+
+
+cdef inline bint _keys_equal(np.int64_t *a, np.int64_t *b, Py_ssize_t nk) nogil:
+    cdef Py_ssize_t j
+    for j in range(nk):
+        if a[j] != b[j]:
+            return False
+    return True
+
+
+def hash_join(ndarray[np.int64_t, ndim=2] left_keys, ndarray[np.int64_t, ndim=2] right_keys,
+              str how):
+    """
+    Parameters
+    ----------
+    left_keys, right_keys : C-contiguous int64 arrays of the encoded join columns
+    how : 'inner', 'left', 'outer', 'semi' or 'anti'
+
+    Returns
+    -------
+    left_rep : number of times each left row appears in the result
+    right_idx : row of `right` for each row of the result. -1 when a left row has no match.
+        For outer joins, the right rows without a match are appended to the end and have no
+        corresponding left row. Empty for semi and anti joins.
+    n_new : number of rows in the result
+    """
     cdef:
-        Py_ssize_t i, n_right=len(right), n_left=len(left), n_new=0, idx, ct=0, cur_len
+        Py_ssize_t i, j, g, nk = left_keys.shape[1]
+        Py_ssize_t n_left = left_keys.shape[0], n_right = right_keys.shape[0]
+        Py_ssize_t n_groups = 0, n_new = 0, n_extra = 0, ct = 0, cap = 1
+        np.uint64_t h, slot, mask
+        np.int64_t *lk = <np.int64_t *> left_keys.data
+        np.int64_t *rk = <np.int64_t *> right_keys.data
+        int kind
+        ndarray[np.int64_t] table
+        ndarray[np.int64_t] right_group = np.empty(n_right, dtype='int64')
+        ndarray[np.int64_t] left_group = np.empty(n_left, dtype='int64')
+        ndarray[np.int64_t] group_first = np.empty(n_right, dtype='int64')
+        ndarray[np.int64_t] group_start = np.zeros(n_right + 1, dtype='int64')
+        ndarray[np.int64_t] group_rows = np.empty(n_right, dtype='int64')
+        ndarray[np.uint8_t, cast=True] group_matched = np.zeros(n_right, dtype='bool')
+        ndarray[np.int64_t] left_rep = np.empty(n_left, dtype='int64')
         ndarray[np.int64_t] right_idx
-        ndarray[np.int64_t] left_rep = np.empty(n_left, dtype=np.int64)
-
-    right_idx_list = defaultdict(list)
-
-    for i in range(n_right):
-        right_idx_list[right[i]].append(i)
-
-    for i in range(n_left):
-        cur_len = len(right_idx_list[left[i]])
-        left_rep[i] = cur_len
-        n_new += cur_len
-
-    right_idx = np.empty(n_new, dtype='int64')
-
-    for i in range(n_left):
-        for idx in right_idx_list[left[i]]:
-            right_idx[ct] = idx
-            ct += 1
-
-    return left_rep, right_idx, n_new
-
-def join_float_1d(ndarray[np.float64_t] left, ndarray[np.float64_t] right):
+        np.int64_t *tbl
+        np.int64_t *rg = <np.int64_t *> right_group.data
+        np.int64_t *lg = <np.int64_t *> left_group.data
+        np.int64_t *gf = <np.int64_t *> group_first.data
+        np.int64_t *gs = <np.int64_t *> group_start.data
+        np.int64_t *gr = <np.int64_t *> group_rows.data
+        np.uint8_t *gm = <np.uint8_t *> group_matched.data
+        np.int64_t *lr = <np.int64_t *> left_rep.data
+        np.int64_t *ri
+
+    kind = _get_join_kind(how)
+    while cap < 2 * n_right:
+        cap *= 2
+    mask = cap - 1
+    table = np.full(cap, -1, dtype='int64')
+    tbl = <np.int64_t *> table.data
+
+    with nogil:
+        # group the rows of the right keys
+        for i in range(n_right):
+            h = _hash_row(rk + i * nk, nk)
+            slot = h & mask
+            while True:
+                g = tbl[slot]
+                if g == -1:
+                    g = n_groups
+                    tbl[slot] = g
+                    gf[g] = i
+                    n_groups += 1
+                    break
+                if _keys_equal(rk + gf[g] * nk, rk + i * nk, nk):
+                    break
+                slot = (slot + 1) & mask
+            rg[i] = g
+            gs[g + 1] += 1
+
+        # rows of each group are stored contiguously in their original order
+        for g in range(n_groups):
+            gs[g + 1] += gs[g]
+        for i in range(n_right):
+            g = rg[i]
+            gr[gs[g]] = i
+            gs[g] += 1
+        for g in range(n_groups, 0, -1):
+            gs[g] = gs[g - 1]
+        gs[0] = 0
+
+        # probe with the left keys
+        for i in range(n_left):
+            h = _hash_row(lk + i * nk, nk)
+            slot = h & mask
+            while True:
+                g = tbl[slot]
+                if g == -1 or _keys_equal(rk + gf[g] * nk, lk + i * nk, nk):
+                    break
+                slot = (slot + 1) & mask
+            lg[i] = g
+
+            if kind == JOIN_SEMI:
+                lr[i] = g != -1
+            elif kind == JOIN_ANTI:
+                lr[i] = g == -1
+            elif g == -1:
+                lr[i] = kind != JOIN_INNER
+            else:
+                lr[i] = gs[g + 1] - gs[g]
+                gm[g] = True
+            n_new += lr[i]
+
+        if kind == JOIN_OUTER:
+            for i in range(n_right):
+                if not gm[rg[i]]:
+                    n_extra += 1
+
+    if kind == JOIN_SEMI or kind == JOIN_ANTI:
+        return left_rep, np.empty(0, dtype='int64'), n_new
+
+    right_idx = np.empty(n_new + n_extra, dtype='int64')
+    ri = <np.int64_t *> right_idx.data
+    with nogil:
+        for i in range(n_left):
+            g = lg[i]
+            if g == -1:
+                if kind != JOIN_INNER:
+                    ri[ct] = -1
+                    ct += 1
+            else:
+                for j in range(gs[g], gs[g + 1]):
+                    ri[ct] = gr[j]
+                    ct += 1
+
+        if kind == JOIN_OUTER:
+            for i in range(n_right):
+                if not gm[rg[i]]:
+                    ri[ct] = i
+                    ct += 1
+
+    return left_rep, right_idx, n_new + n_extra
+
+
+# Merge join on composite keys
+#
+# Used when both key arrays are sorted lexicographically. Both arrays are streamed once, so
+# no hash table is needed. The output follows the same contract as `hash_join`.
+
+cdef inline int _compare_keys(np.int64_t *a, np.int64_t *b, Py_ssize_t nk) nogil:
+    cdef Py_ssize_t j
+    for j in range(nk):
+        if a[j] < b[j]:
+            return -1
+        if a[j] > b[j]:
+            return 1
+    return 0
+
+
+def is_sorted(ndarray[np.int64_t, ndim=2] keys):
+    """
+    Whether the rows of the C-contiguous `keys` are in lexicographic order
+    """
     cdef:
-        Py_ssize_t i, n_right=len(right), n_left=len(left), n_new=0, idx, ct=0, cur_len
-        ndarray[np.int64_t] right_idx
-        ndarray[np.int64_t] left_rep = np.empty(n_left, dtype=np.int64)
-
-    right_idx_list = defaultdict(list)
-
-    for i in range(n_right):
-        right_idx_list[right[i]].append(i)
-
-    for i in range(n_left):
-        cur_len = len(right_idx_list[left[i]])
-        left_rep[i] = cur_len
-        n_new += cur_len
-
-    right_idx = np.empty(n_new, dtype='int64')
-
-    for i in range(n_left):
-        for idx in right_idx_list[left[i]]:
-            right_idx[ct] = idx
-            ct += 1
-
-    return left_rep, right_idx, n_new
-
-
-def join_bool_1d(ndarray[bint] left, ndarray[bint] right):
+        Py_ssize_t i, n = keys.shape[0], nk = keys.shape[1]
+        np.int64_t *k = <np.int64_t *> keys.data
+        bint result = True
+
+    with nogil:
+        for i in range(1, n):
+            if _compare_keys(k + (i - 1) * nk, k + i * nk, nk) > 0:
+                result = False
+                break
+    return result
+
+
+def merge_join(ndarray[np.int64_t, ndim=2] left_keys, ndarray[np.int64_t, ndim=2] right_keys,
+               str how):
+    """
+    Same as `hash_join` except both `left_keys` and `right_keys` must be sorted
+    """
     cdef:
-        Py_ssize_t i, n_right=len(right), n_left=len(left), n_new=0, idx, ct=0, cur_len
+        Py_ssize_t i = 0, j = 0, i2, j2, r, nk = left_keys.shape[1]
+        Py_ssize_t n_left = left_keys.shape[0], n_right = right_keys.shape[0]
+        Py_ssize_t n_new = 0, n_extra = 0, ct = 0
+        int c, kind
+        np.int64_t *lk = <np.int64_t *> left_keys.data
+        np.int64_t *rk = <np.int64_t *> right_keys.data
+        ndarray[np.int64_t] left_rep = np.zeros(n_left, dtype='int64')
+        ndarray[np.int64_t] left_match = np.empty(n_left, dtype='int64')
+        ndarray[np.int64_t] left_match_end = np.empty(n_left, dtype='int64')
+        ndarray[np.uint8_t, cast=True] right_matched = np.zeros(n_right, dtype='bool')
         ndarray[np.int64_t] right_idx
-        ndarray[np.int64_t] left_rep = np.empty(n_left, dtype=np.int64)
-
-    right_idx_list = defaultdict(list)
-
-    for i in range(n_right):
-        right_idx_list[right[i]].append(i)
-
-    for i in range(n_left):
-        cur_len = len(right_idx_list[left[i]])
-        left_rep[i] = cur_len
-        n_new += cur_len
-
-    right_idx = np.empty(n_new, dtype='int64')
-
-    for i in range(n_left):
-        for idx in right_idx_list[left[i]]:
-            right_idx[ct] = idx
-            ct += 1
-
-    return left_rep, right_idx, n_new
-
-# def join_str_2d(ndarray[object, ndim=2] left, ndarray[object, ndim=2] right,
-#                 list left_locs, list right_locs):
-#     cdef:
-#         Py_ssize_t i, j, nr_right=len(right), nr_left=len(left), nc_right = len(right_locs), nc_left = len(left_locs)
-#         Py_ssize_t n_new=0, idx, ct=0, cur_len
-#         ndarray[np.int64_t] right_idx
-#         ndarray[np.int64_t] left_rep = np.empty(nr_left, dtype=np.int64)
-#         list vals = list(range(nc_right))
-#         tuple t
-#         list temp_list
-#
-#     right_idx_list = defaultdict(list)
-#
-#     for i in range(nr_right):
-#         for j in range(nc_right):
-#             vals[j] = right[i, right_locs[j]]
-#         t = tuple(vals)
-#         right_idx_list[t].append(i)
-#
-#     for i in range(nr_left):
-#         for j in range(nc_left):
-#             vals[j] = left[i, left_locs[j]]
-#         t = tuple(vals)
-#         cur_len = len(right_idx_list[t])
-#         left_rep[i] = cur_len
-#         n_new += cur_len
-#
-#     right_idx = np.empty(n_new, dtype='int64')
-#
-#     for i in range(nr_left):
-#         for j in range(nc_left):
-#             vals[j] = left[i, left_locs[j]]
-#         t = tuple(vals)
-#         temp_list = right_idx_list[t]
-#         cur_len = len(temp_list)
-#         for j in range(cur_len):
-#             right_idx[ct] = temp_list[j]
-#             ct += 1
-#
-#     return left_rep, right_idx, n_new
-
-def join_str_2d(ndarray[object, ndim=2] left, ndarray[object, ndim=2] right,
-                list left_locs, list right_locs):
+        np.int64_t *lr = <np.int64_t *> left_rep.data
+        np.int64_t *lm = <np.int64_t *> left_match.data
+        np.int64_t *lme = <np.int64_t *> left_match_end.data
+        np.uint8_t *rm = <np.uint8_t *> right_matched.data
+        np.int64_t *ri
+
+    kind = _get_join_kind(how)
+
+    with nogil:
+        # find the range of matching right rows for each left row
+        while i < n_left:
+            while j < n_right and _compare_keys(rk + j * nk, lk + i * nk, nk) < 0:
+                j += 1
+
+            j2 = j
+            while j2 < n_right and _compare_keys(rk + j2 * nk, lk + i * nk, nk) == 0:
+                j2 += 1
+
+            # every left row with this key has the same matches
+            i2 = i
+            while i2 < n_left and _compare_keys(lk + i2 * nk, lk + i * nk, nk) == 0:
+                lm[i2] = j
+                lme[i2] = j2
+                i2 += 1
+
+            for r in range(j, j2):
+                rm[r] = True
+            i = i2
+            j = j2
+
+        for i in range(n_left):
+            if kind == JOIN_SEMI:
+                lr[i] = lme[i] > lm[i]
+            elif kind == JOIN_ANTI:
+                lr[i] = lme[i] == lm[i]
+            elif lme[i] == lm[i]:
+                lr[i] = kind != JOIN_INNER
+            else:
+                lr[i] = lme[i] - lm[i]
+            n_new += lr[i]
+
+        if kind == JOIN_OUTER:
+            for j in range(n_right):
+                if not rm[j]:
+                    n_extra += 1
+
+    if kind == JOIN_SEMI or kind == JOIN_ANTI:
+        return left_rep, np.empty(0, dtype='int64'), n_new
+
+    right_idx = np.empty(n_new + n_extra, dtype='int64')
+    ri = <np.int64_t *> right_idx.data
+    with nogil:
+        for i in range(n_left):
+            if lme[i] == lm[i]:
+                if kind != JOIN_INNER:
+                    ri[ct] = -1
+                    ct += 1
+            else:
+                for r in range(lm[i], lme[i]):
+                    ri[ct] = r
+                    ct += 1
+
+        if kind == JOIN_OUTER:
+            for j in range(n_right):
+                if not rm[j]:
+                    ri[ct] = j
+                    ct += 1
+
+    return left_rep, right_idx, n_new + n_extra
+
+
+# Gathering rows for the result of a join. Columns `locs` of `a` are written directly into the
+# pre-allocated Fortran-ordered output block beginning at column `start`. An index of -1
+# produces the missing value of the data type.
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def take_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+             ndarray[np.int64_t] idx, ndarray[np.int64_t, ndim=2] out, Py_ssize_t start):
     cdef:
-        Py_ssize_t i, j, nr_right=len(right), nr_left=len(left), nc_right = len(right_locs), nc_left = len(left_locs)
-        Py_ssize_t n_new=0, idx, ct=0, cur_len
-        ndarray[np.int64_t] right_idx
-        ndarray[np.int64_t] left_rep = np.empty(nr_left, dtype=np.int64)
-        list vals = list(range(nc_right))
-        tuple t
-        list temp_list
-        ndarray[object] left_tuples = np.empty(nr_left, dtype='O')
-        ndarray[object] right_tuples = np.empty(nr_right, dtype='O')
-        ndarray[object] right_arrays = np.empty(nr_right, dtype='O')
-
-    right_idx_list = defaultdict(list)
-
-    for i in range(nr_right):
-        for j in range(nc_right):
-            vals[j] = right[i, right_locs[j]]
-        t = tuple(vals)
-        right_tuples[i] = t
-
-    for i in range(nr_right):
-        right_arrays[i] = np.empty(len(right_tuples[i]), dtype='int64')
-
-    for i in range(nr_left):
-        for j in range(nc_left):
-            vals[j] = left[i, left_locs[j]]
-        t = tuple(vals)
-        cur_len = len(right_idx_list[t])
-        left_rep[i] = cur_len
-        n_new += cur_len
-        left_tuples[i] = t
-
-    right_idx = np.empty(n_new, dtype='int64')
-
-    for i in range(nr_left):
-        t = left_tuples[i]
-        temp_list = right_idx_list[t]
-        cur_len = len(temp_list)
-        for j in range(cur_len):
-            right_idx[ct] = temp_list[j]
-            ct += 1
-
-    return left_rep, right_idx, n_new
\ No newline at end of file
+        Py_ssize_t i, j, loc, n = len(idx), nc = len(locs)
+
+    with nogil:
+        for j in range(nc):
+            loc = locs[j]
+            for i in range(n):
+                if idx[i] == -1:
+                    out[i, start + j] = MIN_INT
+                else:
+                    out[i, start + j] = a[idx[i], loc]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def take_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+               ndarray[np.int64_t] idx, ndarray[np.float64_t, ndim=2] out, Py_ssize_t start):
+    cdef:
+        Py_ssize_t i, j, loc, n = len(idx), nc = len(locs)
+
+    with nogil:
+        for j in range(nc):
+            loc = locs[j]
+            for i in range(n):
+                if idx[i] == -1:
+                    out[i, start + j] = NAN
+                else:
+                    out[i, start + j] = a[idx[i], loc]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def take_bool(ndarray[np.int8_t, ndim=2] a, ndarray[np.int64_t] locs,
+              ndarray[np.int64_t] idx, ndarray[np.int8_t, ndim=2] out, Py_ssize_t start):
+    cdef:
+        Py_ssize_t i, j, loc, n = len(idx), nc = len(locs)
+
+    with nogil:
+        for j in range(nc):
+            loc = locs[j]
+            for i in range(n):
+                if idx[i] == -1:
+                    out[i, start + j] = -1
+                else:
+                    out[i, start + j] = a[idx[i], loc]
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def take_str(ndarray[np.uint32_t, ndim=2] a, ndarray[np.int64_t] locs,
+             ndarray[np.int64_t] idx, ndarray[np.uint32_t, ndim=2] out, Py_ssize_t start):
+    cdef:
+        Py_ssize_t i, j, loc, n = len(idx), nc = len(locs)
+
+    with nogil:
+        for j in range(nc):
+            loc = locs[j]
+            for i in range(n):
+                if idx[i] == -1:
+                    out[i, start + j] = 0
+                else:
+                    out[i, start + j] = a[idx[i], loc]
+
+
+def take_date(ndarray a, ndarray[np.int64_t] locs, ndarray[np.int64_t] idx, ndarray out,
+              Py_ssize_t start):
+    # NaT has the same bits as the minimum integer
+    take_int(a.view('int64'), locs, idx, out.view('int64'), start)
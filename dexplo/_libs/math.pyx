@@ -5,11 +5,11 @@ cimport numpy as np
 from numpy cimport ndarray
 from numpy import nan
 from cpython cimport set, list
-from libc.math cimport isnan, floor, ceil
+from libc.math cimport isnan, floor, ceil, sqrt, NAN, INFINITY
 import groupby as gb
 import math as _math
 from libc.stdlib cimport free, malloc
-from libc.string cimport memcpy
+from libc.string cimport memcpy, memset
 
 try:
     import bottleneck as bn
@@ -23,6 +23,26 @@ cdef:
     np.int64_t MAX_INT = np.iinfo(np.int64).max
     np.int64_t MIN_INT = np.iinfo(np.int64).min
 
+# The axis 0 branches of the reductions below loop without the GIL so that
+# DataFrame._stat_funcs_axis0 can run them on groups of columns in parallel
+
+cdef ndarray[np.uint8_t] _check_nans(hasnans, Py_ssize_t n):
+    # Whether each column must be checked for missing values. None means unknown.
+    if hasnans is None:
+        return np.ones(n, dtype='uint8')
+    return np.array([h is None or h for h in hasnans], dtype='uint8')
+
+cdef ndarray _codes_present(ndarray[np.uint32_t] codes, Py_ssize_t n):
+    # The reverse map of a string column can hold categories that no row uses any more
+    # so the reductions over categories only look at the codes that are present
+    cdef:
+        Py_ssize_t i
+        ndarray[np.uint8_t, cast=True] seen = np.zeros(n, dtype='bool')
+
+    for i in range(len(codes)):
+        seen[codes[i]] = True
+    return seen
+
 def min_max_int(ndarray[np.int64_t] a):
     cdef:
         Py_ssize_t i
@@ -79,17 +99,19 @@ def nunique_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map,
         Py_ssize_t i, j
         int nr, nc
         ndarray[np.int64_t] result
+        ndarray seen
         np.uint32_t cur_num
         bint has_missing
         set s
 
     if axis == 0:
-        nc = len(str_reverse_map)
+        nc = a.shape[1]
         result = np.empty(nc, dtype='int64')
         for i in range(nc):
-            result[i] = len(str_reverse_map[i])
-            if hasnans[i] and not count_na:
-                result[i] -= 1
+            seen = _codes_present(a[:, i], len(str_reverse_map[i]))
+            result[i] = seen[1:].sum()
+            if count_na and seen[0]:
+                result[i] += 1
     if axis == 1:
         nr = a.shape[0]
         nc = a.shape[1]
@@ -261,12 +283,15 @@ def sum_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1]
         ndarray[np.int64_t] total
+        np.int64_t *t
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.int64)
-        for i in range(nc):
-            for j in range(nr):
-                total[i] += arr[i * nr + j]
+        t = <np.int64_t*> total.data
+        with nogil:
+            for i in range(nc):
+                for j in range(nr):
+                    t[i] += arr[i * nr + j]
     else:
         total = np.zeros(nr, dtype=np.int64)
         for i in range(nr):
@@ -278,14 +303,18 @@ def sum_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, axis, **kwargs):
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1]
+        unsigned char *arr = <unsigned char*> a.data
         ndarray[np.int64_t] total
+        np.int64_t *t
 
     if axis == 0:
         total = np.zeros(nc, dtype='int64')
-        for i in range(nc):
-            for j in range(nr):
-                if a[j, i]:
-                    total[i] += 1
+        t = <np.int64_t*> total.data
+        with nogil:
+            for i in range(nc):
+                for j in range(nr):
+                    if arr[i * nr + j]:
+                        t[i] += 1
     else:
         total = np.zeros(nr, dtype='int64')
         for i in range(nr):
@@ -301,17 +330,24 @@ def sum_float(ndarray[np.float64_t, ndim=2] a, axis, hasnans, **kwargs):
         int nr = a.shape[0], nc = a.shape[1]
         long idx
         ndarray[np.float64_t] total
+        ndarray[np.uint8_t] check_nans
+        double *t
+        unsigned char *cn
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.float64)
-        for i in range(nc):
-            if hasnans[i] is None or hasnans[i]:
-                for j in range(nr):
-                    if not isnan(arr[i * nr + j]):
-                        total[i] += arr[i * nr + j]
-            else:
-                for j in range(nr):
-                    total[i] += arr[i * nr + j]
+        check_nans = _check_nans(hasnans, nc)
+        t = <double*> total.data
+        cn = <unsigned char*> check_nans.data
+        with nogil:
+            for i in range(nc):
+                if cn[i]:
+                    for j in range(nr):
+                        if not isnan(arr[i * nr + j]):
+                            t[i] += arr[i * nr + j]
+                else:
+                    for j in range(nr):
+                        t[i] += arr[i * nr + j]
 
     else:
         total = np.zeros(nr, dtype=np.float64)
@@ -331,7 +367,7 @@ def sum_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans)
         np.uint32_t nr = a.shape[0], nc = a.shape[1], ct, cur_num
         ndarray[np.uint32_t] arr
         dict new_str_reverse_map = {}
-        list cur_srm
+        object cur_srm
         str cur_val
         bint has_one_string
 
@@ -616,14 +652,20 @@ def max_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         int nr = a.shape[0], nc = a.shape[1]
         long *arr = <long*> a.data
         ndarray[np.int64_t] amax
+        np.int64_t *m
     
-    if axis ==0:
+    if axis == 0 and nr == 0:
+        # no rows so every column is missing
+        return np.full(nc, MIN_INT, dtype='int64')
+    elif axis == 0:
         amax = np.empty(nc, dtype='int64')
-        for i in range(nc):
-            amax[i] = a[0, i]
-            for j in range(nr):
-                if arr[i * nr + j] > amax[i]:
-                    amax[i] = arr[i * nr + j]
+        m = <np.int64_t*> amax.data
+        with nogil:
+            for i in range(nc):
+                m[i] = arr[i * nr]
+                for j in range(nr):
+                    if arr[i * nr + j] > m[i]:
+                        m[i] = arr[i * nr + j]
     else:
         amax = a[:, 0].copy('F')
         for i in range(nc):
@@ -638,14 +680,20 @@ def min_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         int nr = a.shape[0], nc = a.shape[1]
         long *arr = <long*> a.data
         ndarray[np.int64_t] amin
+        np.int64_t *m
 
-    if axis == 0:
+    if axis == 0 and nr == 0:
+        # no rows so every column is missing
+        return np.full(nc, MIN_INT, dtype='int64')
+    elif axis == 0:
         amin = np.empty(nc, dtype='int64')
-        for i in range(nc):
-            amin[i] = a[0, i]
-            for j in range(nr):
-                if arr[i * nr + j] < amin[i]:
-                    amin[i] = arr[i * nr + j]
+        m = <np.int64_t*> amin.data
+        with nogil:
+            for i in range(nc):
+                m[i] = arr[i * nr]
+                for j in range(nr):
+                    if arr[i * nr + j] < m[i]:
+                        m[i] = arr[i * nr + j]
     else:
         amin = a[:, 0].copy('F')
         for i in range(nc):
@@ -654,7 +702,6 @@ def min_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
                     amin[j] = arr[i * nr + j]
     return amin
 
-
 def max_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, axis, **kwargs):
     cdef:
         Py_ssize_t i, j
@@ -707,24 +754,34 @@ def max_float(ndarray[np.float64_t, ndim=2] a, axis, hasnans):
         int nr = a.shape[0], nc = a.shape[1]
         double *arr = <double*> a.data
         ndarray[np.float64_t] amax
-
-    if axis == 0:
+        ndarray[np.uint8_t] check_nans
+        double *m
+        unsigned char *cn
+
+    if axis == 0 and nr == 0:
+        # no rows so every column is missing
+        return np.full(nc, nan, dtype=np.float64)
+    elif axis == 0:
         amax = np.full(nc, nan, dtype=np.float64)
-        for i in range(nc):
-            if hasnans[i] is None or hasnans[i]:
-                k = 0
-                while isnan(arr[i * nr + k]) and k < nr - 1:
-                    k += 1
-                amax[i] = arr[i * nr + k]
-                for j in range(k, nr):
-                    if not isnan(arr[i * nr + j]):
-                        if arr[i * nr + j] > amax[i]:
-                            amax[i] = arr[i * nr + j]
-            else:
-                amax[i] = arr[i * nr]
-                for j in range(nr):
-                    if arr[i * nr + j] > amax[i]:
-                        amax[i] = arr[i * nr + j]
+        check_nans = _check_nans(hasnans, nc)
+        m = <double*> amax.data
+        cn = <unsigned char*> check_nans.data
+        with nogil:
+            for i in range(nc):
+                if cn[i]:
+                    k = 0
+                    while isnan(arr[i * nr + k]) and k < nr - 1:
+                        k += 1
+                    m[i] = arr[i * nr + k]
+                    for j in range(k, nr):
+                        if not isnan(arr[i * nr + j]):
+                            if arr[i * nr + j] > m[i]:
+                                m[i] = arr[i * nr + j]
+                else:
+                    m[i] = arr[i * nr]
+                    for j in range(nr):
+                        if arr[i * nr + j] > m[i]:
+                            m[i] = arr[i * nr + j]
     else:
         amax = np.full(nr, nan, dtype=np.float64)
         if hasnans.sum() > 0:
@@ -750,24 +807,34 @@ def min_float(ndarray[np.float64_t, ndim=2] a, axis, hasnans):
         int nr = a.shape[0], nc = a.shape[1]
         double *arr = <double*> a.data
         ndarray[np.float64_t] amin
-
-    if axis == 0:
+        ndarray[np.uint8_t] check_nans
+        double *m
+        unsigned char *cn
+
+    if axis == 0 and nr == 0:
+        # no rows so every column is missing
+        return np.full(nc, nan, dtype=np.float64)
+    elif axis == 0:
         amin = np.full(nc, nan, dtype=np.float64)
-        for i in range(nc):
-            if hasnans[i] is None or hasnans[i]:
-                k = 0
-                while isnan(arr[i * nr + k]) and k < nr - 1:
-                    k += 1
-                amin[i] = arr[i * nr + k]
-                for j in range(k, nr):
-                    if not isnan(arr[i * nr + j]):
-                        if arr[i * nr + j] < amin[i]:
-                            amin[i] = arr[i * nr + j]
-            else:
-                amin[i] = arr[i * nr]
-                for j in range(nr):
-                    if arr[i * nr + j] < amin[i]:
-                        amin[i] = arr[i * nr + j]
+        check_nans = _check_nans(hasnans, nc)
+        m = <double*> amin.data
+        cn = <unsigned char*> check_nans.data
+        with nogil:
+            for i in range(nc):
+                if cn[i]:
+                    k = 0
+                    while isnan(arr[i * nr + k]) and k < nr - 1:
+                        k += 1
+                    m[i] = arr[i * nr + k]
+                    for j in range(k, nr):
+                        if not isnan(arr[i * nr + j]):
+                            if arr[i * nr + j] < m[i]:
+                                m[i] = arr[i * nr + j]
+                else:
+                    m[i] = arr[i * nr]
+                    for j in range(nr):
+                        if arr[i * nr + j] < m[i]:
+                            m[i] = arr[i * nr + j]
     else:
         amin = np.full(nr, nan, dtype=np.float64)
         if hasnans.sum() > 0:
@@ -791,10 +858,11 @@ def max_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
     cdef:
         Py_ssize_t i, j, k
         int nr = a.shape[0], nc = a.shape[1], num_vals, cur_code
-        list cur_srm
+        object cur_srm
         str cur_max_min, cur_val
         dict new_str_reverse_map = {}, cur_sm = {}
         ndarray[np.uint32_t, ndim=2] codes
+        ndarray seen
         bint has_one_string
 
     if axis == 0:
@@ -807,11 +875,16 @@ def max_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
                 codes[0, i] = 0
                 continue
             else:
-                cur_max_min = cur_srm[1]
-                for j in range(2, num_vals):
+                seen = _codes_present(a[:, i], num_vals)
+                cur_max_min = None
+                for j in range(1, num_vals):
                     cur_val = cur_srm[j]
-                    if cur_val > cur_max_min:
+                    if seen[j] and (cur_max_min is None or cur_val > cur_max_min):
                         cur_max_min = cur_val
+                if cur_max_min is None:
+                    new_str_reverse_map[i] = [False]
+                    codes[0, i] = 0
+                    continue
             new_str_reverse_map[i] = [False, cur_max_min]
     else:
         codes = np.zeros((nr, 1), dtype='uint32', order='F')
@@ -846,10 +919,11 @@ def min_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
     cdef:
         Py_ssize_t i, j, k
         int nr = a.shape[0], nc = a.shape[1], num_vals, cur_code
-        list cur_srm
+        object cur_srm
         str cur_max_min, cur_val
         dict new_str_reverse_map = {}, cur_sm = {}
         ndarray[np.uint32_t, ndim=2] codes
+        ndarray seen
         bint has_one_string
 
     if axis == 0:
@@ -862,11 +936,16 @@ def min_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
                 codes[0, i] = 0
                 continue
             else:
-                cur_max_min = cur_srm[1]
-                for j in range(2, num_vals):
+                seen = _codes_present(a[:, i], num_vals)
+                cur_max_min = None
+                for j in range(1, num_vals):
                     cur_val = cur_srm[j]
-                    if cur_val < cur_max_min:
+                    if seen[j] and (cur_max_min is None or cur_val < cur_max_min):
                         cur_max_min = cur_val
+                if cur_max_min is None:
+                    new_str_reverse_map[i] = [False]
+                    codes[0, i] = 0
+                    continue
             new_str_reverse_map[i] = [False, cur_max_min]
     else:
         codes = np.zeros((nr, 1), dtype='uint32', order='F')
@@ -903,13 +982,16 @@ def mean_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         int nr = a.shape[0], nc = a.shape[1]
         long *arr = <long*> a.data
         ndarray[np.int64_t] total
+        np.int64_t *t
 
     if axis == 0:
         #return a.mean(0)
         total = np.zeros(nc, dtype=np.int64)
-        for i in range(nc):
-            for j in range(nr):
-                total[i] += arr[i * nr + j]
+        t = <np.int64_t*> total.data
+        with nogil:
+            for i in range(nc):
+                for j in range(nr):
+                    t[i] += arr[i * nr + j]
         return total / nr
     else:
         #return a.mean(1)
@@ -925,12 +1007,15 @@ def mean_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, axis, **kwargs):
         int nr = a.shape[0], nc = a.shape[1]
         unsigned char *arr = <unsigned char*> a.data
         ndarray[np.int64_t] total
+        np.int64_t *t
 
     if axis == 0:
         total = np.zeros(nc, dtype='int64')
-        for i in range(nc):
-            for j in range(nr):
-                total[i] += arr[i * nr + j]
+        t = <np.int64_t*> total.data
+        with nogil:
+            for i in range(nc):
+                for j in range(nr):
+                    t[i] += arr[i * nr + j]
         return total / nr
     else:
         total = np.zeros(nr, dtype='int64')
@@ -945,24 +1030,31 @@ def mean_float(ndarray[np.float64_t, ndim=2] a, axis, hasnans):
         int nr = a.shape[0], nc = a.shape[1], ct = 0
         double *arr = <double*> a.data
         ndarray[np.float64_t] total
+        ndarray[np.uint8_t] check_nans
+        double *t
+        unsigned char *cn
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.float64)
-        for i in range(nc):
-            if hasnans[i] is None or hasnans[i]:
-                ct = 0
-                for j in range(nr):
-                    if not isnan(arr[i * nr + j]):
-                        total[i] += arr[i * nr + j]
-                        ct += 1
-                if ct != 0:
-                    total[i] = total[i] / ct
+        check_nans = _check_nans(hasnans, nc)
+        t = <double*> total.data
+        cn = <unsigned char*> check_nans.data
+        with nogil:
+            for i in range(nc):
+                if cn[i]:
+                    ct = 0
+                    for j in range(nr):
+                        if not isnan(arr[i * nr + j]):
+                            t[i] += arr[i * nr + j]
+                            ct += 1
+                    if ct != 0:
+                        t[i] = t[i] / ct
+                    else:
+                        t[i] = NAN
                 else:
-                    total[i] = nan
-            else:
-                for j in range(nr):
-                    total[i] += arr[i * nr + j]
-                total[i] = total[i] / nr
+                    for j in range(nr):
+                        t[i] += arr[i * nr + j]
+                    t[i] = t[i] / nr
     else:
         total = np.zeros(nr, dtype=np.float64)
         for i in range(nr):
@@ -982,6 +1074,9 @@ def median_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         Py_ssize_t i, nr = a.shape[0], nc = a.shape[1]
         np.float64_t first, second
         ndarray[np.float64_t] result
+        np.int64_t *arr = <np.int64_t*> a.data
+        np.int64_t *buf
+        double *res
 
     if axis == 0:
         result = np.empty(nc, dtype='float64')
@@ -989,14 +1084,23 @@ def median_int(ndarray[np.int64_t, ndim=2] a, axis, **kwargs):
         result = np.empty(nr, dtype='float64')
 
     if axis == 0:
-        if nr % 2 == 1:
+        # select within a copy of each column so that the data is left untouched
+        buf = <np.int64_t*> malloc(max(nr, 1) * sizeof(np.int64_t))
+        if buf == NULL:
+            raise MemoryError()
+        res = <double*> result.data
+        with nogil:
             for i in range(nc):
-                result[i] = quick_select_int2(a[:, i], nr, nr // 2)
-        else:
-            for i in range(nc):
-                first = quick_select_int2(a[:, i], nr, nr // 2 - 1)
-                second = quick_select_int2(a[:, i], nr, nr // 2)
-                result[i] = (first + second) / 2
+                memcpy(buf, arr + i * nr, nr * sizeof(np.int64_t))
+                if nr == 0:
+                    res[i] = NAN
+                elif nr % 2 == 1:
+                    res[i] = _quick_select_int(buf, nr, nr // 2)
+                else:
+                    first = _quick_select_int(buf, nr, nr // 2 - 1)
+                    second = _quick_select_int(buf, nr, nr // 2)
+                    res[i] = (first + second) / 2
+        free(buf)
     else:
         if nc % 2 == 1:
             for i in range(nr):
@@ -1049,28 +1153,32 @@ def var_float(ndarray[double, ndim=2] a, axis, int ddof, hasnans):
         int ct = 0, n = len(a), nr = a.shape[0], nc = a.shape[1]
         ndarray[np.float64_t] total
         double K = nan, Ex = 0, Ex2 = 0
+        double *t
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.float64)
-        for i in range(nc):
-            i1 = 0
-            K = x[i * nr + i1]
-            while isnan(K):
-                i1 += 1
-                K = x[i * nr + i1]
-            Ex = 0
-            Ex2 = 0
-            ct = 0
-            for j in range(i1, nr):
-                if isnan(x[i * nr + j]):
-                    continue
-                ct += 1
-                Ex += x[i * nr + j] - K
-                Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
-            if ct <= ddof:
-                total[i] = nan
-            else:
-                total[i] = (Ex2 - (Ex * Ex) / ct) / (ct - ddof)
+        t = <double*> total.data
+        with nogil:
+            for i in range(nc):
+                # shift by the first non-missing value for numerical stability
+                i1 = 0
+                while i1 < nr and isnan(x[i * nr + i1]):
+                    i1 += 1
+                if i1 < nr:
+                    K = x[i * nr + i1]
+                Ex = 0
+                Ex2 = 0
+                ct = 0
+                for j in range(i1, nr):
+                    if isnan(x[i * nr + j]):
+                        continue
+                    ct += 1
+                    Ex += x[i * nr + j] - K
+                    Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
+                if ct <= ddof:
+                    t[i] = NAN
+                else:
+                    t[i] = (Ex2 - (Ex * Ex) / ct) / (ct - ddof)
     else:
         total = np.zeros(nr, dtype=np.float64)
         for i in range(nr):
@@ -1102,21 +1210,24 @@ def var_int(ndarray[np.int64_t, ndim=2] a, axis, int ddof, hasnans):
         long *x = <long*> a.data
         ndarray[np.float64_t] total
         double K, Ex = 0, Ex2 = 0
+        double *t
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.float64)
-        for i in range(nc):
-            if nr <= ddof:
-                total[i] = nan
-                continue
-            K = x[i * nr]
-            Ex = 0
-            Ex2 = 0
-            for j in range(nr):
-                Ex += x[i * nr + j] - K
-                Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
-            
-            total[i] = (Ex2 - (Ex * Ex) / nr) / (nr - ddof)
+        t = <double*> total.data
+        with nogil:
+            for i in range(nc):
+                if nr <= ddof:
+                    t[i] = NAN
+                    continue
+                K = x[i * nr]
+                Ex = 0
+                Ex2 = 0
+                for j in range(nr):
+                    Ex += x[i * nr + j] - K
+                    Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
+
+                t[i] = (Ex2 - (Ex * Ex) / nr) / (nr - ddof)
     else:
         total = np.zeros(nr, dtype=np.float64)
         for i in range(nr):
@@ -1137,24 +1248,27 @@ def var_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, axis, int ddof, hasnans):
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1]
-        unsigned char *x = <unsigned char *> a.data
+        unsigned char *x = <unsigned char*> a.data
         ndarray[np.float64_t] total
         double K, Ex = 0, Ex2 = 0
+        double *t
 
     if axis == 0:
         total = np.zeros(nc, dtype=np.float64)
-        for i in range(nc):
-            if nr <= ddof:
-                total[i] = nan
-                continue
-            K = x[i * nr]
-            Ex = 0
-            Ex2 = 0
-            for j in range(nr):
-                Ex += x[i * nr + j] - K
-                Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
-            
-            total[i] = (Ex2 - (Ex * Ex) / nr) / (nr - ddof)
+        t = <double*> total.data
+        with nogil:
+            for i in range(nc):
+                if nr <= ddof:
+                    t[i] = NAN
+                    continue
+                K = x[i * nr]
+                Ex = 0
+                Ex2 = 0
+                for j in range(nr):
+                    Ex += x[i * nr + j] - K
+                    Ex2 += (x[i * nr + j] - K) * (x[i * nr + j] - K)
+
+                t[i] = (Ex2 - (Ex * Ex) / nr) / (nr - ddof)
     else:
         total = np.zeros(nr, dtype=np.float64)
         for i in range(nr):
@@ -1250,7 +1364,8 @@ def any_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], num_vals
-        list cur_srm
+        object cur_srm
+        ndarray seen
         ndarray[np.uint8_t, cast=True] result
 
     if axis == 0:
@@ -1258,8 +1373,9 @@ def any_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
         for i in range(nc):
             cur_srm = str_reverse_map[i]
             num_vals = len(cur_srm)
+            seen = _codes_present(a[:, i], num_vals)
             for j in range(1, num_vals):
-                if cur_srm[j] != '':
+                if seen[j] and cur_srm[j] != '':
                     result[i] = True
                     break
     else:
@@ -1340,7 +1456,8 @@ def all_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], num_vals
-        list cur_srm
+        object cur_srm
+        ndarray seen
         ndarray[np.uint8_t, cast=True] result
 
     if axis == 0:
@@ -1348,8 +1465,9 @@ def all_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnans,
         for i in range(nc):
             cur_srm = str_reverse_map[i]
             num_vals = len(cur_srm)
+            seen = _codes_present(a[:, i], num_vals)
             for j in range(1, num_vals):
-                if cur_srm[j] == '':
+                if seen[j] and cur_srm[j] == '':
                     result[i] = False
                     break
     else:
@@ -1539,9 +1657,10 @@ def argmax_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
     cdef:
         Py_ssize_t i, j, k
         int nr = a.shape[0], nc = a.shape[1], num_vals
-        list cur_srm
+        object cur_srm
         np.uint32_t max_code
         str cur_max_min
+        ndarray seen
         ndarray[np.int64_t] result
 
     if axis == 0:
@@ -1553,11 +1672,12 @@ def argmax_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
                 result[i] = np.nan
                 continue
             else:
-                cur_max_min = cur_srm[1]
-                max_code = 1
-                for j in range(2, num_vals):
+                seen = _codes_present(a[:, i], num_vals)
+                cur_max_min = None
+                max_code = 0
+                for j in range(1, num_vals):
                     cur_val = cur_srm[j]
-                    if cur_val > cur_max_min:
+                    if seen[j] and (cur_max_min is None or cur_val > cur_max_min):
                         cur_max_min = cur_val
                         max_code = j
             for j in range(nr):
@@ -1573,9 +1693,10 @@ def argmin_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
     cdef:
         Py_ssize_t i, j, k
         int nr = a.shape[0], nc = a.shape[1], num_vals
-        list cur_srm
+        object cur_srm
         np.uint32_t max_code
         str cur_max_min
+        ndarray seen
         ndarray[np.int64_t] result
 
     if axis == 0:
@@ -1587,11 +1708,12 @@ def argmin_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
                 result[i] = np.nan
                 continue
             else:
-                cur_max_min = cur_srm[1]
-                max_code = 1
-                for j in range(2, num_vals):
+                seen = _codes_present(a[:, i], num_vals)
+                cur_max_min = None
+                max_code = 0
+                for j in range(1, num_vals):
                     cur_val = cur_srm[j]
-                    if cur_val < cur_max_min:
+                    if seen[j] and (cur_max_min is None or cur_val < cur_max_min):
                         cur_max_min = cur_val
                         max_code = j
             for j in range(nr):
@@ -1624,15 +1746,18 @@ def count_float(ndarray[np.float64_t, ndim=2] a, axis, hasnans):
         double *arr = <double*> a.data
         long ct
         ndarray[np.int64_t] result
+        np.int64_t *res
 
     if axis == 0:
         result = np.zeros(nc, dtype=np.int64)
-        for i in range(nc):
-            ct = 0
-            for j in range(nr):
-                if not isnan(arr[i * nr + j]):
-                    ct += 1
-            result[i] = ct
+        res = <np.int64_t*> result.data
+        with nogil:
+            for i in range(nc):
+                ct = 0
+                for j in range(nr):
+                    if not isnan(arr[i * nr + j]):
+                        ct += 1
+                res[i] = ct
     else:
         result = np.zeros(nr, dtype=np.int64)
         for i in range(nr):
@@ -1647,7 +1772,7 @@ def count_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasnan
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], num_vals
-        list cur_srm
+        object cur_srm
         ndarray[np.int64_t] result
 
     if axis == 0:
@@ -1863,8 +1988,8 @@ def cummax_bool(ndarray[np.uint8_t, cast=True, ndim=2] a, axis, hasnans):
         ndarray[np.uint8_t, ndim=2, cast=True] b
 
     if axis == 0:
+        b = np.empty((nr, nc), dtype='bool', order='F')
         for i in range(nc):
-            b = np.empty((nr, nc), dtype='bool')
             amax = False
             for j in range(nr):
                 if amax == True:
@@ -1875,8 +2000,8 @@ def cummax_bool(ndarray[np.uint8_t, cast=True, ndim=2] a, axis, hasnans):
                 else:
                     b[j, i] = False
     else:
+        b = np.empty((nr, nc), dtype='bool', order='F')
         for i in range(nr):
-            b = np.empty((nr, nc), dtype='bool')
             amax = False
             for j in range(nc):
                 if amax == True:
@@ -1896,8 +2021,8 @@ def cummin_bool(ndarray[np.uint8_t, cast=True, ndim=2] a, axis, hasnans):
         ndarray[np.uint8_t, ndim=2, cast=True] b
 
     if axis == 0:
+        b = np.empty((nr, nc), dtype='bool', order='F')
         for i in range(nc):
-            b = np.empty((nr, nc), dtype='bool')
             amin = True
             for j in range(nr):
                 if not amin:
@@ -1908,8 +2033,8 @@ def cummin_bool(ndarray[np.uint8_t, cast=True, ndim=2] a, axis, hasnans):
                 else:
                     b[j, i] = True
     else:
+        b = np.empty((nr, nc), dtype='bool', order='F')
         for i in range(nr):
-            b = np.empty((nr, nc), dtype='bool')
             amin = True
             for j in range(nc):
                 if not amin:
@@ -1925,7 +2050,7 @@ def cummax_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], k, cur_code
-        list cur_srm
+        object cur_srm
         np.uint32_t cur_max_code
         str cur_max, cur_val
         dict new_str_reverse_map = {}
@@ -1967,7 +2092,7 @@ def cummin_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], k, cur_code
-        list cur_srm
+        object cur_srm
         np.uint32_t cur_max_code
         str cur_max, cur_val
         dict new_str_reverse_map = {}
@@ -2077,13 +2202,11 @@ def cumsum_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1], ct, cur_code
-        list cur_srm
+        object cur_srm
         ndarray[np.uint32_t, ndim=2] result = np.empty((nr, nc), 'uint32', 'F')
         str cur_max, cur_val, total
         dict new_str_reverse_map = {}
         list new_srm
-        bint contains_nan, contains_empty_str
-        int empty_str_loc, nan_str_loc
 
     if axis == 0:
         for i in range(nc):
@@ -2092,31 +2215,26 @@ def cumsum_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, axis, hasna
             new_srm = [False]
             new_str_reverse_map[i] = new_srm
             ct = 1
-            contains_nan = False
-            contains_empty_str = False
-            empty_str_loc = 0
-            if hasnans[i] is None or hasnans[i]:
-                for j in range(nr):
-                    cur_code = a[j, i]
-                    if cur_code != 0:
-                        cur_val = cur_srm[cur_code]
-                        if cur_val == '':
-                            if not contains_empty_str:
-                                result[j, i] = ct
-                                contains_empty_str = True
-                                cur_srm.append('')
-                                ct += 1
-                            else:
-                                result[j, i] = ct - 1
-                        else:
+            for j in range(nr):
+                cur_code = a[j, i]
+                if cur_code != 0:
+                    cur_val = cur_srm[cur_code]
+                    if cur_val == '':
+                        # the total is unchanged. `cur_srm` may be shared with other
+                        # DataFrames so only `new_srm` grows
+                        if ct == 1:
                             result[j, i] = ct
-                            total += cur_val
                             new_srm.append(total)
                             ct += 1
+                        else:
+                            result[j, i] = ct - 1
                     else:
-                        result[j, i] = 0
-            else:
-                pass
+                        result[j, i] = ct
+                        total += cur_val
+                        new_srm.append(total)
+                        ct += 1
+                else:
+                    result[j, i] = 0
     else:
         pass
     return result, new_str_reverse_map
@@ -2194,7 +2312,7 @@ def isna_str(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map, hasnans, **kw
     cdef:
         Py_ssize_t i, j
         int nr = a.shape[0], nc = a.shape[1]
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         if hasnans[i] is None or hasnans[i]:
@@ -2283,6 +2401,250 @@ def quantile_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, axis, double q,
                   ndarray[np.uint8_t, cast=True] hasnans):
     return np.percentile(a, q * 100, axis)
 
+cdef double _select_float(double *arr, Py_ssize_t lo, Py_ssize_t hi, Py_ssize_t k) nogil:
+    # Quick select of the kth smallest value of arr[lo:hi]. Afterwards, every value before
+    # k is at most arr[k] and every value after it at least arr[k].
+    cdef:
+        Py_ssize_t i, ir, j, l, mid
+        double a, temp
+
+    l = lo
+    ir = hi - 1
+    while True:
+        if ir <= l + 1:
+            if (ir == l + 1) and (arr[ir] < arr[l]):
+                temp = arr[l]
+                arr[l] = arr[ir]
+                arr[ir] = temp
+            return arr[k]
+        else:
+            mid = (l + ir) // 2
+
+            temp = arr[mid]
+            arr[mid] = arr[l + 1]
+            arr[l + 1] = temp
+
+            if arr[l] > arr[ir]:
+                temp = arr[l]
+                arr[l] = arr[ir]
+                arr[ir] = temp
+
+            if arr[l + 1] > arr[ir]:
+                temp = arr[l + 1]
+                arr[l + 1] = arr[ir]
+                arr[ir] = temp
+
+            if arr[l] > arr[l + 1]:
+                temp = arr[l]
+                arr[l] = arr[l + 1]
+                arr[l + 1] = temp
+
+            i = l + 1
+            j = ir
+
+            a = arr[l + 1]
+            while True:
+                i += 1
+                while arr[i] < a:
+                    i += 1
+
+                j -= 1
+                while arr[j] > a:
+                    j -= 1
+
+                if j < i:
+                    break
+
+                temp = arr[i]
+                arr[i] = arr[j]
+                arr[j] = temp
+
+            arr[l + 1] = arr[j]
+            arr[j] = a
+            if j >= k:
+                ir = j - 1
+            if j <= k:
+                l = i
+
+
+cdef void _describe_finish(double *vals, Py_ssize_t ct, double mean, double m2, double low,
+                           double high, double *pcts, np.int64_t *pct_order, Py_ssize_t nq,
+                           double *out) nogil:
+    # Fills `out` with the count, mean, std, min, max and then the percentiles of the `ct`
+    # non-missing values in `vals`. The percentiles are selected in increasing order, each
+    # one only searching the values above the previous one.
+    cdef:
+        Py_ssize_t i, f, c, lo = 0
+        double k, v_low, v_high
+
+    out[0] = ct
+    if ct == 0:
+        for i in range(1, 5 + nq):
+            out[i] = NAN
+        return
+
+    out[1] = mean
+    out[2] = sqrt(m2 / (ct - 1)) if ct > 1 else NAN
+    out[3] = low
+    out[4] = high
+    for i in range(nq):
+        k = (ct - 1) * pcts[pct_order[i]]
+        f = <Py_ssize_t> floor(k)
+        c = <Py_ssize_t> ceil(k)
+        v_low = _select_float(vals, lo, ct, f)
+        lo = f
+        if c != f:
+            v_high = _select_float(vals, f + 1, ct, c)
+            lo = c
+            out[5 + pct_order[i]] = v_low * (c - k) + v_high * (k - f)
+        else:
+            out[5 + pct_order[i]] = v_low
+
+
+def describe_float(ndarray[np.float64_t, ndim=2] a, hasnans, ndarray[np.float64_t] percentiles,
+                   **kwargs):
+    """
+    Summary statistics of each column from a single pass over the data followed by one
+    selection per percentile on a copy of the non-missing values.
+
+    Returns
+    -------
+    A Fortran array with one column per column of `a` and rows of the count, mean, std, min,
+    max and then each of the percentiles.
+    """
+    cdef:
+        Py_ssize_t i, j, ct, nr = a.shape[0], nc = a.shape[1], nq = len(percentiles)
+        double *arr = <double*> a.data
+        double *pcts = <double*> percentiles.data
+        double x, delta, mean, m2, low, high
+        ndarray[np.int64_t] pct_order = np.argsort(percentiles, kind='mergesort')
+        np.int64_t *order = <np.int64_t*> pct_order.data
+        ndarray[np.float64_t, ndim=2] result = np.empty((5 + nq, nc), dtype='float64',
+                                                         order='F')
+        double *res = <double*> result.data
+        double *vals = <double*> malloc(max(nr, 1) * sizeof(double))
+
+    if vals == NULL:
+        raise MemoryError()
+
+    with nogil:
+        for i in range(nc):
+            ct = 0
+            mean = 0
+            m2 = 0
+            low = INFINITY
+            high = -INFINITY
+            for j in range(nr):
+                x = arr[i * nr + j]
+                if isnan(x):
+                    continue
+                vals[ct] = x
+                ct += 1
+                delta = x - mean
+                mean += delta / ct
+                m2 += delta * (x - mean)
+                if x < low:
+                    low = x
+                if x > high:
+                    high = x
+            _describe_finish(vals, ct, mean, m2, low, high, pcts, order, nq,
+                             res + i * (5 + nq))
+    free(vals)
+    return result
+
+
+def describe_int(ndarray[np.int64_t, ndim=2] a, hasnans, ndarray[np.float64_t] percentiles,
+                 **kwargs):
+    """
+    Same as describe_float for integer columns, which have no missing values
+    """
+    cdef:
+        Py_ssize_t i, j, nr = a.shape[0], nc = a.shape[1], nq = len(percentiles)
+        np.int64_t *arr = <np.int64_t*> a.data
+        double *pcts = <double*> percentiles.data
+        double x, delta, mean, m2, low, high
+        ndarray[np.int64_t] pct_order = np.argsort(percentiles, kind='mergesort')
+        np.int64_t *order = <np.int64_t*> pct_order.data
+        ndarray[np.float64_t, ndim=2] result = np.empty((5 + nq, nc), dtype='float64',
+                                                         order='F')
+        double *res = <double*> result.data
+        double *vals = <double*> malloc(max(nr, 1) * sizeof(double))
+
+    if vals == NULL:
+        raise MemoryError()
+
+    with nogil:
+        for i in range(nc):
+            mean = 0
+            m2 = 0
+            low = INFINITY
+            high = -INFINITY
+            for j in range(nr):
+                x = arr[i * nr + j]
+                vals[j] = x
+                delta = x - mean
+                mean += delta / (j + 1)
+                m2 += delta * (x - mean)
+                if x < low:
+                    low = x
+                if x > high:
+                    high = x
+            _describe_finish(vals, nr, mean, m2, low, high, pcts, order, nq,
+                             res + i * (5 + nq))
+    free(vals)
+    return result
+
+
+def describe_codes(ndarray[np.uint32_t, ndim=2] a, ndarray[np.int64_t] n_codes, **kwargs):
+    """
+    Summary of columns of category codes where 0 is missing. `n_codes` is the number of
+    codes of each column including the missing code.
+
+    Returns
+    -------
+    A Fortran int64 array with one column per column of `a` and rows of the count, number of
+    unique values, most frequent code (the lowest on ties and 0 when all are missing) and
+    its frequency
+    """
+    cdef:
+        Py_ssize_t i, j, nr = a.shape[0], nc = a.shape[1], max_codes = 1
+        np.uint32_t *arr = <np.uint32_t*> a.data
+        np.int64_t *ncodes = <np.int64_t*> n_codes.data
+        np.int64_t *counts
+        np.int64_t unique, top, freq
+        ndarray[np.int64_t, ndim=2] result = np.empty((4, nc), dtype='int64', order='F')
+        np.int64_t *res = <np.int64_t*> result.data
+
+    for i in range(nc):
+        if ncodes[i] > max_codes:
+            max_codes = ncodes[i]
+
+    counts = <np.int64_t*> malloc(max_codes * sizeof(np.int64_t))
+    if counts == NULL:
+        raise MemoryError()
+
+    with nogil:
+        for i in range(nc):
+            memset(counts, 0, ncodes[i] * sizeof(np.int64_t))
+            for j in range(nr):
+                counts[arr[i * nr + j]] += 1
+
+            unique = 0
+            top = 0
+            freq = 0
+            for j in range(1, ncodes[i]):
+                if counts[j] > 0:
+                    unique += 1
+                    if counts[j] > freq:
+                        top = j
+                        freq = counts[j]
+            res[i * 4] = nr - counts[0]
+            res[i * 4 + 1] = unique
+            res[i * 4 + 2] = top
+            res[i * 4 + 3] = freq
+    free(counts)
+    return result
+
 # def fillna_float(ndarray[np.float64_t, ndim=2] a, int limit, np.float64_t value):
 #         i, j, k, ct
 #         nr = a.shape[0]
@@ -3188,6 +3550,70 @@ def nsmallest_bool(ndarray[np.uint8_t, cast=True] a, n):
 
     return topn_arg, ties
 
+cdef np.int64_t _quick_select_int(np.int64_t *arr, Py_ssize_t n, Py_ssize_t k) nogil:
+    # Same as quick_select_int2 below on a raw buffer
+    cdef:
+        Py_ssize_t i, ir, j, l, mid
+        np.int64_t a, temp
+
+    l = 0
+    ir = n - 1
+    while True:
+        if ir <= l + 1:
+            if (ir == l + 1) and (arr[ir] < arr[l]):
+                temp = arr[l]
+                arr[l] = arr[ir]
+                arr[ir] = temp
+            return arr[k]
+        else:
+            mid = (l + ir) // 2
+
+            temp = arr[mid]
+            arr[mid] = arr[l + 1]
+            arr[l + 1] = temp
+
+            if arr[l] > arr[ir]:
+                temp = arr[l]
+                arr[l] = arr[ir]
+                arr[ir] = temp
+
+            if arr[l + 1] > arr[ir]:
+                temp = arr[l + 1]
+                arr[l + 1] = arr[ir]
+                arr[ir] = temp
+
+            if arr[l] > arr[l + 1]:
+                temp = arr[l]
+                arr[l] = arr[l + 1]
+                arr[l + 1] = temp
+
+            i = l + 1
+            j = ir
+
+            a = arr[l + 1]
+            while True:
+                i += 1
+                while arr[i] < a:
+                    i += 1
+
+                j -= 1
+                while arr[j] > a:
+                    j -= 1
+
+                if j < i:
+                    break
+
+                temp = arr[i]
+                arr[i] = arr[j]
+                arr[j] = temp
+
+            arr[l + 1] = arr[j]
+            arr[j] = a
+            if j >= k:
+                ir = j - 1
+            if j <= k:
+                l = i
+
 def quick_select_int2(ndarray[np.int64_t] arr, int n, int k):
     # Credit: Ryan Tibshirani - http://www.stat.cmu.edu/~ryantibs/median/
     cdef:
@@ -20,7 +20,8 @@ def str__add__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         Py_ssize_t i
         int n
         dict new_str_reverse_map = {}
-        list new_list, cur_srm
+        list new_list
+        object cur_srm
 
     for loc, cur_srm in str_reverse_map.items():
         new_list = [False]
@@ -35,7 +36,8 @@ def str__radd__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other)
         Py_ssize_t i
         int n
         dict new_str_reverse_map = {}
-        list new_list, cur_srm
+        list new_list
+        object cur_srm
 
     for loc, cur_srm in str_reverse_map.items():
         new_list = [False]
@@ -46,7 +48,7 @@ def str__radd__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other)
     return new_str_reverse_map, a.copy('F'), 'S'
 
 def str__add__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2,
-                  list srm1, list srm2):
+                  srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
@@ -88,7 +90,7 @@ def str__add__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2,
 
     return new_str_reverse_map, arr, 'S'
 
-def str__radd__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__radd__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     return str__add__arr(arr2, arr1,  srm2, srm1)
 
 def str__mul__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, int other):
@@ -96,7 +98,8 @@ def str__mul__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, int other):
         Py_ssize_t i
         int n
         dict new_str_reverse_map = {}
-        list new_list, cur_srm
+        list new_list
+        object cur_srm
         bint has_empty_str
         ndarray[np.uint32_t, ndim=2] b
 
@@ -125,7 +128,7 @@ def str__mul__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, int other):
 def str__rmul__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, int other):
     return str__mul__(str_reverse_map, a, other)
 
-def str__mul__arr(ndarray[np.uint32_t] arr1, ndarray[np.int64_t] arr2, list srm1, list srm2):
+def str__mul__arr(ndarray[np.uint32_t] arr1, ndarray[np.int64_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i
         int nr = arr1.shape[0], empty_loc, code
@@ -146,7 +149,7 @@ def str__mul__arr(ndarray[np.uint32_t] arr1, ndarray[np.int64_t] arr2, list srm1
                 result[i] = final_code
     return new_str_reverse_map, result, 'S'
 
-def str__rmul__arr(ndarray[np.int64_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__rmul__arr(ndarray[np.int64_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     return str__mul__arr(arr2, arr1, srm2, srm1)
 
 def str__lt__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
@@ -155,7 +158,7 @@ def str__lt__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n, code
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -170,7 +173,7 @@ def str__lt__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__lt__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__lt__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
@@ -203,7 +206,7 @@ def str__le__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n, code
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -218,7 +221,7 @@ def str__le__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__le__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__le__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
@@ -251,7 +254,7 @@ def str__gt__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n, code
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -266,7 +269,7 @@ def str__gt__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__gt__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__gt__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
@@ -299,7 +302,7 @@ def str__ge__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n, code
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -314,7 +317,7 @@ def str__ge__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__ge__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__ge__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
@@ -347,7 +350,7 @@ def str__eq__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -362,13 +365,20 @@ def str__eq__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__eq__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__eq__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
         ndarray[np.int8_t] result = np.full(nr, -1, 'int8', 'F')
         ndarray[np.int8_t, ndim=2] combos
 
+    if srm1 is srm2:
+        # the columns share their categories, e.g. a string pool, so the codes are compared
+        for i in range(nr):
+            if arr1[i] != 0 and arr2[i] != 0:
+                result[i] = arr1[i] == arr2[i]
+        return {}, result, 'b'
+
     if r * c < nr / 10:
         combos = np.empty((r - 1, c - 1), 'int8', 'F')
         for i in range(1, r):
@@ -395,7 +405,7 @@ def str__ne__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
         int nr = a.shape[0], nc = a.shape[1], n
         ndarray[np.int8_t, ndim=2] final = np.empty((nr, nc), dtype='int8', order='F')
         ndarray[np.int8_t] b
-        list cur_srm
+        object cur_srm
 
     for i in range(nc):
         cur_srm = str_reverse_map[i]
@@ -410,13 +420,20 @@ def str__ne__(dict str_reverse_map, ndarray[np.uint32_t, ndim=2] a, str other):
 
     return {}, final, 'b'
 
-def str__ne__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, list srm1, list srm2):
+def str__ne__arr(ndarray[np.uint32_t] arr1, ndarray[np.uint32_t] arr2, srm1, srm2):
     cdef:
         Py_ssize_t i, j
         int nr = len(arr1), r=len(srm1), c=len(srm2), left_code, right_code, final_code
         ndarray[np.int8_t] result = np.full(nr, -1, 'int8', 'F')
         ndarray[np.int8_t, ndim=2] combos
 
+    if srm1 is srm2:
+        # the columns share their categories, e.g. a string pool, so the codes are compared
+        for i in range(nr):
+            if arr1[i] != 0 and arr2[i] != 0:
+                result[i] = arr1[i] != arr2[i]
+        return {}, result, 'b'
+
     if r * c < nr / 10:
         combos = np.empty((r - 1, c - 1), 'int8', 'F')
         for i in range(1, r):
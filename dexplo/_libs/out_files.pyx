@@ -1,46 +1,223 @@
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from numpy import nan
 
-cdef extern from "numpy/npy_math.h":
+from libc.stdio cimport snprintf
+from libc.stdlib cimport malloc, free, strtod
+from libc.string cimport memcpy
+
+cdef extern from "numpy/npy_math.h" nogil:
     bint npy_isnan(double x)
+    bint npy_isinf(double x)
+
+# Each column of a batch of rows is formatted into its own byte buffer. `offsets[i]` is the
+# start of the ith value and `offsets[n]` the end of the last. The buffers are then
+# interleaved into lines by `join_columns`. Nothing below requires the GIL.
+
+cdef np.int64_t MIN_INT = np.iinfo('int64').min
+
+
+cdef inline Py_ssize_t _write_int(np.int64_t x, unsigned char *out) nogil:
+    cdef:
+        unsigned char tmp[20]
+        Py_ssize_t n = 0, i
+        np.uint64_t ux
+
+    if x < 0:
+        ux = <np.uint64_t> (-(x + 1)) + 1
+    else:
+        ux = x
+
+    while True:
+        tmp[n] = 48 + ux % 10
+        ux //= 10
+        n += 1
+        if ux == 0:
+            break
+
+    i = 0
+    if x < 0:
+        out[0] = 45
+        i = 1
+    while n > 0:
+        n -= 1
+        out[i] = tmp[n]
+        i += 1
+    return i
+
+
+cdef inline Py_ssize_t _write_float(double x, unsigned char *out) nogil:
+    # Use the fewest significant digits that give back the same number, like repr
+    cdef:
+        int n, precision
+        Py_ssize_t i
+        bint need_dot = True
+
+    if npy_isinf(x):
+        if x > 0:
+            memcpy(out, b'inf', 3)
+            return 3
+        memcpy(out, b'-inf', 4)
+        return 4
+
+    for precision in range(15, 18):
+        n = snprintf(<char *> out, 32, '%.*g', precision, x)
+        if strtod(<char *> out, NULL) == x:
+            break
+
+    for i in range(n):
+        if out[i] == 46 or out[i] == 101:  # . or e
+            need_dot = False
+            break
+
+    if need_dot:
+        out[n] = 46
+        out[n + 1] = 48
+        n += 2
+    return n
+
+
+def format_int(ndarray[np.int64_t] a, ndarray[np.uint8_t] out, ndarray[np.int64_t] offsets):
+    cdef:
+        Py_ssize_t i, n = len(a)
+        np.int64_t pos = 0
+        np.int64_t *arr = <np.int64_t *> a.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        unsigned char *o = <unsigned char *> out.data
+
+    with nogil:
+        for i in range(n):
+            offs[i] = pos
+            if arr[i] != MIN_INT:
+                pos += _write_int(arr[i], o + pos)
+        offs[n] = pos
 
-def to_csv(ndarray[object, ndim=2] a, ndarray[object] columns, ndarray[np.int64_t] dtypes,
-           str fn, str sep):
+
+def format_float(ndarray[np.float64_t] a, ndarray[np.uint8_t] out, ndarray[np.int64_t] offsets):
+    cdef:
+        Py_ssize_t i, n = len(a)
+        np.int64_t pos = 0
+        double *arr = <double *> a.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        unsigned char *o = <unsigned char *> out.data
+
+    with nogil:
+        for i in range(n):
+            offs[i] = pos
+            if not npy_isnan(arr[i]):
+                pos += _write_float(arr[i], o + pos)
+        offs[n] = pos
+
+
+def format_bool(ndarray[np.int8_t] a, ndarray[np.uint8_t] out, ndarray[np.int64_t] offsets):
+    cdef:
+        Py_ssize_t i, n = len(a)
+        np.int64_t pos = 0
+        np.int8_t *arr = <np.int8_t *> a.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        unsigned char *o = <unsigned char *> out.data
+
+    with nogil:
+        for i in range(n):
+            offs[i] = pos
+            if arr[i] == 1:
+                memcpy(o + pos, b'True', 4)
+                pos += 4
+            elif arr[i] == 0:
+                memcpy(o + pos, b'False', 5)
+                pos += 5
+        offs[n] = pos
+
+
+def format_str(ndarray[np.uint32_t] a, ndarray[np.uint8_t] cats,
+               ndarray[np.int64_t] cat_offsets, ndarray[np.uint8_t] out,
+               ndarray[np.int64_t] offsets):
+    """
+    Copies the bytes of the category of each code. `cats` holds the encoded categories
+    back to back with the first, code 0, being empty.
+    """
+    cdef:
+        Py_ssize_t i, n = len(a)
+        np.int64_t pos = 0, start, size
+        np.uint32_t *arr = <np.uint32_t *> a.data
+        np.int64_t *cat_offs = <np.int64_t *> cat_offsets.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        unsigned char *c = <unsigned char *> cats.data
+        unsigned char *o = <unsigned char *> out.data
+
+    with nogil:
+        for i in range(n):
+            offs[i] = pos
+            start = cat_offs[arr[i]]
+            size = cat_offs[arr[i] + 1] - start
+            memcpy(o + pos, c + start, size)
+            pos += size
+        offs[n] = pos
+
+
+def format_fixed(ndarray[np.uint8_t, ndim=2] a, ndarray[np.uint8_t] out,
+                 ndarray[np.int64_t] offsets):
+    """
+    Copies fixed width byte strings (one per row of `a`), dropping the trailing null bytes
+    """
+    cdef:
+        Py_ssize_t i, n = a.shape[0], width = a.shape[1], size
+        np.int64_t pos = 0
+        unsigned char *arr = <unsigned char *> a.data
+        np.int64_t *offs = <np.int64_t *> offsets.data
+        unsigned char *o = <unsigned char *> out.data
+
+    with nogil:
+        for i in range(n):
+            offs[i] = pos
+            size = width
+            while size > 0 and arr[i * width + size - 1] == 0:
+                size -= 1
+            memcpy(o + pos, arr + i * width, size)
+            pos += size
+        offs[n] = pos
+
+
+def join_columns(list bufs, list offsets, int sep, ndarray[np.uint8_t] out):
+    """
+    Interleaves the formatted columns into lines of text
+
+    Returns
+    -------
+    The number of bytes written to `out`
+    """
     cdef:
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1] - 1
-    with open(fn, 'w') as f:
-        for j in range(nc):
-            f.write(f'{columns[j]}{sep}')
-        f.write(f'{columns[nc]}\n')
+        Py_ssize_t i, j, nc = len(bufs), n
+        np.int64_t pos = 0, start, size
+        unsigned char **b = <unsigned char **> malloc(nc * sizeof(unsigned char *))
+        np.int64_t **offs = <np.int64_t **> malloc(nc * sizeof(np.int64_t *))
+        unsigned char *o = <unsigned char *> out.data
+        ndarray[np.uint8_t] buf
+        ndarray[np.int64_t] offset
 
-        # 0: float, 1: str, 2: datetime/timedelta, 3: int/bool
+    if b == NULL or offs == NULL:
+        free(b)
+        free(offs)
+        raise MemoryError()
 
-        for i in range(nr):
+    n = len(offsets[0]) - 1
+    for j in range(nc):
+        buf = bufs[j]
+        offset = offsets[j]
+        b[j] = <unsigned char *> buf.data
+        offs[j] = <np.int64_t *> offset.data
+
+    with nogil:
+        for i in range(n):
             for j in range(nc):
-                if dtypes[j] == 0:
-                    if not npy_isnan(a[i, j]):
-                        f.write(f'{a[i, j]}')
-                elif dtypes[j] == 1:
-                    if a[i, j] is not None:
-                        f.write(a[i, j])
-                elif dtypes[j] == 2:
-                    if not npy_isnan(a[i, j]):
-                        f.write(f'{a[i, j]}')
-                else:
-                    f.write(f'{a[i, j]}')
-                f.write(sep)
-
-            if dtypes[nc] == 0:
-                if not npy_isnan(a[i, nc]):
-                    f.write(f'{a[i, nc]}')
-            elif dtypes[nc] == 1:
-                if a[i, nc] is not None:
-                    f.write(a[i, nc])
-            elif dtypes[nc] == 2:
-                if not npy_isnan(a[i, nc]):
-                    f.write(f'{a[i, nc]}')
-            else:
-                f.write(f'{a[i, nc]}')
-            f.write('\n')
\ No newline at end of file
+                start = offs[j][i]
+                size = offs[j][i + 1] - start
+                memcpy(o + pos, b[j] + start, size)
+                pos += size
+                o[pos] = sep
+                pos += 1
+            o[pos - 1] = 10
+
+    free(b)
+    free(offs)
+    return pos
@@ -1,592 +1,568 @@
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from numpy import nan
 
-from cpython cimport list
-from cpython.unicode cimport PyUnicode_InternFromString
+from libc.stdlib cimport malloc, calloc, realloc, free, strtod
+from libc.string cimport memchr, memcmp, memcpy
+from libc.math cimport NAN
 
-from collections import defaultdict
+from .string_buffer import StringBuffer
 
-MIN_INT = np.iinfo('int64').min
 
-def get_dtypes_first_line(char * chars, int nc, ndarray[np.uint8_t, cast=True] usecols_arr, int sep):
-    cdef:
-        Py_ssize_t i=0, j=0, n, start=0, k=0
-        int x = 0, dec=0, denom = 1, sign = 1
-        ndarray[np.int64_t] dtypes = np.zeros(nc, dtype='int64')
-        ndarray[np.int64_t] dtype_loc = np.zeros(nc, dtype='int64')
-        ndarray[np.int64_t] dtype_summary = np.zeros(5, dtype='int64')
-        ndarray[object] vals = np.empty(nc, dtype='O')
+# The buffer (usually a memory map of the file) is split into chunks on line boundaries and
+# each chunk goes through three stages:
+#   1. `tokenize_lines` counts the lines and records where every field ends in a single pass
+#   2. `infer_chunk` determines which kinds of values each column contains
+#   3. `parse_chunk` writes the values directly into the final arrays
+# All the byte level work happens without the GIL so that chunks can be processed by
+# several threads at the same time. The unique strings of each column are copied into a
+# StringBuffer so no Python string is created while parsing.
 
-        bint is_int = True
-        bint is_float = False
-        bint is_str = False
-        bint begun = False
-        bytes temp
+cdef enum:
+    LF = 10
+    CR = 13
+    SPACE = 32
 
-    dtypes = np.zeros(nc, dtype='int64')
-    n = len(chars)
+# bit flags of the kinds of values found in a column
+cdef enum:
+    MASK_BOOL = 1
+    MASK_INT = 2
+    MASK_FLOAT = 4
+    MASK_STR = 8
 
-    # 0: unknown, 1 boolean, 2 int, 3 float, 4 str
+cdef np.int64_t NA_INT = np.iinfo('int64').min
 
-    for i in range(n):
-        if not usecols_arr[k]:
-            if chars[i] == sep or chars[i] == b'\n':
-                k += 1
-                start = i + 1
-            continue
 
-        if not begun:
-            # remove white spaces in beginning
-            if chars[i] == b' ':
-                continue
-            elif chars[i] == 45:
-                sign = -1
-                begun = True
-                continue
-            else:
-                begun = True
-
-        if chars[i] == sep or chars[i] == b'\n':
-            # found separator or end of line. chars[start:i] is current column value
-            k += 1
-            if i != start:
-                temp = chars[start:i]
-                if is_str:
-                    if temp == b'True':
-                        vals[j] = 1
-                        dtypes[j] = 1
-                    elif temp == b'False':
-                        vals[j] = 0
-                        dtypes[j] = 1
-                    elif temp == b'nan' or temp == b'NaN':
-                        pass
+cdef Py_ssize_t _tokenize(const unsigned char *chars, Py_ssize_t base, Py_ssize_t pos,
+                          Py_ssize_t end, unsigned char sep, Py_ssize_t nf,
+                          np.uint32_t *row_starts, np.uint32_t *ends, np.uint8_t *blank,
+                          Py_ssize_t max_rows, Py_ssize_t *rows_done) nogil:
+    # Offsets are stored relative to `base`, the beginning of the chunk. Blank lines are
+    # recorded as rows so that line numbers stay correct, and flagged in `blank`
+    cdef:
+        Py_ssize_t r = 0, j, i = pos, line_start
+        const unsigned char *p
+
+    while i < end and r < max_rows:
+        line_start = i
+        row_starts[r] = i - base
+        j = 0
+        while i < end and chars[i] != LF:
+            if chars[i] == sep:
+                ends[r * nf + j] = i - base
+                j += 1
+                if j == nf:
+                    # every needed field found. Jump to the end of the line
+                    p = <const unsigned char *> memchr(chars + i, LF, end - i)
+                    if p == NULL:
+                        i = end
                     else:
-                        # vals[j] = temp.decode('utf-8')
-                        vals[j] = PyUnicode_InternFromString(temp)
-                        dtypes[j] = 4
-                elif is_float:
-                    vals[j] = sign * (x + <double> dec / denom)
-                    dtypes[j] = 3
-                else:
-                    vals[j] = sign * x
-                    dtypes[j] = 2
-
-            # reset - new value
-            start = i + 1
+                        i = p - chars
+                    break
+            i += 1
+
+        blank[r] = j == 0 and (i == line_start or
+                               (i == line_start + 1 and chars[line_start] == CR))
+
+        # fields missing from a short row all end at the end of the line. `_get_field`
+        # gives them a length of zero
+        while j < nf:
+            ends[r * nf + j] = i - base
             j += 1
-            is_int = True
-            is_str = False
-            is_float = False
-            x = 0
-            dec = 0
-            denom = 1
-            begun = False
-            sign = 1
-        elif is_str:
-            pass
-        elif chars[i] >= 48 and chars[i] <= 57:
-            if is_float:
-                dec = dec * 10 + chars[i] - 48
-                denom = denom * 10
-            else:
-                x = x * 10 + chars[i] - 48
-        elif chars[i] == 46 and not is_float: #only first time sees decimal
-            is_float = True
-        else:
-            is_str = True
 
-    for i in range(nc):
-        dtype_loc[i] = dtype_summary[dtypes[i]]
-        dtype_summary[dtypes[i]] += 1
+        r += 1
+        i += 1
 
-    return dtypes, dtype_loc, dtype_summary, vals
+    rows_done[0] = r
+    if i > end:
+        i = end
+    return i
 
-cdef double get_float(char * string):
-    cdef:
-        int x = 0
-        int dec = 0
-        int denom = 1
-        int sign = 1
-        int i = 0
-        bint has_dec = False
-        int n = len(string)
-        int start = 0
-
-    while string[start] == b' ':
-        start += 1
-
-    if string[start] == 45:
-        sign = -1
-        start += 1
-
-    for i in range(start, n):
-        if string[i] >= 48 and string[i] <= 57:
-            if has_dec:
-                dec = dec * 10 + string[i] - 48
-                denom = denom * 10
-            else:
-                x = x * 10 + string[i] - 48
-        elif string[i] == 46:
-            has_dec = True
-
-    return sign * (x + <double> dec / denom)
-
-def add_new_string_column(dict string_mapping, ndarray[np.uint32_t, ndim=2] orig_str_cat,
-                          ndarray a_tmp_str, int col_num):
-    # n is current row number
-    cdef:
-        Py_ssize_t i
-        int val, n = len(a_tmp_str)
-        ndarray[np.uint32_t] new_arr = np.empty(len(orig_str_cat), np.uint32, 'F')
-        dict cur_str_map = {False: 0}
 
-    string_mapping[col_num] = cur_str_map
+cdef inline void _get_field(const unsigned char *chars, np.uint32_t *row_starts, np.uint32_t *ends,
+                            Py_ssize_t nf, Py_ssize_t r, Py_ssize_t j,
+                            Py_ssize_t *start, Py_ssize_t *end) nogil:
+    cdef Py_ssize_t s, e
+    if j == 0:
+        s = row_starts[r]
+    else:
+        s = ends[r * nf + j - 1] + 1
+    e = ends[r * nf + j]
+    if s > e:
+        # a field missing from a short row
+        s = e
+
+    while s < e and chars[s] == SPACE:
+        s += 1
+    while e > s and (chars[e - 1] == SPACE or chars[e - 1] == CR):
+        e -= 1
+    start[0] = s
+    end[0] = e
+
+
+cdef inline bint _is_missing(const unsigned char *c, Py_ssize_t n) nogil:
+    if n == 0:
+        return True
+    if n == 3:
+        return memcmp(c, b'nan', 3) == 0 or memcmp(c, b'NaN', 3) == 0
+    return False
+
+
+cdef inline int _classify(const unsigned char *c, Py_ssize_t n) nogil:
+    """
+    Returns 0 for missing values otherwise the mask of the kind of value
+    """
+    cdef:
+        Py_ssize_t i = 0, n_digits = 0, n_exp_digits = 0
+        bint has_dot = False
+
+    if _is_missing(c, n):
+        return 0
+    if n == 4 and memcmp(c, b'True', 4) == 0:
+        return MASK_BOOL
+    if n == 5 and memcmp(c, b'False', 5) == 0:
+        return MASK_BOOL
+
+    if c[0] == 45 or c[0] == 43:  # - or +
+        i = 1
+
+    while i < n:
+        if 48 <= c[i] <= 57:
+            n_digits += 1
+        elif c[i] == 46 and not has_dot:
+            has_dot = True
+        else:
+            break
+        i += 1
 
-    for i in range(n):
-        val = cur_str_map.setdefault(a_tmp_str[i], len(cur_str_map))
-        new_arr[i] = val
+    if n_digits == 0:
+        return MASK_STR
 
-    return string_mapping, np.column_stack((orig_str_cat, new_arr))
+    if i == n:
+        # integers with more than 18 digits might not fit into 64 bits
+        if has_dot or n_digits > 18:
+            return MASK_FLOAT
+        return MASK_INT
 
+    if c[i] != 101 and c[i] != 69:  # e or E
+        return MASK_STR
 
-def read_csv(fn, long nr, int sep, int header, int skiprows_int, set skiprows_set, list usecols):
-    cdef:
-        bytes buf, first_buf
-        list columns
-        char * chars # const?
-        char * first_line
-        bytes temp
-        Py_ssize_t i=0, j=0,k=0, nc, start=0, end=0, n, act_row = 0, use_col_idx=0
-
-        ndarray[np.uint8_t, ndim=2, cast=True] a_bool
-        ndarray[np.int64_t, ndim=2] a_int
-        ndarray[np.float64_t, ndim=2] a_float
-        ndarray[np.uint32_t, ndim=2] a_str_cat
-
-        bint is_int = True
-        bint is_float = False
-        bint is_str = False
-        bint begun = False
-        bint has_int = False
-        bint has_num = False
-        bint has_skiprows_set = bool(skiprows_set)
-        bint has_usecols = bool(usecols)
-
-        int x = 0, dec=0, denom = 1, sign = 1, jump = 0, ct_dec, nc_orig=0
-        ndarray[np.int64_t] dtypes
-        ndarray[np.int64_t] dtype_loc
-        ndarray[np.int64_t] dtype_summary
-        ndarray[object] vals
-        ndarray[np.uint8_t, cast=True] usecols_arr
-
-        unicode unicode_str
-        dict string_mapping = {}
-        dict cur_str_map
-
-    py_sep = bytes(chr(sep), 'utf-8')
-
-    if header == -1:
-        nr = nr - len(skiprows_set) - skiprows_int
-        with open(fn, "rb") as f:
-            for i in range(skiprows_int):
-                f.readline()
-            while act_row in skiprows_set:
-                skiprows_set.remove(act_row)
-                f.readline()
-                act_row += 1
-            first_buf = f.readline()
-            act_row += 1
-            while act_row in skiprows_set:
-                skiprows_set.remove(act_row)
-                f.readline()
-                act_row += 1
-            nc = len(first_buf.split(py_sep))
-            columns = ['a' + str(i) for i in range(nc)]
-            buf = f.read()
-    else:
-        nr = nr - len(skiprows_set) - skiprows_int - header - 1
-        with open(fn, "rb") as f:
-            for i in range(skiprows_int + header):
-                f.readline()
-                act_row += 1
-
-            columns = []
-            col_set = set()
-            for i, v in enumerate(f.readline().replace(b"\n", b"").split(py_sep)):
-                # v = v.decode('utf8')
-                v = PyUnicode_InternFromString(v)
-                if v == '':
-                    col_name = col_name = 'a' + str(i)
-                else:
-                    col_name = col_base = v
-
-                k = 0
-                while col_name in col_set:
-                    col_name = col_base + '_' + str(k)
-                    k += 1
-                columns.append(col_name)
-                col_set.add(col_name)
-            act_row += 1
-
-            while act_row in skiprows_set:
-                skiprows_set.remove(act_row)
-                f.readline()
-                act_row += 1
-            first_buf = f.readline()
-            act_row += 1
-            while act_row in skiprows_set:
-                skiprows_set.remove(act_row)
-                f.readline()
-                act_row += 1
-
-            buf = f.read() # this is fast, can keep in Python
-
-    first_line = first_buf
-    nc = len(columns)
-    nc_orig = nc
-
-    if has_usecols:
-        if isinstance(usecols[0], (int, np.integer)):
-            try:
-                # test whether selection works - can ue negative indices
-                usecols_new = np.arange(nc)[usecols]
-            except IndexError:
-                raise IndexError('The integer values in `usecols` cannot must be used to '
-                                 f'select columns in a {nc}-item sequence')
-        else:
-            # assume we have column names
-            usecols_new = []
-            for col in usecols:
-                usecols_new.append(columns.index(col))
-
-        usecols_arr = np.zeros(nc, dtype='bool')
-        usecols_arr[usecols_new] = True
-        nc = usecols_arr.sum()
-        columns = np.array(columns)[usecols_arr].tolist()
-    else:
-        usecols_arr = np.ones(nc, dtype='bool')
+    i += 1
+    if i < n and (c[i] == 45 or c[i] == 43):
+        i += 1
+    while i < n and 48 <= c[i] <= 57:
+        n_exp_digits += 1
+        i += 1
 
-    dtypes, dtype_loc, dtype_summary, vals = get_dtypes_first_line(first_line, nc, usecols_arr, sep)
+    if i == n and n_exp_digits > 0:
+        return MASK_FLOAT
+    return MASK_STR
 
-    a_bool = np.empty((nr, dtype_summary[1]), dtype='int8', order='F')
-    a_int = np.empty((nr, dtype_summary[2]), dtype='int64', order='F')
-    a_float = np.empty((nr, dtype_summary[3]), dtype='float64', order='F')
-    a_str_cat = np.zeros((nr, dtype_summary[4]), dtype='uint32', order='F')
 
-    for i in range(nc):
-        if dtypes[i] == 1:
-            a_bool[0, dtype_loc[i]] = vals[i]
-        elif dtypes[i] == 2:
-            a_int[0, dtype_loc[i]] = vals[i]
-        elif dtypes[i] == 3:
-            a_float[0, dtype_loc[i]] = vals[i]
-        elif dtypes[i] == 4:
-            a_str_cat[0, dtype_loc[i]] = 1
-            string_mapping[dtype_loc[i]] = {False: 0, vals[i]: 1}
+cdef inline np.int64_t _parse_int(const unsigned char *c, Py_ssize_t n) nogil:
+    cdef:
+        Py_ssize_t i = 0
+        np.int64_t x = 0, sign = 1
 
-    i = 0
-    k = 1
+    if c[0] == 45:
+        sign = -1
+        i = 1
+    elif c[0] == 43:
+        i = 1
 
-    chars = buf
-    n = len(chars)
+    while i < n:
+        x = x * 10 + c[i] - 48
+        i += 1
+    return sign * x
 
-    dtypes_changed = defaultdict(list)
 
-    while True:
-        if i >= n:
-            break
+cdef inline double _parse_float(const unsigned char *c, Py_ssize_t n) nogil:
+    # strtod needs a null-terminated string and the field is followed by a separator or newline
+    cdef:
+        char buf[64]
+        char *tmp
+        double val
+
+    if n < 64:
+        memcpy(buf, c, n)
+        buf[n] = 0
+        return strtod(buf, NULL)
+
+    tmp = <char *> malloc(n + 1)
+    if tmp == NULL:
+        return NAN
+    memcpy(tmp, c, n)
+    tmp[n] = 0
+    val = strtod(tmp, NULL)
+    free(tmp)
+    return val
+
+
+cdef inline np.uint64_t _hash_bytes(const unsigned char *c, Py_ssize_t n) nogil:
+    # FNV-1a
+    cdef:
+        Py_ssize_t i
+        np.uint64_t h = 14695981039346656037ULL
 
-        if has_usecols:
-            if not usecols_arr[use_col_idx]:
-                while chars[i] != sep and chars[i] != b'\n':
-                    i += 1
-                # go to next row
-                if chars[i] == b'\n':
-                    j = 0
-                    use_col_idx = 0
-                    k += 1
-                    act_row += 1
-                else:
-                    use_col_idx += 1
-
-                i += 1
-                continue
-
-        # if the data type is string
-        if dtypes[j] == 4:
-            start = i
-            while chars[i] == b' ':
-                i += 1
-
-            while chars[i] != sep and chars[i] != b'\n':
-                i += 1
-
-            # only assign when a non-empty string is present - otherwise its already None
-            if i != start:
-                # otherwise it is missing and already represented by 0
-                # can intern with PyUnicode_InternFromString(chars[start:i])
-                unicode_str = chars[start:i].decode('utf-8')
-                cur_str_map = string_mapping[dtype_loc[j]]
-                a_str_cat[k, dtype_loc[j]] = cur_str_map.setdefault(unicode_str, len(cur_str_map))
-
-        # if the data type is int
-        elif dtypes[j] == 2:
-            ct_dec = 0
-            x = 0
-            sign = 1
-            is_str = False
-            has_int = False
-
-            while chars[i] == b' ':
-                i += 1
-
-            start = i
-
-            if chars[i] == 45:
-                sign = -1
-                i += 1
-
-            while True:
-                if chars[i] >= 48 and chars[i] <= 57:
-                    x = x * 10 + chars[i] - 48
-                    i += 1
-                    has_int = True
-                elif chars[i] == 46:
-                    ct_dec += 1
-                    i += 1
-                elif chars[i] != sep and chars[i] != b'\n':
-                    is_str = True
-                    i += 1
-                else:
+    for i in range(n):
+        h = (h ^ c[i]) * 1099511628211ULL
+    return h
+
+
+def tokenize(const unsigned char[:] buf, Py_ssize_t start, Py_ssize_t end, int sep,
+             ndarray[np.uint32_t] row_starts, ndarray[np.uint32_t, ndim=2] ends,
+             ndarray[np.uint8_t, cast=True] blank):
+    """
+    Records the end of each of the first `ends.shape[1]` fields of every line beginning at
+    byte `start` and whether the line is blank. Stops after `len(row_starts)` lines or
+    at `end`.
+
+    Returns
+    -------
+    Tuple of the number of lines tokenized and the byte position after the last line
+    """
+    cdef:
+        Py_ssize_t rows_done = 0, pos = start
+        Py_ssize_t nf = ends.shape[1], max_rows = len(row_starts)
+        np.uint32_t *rs = <np.uint32_t *> row_starts.data
+        np.uint32_t *e = <np.uint32_t *> ends.data
+        np.uint8_t *b = <np.uint8_t *> blank.data
+
+    if start >= end or max_rows == 0:
+        return 0, start
+
+    with nogil:
+        pos = _tokenize(&buf[0], start, start, end, sep, nf, rs, e, b, max_rows, &rows_done)
+    return rows_done, pos
+
+
+def tokenize_lines(const unsigned char[:] buf, Py_ssize_t start, Py_ssize_t end, int sep,
+                   Py_ssize_t nf):
+    """
+    Tokenizes every line from byte `start` to `end`, counting the lines as it goes.
+    The arrays are grown as needed so the buffer is only scanned once.
+
+    Returns
+    -------
+    Tuple of the start of each line, the end of its first `nf` fields and whether
+    it is blank
+    """
+    cdef:
+        Py_ssize_t rows_done = 0, n = 0, pos = start
+        Py_ssize_t cap = max(16, (end - start) // (8 * (nf + 1)))
+        ndarray[np.uint32_t] row_starts = np.empty(cap, dtype='uint32')
+        ndarray[np.uint32_t, ndim=2] ends = np.empty((cap, nf), dtype='uint32')
+        ndarray[np.uint8_t, cast=True] blank = np.empty(cap, dtype='bool')
+        ndarray[np.uint32_t] new_row_starts
+        ndarray[np.uint32_t, ndim=2] new_ends
+        ndarray[np.uint8_t, cast=True] new_blank
+        np.uint32_t *rs
+        np.uint32_t *e
+        np.uint8_t *b
+
+    while pos < end:
+        if n == cap:
+            cap *= 2
+            new_row_starts = np.empty(cap, dtype='uint32')
+            new_ends = np.empty((cap, nf), dtype='uint32')
+            new_blank = np.empty(cap, dtype='bool')
+            new_row_starts[:n] = row_starts
+            new_ends[:n] = ends
+            new_blank[:n] = blank
+            row_starts = new_row_starts
+            ends = new_ends
+            blank = new_blank
+
+        rs = <np.uint32_t *> row_starts.data + n
+        e = <np.uint32_t *> ends.data + n * nf
+        b = <np.uint8_t *> blank.data + n
+        with nogil:
+            pos = _tokenize(&buf[0], start, pos, end, sep, nf, rs, e, b, cap - n, &rows_done)
+        n += rows_done
+
+    return row_starts[:n], ends[:n], blank[:n]
+
+
+def infer_chunk(const unsigned char[:] buf, Py_ssize_t start, ndarray[np.uint32_t] row_starts,
+                ndarray[np.uint32_t, ndim=2] ends, ndarray[np.int64_t] field_idx,
+                ndarray[np.uint8_t, cast=True] keep, ndarray[np.uint8_t] masks):
+    """
+    ORs the kind of every value of each column into `masks`. Rows where `keep` is False are
+    ignored. `field_idx` holds the position of each column within the line.
+    """
+    cdef:
+        Py_ssize_t i, r, j, s, e, nc = len(field_idx), nr = len(row_starts), nf = ends.shape[1]
+        const unsigned char *chars
+        np.uint32_t *rs = <np.uint32_t *> row_starts.data
+        np.uint32_t *en = <np.uint32_t *> ends.data
+        np.int64_t *fi = <np.int64_t *> field_idx.data
+        np.uint8_t *kp = <np.uint8_t *> keep.data
+        np.uint8_t *m = <np.uint8_t *> masks.data
+
+    if nr == 0:
+        return masks
+
+    chars = &buf[start]
+    with nogil:
+        for i in range(nc):
+            j = fi[i]
+            for r in range(nr):
+                if m[i] & MASK_STR:
+                    # nothing else can change a string column
                     break
+                if not kp[r]:
+                    continue
+                _get_field(chars, rs, en, nf, r, j, &s, &e)
+                m[i] |= _classify(chars + s, e - s)
+    return masks
+
+
+def combine_masks(ndarray[np.uint8_t] masks):
+    """
+    Converts the masks of value kinds to the data type codes
+    0: unknown, 1 boolean, 2 int, 3 float, 4 str
+    """
+    cdef:
+        Py_ssize_t i, n = len(masks)
+        np.uint8_t m
+        ndarray[np.int64_t] dtypes = np.empty(n, dtype='int64')
 
-            if has_int and ct_dec == 0 and not is_str:
-                a_int[k, dtype_loc[j]] = sign * x
-            elif start == i:
-                a_int[k, dtype_loc[j]] = MIN_INT
-            elif chars[start:i] == b'nan' or chars[start:i] == b'NaN':
-                a_int[k, dtype_loc[j]] = MIN_INT
-            elif is_str or ct_dec > 1:
-                # change to string
-                dtypes_changed[2].append(j)
-                a_tmp_str = a_int[:k, dtype_loc[j]].astype('str').astype('O')
-                dtype_loc[j] = dtype_summary[4]
-                string_mapping, a_str_cat = add_new_string_column(string_mapping, a_str_cat,
-                                                                  a_tmp_str, dtype_loc[j])
-                dtypes[j] = 4
-                dtype_summary[4] += 1
-
-                unicode_str = chars[start:i].decode('utf-8')
-                cur_str_map = string_mapping[dtype_loc[j]]
-                a_str_cat[k, dtype_loc[j]] = cur_str_map.setdefault(unicode_str, len(cur_str_map))
-
-            else: # ct_dec == 1 or not has_int:
-                # change to float
-                dtypes_changed[2].append(j)
-                a_float = np.column_stack((a_float, a_int[:, dtype_loc[j]]))
-                dtype_loc[j] = dtype_summary[3]
-                dtype_summary[3] += 1
-                dtypes[j] = 3
-                if start == i:
-                    a_float[k, dtype_loc[j]] = nan
-                else:
-                    a_float[k, dtype_loc[j]] = get_float(chars[start:i])
-
-        # if data type is float
-        elif dtypes[j] == 3:
-            x = 0
-            dec = 0
-            denom = 1
-            ct_dec = 0
-            sign = 1
-            has_num = False
-            is_str = False
-
-            while chars[i] == b' ':
-                i += 1
-
-            start = i
-
-            if chars[i] == 45:
-                sign = -1
-                i += 1
-
-            while True:
-                if chars[i] >= 48 and chars[i] <= 57:
-                    if ct_dec > 0:
-                        dec = dec * 10 + chars[i] - 48
-                        denom = denom * 10
-                    else:
-                        x = x * 10 + chars[i] - 48
-                    i += 1
-                    has_num = True
-                elif chars[i] == 46:
-                    ct_dec += 1
-                    i += 1
-                elif chars[i] != sep and chars[i] != b'\n':
-                    is_str = True
-                    i += 1
-                else:
-                    break
+    for i in range(n):
+        m = masks[i]
+        if m & MASK_STR or (m & MASK_BOOL and m & (MASK_INT | MASK_FLOAT)):
+            dtypes[i] = 4
+        elif m & MASK_FLOAT:
+            dtypes[i] = 3
+        elif m & MASK_INT:
+            dtypes[i] = 2
+        elif m & MASK_BOOL:
+            dtypes[i] = 1
+        else:
+            dtypes[i] = 0
+    return dtypes
+
+
+cdef int _factorize_str(const unsigned char *chars, np.uint32_t *rs, np.uint32_t *en, Py_ssize_t nf,
+                        Py_ssize_t nr, Py_ssize_t j, np.uint8_t *kp, np.uint32_t *out,
+                        np.int64_t **uniq_start_ptr, np.int64_t **uniq_len_ptr,
+                        Py_ssize_t *n_uniq_ptr) nogil:
+    """
+    Assigns an integer code to each distinct string in the column, hashing the raw bytes.
+    Code 0 is reserved for missing values. Returns -1 when memory cannot be allocated
+    """
+    cdef:
+        Py_ssize_t r, s, e, n, k, cap = 1024, n_uniq = 0, uniq_cap = 512
+        int status = 0
+        np.uint64_t h, slot, mask
+        np.int64_t *table = <np.int64_t *> calloc(cap, sizeof(np.int64_t))
+        np.int64_t *new_table
+        np.int64_t *uniq_start = <np.int64_t *> malloc(uniq_cap * sizeof(np.int64_t))
+        np.int64_t *uniq_len = <np.int64_t *> malloc(uniq_cap * sizeof(np.int64_t))
+        np.uint64_t *uniq_hash = <np.uint64_t *> malloc(uniq_cap * sizeof(np.uint64_t))
+        void *tmp
+
+    if table == NULL or uniq_start == NULL or uniq_len == NULL or uniq_hash == NULL:
+        free(table)
+        free(uniq_start)
+        free(uniq_len)
+        free(uniq_hash)
+        return -1
+
+    mask = cap - 1
+    for r in range(nr):
+        if not kp[r]:
+            continue
+        _get_field(chars, rs, en, nf, r, j, &s, &e)
+        n = e - s
+        if _is_missing(chars + s, n):
+            out[0] = 0
+            out += 1
+            continue
 
-            if has_num and ct_dec <= 1 and not is_str:
-                a_float[k, dtype_loc[j]] = sign * (x + <double> dec / denom)
-            elif start == i:
-                a_float[k, dtype_loc[j]] = nan
-            elif chars[start:i] == b'nan' or chars[start:i] == b'NaN':
-                a_float[k, dtype_loc[j]] = nan
-            else:
-                # change to string
-                dtypes_changed[3].append(j)
-                a_tmp_str = a_float[:k, dtype_loc[j]].astype('str').astype('O')
-                dtype_loc[j] = dtype_summary[4]
-                string_mapping, a_str_cat = add_new_string_column(string_mapping, a_str_cat,
-                                                                  a_tmp_str, dtype_loc[j])
-                dtype_summary[4] += 1
-                dtypes[j] = 4
-
-                unicode_str = chars[start:i].decode('utf-8')
-                cur_str_map = string_mapping[dtype_loc[j]]
-                a_str_cat[k, dtype_loc[j]] = cur_str_map.setdefault(unicode_str, len(cur_str_map))
-
-        # if data type is boolean
-        elif dtypes[j] == 1:
-            while chars[i] == b' ':
-                i += 1
-
-            start = i
-
-            while chars[i] != sep and chars[i] != b'\n':
-                i += 1
-
-            temp = chars[start:i]
-            if temp == b'True':
-                a_bool[k, dtype_loc[j]] = 1
-            elif temp == b'False':
-                a_bool[k, dtype_loc[j]] = 0
-            elif start == i:
-                a_bool[k, dtype_loc[j]] = -1
-            elif temp == b'nan' or temp == b'NaN':
-                a_bool[k, dtype_loc[j]] = -1
-            else:
-                # change dtype to str
-                dtypes_changed[1].append(j)
-                # astype('O') is to change the data type of the value to str and not np.str_
-                a_tmp_str = a_bool[:k, dtype_loc[j]].astype('bool').astype('str').astype('O')
-                dtype_loc[j] = dtype_summary[4]
-                string_mapping, a_str_cat = add_new_string_column(string_mapping, a_str_cat,
-                                                                  a_tmp_str, dtype_loc[j])
-                dtype_summary[4] += 1
-                dtypes[j] = 4
-
-                unicode_str = chars[start:i].decode('utf-8')
-                cur_str_map = string_mapping[dtype_loc[j]]
-                a_str_cat[k, dtype_loc[j]] = cur_str_map.setdefault(unicode_str, len(cur_str_map))
-
-        # unknown data type - first row had a missing value
-        elif dtypes[j] == 0:
-            x = 0
-            dec = 0
-            denom = 1
-            ct_dec = 0
-            sign = 1
-            is_str = False
-
-            while chars[i] == b' ':
-                i += 1
-
-            start = i
-
-            if chars[i] == 45:
-                sign = -1
-                i += 1
-
-            while True:
-                if chars[i] >= 48 and chars[i] <= 57:
-                    if ct_dec == 1:
-                        dec = dec * 10 + chars[i] - 48
-                        denom = denom * 10
-                    elif ct_dec == 0:
-                        x = x * 10 + chars[i] - 48
-                    i += 1
-                elif chars[i] == 46:
-                    ct_dec += 1
-                    i += 1
-                elif chars[i] != sep and chars[i] != b'\n':
-                    is_str = True
-                    i += 1
-                else:
+        h = _hash_bytes(chars + s, n)
+        slot = h & mask
+        while True:
+            k = table[slot] - 1
+            if k == -1:
+                break
+            if (uniq_hash[k] == h and uniq_len[k] == n and
+                    memcmp(chars + uniq_start[k], chars + s, n) == 0):
+                break
+            slot = (slot + 1) & mask
+
+        if k == -1:
+            k = n_uniq
+            if n_uniq == uniq_cap:
+                uniq_cap *= 2
+                tmp = realloc(uniq_start, uniq_cap * sizeof(np.int64_t))
+                if tmp == NULL:
+                    status = -1
                     break
+                uniq_start = <np.int64_t *> tmp
+                tmp = realloc(uniq_len, uniq_cap * sizeof(np.int64_t))
+                if tmp == NULL:
+                    status = -1
+                    break
+                uniq_len = <np.int64_t *> tmp
+                tmp = realloc(uniq_hash, uniq_cap * sizeof(np.uint64_t))
+                if tmp == NULL:
+                    status = -1
+                    break
+                uniq_hash = <np.uint64_t *> tmp
+
+            uniq_start[k] = s
+            uniq_len[k] = n
+            uniq_hash[k] = h
+            table[slot] = k + 1
+            n_uniq += 1
+
+            # keep the load factor below one half
+            if n_uniq * 2 > cap:
+                cap *= 2
+                mask = cap - 1
+                new_table = <np.int64_t *> calloc(cap, sizeof(np.int64_t))
+                if new_table == NULL:
+                    status = -1
+                    break
+                free(table)
+                table = new_table
+                for k in range(n_uniq):
+                    slot = uniq_hash[k] & mask
+                    while table[slot] != 0:
+                        slot = (slot + 1) & mask
+                    table[slot] = k + 1
+                k = n_uniq - 1
+
+        out[0] = k + 1
+        out += 1
+
+    free(table)
+    free(uniq_hash)
+    uniq_start_ptr[0] = uniq_start
+    uniq_len_ptr[0] = uniq_len
+    n_uniq_ptr[0] = n_uniq
+    return status
+
+
+def parse_chunk(const unsigned char[:] buf, Py_ssize_t start, ndarray[np.uint32_t] row_starts,
+                ndarray[np.uint32_t, ndim=2] ends, ndarray[np.int64_t] field_idx,
+                ndarray[np.uint8_t, cast=True] keep, ndarray[np.int64_t] dtypes,
+                ndarray[np.int64_t] dtype_loc, ndarray[np.int8_t, ndim=2] a_bool,
+                ndarray[np.int64_t, ndim=2] a_int, ndarray[np.float64_t, ndim=2] a_float,
+                ndarray[np.uint32_t, ndim=2] a_str_cat, Py_ssize_t out_row):
+    """
+    Parses the tokenized chunk and writes its kept rows into the Fortran-ordered arrays
+    beginning at row `out_row`. The string columns are given codes local to this chunk.
+
+    Returns
+    -------
+    A dictionary mapping the location of each string column to a StringBuffer of its
+    distinct strings. Position 0 is the missing value.
+    """
+    cdef:
+        Py_ssize_t i, r, j, s, e, n, k, loc, nc = len(field_idx), nr = len(row_starts)
+        Py_ssize_t nf = ends.shape[1], n_uniq = 0
+        int status
+        const unsigned char *chars
+        np.uint32_t *rs = <np.uint32_t *> row_starts.data
+        np.uint32_t *en = <np.uint32_t *> ends.data
+        np.uint8_t *kp = <np.uint8_t *> keep.data
+        np.int8_t *out_bool
+        np.int64_t *out_int
+        np.float64_t *out_float
+        np.uint32_t *out_str
+        np.int64_t *uniq_start = NULL
+        np.int64_t *uniq_len = NULL
+        np.int64_t *offs
+        ndarray[np.int64_t] offsets
+        ndarray[np.uint8_t] data
+        dict string_mapping = {}
+
+    if nr == 0:
+        return string_mapping
 
-            if start != i:
-                temp = chars[start:i]
-                if temp != b'nan' and temp != b'NaN':
-                    if is_str or ct_dec > 1:
-                        if temp == b'True' or temp == b'False':
-                            dtypes_changed[0].append(j)
-                            a_bool = np.column_stack((a_bool, np.full(nr, -1, dtype='int8')))
-                            dtype_loc[j] = dtype_summary[1]
-                            dtype_summary[1] += 1
-                            dtypes[j] = 1
-                            a_bool[k, dtype_loc[j]] = (temp == b'True') * 1
-                        else:
-                            # it really is a string now
-                            dtypes_changed[0].append(j)
-                            dtype_loc[j] = dtype_summary[4]
-                            string_mapping, a_str_cat = add_new_string_column(string_mapping, a_str_cat,
-                                                                              a_tmp_str, dtype_loc[j])
-                            dtype_summary[4] += 1
-                            dtypes[j] = 4
-                            unicode_str = temp.decode('utf-8')
-                            cur_str_map = string_mapping[dtype_loc[j]]
-                            a_str_cat[k, dtype_loc[j]] = cur_str_map.setdefault(unicode_str, len(cur_str_map))
+    chars = &buf[start]
+    for i in range(nc):
+        j = field_idx[i]
+        loc = dtype_loc[i]
+        if dtypes[i] == 1:
+            out_bool = <np.int8_t *> a_bool.data + loc * a_bool.shape[0] + out_row
+            with nogil:
+                for r in range(nr):
+                    if not kp[r]:
+                        continue
+                    _get_field(chars, rs, en, nf, r, j, &s, &e)
+                    n = e - s
+                    if n == 4 and memcmp(chars + s, b'True', 4) == 0:
+                        out_bool[0] = 1
+                    elif n == 5 and memcmp(chars + s, b'False', 5) == 0:
+                        out_bool[0] = 0
                     else:
-                        if ct_dec == 1:
-                            dtypes_changed[0].append(j)
-                            a_float = np.column_stack((a_float, np.full(nr, nan, dtype='float64')))
-                            dtype_loc[j] = dtype_summary[3]
-                            dtype_summary[3] += 1
-                            dtypes[j] = 3
-                            a_float[k, dtype_loc[j]] = sign * (x + <double> dec / denom)
-                        else:
-                            dtypes_changed[0].append(j)
-                            a_int = np.column_stack((a_int, np.full(nr, MIN_INT, dtype='int64')))
-                            dtype_loc[j] = dtype_summary[2]
-                            dtype_summary[2] += 1
-                            dtypes[j] = 2
-                            a_int[k, dtype_loc[j]] = sign * x
+                        out_bool[0] = -1
+                    out_bool += 1
+        elif dtypes[i] == 2:
+            out_int = <np.int64_t *> a_int.data + loc * a_int.shape[0] + out_row
+            with nogil:
+                for r in range(nr):
+                    if not kp[r]:
+                        continue
+                    _get_field(chars, rs, en, nf, r, j, &s, &e)
+                    if _is_missing(chars + s, e - s):
+                        out_int[0] = NA_INT
+                    else:
+                        out_int[0] = _parse_int(chars + s, e - s)
+                    out_int += 1
+        elif dtypes[i] == 3 or dtypes[i] == 0:
+            # columns of only missing values become float
+            out_float = <np.float64_t *> a_float.data + loc * a_float.shape[0] + out_row
+            with nogil:
+                for r in range(nr):
+                    if not kp[r]:
+                        continue
+                    _get_field(chars, rs, en, nf, r, j, &s, &e)
+                    if _is_missing(chars + s, e - s):
+                        out_float[0] = NAN
+                    else:
+                        out_float[0] = _parse_float(chars + s, e - s)
+                    out_float += 1
+        else:
+            out_str = <np.uint32_t *> a_str_cat.data + loc * a_str_cat.shape[0] + out_row
+            with nogil:
+                status = _factorize_str(chars, rs, en, nf, nr, j, kp, out_str,
+                                        &uniq_start, &uniq_len, &n_uniq)
+            try:
+                if status == -1:
+                    raise MemoryError('Not enough memory to read the strings of the file')
+                offsets = np.zeros(n_uniq + 2, dtype='int64')
+                offs = <np.int64_t *> offsets.data
+                for k in range(n_uniq):
+                    offs[k + 2] = offs[k + 1] + uniq_len[k]
+                data = np.empty(offs[n_uniq + 1], dtype='uint8')
+                with nogil:
+                    for k in range(n_uniq):
+                        memcpy(<unsigned char *> data.data + offs[k + 1], chars + uniq_start[k],
+                               uniq_len[k])
+                string_mapping[loc] = StringBuffer(data, offsets)
+            finally:
+                free(uniq_start)
+                free(uniq_len)
+                uniq_start = NULL
+                uniq_len = NULL
+
+    return string_mapping
+
+
+def remap_str_codes(ndarray[np.uint32_t, ndim=2] a_str_cat, Py_ssize_t loc, Py_ssize_t start,
+                    Py_ssize_t end, ndarray[np.uint32_t] new_codes):
+    """
+    Replaces the chunk local codes of rows `start` to `end` of a string column with the
+    codes of the final string mapping
+    """
+    cdef:
+        Py_ssize_t i
+        np.uint32_t *arr = <np.uint32_t *> a_str_cat.data + loc * a_str_cat.shape[0]
+        np.uint32_t *codes = <np.uint32_t *> new_codes.data
 
-        i += 1
-        j += 1
-        use_col_idx += 1
-        if use_col_idx == nc_orig:
-            j = 0
-            use_col_idx = 0
-            k += 1
-            act_row += 1
-
-            if has_skiprows_set:
-                while act_row in skiprows_set:
-                    skiprows_set.remove(act_row)
-                    while chars[i] != b'\n':
-                        i += 1
-                    i += 1
-                    act_row += 1
-
-                if len(skiprows_set) == 0:
-                    has_skiprows_set = False
-
-    is_unk = dtypes == 0
-    unk_total = is_unk.sum()
-    if unk_total > 0:
-        raise NotImplementedError('Unknown data types: Fix later')
-    # if unk_total > 0:
-    #     # make unknown data types str
-    #     a_unk = np.empty((nr, unk_total), dtype='uint32')
-    #     a_str = np.column_stack((a_str, a_unk))
-    #     dtypes[is_unk] = 4
-    #     dtype_loc[is_unk] = np.arange(unk_total) + dtype_summary[4]
-
-    return a_bool, a_int, a_float, a_str_cat, string_mapping, columns, dtypes, dtype_loc
\ No newline at end of file
+    with nogil:
+        for i in range(start, end):
+            arr[i] = codes[arr[i]]
@@ -5,15 +5,11 @@ cimport numpy as np
 from numpy cimport ndarray
 import cython
 from numpy import nan
+from libc.math cimport sqrt
 from .math import var_int as var_int_math
 from collections import defaultdict
 from dexplo import _utils
 
-try:
-    import bottleneck as bn
-except ImportError:
-    import numpy as bn
-
 cdef np.float64_t MAX_FLOAT = np.finfo(np.float64).max
 cdef np.float64_t MIN_FLOAT = np.finfo(np.float64).min
 
@@ -24,2354 +20,1179 @@ MAX_CHAR = chr(1_000_000)
 MIN_CHAR = chr(0)
 
 
-cdef extern from "numpy/npy_math.h":
+cdef extern from "numpy/npy_math.h" nogil:
     bint npy_isnan(double x)
 
 
-def sum_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        np.int64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+cdef inline Py_ssize_t _bound(Py_ssize_t i, Py_ssize_t nr) nogil:
+    # Window edges are clipped to the rows of the array. Each kernel below slides the
+    # window [i + left, i + right) down a column, adding the rows that enter it and
+    # removing the ones that leave, so every output row is correct no matter where the
+    # window falls off either end of the array.
+    if i < 0:
+        return 0
+    if i > nr:
+        return nr
+    return i
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
 
-    for j in range(nc_actual):
+cdef inline void _fenwick_add(np.int64_t *tree, Py_ssize_t n, Py_ssize_t i,
+                              np.int64_t value) nogil:
+    i += 1
+    while i <= n:
+        tree[i] += value
+        i += i & -i
 
-        j_act = locs[j]
-        temp = a[:, j_act]
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        total += temp[k]
-                else:
-                    continue
-            else:
-                total += temp[i + right - 1]
-            result[i, j] = total
+cdef inline Py_ssize_t _fenwick_select(np.int64_t *tree, Py_ssize_t n, Py_ssize_t top,
+                                       Py_ssize_t k) nogil:
+    # Returns the position of the (k + 1)th set element. `top` is the largest power of
+    # two not greater than `n`
+    cdef Py_ssize_t pos = 0
 
-        for i in range(start, middle):
-            total = total + temp[i + right - 1] - temp[i + left - 1]
-            result[i, j] = total
+    k += 1
+    while top > 0:
+        if pos + top <= n and tree[pos + top] < k:
+            pos += top
+            k -= tree[pos]
+        top >>= 1
+    return pos
 
-        if middle != nr:
-            total += temp[i + right]
 
-        for i in range(middle, end):
-            total -= temp[i + left - 1]
-            result[i, j] = total
+def sum_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = total
 
     return result
 
 def sum_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64', order='F')
+        np.float64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = total
 
-        j_act = locs[j]
-        temp = a[:, j_act]
+    return result
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            total += temp[k]
-                else:
-                    continue
-            else:
-                if not npy_isnan(temp[i + right - 1]):
-                    total += temp[i + right - 1]
-            result[i, j] = total
+def sum_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = total
 
-        for i in range(start, middle):
-            if not npy_isnan(temp[i + right - 1]):
-                total = total + temp[i + right - 1]
-            if not npy_isnan(temp[i + left - 1]):
-                total = total - temp[i + left - 1]
-            result[i, j] = total
+    return result
 
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                total += temp[i + right]
+# Rolling min and max keep a monotonic deque of the rows in the window that could still
+# become the extreme value. Each row is pushed and popped at most once so a column takes
+# linear time no matter how wide the window is.
 
-        for i in range(middle, end):
-            if not npy_isnan(temp[i + left - 1]):
-                total -= temp[i + left - 1]
-            result[i, j] = total
+def min_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.full((nr, nc_actual), MIN_INT, dtype='int64', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    while tail > head and a[deque[tail - 1], j_act] >= a[k, j_act]:
+                        tail -= 1
+                    deque[tail] = k
+                    tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
     return result
 
-def sum_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+def min_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.uint8_t, cast=True] temp
-        np.int64_t total = 0
-        bint not_started = True
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        while tail > head and a[deque[tail - 1], j_act] >= a[k, j_act]:
+                            tail -= 1
+                        deque[tail] = k
+                        tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+    return result
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+def min_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.uint8_t, ndim=2, cast=True] result = np.zeros((nr, nc_actual), dtype='bool', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    while tail > head and a[deque[tail - 1], j_act] >= a[k, j_act]:
+                        tail -= 1
+                    deque[tail] = k
+                    tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
-    for j in range(nc_actual):
+    return result
 
-        j_act = locs[j]
-        temp = a[:, j_act]
+def max_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.full((nr, nc_actual), MIN_INT, dtype='int64', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    while tail > head and a[deque[tail - 1], j_act] <= a[k, j_act]:
+                        tail -= 1
+                    deque[tail] = k
+                    tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        total += temp[k]
-                else:
-                    continue
-            else:
-                total += temp[i + right - 1]
-            result[i, j] = total
+    return result
 
-        for i in range(start, middle):
-            total = total + temp[i + right - 1] - temp[i + left - 1]
-            result[i, j] = total
+def max_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        while tail > head and a[deque[tail - 1], j_act] <= a[k, j_act]:
+                            tail -= 1
+                        deque[tail] = k
+                        tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
-        if middle != nr:
-            total += temp[i + right]
+    return result
 
-        for i in range(middle, end):
-            total -= temp[i + left - 1]
-            result[i, j] = total
+def max_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, head, tail
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.uint8_t, ndim=2, cast=True] result = np.zeros((nr, nc_actual), dtype='bool', order='F')
+        ndarray[np.int64_t] deque = np.empty(nr, dtype='int64')
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            head = 0
+            tail = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    while tail > head and a[deque[tail - 1], j_act] <= a[k, j_act]:
+                        tail -= 1
+                    deque[tail] = k
+                    tail += 1
+                lo = new_lo
+                hi = new_hi
+                while head < tail and deque[head] < lo:
+                    head += 1
+                if head < tail:
+                    result[i, j] = a[deque[head], j_act]
 
     return result
 
 
-def min_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+def mean_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        np.int64_t val
-        bint not_started = True, first = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    result[i, j] = total / <np.float64_t> n
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+    return result
 
-    for j in range(nc_actual):
+def mean_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        n += 1
+                        total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        n -= 1
+                        total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    result[i, j] = total / <np.float64_t> n
 
-        j_act = locs[j]
-        temp = a[:, j_act]
+    return result
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] < val:
-                            val = temp[k]
-                            idx = k
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] < val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
+def mean_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            total = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    total += a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    total -= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    result[i, j] = total / <np.float64_t> n
 
-        for i in range(start, middle):
-            if temp[i + right - 1] < val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+    return result
 
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+def count_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = hi - lo
 
     return result
 
-def min_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+def count_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t val
-        bint not_started = True, first = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        Py_ssize_t n
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        n += 1
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        n -= 1
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = n
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+    return result
 
-    for j in range(nc_actual):
+def count_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                lo = new_lo
+                hi = new_hi
+                result[i, j] = hi - lo
 
-        j_act = locs[j]
-        temp = a[:, j_act]
+    return result
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] < val:
-                            val = temp[k]
-                            idx = k
+def prod_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        Py_ssize_t n_zero
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n_zero = 0
+            total = 1
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if a[k, j_act] == 0:
+                        n_zero += 1
+                    else:
+                        total *= a[k, j_act]
+                for k in range(lo, new_lo):
+                    if a[k, j_act] == 0:
+                        n_zero -= 1
+                    else:
+                        total //= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                # zeros are counted rather than multiplied so they can leave the window
+                if n_zero > 0:
+                    result[i, j] = 0
                 else:
-                    continue
-            else:
-                if temp[i + right - 1] < val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
+                    result[i, j] = total
 
-        for i in range(start, middle):
-            if temp[i + right - 1] < val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+    return result
 
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+def prod_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64', order='F')
+        Py_ssize_t n_zero
+        np.float64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n_zero = 0
+            total = 1
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        if a[k, j_act] == 0:
+                            n_zero += 1
+                        else:
+                            total *= a[k, j_act]
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        if a[k, j_act] == 0:
+                            n_zero -= 1
+                        else:
+                            total /= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                # zeros are counted rather than multiplied so they can leave the window
+                if n_zero > 0:
+                    result[i, j] = 0
+                else:
+                    result[i, j] = total
 
     return result
 
-def min_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+def prod_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.uint8_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='bool')
-        ndarray[np.uint8_t] temp
-        bint val
-        bint not_started = True, first = True
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        Py_ssize_t n_zero
+        np.int64_t total
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n_zero = 0
+            total = 1
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if a[k, j_act] == 0:
+                        n_zero += 1
+                    else:
+                        total *= a[k, j_act]
+                for k in range(lo, new_lo):
+                    if a[k, j_act] == 0:
+                        n_zero -= 1
+                    else:
+                        total //= a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                # zeros are counted rather than multiplied so they can leave the window
+                if n_zero > 0:
+                    result[i, j] = 0
+                else:
+                    result[i, j] = total
 
+    return result
 
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+# Rolling quantiles rank every value of a column once and keep the ranks inside the window
+# in a Fenwick tree. Adding or removing a row and selecting the kth smallest value in the
+# window are all logarithmic.
 
-    for j in range(nc_actual):
+def quantile_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+                 int left, int right, int min_window, double q=0.5):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, n, idx, top = 1
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        ndarray[np.int64_t] order
+        ndarray[np.int64_t] ranks = np.empty(nr, dtype='int64')
+        ndarray[np.int64_t] tree = np.zeros(nr + 1, dtype='int64')
+        np.int64_t *ptree = <np.int64_t *> tree.data
+        np.float64_t pos, frac, val
+
+    while top * 2 <= nr:
+        top *= 2
 
+    for j in range(nc_actual):
         j_act = locs[j]
-        temp = a[:, j_act]
+        order = np.argsort(a[:, j_act], kind='mergesort')
+        with nogil:
+            for k in range(nr):
+                ranks[order[k]] = k
+                ptree[k + 1] = 0
+            n = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    _fenwick_add(ptree, nr, ranks[k], 1)
+                    n += 1
+                for k in range(lo, new_lo):
+                    _fenwick_add(ptree, nr, ranks[k], -1)
+                    n -= 1
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    pos = q * (n - 1)
+                    idx = <Py_ssize_t> pos
+                    frac = pos - idx
+                    val = a[order[_fenwick_select(ptree, nr, top, idx)], j_act]
+                    if frac > 0:
+                        val += (a[order[_fenwick_select(ptree, nr, top, idx + 1)], j_act] - val) * frac
+                    result[i, j] = val
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] < val:
-                            val = temp[k]
-                            idx = k
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] < val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
+    return result
 
-        for i in range(start, middle):
-            if temp[i + right - 1] < val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
-
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
-
-    return result
+def median_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+               int left, int right, int min_window):
+    return quantile_int(a, locs, left, right, min_window, 0.5)
 
-def max_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
+def quantile_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+                 int left, int right, int min_window, double q=0.5):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        np.int64_t val
-        bint not_started = True, first = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, n, idx, top = 1
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        ndarray[np.int64_t] order
+        ndarray[np.int64_t] ranks = np.empty(nr, dtype='int64')
+        ndarray[np.int64_t] tree = np.zeros(nr + 1, dtype='int64')
+        np.int64_t *ptree = <np.int64_t *> tree.data
+        np.float64_t pos, frac, val
+
+    while top * 2 <= nr:
+        top *= 2
 
     for j in range(nc_actual):
-
         j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] > val:
-                            val = temp[k]
-                            idx = k
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] > val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
-
-        for i in range(start, middle):
-            if temp[i + right - 1] > val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] < val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
-
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] > val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+        order = np.argsort(a[:, j_act], kind='mergesort')
+        with nogil:
+            for k in range(nr):
+                ranks[order[k]] = k
+                ptree[k + 1] = 0
+            n = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        _fenwick_add(ptree, nr, ranks[k], 1)
+                        n += 1
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        _fenwick_add(ptree, nr, ranks[k], -1)
+                        n -= 1
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    pos = q * (n - 1)
+                    idx = <Py_ssize_t> pos
+                    frac = pos - idx
+                    val = a[order[_fenwick_select(ptree, nr, top, idx)], j_act]
+                    if frac > 0:
+                        val += (a[order[_fenwick_select(ptree, nr, top, idx + 1)], j_act] - val) * frac
+                    result[i, j] = val
 
     return result
 
-def max_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t val
-        bint not_started = True, first = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+def median_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+               int left, int right, int min_window):
+    return quantile_float(a, locs, left, right, min_window, 0.5)
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+def quantile_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+                 int left, int right, int min_window, double q=0.5):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi, n, idx, top = 1
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        ndarray[np.int64_t] order
+        ndarray[np.int64_t] ranks = np.empty(nr, dtype='int64')
+        ndarray[np.int64_t] tree = np.zeros(nr + 1, dtype='int64')
+        np.int64_t *ptree = <np.int64_t *> tree.data
+        np.float64_t pos, frac, val
+
+    while top * 2 <= nr:
+        top *= 2
 
     for j in range(nc_actual):
-
         j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] > val:
-                            val = temp[k]
-                            idx = k
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] > val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
-
-        for i in range(start, middle):
-            if temp[i + right - 1] > val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] > val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
-
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] > val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+        order = np.argsort(a[:, j_act], kind='mergesort')
+        with nogil:
+            for k in range(nr):
+                ranks[order[k]] = k
+                ptree[k + 1] = 0
+            n = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    _fenwick_add(ptree, nr, ranks[k], 1)
+                    n += 1
+                for k in range(lo, new_lo):
+                    _fenwick_add(ptree, nr, ranks[k], -1)
+                    n -= 1
+                lo = new_lo
+                hi = new_hi
+                if n > 0:
+                    pos = q * (n - 1)
+                    idx = <Py_ssize_t> pos
+                    frac = pos - idx
+                    val = a[order[_fenwick_select(ptree, nr, top, idx)], j_act]
+                    if frac > 0:
+                        val += (a[order[_fenwick_select(ptree, nr, top, idx + 1)], j_act] - val) * frac
+                    result[i, j] = val
 
     return result
 
-def max_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, idx
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.uint8_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='bool')
-        ndarray[np.uint8_t] temp
-        bint val
-        bint not_started = True, first = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
+def median_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+               int left, int right, int min_window):
+    return quantile_bool(a, locs, left, right, min_window, 0.5)
 
-        j_act = locs[j]
-        temp = a[:, j_act]
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if first:
-                            first = False
-                            val = temp[k]
-                            idx = k
-                        elif temp[k] > val:
-                            val = temp[k]
-                            idx = k
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] > val:
-                    val = temp[i + right - 1]
-                    idx = i + right - 1
-            result[i, j] = val
+def var_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    ex += a[k, j_act]
+                    ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    ex -= a[k, j_act]
+                    ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = val
 
-        for i in range(start, middle):
-            if temp[i + right - 1] > val:
-                val = temp[i + right - 1]
-                idx = i + right - 1
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, i + right - 1):
-                    if temp[k] > val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+    return result
 
-        for i in range(middle, end):
-            if idx == i + left - 1:
-                val = temp[i + left]
-                idx = i + left
-                for k in range(i + left, nr):
-                    if temp[k] > val:
-                        val = temp[k]
-                        idx = k
-            result[i, j] = val
+def var_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
+                        n += 1
+                        ex += a[k, j_act]
+                        ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        n -= 1
+                        ex -= a[k, j_act]
+                        ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = val
 
     return result
 
-def mean_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
+def var_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        np.float64_t n, n1 = right - left
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.int64_t] temp
-        np.int64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    ex += a[k, j_act]
+                    ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    ex -= a[k, j_act]
+                    ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = val
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+    return result
 
-    for j in range(nc_actual):
+def std_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    ex += a[k, j_act]
+                    ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    ex -= a[k, j_act]
+                    ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = sqrt(val)
 
-        j_act = locs[j]
-        temp = a[:, j_act]
+    return result
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        total += temp[k]
+def std_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
+    cdef:
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    if not npy_isnan(a[k, j_act]):
                         n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                total += temp[i + right - 1]
-            result[i, j] = total / n
-
-        for i in range(start, middle):
-            total = total + temp[i + right - 1] - temp[i + left - 1]
-            result[i, j] = total / n1
-
-        if middle != nr:
-            total += temp[i + right]
-
-        for i in range(middle, end):
-            total -= temp[i + left - 1]
-            n1 -= 1
-            result[i, j] = total / n1
+                        ex += a[k, j_act]
+                        ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    if not npy_isnan(a[k, j_act]):
+                        n -= 1
+                        ex -= a[k, j_act]
+                        ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = sqrt(val)
 
     return result
 
-def mean_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
+def std_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+            int left, int right, int min_window, int ddof=1):
     cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+        Py_ssize_t i, j, k, j_act, lo, hi, new_lo, new_hi
+        Py_ssize_t nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64', order='F')
+        Py_ssize_t n
+        np.float64_t ex, ex2, val
+
+    with nogil:
+        for j in range(nc_actual):
+            j_act = locs[j]
+            n = 0
+            ex = 0
+            ex2 = 0
+            lo = 0
+            hi = 0
+            for i in range(nr):
+                new_lo = _bound(i + left, nr)
+                new_hi = _bound(i + right, nr)
+                for k in range(hi, new_hi):
+                    n += 1
+                    ex += a[k, j_act]
+                    ex2 += <np.float64_t> a[k, j_act] * a[k, j_act]
+                for k in range(lo, new_lo):
+                    n -= 1
+                    ex -= a[k, j_act]
+                    ex2 -= <np.float64_t> a[k, j_act] * a[k, j_act]
+                lo = new_lo
+                hi = new_hi
+                if n > ddof:
+                    val = ex2 / (n - ddof) - ex * ex / (n * (n - ddof))
+                    if val < 0:
+                        val = 0
+                    result[i, j] = sqrt(val)
 
-    for j in range(nc_actual):
+    return result
 
-        j_act = locs[j]
-        temp = a[:, j_act]
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            total += temp[k]
-                            n += 1
-                else:
-                    continue
-            else:
-                if not npy_isnan(temp[k]):
-                    total += temp[i + right - 1]
+# Rolling nunique and mode first give every distinct value of a column a dense code and
+# then keep a count per code for the window, updating the counts only for the rows that
+# enter and leave it.
+
+cdef tuple _factorize(ndarray col):
+    """
+    Returns the sorted distinct values of `col` and the code of every value, its position
+    among them. Missing values get the code -1
+    """
+    cdef ndarray uniques, codes, nans
+    if col.dtype.kind == 'b':
+        return np.array([False, True]), col.astype('int64')
+    if col.dtype.kind == 'u':
+        # string categories are already codes with 0 for missing
+        codes = col.astype('int64') - 1
+        return np.arange(codes.max() + 1 if len(codes) else 0), codes
+    uniques, codes = np.unique(col, return_inverse=True)
+    codes = codes.astype('int64')
+    if col.dtype.kind == 'f':
+        nans = np.isnan(col)
+        if nans.any():
+            # nans sort last so the codes of the other values are unaffected
+            codes[nans] = -1
+            uniques = uniques[~np.isnan(uniques)]
+    return uniques, codes
+
+
+cdef void _nunique_codes(np.int64_t *codes, Py_ssize_t nr, np.int64_t *counts,
+                         np.int64_t *out, int left, int right) nogil:
+    cdef:
+        Py_ssize_t i, k, lo = 0, hi = 0, new_lo, new_hi
+        np.int64_t n = 0
+
+    for i in range(nr):
+        new_lo = _bound(i + left, nr)
+        new_hi = _bound(i + right, nr)
+        for k in range(hi, new_hi):
+            if codes[k] >= 0:
+                if counts[codes[k]] == 0:
                     n += 1
+                counts[codes[k]] += 1
+        for k in range(lo, new_lo):
+            if codes[k] >= 0:
+                counts[codes[k]] -= 1
+                if counts[codes[k]] == 0:
+                    n -= 1
+        lo = new_lo
+        hi = new_hi
+        out[i] = n
+
+
+cdef inline void _mode_update(np.int64_t *counts, np.int64_t *best, Py_ssize_t size,
+                              np.int64_t code) nogil:
+    # `best` is a tournament tree over the codes. Each node holds the code with the highest
+    # count below it, the smaller code winning ties, so the mode is always at node 1
+    cdef:
+        Py_ssize_t node = (size + code) >> 1
+        np.int64_t l, r
 
-            if n != 0:
-                result[i, j] = total / n
-
-        for i in range(start, middle):
-            if not npy_isnan(temp[i + right - 1]):
-                total += temp[i + right - 1]
-                n += 1
-            if not npy_isnan(temp[i + left - 1]):
-                total -= temp[i + left - 1]
-                n -= 1
-            result[i, j] = total / n
+    while node > 0:
+        l = best[2 * node]
+        r = best[2 * node + 1]
+        if counts[r] > counts[l]:
+            best[node] = r
+        else:
+            best[node] = l
+        node >>= 1
 
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                total += temp[i + right]
-                n += 1
 
-        for i in range(middle, end):
-            if not npy_isnan(temp[i + left - 1]):
-                total -= temp[i + left - 1]
-                n -= 1
-            result[i, j] = total / n
+cdef void _mode_codes(np.int64_t *codes, Py_ssize_t nr, np.int64_t *counts, np.int64_t *best,
+                      Py_ssize_t size, np.int64_t *out, int left, int right) nogil:
+    cdef:
+        Py_ssize_t i, k, lo = 0, hi = 0, new_lo, new_hi
+
+    for k in range(size):
+        best[size + k] = k
+    for k in range(size - 1, 0, -1):
+        best[k] = best[2 * k]
+
+    for i in range(nr):
+        new_lo = _bound(i + left, nr)
+        new_hi = _bound(i + right, nr)
+        for k in range(hi, new_hi):
+            if codes[k] >= 0:
+                counts[codes[k]] += 1
+                _mode_update(counts, best, size, codes[k])
+        for k in range(lo, new_lo):
+            if codes[k] >= 0:
+                counts[codes[k]] -= 1
+                _mode_update(counts, best, size, codes[k])
+        lo = new_lo
+        hi = new_hi
+        if counts[best[1]] > 0:
+            out[i] = best[1]
+        else:
+            out[i] = -1
+
+
+cdef ndarray _roll_nunique(ndarray a, ndarray[np.int64_t] locs, int left, int right):
+    cdef:
+        Py_ssize_t j, nr = a.shape[0], nc_actual = len(locs)
+        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64', order='F')
+        ndarray uniques
+        ndarray[np.int64_t] codes, counts
 
+    for j in range(nc_actual):
+        uniques, codes = _factorize(a[:, locs[j]])
+        counts = np.zeros(len(uniques), dtype='int64')
+        with nogil:
+            _nunique_codes(<np.int64_t *> codes.data, nr, <np.int64_t *> counts.data,
+                           <np.int64_t *> result.data + j * nr, left, right)
     return result
 
-def mean_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.uint8_t, cast=True] temp
-        np.int64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
 
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
+cdef ndarray _roll_mode(ndarray a, ndarray[np.int64_t] locs, int left, int right,
+                        ndarray result, object missing):
+    cdef:
+        Py_ssize_t j, nr = a.shape[0], nc_actual = len(locs), size
+        ndarray uniques
+        ndarray[np.int64_t] codes, counts, best
+        ndarray[np.int64_t] out = np.empty(nr, dtype='int64')
 
     for j in range(nc_actual):
+        uniques, codes = _factorize(a[:, locs[j]])
+        size = 1
+        while size < len(uniques):
+            size *= 2
+        counts = np.zeros(size, dtype='int64')
+        best = np.empty(2 * size, dtype='int64')
+        with nogil:
+            _mode_codes(<np.int64_t *> codes.data, nr, <np.int64_t *> counts.data,
+                        <np.int64_t *> best.data, size, <np.int64_t *> out.data, left, right)
+        if len(uniques):
+            result[:, j] = np.where(out >= 0, uniques[out], missing)
+    return result
 
-        j_act = locs[j]
-        temp = a[:, j_act]
 
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        total += temp[k]
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                total += temp[i + right - 1]
-            result[i, j] = total / n
+def nunique_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+                int left, int right, int min_window):
+    return _roll_nunique(a, locs, left, right)
 
-        for i in range(start, middle):
-            total = total + temp[i + right - 1] - temp[i + left - 1]
-            result[i, j] = total / n1
+def nunique_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
+                  int left, int right, int min_window):
+    return _roll_nunique(a, locs, left, right)
 
-        if middle != nr:
-            total += temp[i + right]
+def nunique_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
+                 int left, int right, int min_window):
+    return _roll_nunique(a, locs, left, right)
 
-        for i in range(middle, end):
-            total -= temp[i + left - 1]
-            n1 -= 1
-            result[i, j] = total / n1
-
-    return result
-
-def count_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        np.int64_t total = 0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        total += temp[k]
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                total += temp[i + right - 1]
-            result[i, j] = n
-
-        for i in range(start, middle):
-            result[i, j] = n1
-
-        if middle != nr:
-            total += temp[i + right]
-
-        for i in range(middle, end):
-            n1 -= 1
-            result[i, j] = n1
-
-    return result
-
-def count_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n=0, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.float64_t] temp
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            n += 1
-                else:
-                    continue
-            else:
-                if not npy_isnan(temp[i + right - 1]):
-                    n += 1
-            if n != 0:
-                result[i, j] = n
-
-        for i in range(start, middle):
-            if not npy_isnan(temp[i + right - 1]):
-                n += 1
-            if not npy_isnan(temp[i + left - 1]):
-                n -= 1
-            result[i, j] = n
-
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                n += 1
-
-        for i in range(middle, end):
-            if not npy_isnan(temp[i + left - 1]):
-                n -= 1
-            result[i, j] = n
-
-    return result
-
-def count_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.uint8_t, cast=True] temp
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-            result[i, j] = n
-
-        for i in range(start, middle):
-            result[i, j] = n1
-
-        for i in range(middle, end):
-            n1 -= 1
-            result[i, j] = n1
-
-    return result
-
-def count_str(ndarray[object, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[object] temp
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        if temp[k] is not None:
-                            n += 1
-                else:
-                    continue
-            else:
-                if temp[i + right - 1] is not None:
-                    n += 1
-
-            if n != 0:
-                result[i, j] = n
-
-        for i in range(start, middle):
-            if temp[i + right - 1] is not None:
-                n += 1
-            if temp[i + left - 1] is not None:
-                n -= 1
-            result[i, j] = n
-
-        if middle != nr:
-            if temp[i + right] is not None:
-                n += 1
-
-        for i in range(middle, end):
-            if temp[i + left - 1] is not None:
-                n -= 1
-            result[i, j] = n
-
-    return result
-
-def prod_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        np.int64_t total = 1
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        total *= temp[k]
-                else:
-                    continue
-            else:
-                total *= temp[i + right - 1]
-            result[i, j] = total
-
-        for i in range(start, middle):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, i + right):
-                    total *= temp[k]
-            else:
-                total = total * temp[i + right - 1] / temp[i + left - 1]
-            result[i, j] = total
-
-        if middle != nr:
-            total *= temp[i + right]
-
-        for i in range(middle, end):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, nr):
-                    total *= temp[k]
-            else:
-                total /= temp[i + left - 1]
-            result[i, j] = total
-
-    return result
-
-def prod_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t total = 1
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            total *= temp[k]
-                else:
-                    continue
-            else:
-                if npy_isnan(temp[i + right - 1]):
-                    total *= temp[i + right - 1]
-            result[i, j] = total
-
-        for i in range(start, middle):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, i + right):
-                    if not npy_isnan(temp[k]):
-                        total *= temp[k]
-            else:
-                if not npy_isnan(temp[i + right - 1]):
-                    total = total * temp[i + right - 1]
-                if not npy_isnan(temp[i + left - 1]):
-                    total /= temp[i + left - 1]
-            result[i, j] = total
-
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                total *= temp[i + right]
-
-        for i in range(middle, end):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, nr):
-                    if not npy_isnan(temp[k]):
-                        total *= temp[k]
-            else:
-                if not npy_isnan(temp[i + left - 1]):
-                    total /= temp[i + left - 1]
-            result[i, j] = total
-
-    return result
-
-def prod_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.uint8_t, cast=True] temp
-        np.int64_t total = 1
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        total *= temp[k]
-                else:
-                    continue
-            else:
-                total *= temp[i + right - 1]
-            result[i, j] = total
-
-        for i in range(start, middle):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, i + right):
-                    total *= temp[k]
-            else:
-                total = total * temp[i + right - 1] / temp[i + left - 1]
-            result[i, j] = total
-
-        if middle != nr:
-            total *= temp[i + right]
-
-        for i in range(middle, end):
-            if temp[i + left - 1] == 0:
-                total = 1
-                for k in range(i + left, nr):
-                    total *= temp[k]
-            else:
-                total /= temp[i + left - 1]
-            result[i, j] = total
-
-    return result
-
-def median_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-               int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, l=0, n=0, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        Py_ssize_t first_n=0, middle_n=nr, last_n=0
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.int64_t] data = np.empty(n1, dtype='int64')
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        data[n] = a[k, j_act]
-                        n += 1
-                else:
-                    continue
-            else:
-                data[n] = a[i + right - 1, j_act]
-                n += 1
-            result[i, j] = bn.median(data[:n])
-
-        for i in range(start, middle):
-            l = 0
-            for k in range(i + left, i + right):
-                data[l] = a[k, j_act]
-                l += 1
-            result[i, j] = bn.median(data)
-
-        for i in range(middle, end):
-            l = 0
-            for k in range(i + left, nr):
-                data[l] = a[k, j_act]
-                l += 1
-            result[i, j] = bn.median(data[:l])
-
-    return result
-
-def median_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, l=0, n=0, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        Py_ssize_t first_n=0, middle_n=nr, last_n=0
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] data = np.full(right - left, nan, dtype='float64')
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(a[k, j_act]):
-                            data[n] = a[k, j_act]
-                            n += 1
-                else:
-                    continue
-            else:
-                if not npy_isnan(a[i + right - 1, j_act]):
-                    data[n] = a[i + right - 1, j_act]
-                    n += 1
-            if n > 0:
-                result[i, j] = bn.median(data[:n])
-
-        for i in range(start, middle):
-            l = 0
-            for k in range(i + left, i + right):
-                if not npy_isnan(a[k, j_act]):
-                    data[l] = a[k, j_act]
-                    l += 1
-            if l > 0:
-                result[i, j] = bn.median(data[:l])
-
-        for i in range(middle, end):
-            l = 0
-            for k in range(i + left, nr):
-                if not npy_isnan(a[k, j_act]):
-                    data[l] = a[k, j_act]
-                    l += 1
-            if l > 0:
-                result[i, j] = bn.median(data[:l])
-
-    return result
-
-def median_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, l=0, n=0, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        Py_ssize_t first_n=0, middle_n=nr, last_n=0
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.uint8_t, cast=True] data = np.empty(n1, dtype='bool')
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        data[n] = a[k, j_act]
-                        n += 1
-                else:
-                    continue
-            else:
-                data[n] = a[i + right - 1, j_act]
-                n += 1
-            result[i, j] = bn.median(data[:n])
-
-        for i in range(start, middle):
-            l = 0
-            for k in range(i + left, i + right):
-                data[l] = a[k, j_act]
-                l += 1
-            result[i, j] = bn.median(data)
-
-        for i in range(middle, end):
-            l = 0
-            for k in range(i + left, nr):
-                data[l] = a[k, j_act]
-                l += 1
-            result[i, j] = bn.median(data[:l])
-
-    return result
-
-def var_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.int64_t] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        ex += temp[k]
-                        ex2 += temp[k] ** 2
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                ex += temp[i + right - 1]
-                ex2 += temp[i + right - 1] ** 2
-            if n > ddof:
-                result[i, j] = ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof))
-
-        if n1 > ddof:
-            for i in range(start, middle):
-                ex = ex + temp[i + right - 1] - temp[i + left - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2 - (temp[i + left - 1] ** 2)
-                result[i, j] = ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof))
-
-        if middle != nr:
-            ex += temp[i + right]
-            ex2 += temp[i + right] ** 2
-            n1 += 1
-
-        for i in range(middle, end):
-            ex -= temp[i + left - 1]
-            ex2 -= (temp[i + left - 1] ** 2)
-            n1 -= 1
-            if n1 > ddof:
-                result[i, j] = ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof))
-    return result
-
-def var_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            ex += temp[k]
-                            ex2 += temp[k] ** 2
-                            n += 1
-                else:
-                    continue
-            else:
-                if not npy_isnan(temp[i + right - 1]):
-                    ex += temp[i + right - 1]
-                    ex2 += temp[i + right - 1] ** 2
-                    n += 1
-            if n > ddof:
-                result[i, j] = ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof))
-
-        for i in range(start, middle):
-            if not npy_isnan(temp[i + right - 1]):
-                ex = ex + temp[i + right - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2
-                n += 1
-
-            if not npy_isnan(temp[i + left - 1]):
-                ex = ex - temp[i + left - 1]
-                ex2 = ex2 - temp[i + left - 1] ** 2
-                n -= 1
-            if n > ddof:
-                result[i, j] = ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof))
-
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                ex += temp[i + right]
-                ex2 += temp[i + right] ** 2
-                n += 1
-
-        for i in range(middle, end):
-            if not npy_isnan(temp[i + left - 1]):
-                ex -= temp[i + left - 1]
-                ex2 -= (temp[i + left - 1] ** 2)
-                n -= 1
-            if n > ddof:
-                result[i, j] = ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof))
-    return result
-
-def var_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.uint8_t, cast=True] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        ex += temp[k]
-                        ex2 += temp[k] ** 2
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                ex += temp[i + right - 1]
-                ex2 += temp[i + right - 1] ** 2
-            if n > ddof:
-                result[i, j] = ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof))
-
-        if n1 > ddof:
-            for i in range(start, middle):
-                ex = ex + temp[i + right - 1] - temp[i + left - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2 - (temp[i + left - 1] ** 2)
-                result[i, j] = ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof))
-
-        if middle != nr:
-            ex += temp[i + right]
-            ex2 += temp[i + right] ** 2
-            n1 += 1
-
-        for i in range(middle, end):
-            ex -= temp[i + left - 1]
-            ex2 -= (temp[i + left - 1] ** 2)
-            n1 -= 1
-            if n1 > ddof:
-                result[i, j] = ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof))
-    return result
-
-
-def std_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.int64_t] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        ex += temp[k]
-                        ex2 += temp[k] ** 2
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                ex += temp[i + right - 1]
-                ex2 += temp[i + right - 1] ** 2
-            if n > ddof:
-                result[i, j] = np.sqrt(ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof)))
-
-        if n1 > ddof:
-            for i in range(start, middle):
-                ex = ex + temp[i + right - 1] - temp[i + left - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2 - (temp[i + left - 1] ** 2)
-                result[i, j] = np.sqrt(ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof)))
-
-        if middle != nr:
-            ex += temp[i + right]
-            ex2 += temp[i + right] ** 2
-            n1 += 1
-
-        for i in range(middle, end):
-            ex -= temp[i + left - 1]
-            ex2 -= (temp[i + left - 1] ** 2)
-            n1 -= 1
-            if n1 > ddof:
-                result[i, j] = np.sqrt(ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof)))
-    return result
-
-def std_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        if not npy_isnan(temp[k]):
-                            ex += temp[k]
-                            ex2 += temp[k] ** 2
-                            n += 1
-                else:
-                    continue
-            else:
-                if not npy_isnan(temp[i + right - 1]):
-                    ex += temp[i + right - 1]
-                    ex2 += temp[i + right - 1] ** 2
-                    n += 1
-            if n > ddof:
-                result[i, j] = np.sqrt(ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof)))
-
-        for i in range(start, middle):
-            if not npy_isnan(temp[i + right - 1]):
-                ex = ex + temp[i + right - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2
-                n += 1
-
-            if not npy_isnan(temp[i + left - 1]):
-                ex = ex - temp[i + left - 1]
-                ex2 = ex2 - temp[i + left - 1] ** 2
-                n -= 1
-            if n > ddof:
-                result[i, j] = np.sqrt(ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof)))
-
-        if middle != nr:
-            if not npy_isnan(temp[i + right]):
-                ex += temp[i + right]
-                ex2 += temp[i + right] ** 2
-                n += 1
-
-        for i in range(middle, end):
-            if not npy_isnan(temp[i + left - 1]):
-                ex -= temp[i + left - 1]
-                ex2 -= (temp[i + left - 1] ** 2)
-                n -= 1
-            if n > ddof:
-                result[i, j] = np.sqrt(ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof)))
-    return result
-
-def std_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window, int ddof):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, n, n1 = right - left
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.uint8_t, cast=True] temp
-        np.float64_t ex = 0, ex2 = 0, total=0
-        bint not_started = True
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    n = 0
-                    for k in range(max(0, i + left), i + right):
-                        ex += temp[k]
-                        ex2 += temp[k] ** 2
-                        n += 1
-                else:
-                    continue
-            else:
-                n += 1
-                ex += temp[i + right - 1]
-                ex2 += temp[i + right - 1] ** 2
-            if n > ddof:
-                result[i, j] = np.sqrt(ex2 / (n - ddof) - ex ** 2 / (n * (n - ddof)))
-
-        if n1 > ddof:
-            for i in range(start, middle):
-                ex = ex + temp[i + right - 1] - temp[i + left - 1]
-                ex2 = ex2 + temp[i + right - 1] ** 2 - (temp[i + left - 1] ** 2)
-                result[i, j] = np.sqrt(ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof)))
-
-        if middle != nr:
-            ex += temp[i + right]
-            ex2 += temp[i + right] ** 2
-            n1 += 1
-
-        for i in range(middle, end):
-            ex -= temp[i + left - 1]
-            ex2 -= (temp[i + left - 1] ** 2)
-            n1 -= 1
-            if n1 > ddof:
-                result[i, j] = np.sqrt(ex2 / (n1 - ddof) - ex ** 2 / (n1 * (n1 - ddof)))
-    return result
-
-def nunique_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            result[i, j] = len(d)
-
-    return result
-
-def nunique_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.float64_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        if npy_isnan(temp[k]):
-                            d[nan] += 1
-                        else:
-                            d[temp[k]] += 1
-                else:
-                    continue
-            else:
-                if npy_isnan(temp[i + right - 1]):
-                    d[nan] += 1
-                else:
-                    d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        for i in range(start, middle):
-            if npy_isnan(temp[i + left - 1]):
-                d[nan] -= 1
-                if d[nan] == 0:
-                    d.pop(nan)
-            else:
-                d[temp[i + left - 1]] -= 1
-                if d[temp[i + left - 1]] == 0:
-                    d.pop(temp[i + left - 1])
-
-            if npy_isnan(temp[i + right - 1]):
-                d[nan] += 1
-            else:
-                d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        if middle != nr:
-            if npy_isnan(temp[i + right]):
-                d[nan] += 1
-            else:
-                d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            if npy_isnan(temp[i + left - 1]):
-                d[nan] -= 1
-                if d[nan] == 0:
-                    d.pop(nan)
-            else:
-                d[temp[i + left - 1]] -= 1
-                if d[temp[i + left - 1]] == 0:
-                    d.pop(temp[i + left - 1])
-
-            result[i, j] = len(d)
-
-    return result
-
-def nunique_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            result[i, j] = len(d)
-
-    return result
-
-def nunique_str(ndarray[object, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[object] temp
-        bint not_started = True
-        d = defaultdict(int)
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-            result[i, j] = len(d)
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            result[i, j] = len(d)
-
-    return result
-
-def mode_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, ct2=0, prev_ct=0, cur_ct=0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.int64_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='int64')
-        ndarray[np.int64_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-        np.int64_t val
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                        if d[temp[k]] > ct:
-                            val = temp[k]
-                            ct = d[temp[k]]
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct = d[temp[i + right - 1]]
-
-            result[i, j] = val
-            prev_ct = ct
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-
-            ct = d.get(val, 0)
-            if ct == prev_ct:
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct += 1
-            elif ct < prev_ct:
-                if ct == 0 and d[temp[i + right - 1]] == 1:
-                    val = temp[i + left]
-                    ct = d[val]
-                else:
-                    ct = 0
-                    for val2, ct2 in d.items():
-                        if ct2 > ct:
-                            ct = ct2
-                            val = val2
-
-            result[i, j] = val
-            prev_ct = ct
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-
-            if val in d:
-                ct = d[val]
-            else:
-                ct = 0
-
-            for val2, ct2 in d.items():
-                if ct2 > ct:
-                    val = val2
-                    ct = ct2
+def nunique_str(ndarray[np.uint32_t, ndim=2] a, ndarray[np.int64_t] locs,
+                int left, int right, int min_window):
+    return _roll_nunique(a, locs, left, right)
 
-            result[i, j] = val
-
-    return result
+def mode_int(ndarray[np.int64_t, ndim=2] a, ndarray[np.int64_t] locs,
+             int left, int right, int min_window):
+    result = np.full((len(a), len(locs)), MIN_INT, dtype='int64', order='F')
+    return _roll_mode(a, locs, left, right, result, MIN_INT)
 
 def mode_float(ndarray[np.float64_t, ndim=2] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, ct2=0, prev_ct=0, cur_ct=0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.float64_t, ndim=2] result = np.full((nr, nc_actual), nan, dtype='float64')
-        ndarray[np.float64_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-        np.float64_t val
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                        if d[temp[k]] > ct:
-                            val = temp[k]
-                            ct = d[temp[k]]
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct = d[temp[i + right - 1]]
-
-            result[i, j] = val
-            prev_ct = ct
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-
-            ct = d.get(val, 0)
-            if ct == prev_ct:
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct += 1
-            elif ct < prev_ct:
-                if ct == 0 and d[temp[i + right - 1]] == 1:
-                    val = temp[i + left]
-                    ct = d[val]
-                else:
-                    ct = 0
-                    for val2, ct2 in d.items():
-                        if ct2 > ct:
-                            ct = ct2
-                            val = val2
-
-            result[i, j] = val
-            prev_ct = ct
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-
-            if val in d:
-                ct = d[val]
-            else:
-                ct = 0
-
-            for val2, ct2 in d.items():
-                if ct2 > ct:
-                    val = val2
-                    ct = ct2
-
-            result[i, j] = val
-
-    return result
+               int left, int right, int min_window):
+    result = np.full((len(a), len(locs)), nan, dtype='float64', order='F')
+    return _roll_mode(a, locs, left, right, result, nan)
 
 def mode_bool(ndarray[np.uint8_t, ndim=2, cast=True] a, ndarray[np.int64_t] locs,
-            int left, int right, int min_window):
-    cdef:
-        Py_ssize_t i=0, j, k, j_act, start, middle, end, ct = 0, ct2=0, prev_ct=0, cur_ct=0
-        Py_ssize_t nr = a.shape[0], nc = a.shape[1], nc_actual = len(locs)
-        ndarray[np.uint8_t, ndim=2] result = np.zeros((nr, nc_actual), dtype='bool')
-        ndarray[np.uint8_t] temp
-        bint not_started = True
-        d = defaultdict(int)
-        bint val
-
-    if left < 0:
-        start = -left + 1
-        end = nr
-    else:
-        end = nr - left
-        start = 1
-
-    if right > 0:
-        middle = nr - right
-    else:
-        middle = nr
-
-    for j in range(nc_actual):
-
-        j_act = locs[j]
-        temp = a[:, j_act]
-
-        # must enter first for loop before subtraction can begin
-        for i in range(start):
-            if not_started:
-                if i + right > 0:
-                    not_started = False
-                    for k in range(max(0, i + left), i + right):
-                        d[temp[k]] += 1
-                        if d[temp[k]] > ct:
-                            val = temp[k]
-                            ct = d[temp[k]]
-                else:
-                    continue
-            else:
-                d[temp[i + right - 1]] += 1
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct = d[temp[i + right - 1]]
-
-            result[i, j] = val
-            prev_ct = ct
-
-        for i in range(start, middle):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-            d[temp[i + right - 1]] += 1
-
-            ct = d.get(val, 0)
-            if ct == prev_ct:
-                if d[temp[i + right - 1]] > ct:
-                    val = temp[i + right - 1]
-                    ct += 1
-            elif ct < prev_ct:
-                if ct == 0 and d[temp[i + right - 1]] == 1:
-                    val = temp[i + left]
-                    ct = d[val]
-                else:
-                    ct = 0
-                    for val2, ct2 in d.items():
-                        if ct2 > ct:
-                            ct = ct2
-                            val = val2
-
-            result[i, j] = val
-            prev_ct = ct
-
-        if middle != nr:
-            d[temp[i + right]] += 1
-
-        for i in range(middle, end):
-            d[temp[i + left - 1]] -= 1
-            if d[temp[i + left - 1]] == 0:
-                d.pop(temp[i + left - 1])
-
-            if val in d:
-                ct = d[val]
-            else:
-                ct = 0
+              int left, int right, int min_window):
+    result = np.zeros((len(a), len(locs)), dtype='bool', order='F')
+    return _roll_mode(a, locs, left, right, result, False)
 
-            for val2, ct2 in d.items():
-                if ct2 > ct:
-                    val = val2
-                    ct = ct2
-
-            result[i, j] = val
-
-    return result
 
 def mode_str(ndarray[object, ndim=2] a, ndarray[np.int64_t] locs,
             int left, int right, int min_window):
@@ -0,0 +1,362 @@
+import numpy as np
+cimport numpy as np
+from numpy cimport ndarray
+from cpython.unicode cimport PyUnicode_DecodeUTF8
+
+from libc.stdlib cimport malloc, free
+from libc.string cimport memcmp, memcpy
+
+# A StringBuffer holds the categories of a string column like an Arrow string array, the
+# UTF-8 bytes of all the strings back to back and the int64 offset of each string into them.
+# `offsets[k]` is the start of the kth category and `offsets[k + 1]` its end. Position 0 is
+# the missing value, an empty string, so the codes of a column index it like a list of
+# categories. UTF-8 bytes sort in the same order as the strings they encode.
+
+
+cdef inline np.uint64_t _hash_bytes(const unsigned char *c, Py_ssize_t n) nogil:
+    # FNV-1a
+    cdef:
+        Py_ssize_t i
+        np.uint64_t h = 14695981039346656037ULL
+
+    for i in range(n):
+        h = (h ^ c[i]) * 1099511628211ULL
+    return h
+
+
+cdef inline Py_ssize_t _table_size(Py_ssize_t n):
+    # a power of two that keeps the load factor at most one half
+    cdef Py_ssize_t cap = 8
+    while cap < 2 * n:
+        cap *= 2
+    return cap
+
+
+cdef inline int _compare(const unsigned char *data, const np.int64_t *offs,
+                         np.int64_t a, np.int64_t b) nogil:
+    cdef:
+        np.int64_t len_a = offs[a + 1] - offs[a], len_b = offs[b + 1] - offs[b]
+        int cmp = memcmp(data + offs[a], data + offs[b], len_a if len_a < len_b else len_b)
+
+    if cmp != 0:
+        return cmp
+    return (len_a > len_b) - (len_a < len_b)
+
+
+cdef void _merge_sort(const unsigned char *data, const np.int64_t *offs, np.int64_t *idx,
+                      np.int64_t *tmp, Py_ssize_t n) nogil:
+    # bottom-up and stable, each pass merges from one of `idx` and `tmp` into the other
+    cdef:
+        Py_ssize_t width = 1, lo, mid, hi, i, j, k
+        np.int64_t *src = idx
+        np.int64_t *dst = tmp
+        np.int64_t *swap
+
+    while width < n:
+        lo = 0
+        while lo < n:
+            mid = lo + width if lo + width < n else n
+            hi = lo + 2 * width if lo + 2 * width < n else n
+            i, j, k = lo, mid, lo
+            while i < mid and j < hi:
+                if _compare(data, offs, src[j], src[i]) < 0:
+                    dst[k] = src[j]
+                    j += 1
+                else:
+                    dst[k] = src[i]
+                    i += 1
+                k += 1
+            while i < mid:
+                dst[k] = src[i]
+                i += 1
+                k += 1
+            while j < hi:
+                dst[k] = src[j]
+                j += 1
+                k += 1
+            lo = hi
+        swap = src
+        src = dst
+        dst = swap
+        width *= 2
+
+    if src != idx:
+        memcpy(idx, src, n * sizeof(np.int64_t))
+
+
+cdef class StringBuffer:
+    """
+    The categories of a string column stored as one UTF-8 byte buffer and the offsets of
+    the strings into it. It is read like a list of categories but costs the length of the
+    strings plus 8 bytes each instead of a Python string object each.
+
+    StringBuffers never change. Copying one gives a list.
+    """
+    cdef readonly ndarray data
+    cdef readonly ndarray offsets
+    # an open addressing hash table of the positions of the strings, built on the first
+    # lookup and holding 0 for empty slots
+    cdef ndarray _table
+
+    def __init__(self, ndarray data, ndarray offsets):
+        self.data = np.ascontiguousarray(data, dtype='uint8')
+        self.offsets = np.ascontiguousarray(offsets, dtype='int64')
+
+    cdef void _build_table(self):
+        cdef:
+            Py_ssize_t k, n = len(self.offsets) - 1
+            np.int64_t *offs = <np.int64_t *> self.offsets.data
+            const unsigned char *data = <const unsigned char *> self.data.data
+            ndarray[np.uint32_t] table = np.zeros(_table_size(n), dtype='uint32')
+            np.uint32_t *tab = <np.uint32_t *> table.data
+            np.uint64_t slot, mask = len(table) - 1
+
+        with nogil:
+            for k in range(1, n):
+                slot = _hash_bytes(data + offs[k], offs[k + 1] - offs[k]) & mask
+                while tab[slot] != 0:
+                    slot = (slot + 1) & mask
+                tab[slot] = k
+        self._table = table
+
+    cdef Py_ssize_t _find(self, str value):
+        # the first position of `value` or -1
+        cdef:
+            bytes encoded = value.encode()
+            const unsigned char *target = encoded
+            Py_ssize_t k, size = len(encoded)
+            np.int64_t *offs = <np.int64_t *> self.offsets.data
+            const unsigned char *data = <const unsigned char *> self.data.data
+            np.uint32_t *tab
+            np.uint64_t slot, mask
+
+        if self._table is None:
+            self._build_table()
+        tab = <np.uint32_t *> self._table.data
+        mask = len(self._table) - 1
+        slot = _hash_bytes(target, size) & mask
+        while tab[slot] != 0:
+            k = tab[slot]
+            if offs[k + 1] - offs[k] == size and memcmp(data + offs[k], target, size) == 0:
+                return k
+            slot = (slot + 1) & mask
+        return -1
+
+    @classmethod
+    def from_strings(cls, strings):
+        """
+        Encodes a list of categories whose first element is the missing value
+        """
+        cdef list encoded = [b''] + [s.encode() for s in strings[1:]]
+        cdef ndarray[np.int64_t] offsets = np.zeros(len(encoded) + 1, dtype='int64')
+        np.cumsum([len(val) for val in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype='uint8'), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        cdef:
+            Py_ssize_t n = len(self.offsets) - 1, k
+            np.int64_t *offs = <np.int64_t *> self.offsets.data
+
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(n))]
+        k = i
+        if k < 0:
+            k += n
+        if k < 0 or k >= n:
+            raise IndexError('StringBuffer index out of range')
+        if k == 0:
+            return False
+        return PyUnicode_DecodeUTF8(<const char *> self.data.data + offs[k],
+                                    offs[k + 1] - offs[k], NULL)
+
+    def __iter__(self):
+        cdef Py_ssize_t k
+        for k in range(len(self.offsets) - 1):
+            yield self[k]
+
+    def __eq__(self, other):
+        if isinstance(other, StringBuffer):
+            return (np.array_equal(self.offsets, other.offsets) and
+                    np.array_equal(self.data, other.data))
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return StringBuffer, (self.data, self.offsets)
+
+    def __repr__(self):
+        return f'StringBuffer({len(self) - 1} strings, {self.nbytes} bytes)'
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.offsets.nbytes
+
+    def copy(self):
+        return list(self)
+
+    def index(self, value):
+        """
+        Returns the position of the string `value`. The positions are hashed on the first
+        call, which costs 8 to 16 bytes per string.
+        """
+        cdef Py_ssize_t k = -1
+
+        if value is False:
+            return 0
+        if isinstance(value, str):
+            k = self._find(value)
+        if k == -1:
+            raise ValueError(f'{value!r} is not in StringBuffer')
+        return k
+
+    def __contains__(self, value):
+        if value is False:
+            return True
+        return isinstance(value, str) and self._find(value) != -1
+
+    def take(self, ndarray[np.int64_t] positions):
+        """
+        Returns a new StringBuffer with the strings at `positions`. The first position
+        should be 0, the missing value.
+        """
+        cdef:
+            Py_ssize_t k, n = len(positions)
+            np.int64_t *pos = <np.int64_t *> positions.data
+            np.int64_t *offs = <np.int64_t *> self.offsets.data
+            ndarray[np.int64_t] new_offsets = np.zeros(n + 1, dtype='int64')
+            np.int64_t *new_offs = <np.int64_t *> new_offsets.data
+            ndarray[np.uint8_t] new_data
+            unsigned char *out
+            const unsigned char *data = <const unsigned char *> self.data.data
+
+        for k in range(n):
+            if pos[k] < 0 or pos[k] >= len(self.offsets) - 1:
+                raise IndexError('StringBuffer index out of range')
+            new_offs[k + 1] = new_offs[k] + offs[pos[k] + 1] - offs[pos[k]]
+
+        new_data = np.empty(new_offs[n], dtype='uint8')
+        out = <unsigned char *> new_data.data
+        with nogil:
+            for k in range(n):
+                memcpy(out + new_offs[k], data + offs[pos[k]], new_offs[k + 1] - new_offs[k])
+        return StringBuffer(new_data, new_offsets)
+
+    def argsort(self):
+        """
+        Returns the positions of the strings after the missing value, counted from the first
+        string, in sorted order. It is the same as
+        `np.argsort(np.array(self[1:], dtype='O'))`
+        """
+        cdef:
+            Py_ssize_t n = len(self.offsets) - 2
+            ndarray[np.int64_t] idx = np.arange(1, n + 1, dtype='int64')
+            ndarray[np.int64_t] tmp = np.empty(n, dtype='int64')
+            const unsigned char *data = <const unsigned char *> self.data.data
+            np.int64_t *offs = <np.int64_t *> self.offsets.data
+
+        if n > 0:
+            with nogil:
+                _merge_sort(data, offs, <np.int64_t *> idx.data, <np.int64_t *> tmp.data, n)
+        return idx - 1
+
+
+def merge_string_buffers(list buffers):
+    """
+    Combines StringBuffers into one holding each of their strings once, in the order they
+    first appear. Returns it and, for each buffer, the uint32 codes of its positions in
+    the combined buffer.
+    """
+    cdef:
+        Py_ssize_t i, k, n, n_buf = len(buffers), total = 0, n_uniq = 0
+        np.int64_t s, size
+        np.uint64_t slot, mask
+        np.uint32_t u
+        StringBuffer buf
+        ndarray[np.uint32_t] table
+        ndarray[np.int64_t] uniq_buf, uniq_pos, new_offsets
+        ndarray[np.uint32_t] codes
+        ndarray[np.uint8_t] new_data
+        np.uint32_t *tab
+        np.uint32_t *out
+        np.int64_t *ub
+        np.int64_t *up
+        np.int64_t *new_offs
+        np.int64_t **all_offs = <np.int64_t **> malloc(n_buf * sizeof(np.int64_t *))
+        const unsigned char **all_data = <const unsigned char **> malloc(
+            n_buf * sizeof(unsigned char *))
+        list all_codes = []
+
+    if all_offs == NULL or all_data == NULL:
+        free(all_offs)
+        free(all_data)
+        raise MemoryError('Not enough memory to merge the strings')
+
+    try:
+        for i in range(n_buf):
+            buf = buffers[i]
+            all_offs[i] = <np.int64_t *> buf.offsets.data
+            all_data[i] = <const unsigned char *> buf.data.data
+            total += len(buf.offsets) - 2
+
+        table = np.zeros(_table_size(total), dtype='uint32')
+        tab = <np.uint32_t *> table.data
+        mask = len(table) - 1
+        # the buffer and position of each distinct string
+        uniq_buf = np.empty(total, dtype='int64')
+        uniq_pos = np.empty(total, dtype='int64')
+        ub = <np.int64_t *> uniq_buf.data
+        up = <np.int64_t *> uniq_pos.data
+
+        for i in range(n_buf):
+            n = len(buffers[i])
+            codes = np.zeros(n, dtype='uint32')
+            out = <np.uint32_t *> codes.data
+            with nogil:
+                for k in range(1, n):
+                    s = all_offs[i][k]
+                    size = all_offs[i][k + 1] - s
+                    slot = _hash_bytes(all_data[i] + s, size) & mask
+                    while True:
+                        u = tab[slot]
+                        if u == 0:
+                            break
+                        if (all_offs[ub[u - 1]][up[u - 1] + 1] -
+                                all_offs[ub[u - 1]][up[u - 1]] == size and
+                                memcmp(all_data[ub[u - 1]] + all_offs[ub[u - 1]][up[u - 1]],
+                                       all_data[i] + s, size) == 0):
+                            break
+                        slot = (slot + 1) & mask
+                    if u == 0:
+                        ub[n_uniq] = i
+                        up[n_uniq] = k
+                        n_uniq += 1
+                        u = tab[slot] = n_uniq
+                    out[k] = u
+            all_codes.append(codes)
+
+        new_offsets = np.zeros(n_uniq + 2, dtype='int64')
+        new_offs = <np.int64_t *> new_offsets.data
+        for k in range(n_uniq):
+            new_offs[k + 2] = (new_offs[k + 1] + all_offs[ub[k]][up[k] + 1] -
+                               all_offs[ub[k]][up[k]])
+        new_data = np.empty(new_offs[n_uniq + 1], dtype='uint8')
+        with nogil:
+            for k in range(n_uniq):
+                memcpy(<unsigned char *> new_data.data + new_offs[k + 1],
+                       all_data[ub[k]] + all_offs[ub[k]][up[k]], new_offs[k + 2] - new_offs[k + 1])
+    finally:
+        free(all_offs)
+        free(all_data)
+    return StringBuffer(new_data, new_offsets), all_codes
@@ -6,217 +6,259 @@ import numpy as np
 from numpy import nan
 from numpy cimport ndarray
 import re
+from collections import OrderedDict
 from typing import Pattern
 
+from dexplo import options
+
 cimport cython
 cimport numpy as np
 
 
-def capitalize(ndarray[np.uint32_t] arr, dict str_reverse_map):
-    cdef:
-        Py_ssize_t i
-        int n = len(arr)
-        ndarray[np.uint32_t] result = np.empty(n, dtype='uint32')
-        dict new_str_map = {False: 0}
-        list cur_str_reverse_list = str_reverse_map[0]
-        int m = len(cur_str_reverse_list), num_unique = 1
-        ndarray[np.uint32_t] new_code_map = np.empty(m, dtype='uint32')
-        list new_str_reverse_map = [False]
-        str new_string
-
-    new_code_map[0] = 0
-
-    for i in range(1, m):
-        new_string = cur_str_reverse_list[i].capitalize()
-        new_code_map[i] = new_str_map.setdefault(new_string, len(new_str_map))
-        if len(new_str_map) > num_unique: # new entry
-            new_str_reverse_map.append(new_string)
-            num_unique += 1
+# The element-wise functions work on the uint32 category codes of string columns. Each
+# distinct string of a column is transformed once and the codes are remapped, so the string
+# work grows with the number of categories and not the number of rows. The `_2d` versions
+# take the reverse maps of the passed columns keyed by their position in `arr`.
+#
+# The regular expression functions also keep what they computed for a list of categories
+# keyed by their arguments, so repeating them on the same columns is only a lookup of the
+# codes. Lists of categories are shared and never changed in place, only replaced or, for
+# string pools, appended to, so a cached entry is valid while the list has the same length.
 
-    for i in range(n):
-        result[i] = new_code_map[arr[i]]
+_category_cache = OrderedDict()
 
-    return result, {0: new_str_reverse_map}, 'S'
 
-def capitalize_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = arr.shape[0]
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].capitalize()
-            else:
-                arr[i, j] = None
-    return result
+cdef object _cache_get(key, object str_reverse_list):
+    if key is None:
+        return None
+    entry = _category_cache.get((key, id(str_reverse_list)))
+    if entry is None or entry[0] is not str_reverse_list or entry[1] != len(str_reverse_list):
+        return None
+    _category_cache.move_to_end((key, id(str_reverse_list)))
+    return entry[2]
 
-def center(ndarray[np.uint32_t] arr, dict str_reverse_map, int width, str fillchar=' '):
-    cdef:
-        Py_ssize_t i
-        int n = len(arr)
-        ndarray[np.uint32_t] result = np.empty(n, dtype='uint32')
-        dict new_str_map = {False: 0}
-        list cur_str_reverse_list = str_reverse_map[0]
-        int m = len(cur_str_reverse_list), num_unique = 1
-        ndarray[np.uint32_t] new_code_map = np.empty(m, dtype='uint32')
-        list new_str_reverse_map = [False]
-        str new_string
-
-    new_code_map[0] = 0
-
-    for i in range(1, m):
-        new_string = cur_str_reverse_list[i].center(width, fillchar)
-        new_code_map[i] = new_str_map.setdefault(new_string, len(new_str_map))
-        if len(new_str_map) > num_unique: # new entry
-            new_str_reverse_map.append(new_string)
-            num_unique += 1
-            
-    for i in range(n):
-        result[i] = new_code_map[arr[i]]
 
-    return result, {0: new_str_reverse_map}, 'S'
+cdef void _cache_put(key, object str_reverse_list, result):
+    # keep the `str_cache_size` most recently used results
+    if key is None:
+        return
+    full_key = (key, id(str_reverse_list))
+    _category_cache[full_key] = (str_reverse_list, len(str_reverse_list), result)
+    _category_cache.move_to_end(full_key)
+    while len(_category_cache) > options.options_dict['str_cache_size']:
+        _category_cache.popitem(last=False)
 
-def center_2d(ndarray[object, ndim=2] arr, int width, str fillchar=' '):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].center(width, fillchar)
-            else:
-                result[i, j] = None
-    return result
 
-def contains(ndarray[np.uint32_t] arr, dict str_reverse_map, pat, case=True, flags=0, na=nan, regex=True):
+cdef ndarray _codes_2d(ndarray arr):
+    if arr.ndim == 1:
+        return arr[:, np.newaxis]
+    return arr
+
+
+cdef tuple _str_code_map(object cur_str_reverse_list, func):
     cdef:
-        Py_ssize_t i
-        list cur_str_reverse_list = str_reverse_map[0]
-        int m = len(cur_str_reverse_list), n = len(arr)
-        ndarray[np.int8_t] result = np.empty(n, dtype='int8')
-        ndarray[np.uint32_t] new_code_map = np.empty(m, dtype='uint32')
-        
-    new_code_map[0] = -1
+        Py_ssize_t k
+        ndarray[np.uint32_t] code_map = np.zeros(len(cur_str_reverse_list), dtype='uint32')
+        dict new_str_map = {}
+        list new_str_reverse_list = [False]
+
+    for k in range(1, len(cur_str_reverse_list)):
+        new_string = func(cur_str_reverse_list[k])
+        if new_string is not None:
+            code_map[k] = new_str_map.setdefault(new_string, len(new_str_reverse_list))
+            if code_map[k] == len(new_str_reverse_list):
+                new_str_reverse_list.append(new_string)
+    return code_map, new_str_reverse_list
+
+
+cdef tuple _map_str(ndarray arr, dict str_reverse_map, func, key=None):
+    """
+    Calls `func` on each string category of each column and remaps the codes to the new
+    strings. Categories that become the same string share a code and those that
+    become None are missing
+    """
+    cdef:
+        Py_ssize_t i, j
+        ndarray[np.uint32_t, ndim=2] codes = _codes_2d(arr)
+        Py_ssize_t nr = codes.shape[0], nc = codes.shape[1]
+        ndarray[np.uint32_t, ndim=2] result = np.empty((nr, nc), dtype='uint32', order='F')
+        ndarray[np.uint32_t] code_map
+        dict new_str_reverse_map = {}
+        object cur_str_reverse_list
 
-    if regex:
-        if isinstance(pat, Pattern):
-            pattern = pat
-        else:
-            if not case:
-                flags = flags | re.IGNORECASE
-            pattern = re.compile(pat, flags=flags)
+    for j in range(nc):
+        cur_str_reverse_list = str_reverse_map[j]
+        mapped = _cache_get(key, cur_str_reverse_list)
+        if mapped is None:
+            mapped = _str_code_map(cur_str_reverse_list, func)
+            _cache_put(key, cur_str_reverse_list, mapped)
+        code_map, new_str_reverse_map[j] = mapped
 
-        for i in range(1, m):
-            new_code_map[i] = bool(pattern.search(cur_str_reverse_list[i])) * 1
-    else:
-        if case:
-            for i in range(m):
-                new_code_map[i] = (pat in cur_str_reverse_list[i]) * 1
-        else:
-            pat = pat.lower()
-            for i in range(m):
-                new_code_map[i] = (pat in cur_str_reverse_list[i]) * 1
+        for i in range(nr):
+            result[i, j] = code_map[codes[i, j]]
 
-    for i in range(n):
-        result[i] = new_code_map[arr[i]]
+    if arr.ndim == 1:
+        return result[:, 0], new_str_reverse_map, 'S'
+    return result, new_str_reverse_map, 'S'
 
-    return result, {}, 'b'
 
-def contains_2d(ndarray[object, ndim=2] arr, pat, case=True, flags=0, na=nan, regex=True):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
+cdef ndarray _category_values(object cur_str_reverse_list, func, str dtype):
+    cdef:
+        Py_ssize_t k
+        ndarray values = np.empty(len(cur_str_reverse_list), dtype=dtype)
 
-    if regex:
-        if isinstance(pat, Pattern):
-            pattern = pat
-        else:
-            if not case:
-                flags = flags | re.IGNORECASE
-            pattern = re.compile(pat, flags=flags)
+    values[0] = -1 if dtype == 'int8' else nan
+    for k in range(1, len(cur_str_reverse_list)):
+        values[k] = func(cur_str_reverse_list[k])
+    return values
 
-        for i in range(nr):
-            for j in range(nc):
-                if arr[i, j] is not None:
-                    result[i, j] = bool(pattern.search(arr[i, j]))
-                else:
-                    result[i, j] = False
-    else:
-        if case:
-            for i in range(nr):
-                for j in range(nc):
-                    if arr[i, j] is not None:
-                        result[i, j] = pat in arr[i, j]
-                    else:
-                        result[i, j] = False
-        else:
-            pat = pat.lower()
-            for i in range(nr):
-                for j in range(nc):
-                    if arr[i, j] is not None:
-                        result[i, j] = pat in arr[i, j].lower()
-                    else:
-                        result[i, j] = False
-    return result
 
-def count(ndarray[object] arr, pat, case=True, flags=0, na=nan, regex=True):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.float64_t] result = np.empty(n, dtype=np.float64)
+cdef tuple _map_values(ndarray arr, dict str_reverse_map, func, str kind, key=None):
+    """
+    Calls `func` on each string category of each column and gives every row the value of
+    its category. `kind` is 'b' for booleans or 'i' for integers. Integer results
+    become floats when a column has missing values
+    """
+    cdef:
+        Py_ssize_t j
+        ndarray codes = _codes_2d(arr)
+        Py_ssize_t nr = codes.shape[0], nc = codes.shape[1]
+        ndarray result, values
+        object cur_str_reverse_list
+        str dtype = 'int8' if kind == 'b' else 'float64'
+
+    result = np.empty((nr, nc), dtype=dtype, order='F')
+    for j in range(nc):
+        cur_str_reverse_list = str_reverse_map[j]
+        values = _cache_get(key, cur_str_reverse_list)
+        if values is None:
+            values = _category_values(cur_str_reverse_list, func, dtype)
+            _cache_put(key, cur_str_reverse_list, values)
+        result[:, j] = values[codes[:, j]]
+
+    if kind == 'i':
+        if (codes == 0).any():
+            kind = 'f'
+        else:
+            result = result.astype('int64', order='F')
+
+    if arr.ndim == 1:
+        return result[:, 0], {}, kind
+    return result, {}, kind
+
+
+cdef tuple _map_parts(ndarray arr, dict str_reverse_map, func, key=None):
+    """
+    Calls `func`, which returns a list of strings, on each string category of each column
+    and puts the kth string of each row into the kth new column. A column makes as many
+    new columns as the longest list of the categories that it uses.
+
+    Returns
+    -------
+    The codes of the new columns, their reverse maps and the number of new columns made
+    from each column
+    """
+    cdef:
+        Py_ssize_t j, k, p, n_parts
+        ndarray[np.uint32_t, ndim=2] codes = _codes_2d(arr)
+        Py_ssize_t nr = codes.shape[0], nc = codes.shape[1]
+        ndarray[np.uint32_t] code_map
+        ndarray seen
+        dict new_str_map, new_str_reverse_map = {}
+        object cur_str_reverse_list
+        list new_str_reverse_list, parts, results = [], group_len = []
+
+    for j in range(nc):
+        cur_str_reverse_list = str_reverse_map[j]
+        parts = _cache_get(key, cur_str_reverse_list)
+        if parts is None:
+            parts = [[]] + [func(s) for s in cur_str_reverse_list[1:]]
+            _cache_put(key, cur_str_reverse_list, parts)
+
+        # unused categories do not make new columns
+        seen = np.bincount(codes[:, j], minlength=len(parts)) > 0
+        n_parts = 0
+        for k in np.flatnonzero(seen):
+            n_parts = max(n_parts, len(parts[k]))
+
+        for p in range(n_parts):
+            code_map = np.zeros(len(parts), dtype='uint32')
+            new_str_map = {}
+            new_str_reverse_list = [False]
+            for k in range(1, len(parts)):
+                if len(parts[k]) > p:
+                    code_map[k] = new_str_map.setdefault(parts[k][p], len(new_str_reverse_list))
+                    if code_map[k] == len(new_str_reverse_list):
+                        new_str_reverse_list.append(parts[k][p])
+            new_str_reverse_map[len(results)] = new_str_reverse_list
+            results.append(code_map[codes[:, j]])
+        group_len.append(n_parts)
+
+    if results:
+        return np.column_stack(results).astype('uint32', order='F'), new_str_reverse_map, group_len
+    return np.empty((nr, 0), dtype='uint32', order='F'), new_str_reverse_map, group_len
+
+
+cdef object _compile(pat, case, flags):
+    if isinstance(pat, Pattern):
+        return pat
+    if not case:
+        flags = flags | re.IGNORECASE
+    return re.compile(pat, flags=flags)
 
+
+cdef object _contains_func(pat, case, flags, regex):
     if regex:
-        if isinstance(pat, Pattern):
-            pattern = pat
-        else:
-            if not case:
-                flags = flags | re.IGNORECASE
-            pattern = re.compile(pat, flags=flags)
-        for i in range(n):
-            if arr[i] is not None:
-                result[i] = len(pattern.findall(arr[i]))
-            else:
-                result[i] = na
-        return result
-    else:
-        for i in range(n):
-            if arr[i] is not None:
-                result[i] = arr[i].count(pat)
-            else:
-                result[i] = na
-        return result
-
-def count_2d(ndarray[object, ndim=2] arr, pat, case=True, flags=0, na=nan, regex=True):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.float64_t, ndim=2] result = np.empty((nr, nc), dtype=np.float64)
+        pattern = _compile(pat, case, flags)
+        return lambda s: pattern.search(s) is not None
+    if case:
+        return lambda s: pat in s
+    pat = pat.lower()
+    return lambda s: pat in s.lower()
 
+
+cdef object _count_func(pat, case, flags, regex):
     if regex:
-        if isinstance(pat, Pattern):
-            pattern = pat
-        else:
-            if not case:
-                flags = flags | re.IGNORECASE
-            pattern = re.compile(pat, flags=flags)
+        pattern = _compile(pat, case, flags)
+        return lambda s: len(pattern.findall(s))
+    return lambda s: s.count(pat)
 
-        for i in range(nr):
-            for j in range(nc):
-                if arr[i, j] is not None:
-                    result[i, j] = len(pattern.findall(arr[i, j]))
-                else:
-                    result[i, j] = na
-        return result
-    else:
-        for i in range(nr):
-            for j in range(nc):
-                if arr[i, j] is not None:
-                    result[i, j] = arr[i, j].count(pat)
-                else:
-                    result[i, j] = na
-        return result
+
+def capitalize(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.capitalize)
+
+def capitalize_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.capitalize)
+
+def center(ndarray[np.uint32_t] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.center(width, fillchar))
+
+def center_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.center(width, fillchar))
+
+def contains(ndarray[np.uint32_t] arr, dict str_reverse_map,
+             pat, case=True, flags=0, na=nan, regex=True):
+    func = _contains_func(pat, case, flags, regex)
+    key = ('contains', pat, case, flags, regex)
+    return _map_values(arr, str_reverse_map, func, 'b', key)
+
+def contains_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map,
+                pat, case=True, flags=0, na=nan, regex=True):
+    func = _contains_func(pat, case, flags, regex)
+    key = ('contains', pat, case, flags, regex)
+    return _map_values(arr, str_reverse_map, func, 'b', key)
+
+def count(ndarray[np.uint32_t] arr, dict str_reverse_map,
+          pat, case=True, flags=0, na=nan, regex=True):
+    func = _count_func(pat, case, flags, regex)
+    key = ('count', pat, case, flags, regex)
+    return _map_values(arr, str_reverse_map, func, 'i', key)
+
+def count_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map,
+             pat, case=True, flags=0, na=nan, regex=True):
+    func = _count_func(pat, case, flags, regex)
+    key = ('count', pat, case, flags, regex)
+    return _map_values(arr, str_reverse_map, func, 'i', key)
 
 def decode(ndarray[object] arr, str encoding, str errors='strict'):
     cdef int i
@@ -237,142 +279,29 @@ def encode(ndarray[object] arr, str encoding, str errors='strict'):
         result[i] = arr[i].encode(encoding, errors)
     return result
 
-def endswith(ndarray[object] arr, str pat):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].endswith(pat)
-        else:
-            result[i] = False
-    return result
+def endswith(ndarray[np.uint32_t] arr, dict str_reverse_map, str pat):
+    return _map_values(arr, str_reverse_map, lambda s: s.endswith(pat), 'b')
 
-def endswith_2d(ndarray[object, ndim=2] arr, str pat):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].endswith(pat)
-            else:
-                result[i, j] = False
-    return result
+def endswith_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, str pat):
+    return _map_values(arr, str_reverse_map, lambda s: s.endswith(pat), 'b')
 
-def find(ndarray[object] arr, str sub, start, end):
-    cdef int i
-    cdef np.uint8_t hasnans = False
-    cdef int n = len(arr)
-    cdef ndarray[np.float64_t] result = np.empty(n, dtype='float64')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].find(sub, start, end)
-        else:
-            hasnans = True
-            result[i] = nan
+def find(ndarray[np.uint32_t] arr, dict str_reverse_map, str sub, start, end):
+    return _map_values(arr, str_reverse_map, lambda s: s.find(sub, start, end), 'i')
 
-    if not hasnans:
-        return result.astype('int64')
-    return result
+def find_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, str sub, start, end):
+    return _map_values(arr, str_reverse_map, lambda s: s.find(sub, start, end), 'i')
 
-def find_2d(ndarray[object, ndim=2] arr, str sub, start, end):
-    cdef int i, j
-    cdef np.uint8_t hasnans = False
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.float64_t, ndim=2] result = np.empty((nr, nc), dtype='float64')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].find(sub, start, end)
-            else:
-                hasnans = True
-                result[i, j] = nan
+def findall(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, pat, pos=0,
+            case=True, flags=0):
+    pattern = _compile(pat, case, flags)
+    key = ('findall', pat, pos, case, flags)
+    return _map_parts(arr, str_reverse_map, lambda s: pattern.findall(s, pos), key)
 
-    if not hasnans:
-        return result.astype('int64')
-    return result
+def get(ndarray[np.uint32_t] arr, dict str_reverse_map, int i):
+    return _map_str(arr, str_reverse_map, lambda s: s[i] if -len(s) <= i < len(s) else None)
 
-def findall(ndarray[object, ndim=2] arr, pat, pos, case=True, flags=0, int count=0):
-    cdef int i, j, k, arr_num, ct = 0
-    cdef int nr = arr.shape[0]
-    cdef int nc = arr.shape[1]
-    cdef list data = []
-    cdef list result
-    cdef ndarray[object] cur_arr
-    cdef ndarray[object, ndim=2] final_arr
-    cdef int amax = 0
-    cdef int total_max = 0
-    cdef list maxes = [0]
-
-    if isinstance(pat, Pattern):
-        pattern = pat
-    else:
-        if not case:
-            flags = flags | re.IGNORECASE
-        pattern = re.compile(pat, flags=flags)
-
-    for j in range(nc):
-        cur_arr = np.empty(nr, 'O')
-        amax = 0
-        for i in range(nr):
-            if arr[i, j] is not None:
-                result = pattern.findall(arr[i, j], pos)
-                cur_arr[i] = result
-                if len(result) > amax:
-                    amax = len(result)
-            else:
-                cur_arr[i] = None
-        total_max += amax
-        data.append(cur_arr)
-        maxes.append(amax)
-
-    final_arr = np.empty((nr, total_max + count), 'O')
-    for j in range(nc):
-        cur_arr = data[j]
-        for i in range(nr):
-            if cur_arr[i] is not None:
-                for k, val in enumerate(cur_arr[i]):
-                    final_arr[i, k + maxes[j] + count] = val
-
-    col_names = []
-    for i, val in enumerate(maxes[1:]):
-        for k in range(val):
-            col_names.append(str(k))
-
-    return final_arr, np.array(col_names, 'O'), maxes[1:]
-
-def get(ndarray[object] arr, int idx):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            try:
-                result[i] = arr[i][idx]
-            except IndexError:
-                result[i] = None
-        else:
-            result[i] = None
-    return result
-
-def get_2d(ndarray[object, ndim=2] arr, int idx):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                try:
-                    result[i, j] = arr[i, j][idx]
-                except IndexError:
-                    result[i, j] = None
-            else:
-                result[i, j] = None
-    return result
+def get_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int i):
+    return _map_str(arr, str_reverse_map, lambda s: s[i] if -len(s) <= i < len(s) else None)
 
 def get_dummies(ndarray[object, ndim=2] arr, sep, int count):
     cdef int i, j
@@ -417,341 +346,89 @@ def get_dummies(ndarray[object, ndim=2] arr, sep, int count):
 
     return result, np.array(col_names, dtype='O'), group_len
 
-def isalnum(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isalnum()
-        else:
-            result[i] = False
-    return result
+def isalnum(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isalnum, 'b')
 
-def isalnum_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isalnum()
-            else:
-                result[i, j] = False
-    return result
+def isalnum_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isalnum, 'b')
 
-def isalpha(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isalpha()
-        else:
-            result[i] = False
-    return result
+def isalpha(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isalpha, 'b')
 
-def isalpha_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isalpha()
-            else:
-                result[i, j] = False
-    return result
+def isalpha_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isalpha, 'b')
 
-def isdecimal(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isdecimal()
-        else:
-            result[i] = False
-    return result
+def isdecimal(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isdecimal, 'b')
 
-def isdecimal_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isdecimal()
-            else:
-                result[i, j] = False
-    return result
+def isdecimal_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isdecimal, 'b')
 
-def isdigit(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isdigit()
-        else:
-            result[i] = False
-    return result
+def isdigit(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isdigit, 'b')
 
-def isdigit_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isdigit()
-            else:
-                result[i, j] = False
-    return result
+def isdigit_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isdigit, 'b')
 
-def islower(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].islower()
-        else:
-            result[i] = False
-    return result
+def islower(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.islower, 'b')
 
-def islower_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].islower()
-            else:
-                result[i, j] = False
-    return result
+def islower_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.islower, 'b')
 
-def isnumeric(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isnumeric()
-        else:
-            result[i] = False
-    return result
+def isnumeric(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isnumeric, 'b')
 
-def isnumeric_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isnumeric()
-            else:
-                result[i, j] = False
-    return result
+def isnumeric_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isnumeric, 'b')
 
-def isspace(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isspace()
-        else:
-            result[i] = False
-    return result
+def isspace(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isspace, 'b')
 
-def isspace_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isspace()
-            else:
-                result[i, j] = False
-    return result
+def isspace_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isspace, 'b')
 
-def istitle(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].istitle()
-        else:
-            result[i] = False
-    return result
+def istitle(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.istitle, 'b')
 
-def istitle_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].istitle()
-            else:
-                result[i, j] = False
-    return result
+def istitle_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.istitle, 'b')
 
-def isupper(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].isupper()
-        else:
-            result[i] = False
-    return result
+def isupper(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isupper, 'b')
 
-def isupper_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].isupper()
-            else:
-                result[i, j] = False
-    return result
+def isupper_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, str.isupper, 'b')
 
-def join(ndarray[object] arr, str sep):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='O')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = sep.join(arr[i])
-        else:
-            result[i] = None
-    return result
+def join(ndarray[np.uint32_t] arr, dict str_reverse_map, str sep):
+    return _map_str(arr, str_reverse_map, sep.join)
 
-def join_2d(ndarray[object, ndim=2] arr, str sep):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='O')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = sep.join(arr[i, j])
-            else:
-                result[i, j] = None
-    return result
+def join_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, str sep):
+    return _map_str(arr, str_reverse_map, sep.join)
 
-def _len(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.int64_t] result = np.empty(n, dtype='int64')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = len(arr[i])
-        else:
-            result[i] = -1
-    return result
+def _len(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, len, 'i')
 
-def _len_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.int64_t, ndim=2] result = np.empty((nr, nc), dtype='int64')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = len(arr[i, j])
-            else:
-                result[i, j] = -1
-    return result
+def _len_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_values(arr, str_reverse_map, len, 'i')
 
-def ljust(ndarray[object] arr, int width, str fillchar=' '):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].ljust(width, fillchar)
-        else:
-            result[i] = None
-    return result
+def ljust(ndarray[np.uint32_t] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.ljust(width, fillchar))
 
-def ljust_2d(ndarray[object, ndim=2] arr, int width, str fillchar=' '):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].ljust(width, fillchar)
-            else:
-                result[i, j] = None
-    return result
+def ljust_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.ljust(width, fillchar))
 
-def lower(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].lower()
-        else:
-            result[i] = None
-    return result
+def lower(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.lower)
 
-def lower_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].lower()
-            else:
-                result[i, j] = None
-    return result
+def lower_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.lower)
 
-def lstrip(ndarray[object] arr, to_strip):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].lstrip(to_strip)
-        else:
-            result[i] = None
-    return result
+def lstrip(ndarray[np.uint32_t] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.lstrip(to_strip))
 
-def lstrip_2d(ndarray[object, ndim=2] arr, to_strip):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].lstrip(to_strip)
-            else:
-                result[i, j] = None
-    return result
+def lstrip_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.lstrip(to_strip))
 
 def partition(ndarray[object, ndim=2] arr, str sep, int count):
     cdef int i, j
@@ -766,134 +443,35 @@ def partition(ndarray[object, ndim=2] arr, str sep, int count):
                     result[i, j * 3 + k + count] = val
     return result, np.array(['head', 'sep', 'tail'] * nc, dtype='O'), [3] * nc
 
-def repeat(ndarray[object] arr, int repeats):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            try:
-                result[i] = arr[i] * repeats
-            except IndexError:
-                result[i] = None
-        else:
-            result[i] = None
-    return result
+def repeat(ndarray[np.uint32_t] arr, dict str_reverse_map, int repeats):
+    return _map_str(arr, str_reverse_map, lambda s: s * repeats)
 
-def repeat_2d(ndarray[object, ndim=2] arr, int repeats):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                try:
-                    result[i, j] = arr[i, j] * repeats
-                except IndexError:
-                    result[i, j] = None
-            else:
-                result[i, j] = None
-    return result
+def repeat_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int repeats):
+    return _map_str(arr, str_reverse_map, lambda s: s * repeats)
 
-def replace(ndarray[object] arr, pat, str repl='', n=0, case=True, flags=0):
-    cdef Py_ssize_t i
-    cdef Py_ssize_t nr = len(arr)
-    cdef ndarray[object] result = np.empty(nr, dtype='O')
+def replace(ndarray[np.uint32_t] arr, dict str_reverse_map,
+            pat, str repl='', n=0, case=True, flags=0):
+    pattern = _compile(pat, case, flags)
+    key = ('replace', pat, repl, n, case, flags)
+    return _map_str(arr, str_reverse_map, lambda s: pattern.sub(repl, s, n), key)
 
-    if isinstance(pat, Pattern):
-        pattern = pat
-    else:
-        if not case:
-            flags = flags | re.IGNORECASE
-        pattern = re.compile(pat, flags=flags)
+def replace_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map,
+               pat, str repl='', n=0, case=True, flags=0):
+    pattern = _compile(pat, case, flags)
+    key = ('replace', pat, repl, n, case, flags)
+    return _map_str(arr, str_reverse_map, lambda s: pattern.sub(repl, s, n), key)
 
-    for i in range(nr):
-        if arr[i] is not None:
-            result[i] = pattern.sub(repl, arr[i], n)
-        else:
-            result[i] = None
-    return result
+def rfind(ndarray[np.uint32_t] arr, dict str_reverse_map, str sub, start, end):
+    return _map_values(arr, str_reverse_map, lambda s: s.rfind(sub, start, end), 'i')
 
-def replace_2d(ndarray[object, ndim=2] arr, pat, str repl='', n=0, case=True, flags=0):
-    cdef Py_ssize_t i, j
-    cdef Py_ssize_t nr = len(arr)
-    cdef Py_ssize_t nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='O')
+def rfind_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, str sub, start, end):
+    return _map_values(arr, str_reverse_map, lambda s: s.rfind(sub, start, end), 'i')
 
-    if isinstance(pat, Pattern):
-        pattern = pat
-    else:
-        if not case:
-            flags = flags | re.IGNORECASE
-        pattern = re.compile(pat, flags=flags)
-
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = pattern.sub(repl, arr[i, j], n)
-            else:
-                result[i, j] = None
+def rjust(ndarray[np.uint32_t] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.rjust(width, fillchar))
 
-    return result
-
-def rfind(ndarray[object] arr, str sub, start, end):
-    cdef int i
-    cdef np.uint8_t hasnans = False
-    cdef int n = len(arr)
-    cdef ndarray[np.float64_t] result = np.empty(n, dtype='float64')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].rfind(sub, start, end)
-        else:
-            hasnans = True
-            result[i] = nan
-
-    if not hasnans:
-        return result.astype('int64')
-    return result
-
-def rfind_2d(ndarray[object, ndim=2] arr, str sub, start, end):
-    cdef int i, j
-    cdef np.uint8_t hasnans = False
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.float64_t, ndim=2] result = np.empty((nr, nc), dtype='float64')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].rfind(sub, start, end)
-            else:
-                hasnans = True
-                result[i, j] = nan
-
-    if not hasnans:
-        return result.astype('int64')
-    return result
-
-def rjust(ndarray[object] arr, int width, str fillchar=' '):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].rjust(width, fillchar)
-        else:
-            result[i] = None
-    return result
-
-def rjust_2d(ndarray[object, ndim=2] arr, int width, str fillchar=' '):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].rjust(width, fillchar)
-            else:
-                result[i, j] = None
-    return result
+def rjust_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int width, str fillchar=' '):
+    return _map_str(arr, str_reverse_map, lambda s: s.rjust(width, fillchar))
 
 def rpartition(ndarray[object, ndim=2] arr, str sep, int count):
     cdef int i, j
@@ -933,382 +511,82 @@ def rpartition(ndarray[object, ndim=2] arr, str sep, int count):
 #     col_names = np.array(['split_' + str(i) for i in range(len(new_arrs))], 'O')
 #     return np.column_stack(new_arrs), col_names
 
-def rsplit(ndarray[object, ndim=2] arr, pat, n, case=True, flags=0, int count=0):
-    cdef int i, j, k, arr_num, ct = 0
-    cdef int nr = arr.shape[0]
-    cdef int nc = arr.shape[1]
-    cdef list data = []
-    cdef list result
-    cdef ndarray[object] cur_arr
-    cdef ndarray[object, ndim=2] final_arr
-    cdef int amax = 0
-    cdef int total_max = 0
-    cdef list maxes = [0]
-
-    if isinstance(pat, Pattern):
-        pattern = pat
-    else:
-        if not case:
-            flags = flags | re.IGNORECASE
-        pattern = re.compile(pat, flags=flags)
-
-    for j in range(nc):
-        cur_arr = np.empty(nr, 'O')
-        amax = 0
-        for i in range(nr):
-            if arr[i, j] is not None:
-                result = pattern.split(arr[i, j][::-1], n)[::-1]
-                cur_arr[i] = result
-                if len(result) > amax:
-                    amax = len(result)
-            else:
-                cur_arr[i] = None
-        total_max += amax
-        data.append(cur_arr)
-        maxes.append(amax)
-
-    final_arr = np.empty((nr, total_max + count), 'O')
-    for j in range(nc):
-        cur_arr = data[j]
-        for i in range(nr):
-            if cur_arr[i] is not None:
-                for k, val in enumerate(cur_arr[i]):
-                    final_arr[i, k + maxes[j] + count] = val[::-1]
-
-    col_names = []
-    for i, val in enumerate(maxes[1:]):
-        for k in range(val):
-            col_names.append(str(k))
-
-    return final_arr, np.array(col_names, 'O'), maxes[1:]
-
-def rstrip(ndarray[object] arr, to_strip):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].rstrip(to_strip)
-        else:
-            result[i] = None
-    return result
-
-def rstrip_2d(ndarray[object, ndim=2] arr, to_strip):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].rstrip(to_strip)
-            else:
-                result[i, j] = None
-    return result
-
-def _slice(ndarray[object] arr, start, stop, step):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i][start:stop:step]
-        else:
-            result[i] = None
-    return result
-
-def _slice_2d(ndarray[object, ndim=2] arr, start, stop, step):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j][start:stop:step]
-            else:
-                result[i, j] = None
-    return result
-
-def slice_replace(ndarray[object] arr, int start, stop, str repl):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
+def rsplit(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, pat, n=0,
+           case=True, flags=0):
+    pattern = _compile(pat, case, flags)
+    key = ('rsplit', pat, n, case, flags)
+    return _map_parts(arr, str_reverse_map,
+                      lambda s: [part[::-1] for part in pattern.split(s[::-1], n)[::-1]], key)
 
-    if stop is None:
-        for i in range(n):
-            if arr[i] is not None:
-                result[i] = arr[i][:start] + repl
-            else:
-                result[i] = None
-    else:
-        for i in range(n):
-            if arr[i] is not None:
-                result[i] = arr[i][:start] + repl + arr[i][stop:]
-            else:
-                result[i] = None
-    return result
+def rstrip(ndarray[np.uint32_t] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.rstrip(to_strip))
 
-def slice_replace_2d(ndarray[object, ndim=2] arr, int start, stop, str repl):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    cdef str s
+def rstrip_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.rstrip(to_strip))
 
-    if stop is None:
-        for i in range(nr):
-            for j in range(nc):
-                if arr[i, j] is not None:
-                    result[i, j] = arr[i, j][:start] + repl
-                else:
-                    result[i, j] = None
-    else:
-        for i in range(nr):
-            for j in range(nc):
-                if arr[i, j] is not None:
-                    result[i, j] = arr[i, j][:start] + repl + arr[i, j][stop:]
-                else:
-                    result[i, j] = None
-    return result
+def _slice(ndarray[np.uint32_t] arr, dict str_reverse_map, start, stop, step):
+    return _map_str(arr, str_reverse_map, lambda s: s[start:stop:step])
 
-def split(ndarray[object, ndim=2] arr, pat, n, case=True, flags=0, int count=0):
-    cdef int i, j, k, arr_num, ct = 0
-    cdef int nr = arr.shape[0]
-    cdef int nc = arr.shape[1]
-    cdef list data = []
-    cdef list result
-    cdef ndarray[object] cur_arr
-    cdef ndarray[object, ndim=2] final_arr
-    cdef int amax = 0
-    cdef int total_max = 0
-    cdef list maxes = [0]
+def _slice_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, start, stop, step):
+    return _map_str(arr, str_reverse_map, lambda s: s[start:stop:step])
 
-    if isinstance(pat, Pattern):
-        pattern = pat
-    else:
-        if not case:
-            flags = flags | re.IGNORECASE
-        pattern = re.compile(pat, flags=flags)
+def slice_replace(ndarray[np.uint32_t] arr, dict str_reverse_map, int start, stop, str repl):
+    return _map_str(arr, str_reverse_map, lambda s: s[:start] + repl + (s[stop:] if stop is not None else ''))
 
-    for j in range(nc):
-        cur_arr = np.empty(nr, 'O')
-        amax = 0
-        for i in range(nr):
-            if arr[i, j] is not None:
-                result = pattern.split(arr[i, j], n)
-                cur_arr[i] = result
-                if len(result) > amax:
-                    amax = len(result)
-            else:
-                cur_arr[i] = None
-        total_max += amax
-        data.append(cur_arr)
-        maxes.append(amax)
-
-    final_arr = np.empty((nr, total_max + count), 'O')
-    for j in range(nc):
-        cur_arr = data[j]
-        for i in range(nr):
-            if cur_arr[i] is not None:
-                for k, val in enumerate(cur_arr[i]):
-                    final_arr[i, k + maxes[j] + count] = val
+def slice_replace_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map,
+                     int start, stop, str repl):
+    return _map_str(arr, str_reverse_map, lambda s: s[:start] + repl + (s[stop:] if stop is not None else ''))
 
-    col_names = []
-    for i, val in enumerate(maxes[1:]):
-        for k in range(val):
-            col_names.append(str(k))
+def split(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, pat, n=0,
+          case=True, flags=0):
+    pattern = _compile(pat, case, flags)
+    key = ('split', pat, n, case, flags)
+    return _map_parts(arr, str_reverse_map, lambda s: pattern.split(s, n), key)
 
-    return final_arr, np.array(col_names, 'O'), maxes[1:]
+def startswith(ndarray[np.uint32_t] arr, dict str_reverse_map, str pat):
+    return _map_values(arr, str_reverse_map, lambda s: s.startswith(pat), 'b')
 
-def startswith(ndarray[object] arr, str pat):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[np.uint8_t, cast=True] result = np.empty(n, dtype='bool')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].startswith(pat)
-        else:
-            result[i] = False
-    return result
+def startswith_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, str pat):
+    return _map_values(arr, str_reverse_map, lambda s: s.startswith(pat), 'b')
 
-def startswith_2d(ndarray[object, ndim=2] arr, str pat):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[np.uint8_t, cast=True, ndim=2] result = np.empty((nr, nc), dtype='bool')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].startswith(pat)
-            else:
-                result[i, j] = False
-    return result
+def swapcase(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.swapcase)
 
-def swapcase(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].swapcase()
-        else:
-            result[i] = None
-    return result
+def swapcase_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.swapcase)
 
-def swapcase_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].swapcase()
-            else:
-                result[i, j] = None
-    return result
+def title(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.title)
 
-def title(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].title()
-        else:
-            result[i] = None
-    return result
+def title_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.title)
 
-def title_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].title()
-            else:
-                result[i, j] = None
-    return result
+def upper(ndarray[np.uint32_t] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.upper)
 
-def upper(ndarray[object] arr):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].upper()
-        else:
-            result[i] = None
-    return result
+def upper_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map):
+    return _map_str(arr, str_reverse_map, str.upper)
 
-def upper_2d(ndarray[object, ndim=2] arr):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].upper()
-            else:
-                result[i, j] = None
-    return result
+def strip(ndarray[np.uint32_t] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.strip(to_strip))
 
-def strip(ndarray[object] arr, to_strip):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].strip(to_strip)
-        else:
-            result[i] = None
-    return result
+def strip_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, to_strip):
+    return _map_str(arr, str_reverse_map, lambda s: s.strip(to_strip))
 
-def strip_2d(ndarray[object, ndim=2] arr, to_strip):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].strip(to_strip)
-            else:
-                result[i, j] = None
-    return result
+def translate(ndarray[np.uint32_t] arr, dict str_reverse_map, dict table):
+    return _map_str(arr, str_reverse_map, lambda s: s.translate(table))
 
-def translate(ndarray[object] arr, dict table):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].translate(table)
-        else:
-            result[i] = None
-    return result
+def translate_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, dict table):
+    return _map_str(arr, str_reverse_map, lambda s: s.translate(table))
 
-def translate_2d(ndarray[object, ndim=2] arr, dict table):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].translate(table)
-            else:
-                result[i, j] = None
-    return result
+def zfill(ndarray[np.uint32_t] arr, dict str_reverse_map, int width):
+    return _map_str(arr, str_reverse_map, lambda s: s.zfill(width))
 
-def zfill(ndarray[object] arr, int width):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = arr[i].zfill(width)
-        else:
-            result[i] = None
-    return result
-
-def zfill_2d(ndarray[object, ndim=2] arr, int width):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = arr[i, j].zfill(width)
-            else:
-                result[i, j] = None
-    return result
+def zfill_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, int width):
+    return _map_str(arr, str_reverse_map, lambda s: s.zfill(width))
 
-def wrap(ndarray[object] arr, t):
-    cdef int i
-    cdef int n = len(arr)
-    cdef ndarray[object] result = np.empty(n, dtype='object')
-    for i in range(n):
-        if arr[i] is not None:
-            result[i] = r'\n'.join(t.wrap(arr[i]))
-        else:
-            result[i] = None
-    return result
+def wrap(ndarray[np.uint32_t] arr, dict str_reverse_map, t):
+    return _map_str(arr, str_reverse_map, lambda s: '\n'.join(t.wrap(s)))
 
-def wrap_2d(ndarray[object, ndim=2] arr, t):
-    cdef int i, j
-    cdef int nr = len(arr)
-    cdef int nc = arr.shape[1]
-    cdef ndarray[object, ndim=2] result = np.empty((nr, nc), dtype='object')
-    for i in range(nr):
-        for j in range(nc):
-            if arr[i, j] is not None:
-                result[i, j] = r'\n'.join(t.wrap(arr[i, j]))
-            else:
-                result[i, j] = None
-    return result
+def wrap_2d(ndarray[np.uint32_t, ndim=2] arr, dict str_reverse_map, t):
+    return _map_str(arr, str_reverse_map, lambda s: '\n'.join(t.wrap(s)))
@@ -283,7 +283,7 @@ def is_equal_1d_object(ndarray[object] a, ndarray[object] b):
     return True
 
 
-def is_equal_str_cat_array(ndarray[np.uint32_t] a, ndarray[np.uint32_t] b, list srm_a, list srm_b):
+def is_equal_str_cat_array(ndarray[np.uint32_t] a, ndarray[np.uint32_t] b, srm_a, srm_b):
     cdef Py_ssize_t i, n = len(a)
 
     for i in range(n):
@@ -413,7 +413,8 @@ def make_object_str_array(list cur_list_map, ndarray[object, ndim=2] a,
 def bool_selection_str_mapping(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_map):
     cdef Py_ssize_t i, j
     cdef int nr = a.shape[0], nc = a.shape[1], cur_code, new_val
-    cdef list cur_srm, new_srm
+    cdef object cur_srm
+    cdef list new_srm
     cdef ndarray[np.uint32_t] new_code
     cdef ndarray[np.uint32_t, ndim=2] b = np.empty((nr, nc), 'uint32', 'F')
     cdef dict new_str_reverse_map = {}
@@ -426,7 +427,8 @@ def bool_selection_str_mapping(ndarray[np.uint32_t, ndim=2] a, dict str_reverse_
         for j in range(nr):
             cur_code = a[j, i]
             new_val = new_code[cur_code]
-            if new_val == 0:
+            # missing values keep code 0
+            if new_val == 0 and cur_code != 0:
                 new_val = len(new_srm)
                 new_code[cur_code] = new_val
                 new_srm.append(cur_srm[cur_code])
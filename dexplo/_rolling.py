@@ -8,8 +8,15 @@ from dexplo._libs import rolling as _roll
 
 ColInfoT = Dict[str, utils.Column]
 
+# kernels that run without the GIL and can be split across threads
+NOGIL_FUNCS = {'sum', 'prod', 'mean', 'count', 'min', 'max', 'var', 'std', 'median', 'quantile',
+               'nunique', 'mode'}
+
+# a single column is only split into row chunks when each chunk has at least this many rows
+MIN_CHUNK_ROWS = 50_000
+
 def get_func_kwargs(name):
-    if name in {'sum', 'prod', 'mean', 'median', 'size'}:
+    if name in {'sum', 'prod', 'mean', 'median', 'quantile', 'size'}:
         return {}
     elif name in {'min', 'max'}:
         return dict(ignore_str=False, ignore_date=False)
@@ -19,7 +26,7 @@ def get_func_kwargs(name):
         return dict(ignore_str=False)
     elif name in {'any', 'all', 'nunique'}:
         return dict(ignore_str=False, ignore_date=False, keep_date_type=False)
-    elif name in {'var'}:
+    elif name in {'var', 'std'}:
         return dict(add_positions=True)
 
 def _get_kept_col_data(self) -> Dict[str, List[ndarray]]:
@@ -66,7 +73,9 @@ class Roller(object):
             columns = self._df.columns
         elif isinstance(columns, str):
             columns = [columns]
-        elif not isinstance(columns, list):
+        elif isinstance(columns, list):
+            columns = columns.copy()
+        else:
             raise TypeError('`columns` must either be a string, a list of column names, or None')
 
         col_order = dict(zip(columns, range(len(columns))))
@@ -85,20 +94,22 @@ class Roller(object):
 
         kept_dtype_loc = defaultdict(list)
         new_col_info = {}
+        new_str_reverse_map = {}
         dtype_ct = defaultdict(int)
         for i, col in enumerate(self._kept_columns):
             dtype, loc, _ = col_info[col].values
             new_loc = len(kept_dtype_loc[dtype])
             kept_dtype_loc[dtype].append(loc)
             new_col_info[col] = utils.Column(dtype, new_loc, i)
+            if dtype == 'S':
+                srm = self._df._str_reverse_map[loc]
+                new_str_reverse_map[new_loc] = utils.copy_str_reverse_list(srm)
             dtype_ct[dtype] += 1
 
         data_dict = defaultdict(list)
         for dtype, locs in dtype_locs.items():
-            func_name = name + '_' + utils.convert_kind_to_dtype_generic(dtype)
             data = self._df._data[dtype]
-            result = getattr(_roll, func_name)(data, np.array(locs), self._left, self._right,
-                                               self._min_window, **kwargs)
+            result = self._roll_kernel(name, dtype, data, locs, kwargs)
             result_dtype = result.dtype.kind
             data_dict[result_dtype].append(result)
             for col in dtype_cols[dtype]:
@@ -124,8 +135,18 @@ class Roller(object):
             else:
                 new_data[dtype] = np.column_stack((new_data[dtype], *data))
 
-        new_columns = np.concatenate((self._kept_columns, columns))
-        return DataFrame._construct_from_new(new_data, new_col_info, new_columns)
+        new_columns = np.array(list(self._kept_columns) + columns, dtype='O')
+        return DataFrame._construct_from_new(new_data, new_col_info, new_columns,
+                                             new_str_reverse_map)
+
+    def _roll_kernel(self, name: str, dtype: str, data: ndarray, locs: List[int],
+                     kwargs: Dict) -> ndarray:
+        func_name = name + '_' + utils.convert_kind_to_dtype_generic(dtype)
+        func = getattr(_roll, func_name)
+        if name in NOGIL_FUNCS and dtype in 'ifb':
+            return _roll_columns(func, data, locs, self._left, self._right, self._min_window,
+                                 utils.get_n_threads(), kwargs)
+        return func(data, np.array(locs), self._left, self._right, self._min_window, **kwargs)
 
     def count(self, columns=None) -> DataFrame:
         return self._roll_generic('count', columns)
@@ -148,6 +169,13 @@ class Roller(object):
     def median(self, columns=None) -> DataFrame:
         return self._roll_generic('median', columns)
 
+    def quantile(self, columns=None, q=0.5) -> DataFrame:
+        if not utils.is_number(q):
+            raise TypeError('`q` must be a number between 0 and 1')
+        if q < 0 or q > 1:
+            raise ValueError('`q` must be between 0 and 1')
+        return self._roll_generic('quantile', columns, q=q)
+
     def mode(self, columns=None) -> DataFrame:
         return self._roll_generic('mode', columns)
 
@@ -155,7 +183,7 @@ class Roller(object):
         return self._roll_generic('var', columns, ddof=ddof)
 
     def std(self, columns, ddof=1) -> DataFrame:
-        return self._roll_generic('var', columns, ddof=ddof)
+        return self._roll_generic('std', columns, ddof=ddof)
 
     def nunique(self, columns) -> DataFrame:
         return self._roll_generic('nunique', columns)
@@ -166,12 +194,16 @@ class Roller(object):
 
         kept_dtype_loc = defaultdict(list)
         new_column_info = {}
+        new_str_reverse_map = {}
         dtype_ct = defaultdict(int)
         for i, col in enumerate(self._kept_columns):
             dtype, loc = self._df._get_col_dtype_loc(col)  # type: str, int
             new_loc = len(kept_dtype_loc[dtype])
             kept_dtype_loc[dtype].append(loc)
             new_column_info[col] = utils.Column(dtype, new_loc, i)
+            if dtype == 'S':
+                srm = self._df._str_reverse_map[loc]
+                new_str_reverse_map[new_loc] = utils.copy_str_reverse_list(srm)
             dtype_ct[dtype] += 1
 
         data_dict = defaultdict(list)
@@ -239,9 +271,13 @@ class Roller(object):
                     kwargs['col_dict'] = dict(zip(agg_dtype_locs[dtype], agg_dtype_names[dtype]))
 
                 func = getattr(_roll, func_name)
-
-                arr = func(data, np.array(agg_dtype_locs[dtype]), self._left, self._right,
-                           self._min_window, **kwargs)
+                locs = agg_dtype_locs[dtype]
+                if isinstance(name, str) and name in NOGIL_FUNCS and dtype in 'ifbmM':
+                    arr = _roll_columns(func, data, locs, self._left, self._right,
+                                        self._min_window, utils.get_n_threads(), kwargs)
+                else:
+                    arr = func(data, np.array(locs), self._left, self._right,
+                               self._min_window, **kwargs)
 
                 if dtype in 'mM' and keep_date_type:
                     new_kind = dtype
@@ -275,7 +311,9 @@ class Roller(object):
             else:
                 new_data[dtype] = np.column_stack((new_data[dtype], *data))
 
-        return DataFrame._construct_from_new(new_data, new_column_info, np.asarray(new_columns, dtype='O'))
+        return DataFrame._construct_from_new(new_data, new_column_info,
+                                             np.asarray(new_columns, dtype='O'),
+                                             new_str_reverse_map)
 
     def agg(self, *args):
         func_cols = OrderedDict()
@@ -295,8 +333,8 @@ class Roller(object):
                                  'for its fourth element')
             if isinstance(arg[0], str):
                 if arg[0] not in {'size', 'count', 'sum', 'prod', 'mean',
-                                  'max', 'min', 'first', 'last', 'var',
-                                  'cov', 'corr', 'any', 'all', 'median',
+                                  'max', 'min', 'first', 'last', 'var', 'std',
+                                  'cov', 'corr', 'any', 'all', 'median', 'quantile',
                                   'nunique'}:
                     raise ValueError(f'{arg[0]} is not a possible aggregation function')
             elif not isinstance(arg[0], Callable):
@@ -385,3 +423,42 @@ class Roller(object):
     #             new_data[dtype] = np.concatenate((data, new_data[dtype]), 1)
     #
     #     return DataFrame._construct_from_new(new_data, new_column_info_final, new_columns)
+
+
+def _roll_columns(func: Callable, data: ndarray, locs: List[int], left: int, right: int,
+                  min_window: int, n_threads: int, kwargs: Dict) -> ndarray:
+    """
+    Runs the rolling kernel `func` on `n_threads` groups of columns at the same time. When
+    there are fewer columns than threads, long columns are instead cut into row chunks that
+    overlap by the width of the window so each chunk sees every row its windows need.
+    """
+    locs = np.array(locs)
+    nr, nc = len(data), len(locs)
+    if n_threads == 1 or nr == 0:
+        return func(data, locs, left, right, min_window, **kwargs)
+
+    if nc >= n_threads or nr < 2 * MIN_CHUNK_ROWS:
+        n_groups = min(n_threads, nc)
+        if n_groups == 1:
+            return func(data, locs, left, right, min_window, **kwargs)
+        bounds = np.linspace(0, nc, n_groups + 1).astype('int64')
+
+        def roll(start, end):
+            return func(data, locs[start:end], left, right, min_window, **kwargs)
+
+        results = utils.thread_map(roll, bounds[:-1], bounds[1:], n_threads=n_groups)
+        return np.column_stack(results)
+
+    n_chunks = min(n_threads, nr // MIN_CHUNK_ROWS)
+    bounds = np.linspace(0, nr, n_chunks + 1).astype('int64')
+
+    def roll_rows(lo, hi):
+        # rows lo to hi need the input rows from the first row of the window of lo
+        # through the last row of the window of hi - 1 (`right` is exclusive)
+        in_lo = min(lo, max(0, lo + left))
+        in_hi = max(hi, min(nr, hi - 1 + right))
+        result = func(data[in_lo:in_hi], locs, left, right, min_window, **kwargs)
+        return result[lo - in_lo:hi - in_lo]
+
+    results = utils.thread_map(roll_rows, bounds[:-1], bounds[1:], n_threads=n_chunks)
+    return np.concatenate(results)
@@ -0,0 +1,119 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+
+class StringPool:
+    """
+    An append-only list of strings that the string columns of any number of DataFrames
+    can share as their categories. A string keeps its code for the life of the pool so
+    columns of the same pool are compared, joined and appended with their codes alone.
+
+    Use `dexplo.string_pool` to get a named pool and `DataFrame.to_string_pool` to encode
+    the string columns of a DataFrame into it.
+    """
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        self.name = name
+        self.strings: List = [False]
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.strings) - 1
+
+    def __repr__(self) -> str:
+        return f'StringPool({self.name!r}, {len(self)} strings)'
+
+    def encode(self, codes: ndarray, str_reverse_list: List) -> ndarray:
+        """
+        Translates the codes of a string column with the categories `str_reverse_list`
+        into codes of the pool, adding the strings that the pool does not have yet
+
+        Returns
+        -------
+        A uint32 array of the new codes
+        """
+        if str_reverse_list is self.strings:
+            return codes
+        mapping = np.zeros(len(str_reverse_list), dtype='uint32')
+        with self._lock:
+            for code, val in enumerate(str_reverse_list[1:], 1):
+                new_code = self._codes.get(val)
+                if new_code is None:
+                    new_code = self._codes[val] = len(self.strings)
+                    self.strings.append(val)
+                mapping[code] = new_code
+        return mapping[codes]
+
+
+_pools: Dict[str, StringPool] = {}
+
+# pools are never removed so the id of their list of strings identifies them
+_pools_by_list: Dict[int, StringPool] = {}
+
+
+def string_pool(name: str = 'default') -> StringPool:
+    """
+    Returns the string pool called `name`, creating it the first time it is asked for
+
+    Parameters
+    ----------
+    name : str
+        Name of the pool. All the DataFrames of the process that use the same name share
+        the same pool.
+
+    Returns
+    -------
+    A StringPool
+    """
+    if not isinstance(name, str):
+        raise TypeError('`name` must be a string')
+    pool = _pools.get(name)
+    if pool is None:
+        pool = _pools[name] = StringPool(name)
+        _pools_by_list[id(pool.strings)] = pool
+    return pool
+
+
+def pool_of(str_reverse_list: List) -> Optional[StringPool]:
+    """
+    Returns the pool that `str_reverse_list` belongs to or None
+    """
+    pool = _pools_by_list.get(id(str_reverse_list))
+    if pool is not None and pool.strings is str_reverse_list:
+        return pool
+    return None
+
+
+def merge_categories(arrs: List[ndarray],
+                     str_reverse_lists: List[List]) -> Tuple[List[ndarray], List]:
+    """
+    Puts the codes of several string columns on the same categories. Columns that already
+    share their categories keep their codes and the others are encoded into the pool of
+    one of them or into a new list. Each distinct list of categories is only encoded once
+    however many columns share it.
+
+    Returns
+    -------
+    The new codes of each column and their categories
+    """
+    first = str_reverse_lists[0]
+    if all(srm is first for srm in str_reverse_lists):
+        return arrs, first
+    pool = next(filter(None, map(pool_of, str_reverse_lists)), None)
+    if pool is None:
+        # a pool that is not registered is a throwaway dictionary
+        pool = StringPool()
+    # the lists are alive for the whole call so their ids are unique
+    mappings: Dict[int, ndarray] = {}
+    new_arrs = []
+    for arr, srm in zip(arrs, str_reverse_lists):
+        mapping = mappings.get(id(srm))
+        if mapping is None:
+            mapping = pool.encode(np.arange(len(srm), dtype='uint32'), srm)
+            mappings[id(srm)] = mapping
+        new_arrs.append(mapping[arr])
+    return new_arrs, pool.strings
@@ -95,7 +95,8 @@ class StringClass(object):
     def _create_df(self, arr, dtype, columns, str_reverse_map):
         new_data = {dtype: arr}
         new_column_info = {col: utils.Column(dtype, i, i) for i, col in enumerate(columns)}
-        return self._df._construct_from_new(new_data, new_column_info, np.array(columns), str_reverse_map)
+        return self._df._construct_from_new(new_data, new_column_info, np.array(columns, dtype='O'),
+                                            str_reverse_map)
 
     def _create_df_all(self, arr, dtype, str_reverse_map):
         new_data = {}
@@ -129,16 +130,17 @@ class StringClass(object):
         new_column_info = self._df._copy_column_info()
         return self._df._construct_from_new(new_data, new_column_info, self._df._columns.copy(), str_reverse_map)
 
-    def _create_df_multiple_dtypes(self, arr_new, columns, column_locs, columns_other, locs_other, str_reverse_map):
+    def _create_df_multiple_dtypes(self, arr_new, dtype_new, columns, column_locs, columns_other, locs_other,
+                                   str_reverse_map):
         new_data = {}
-        dtype_new = arr_new.dtype.kind
         try:
             add_loc = self._df._data[dtype_new].shape[1]
         except KeyError:
             add_loc = 0
         for dtype, arr in self._df._data.items():
             if dtype == 'S':
-                new_data['S'] = arr[:, locs_other]
+                if locs_other:
+                    new_data['S'] = arr[:, locs_other]
             elif dtype == dtype_new:
                 new_data[dtype_new] = np.asfortranarray(np.column_stack((arr, arr_new)))
             else:
@@ -238,6 +240,43 @@ class StringClass(object):
 
         return self._df._construct_from_new(new_data, new_column_info, new_columns, str_reverse_map)
 
+    def _str_generic_parts(self, name, column, keep, **kwargs):
+        # each string column becomes as many new string columns as it has parts
+        if not utils.is_bool(keep):
+            raise TypeError('`keep` must be a boolean')
+
+        columns, locs = self._validate_columns(column)
+        data = self._df._data['S']
+        str_reverse_map = {i: self._df._str_reverse_map[loc] for i, loc in enumerate(locs)}
+        arr, str_reverse_map, group_len = getattr(_sf, name)(data[:, locs], str_reverse_map,
+                                                             **kwargs)
+
+        new_columns = [str(k) for n in group_len for k in range(n)]
+        if len(columns) > 1:
+            new_columns = [col + '_' + str(k) for col, n in zip(columns, group_len)
+                           for k in range(n)]
+
+        if not keep:
+            return self._create_df(arr, 'S', new_columns, str_reverse_map)
+
+        df = self._df.drop(columns=columns)
+        new_data = {dtype: arr_old.copy('F') for dtype, arr_old in df._data.items()}
+        new_column_info = df._copy_column_info()
+        new_str_reverse_map = dict(df._str_reverse_map)
+        add_loc = 0
+        if 'S' in new_data:
+            add_loc = new_data['S'].shape[1]
+            new_data['S'] = np.asfortranarray(np.column_stack((new_data['S'], arr)))
+        else:
+            new_data['S'] = arr
+
+        for i, col in enumerate(new_columns):
+            new_column_info[col] = utils.Column('S', add_loc + i, df.shape[1] + i)
+            new_str_reverse_map[add_loc + i] = str_reverse_map[i]
+        new_columns = np.concatenate((df._columns, np.array(new_columns, dtype='O')))
+        return self._df._construct_from_new(new_data, new_column_info, new_columns,
+                                            new_str_reverse_map)
+
     def _str_generic(self, name, column, keep, multiple, **kwargs):
         if not utils.is_bool(keep):
             raise TypeError('`keep` must be a boolean')
@@ -248,21 +287,30 @@ class StringClass(object):
             columns, locs = self._validate_columns(column)
 
         data = self._df._data['S']
-        str_reverse_map = self._df._str_reverse_map
+        # the kernels take the reverse maps keyed by the position of the column in `data`
+        str_reverse_map = {i: self._df._str_reverse_map[loc] for i, loc in enumerate(locs)}
         if len(locs) == 1:
             arr, str_reverse_map, kind = getattr(_sf, name)(data[:, locs[0]], str_reverse_map, **kwargs)
             arr = arr[:, np.newaxis]
         else:
-            arr, str_reverse_map, kind = getattr(_sf, name + '_2d')(data[:, locs], **kwargs)
+            arr, str_reverse_map, kind = getattr(_sf, name + '_2d')(data[:, locs], str_reverse_map,
+                                                                    **kwargs)
 
         if keep:
             if multiple:
-                return self._create_df_multiple_dtypes(arr, columns, locs, other_columns, other_locs, str_reverse_map)
+                srm = self._df._str_reverse_map
+                other_str_reverse_map = {i: utils.copy_str_reverse_list(srm[loc])
+                                         for i, loc in enumerate(other_locs)}
+                return self._create_df_multiple_dtypes(arr, kind, columns, locs, other_columns,
+                                                       other_locs, other_str_reverse_map)
             else:
-                data = data.copy()
+                data = data.copy('F')
+                new_str_reverse_map = {loc: utils.copy_str_reverse_list(srl)
+                                       for loc, srl in self._df._str_reverse_map.items()}
                 for i, loc in enumerate(locs):
                     data[:, loc] = arr[:, i]
-                return self._create_df_all(data, kind, str_reverse_map)
+                    new_str_reverse_map[loc] = str_reverse_map[i]
+                return self._create_df_all(data, kind, new_str_reverse_map)
         else:
             return self._create_df(arr, kind, columns, str_reverse_map)
 
@@ -366,8 +414,8 @@ class StringClass(object):
         if not isinstance(flags, (int, np.integer, re.RegexFlag)):
             raise TypeError('flags must be a `RegexFlag` or integer')
 
-        return self._str_generic_concat('findall', column, keep, pat=pat, pos=pos,
-                                        case=case, flags=flags, return_dtype='S')
+        return self._str_generic_parts('findall', column, keep, pat=pat, pos=pos,
+                                       case=case, flags=flags)
 
     def get(self, column=None, i=None, keep=False):
         if not isinstance(i, (int, np.integer)):
@@ -504,8 +552,8 @@ class StringClass(object):
         if not isinstance(flags, (int, np.integer, re.RegexFlag)):
             raise TypeError('flags must be a `RegexFlag` or integer')
 
-        return self._str_generic_concat('rsplit', column, keep, pat=pat, n=n, case=case, flags=flags,
-                                        return_dtype='S')
+        return self._str_generic_parts('rsplit', column, keep, pat=pat, n=n, case=case,
+                                       flags=flags)
 
     def rstrip(self, column=None, to_strip=None, keep=False):
         if not isinstance(to_strip, str) and to_strip is not None:
@@ -547,8 +595,8 @@ class StringClass(object):
         if not isinstance(flags, (int, np.integer, re.RegexFlag)):
             raise TypeError('flags must be a `RegexFlag` or integer')
 
-        return self._str_generic_concat('split', column, keep, pat=pat, n=n, case=case, flags=flags,
-                                        return_dtype='S')
+        return self._str_generic_parts('split', column, keep, pat=pat, n=n, case=case,
+                                       flags=flags)
 
     def startswith(self, column=None, pat=None, keep=False):
         if not isinstance(pat, str):
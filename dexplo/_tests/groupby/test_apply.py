@@ -0,0 +1,60 @@
+import dexplo as dx
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo.testing import assert_frame_equal
+
+
+def first_two(df):
+    return df[:2, ['s', 'x']]
+
+
+class TestApplyFilter:
+    df = dx.DataFrame({'g': [1, 2, 1, 2, 1, 3],
+                       'x': [1, 2, 3, 4, 5, 6],
+                       'y': [1.5, nan, 2, 3, 4, 5],
+                       's': ['a', 'b', 'a', 'c', 'd', 'b']},
+                      columns=['g', 'x', 'y', 's'])
+
+    def test_filter(self):
+        df1 = self.df.groupby('g').filter(lambda df: len(df) > 1)
+        df2 = self.df[[0, 1, 2, 3, 4], :]
+        assert_frame_equal(df1, df2)
+
+        with pytest.raises(TypeError):
+            self.df.groupby('g').filter(lambda df: 1)
+
+    def test_apply_scalar(self):
+        df1 = self.df.groupby('g').apply(lambda df: len(df))
+        df2 = dx.DataFrame({'g': [1, 2, 3], 'a0': [3, 2, 1]}, columns=['g', 'a0'])
+        assert_frame_equal(df1, df2)
+
+    def test_apply_frame(self):
+        df1 = self.df.groupby('g').apply(first_two)
+        df2 = dx.DataFrame({'g': [1, 1, 2, 2, 3],
+                            's': ['a', 'a', 'b', 'c', 'b'],
+                            'x': [1, 3, 2, 4, 6]}, columns=['g', 's', 'x'])
+        assert_frame_equal(df1, df2)
+
+    def test_apply_frame_categories(self):
+        # the groups share the categories of the DataFrame
+        df1 = self.df.groupby('g').apply(lambda df: df.drop(columns=['g', 'y']))
+        df2 = dx.DataFrame({'g': [1, 1, 1, 2, 2, 3],
+                            'x': [1, 3, 5, 2, 4, 6],
+                            's': ['a', 'a', 'd', 'b', 'c', 'b']}, columns=['g', 'x', 's'])
+        assert_frame_equal(df1, df2)
+
+        # and the groups have their own categories
+        df1 = self.df.groupby('g').apply(lambda df: df[:, ['s', 'x']].str.upper('s', keep=True))
+        df2 = dx.DataFrame({'g': [1, 1, 1, 2, 2, 3],
+                            's': ['A', 'A', 'D', 'B', 'C', 'B'],
+                            'x': [1, 3, 5, 2, 4, 6]}, columns=['g', 's', 'x'])
+        assert_frame_equal(df1, df2)
+
+    def test_processes(self):
+        df1 = self.df.groupby('g').apply(first_two, n_processes=2)
+        df2 = self.df.groupby('g').apply(first_two)
+        assert_frame_equal(df1, df2)
+
+        with pytest.raises(ValueError):
+            self.df.groupby('g').apply(first_two, n_processes=0)
@@ -0,0 +1,187 @@
+import dexplo as dx
+import pytest
+import numpy as np
+from numpy import nan
+from dexplo.testing import assert_frame_equal
+
+
+class TestGroupAssignment:
+    df = dx.DataFrame({'a': [3, 1, 3, 1, 2, 3, 1, 2],
+                       'b': [1.5, nan, 1.5, nan, 0., -0., 1.5, 0.],
+                       'c': [True, False, True, True, False, False, True, False],
+                       'd': np.array([5, 3, 5, 3, 5, 3, 5, 3], dtype='datetime64[ns]')})
+
+    def test_parallel(self):
+        with dx.options.options_context(n_threads=3):
+            g = self.df.groupby(['a', 'b'])
+        np.testing.assert_array_equal(g._group_labels, [0, 1, 0, 1, 2, 3, 4, 2])
+        np.testing.assert_array_equal(g._group_position, [0, 1, 4, 5, 6])
+
+        with dx.options.options_context(n_threads=3):
+            g = self.df.groupby(['c', 'd'])
+        np.testing.assert_array_equal(g._group_labels, [0, 1, 0, 2, 3, 1, 0, 1])
+        np.testing.assert_array_equal(g._group_position, [0, 1, 3, 4])
+
+    def test_parallel_same_as_serial(self):
+        rng = np.random.RandomState(0)
+        df = dx.DataFrame({'a': rng.randint(0, 20, 1000),
+                           'b': rng.choice([1.5, nan, 2, -4.25], 1000),
+                           'c': rng.randint(-10 ** 12, 10 ** 12, 1000)})
+        for columns in [['a'], ['b'], ['a', 'b'], ['c'], ['a', 'c']]:
+            g1 = df.groupby(columns)
+            # a copy so the cached assignment of `df` is not reused
+            with dx.options.options_context(n_threads=4):
+                g2 = df.copy().groupby(columns)
+            np.testing.assert_array_equal(g1._group_labels, g2._group_labels)
+            np.testing.assert_array_equal(g1._group_position, g2._group_position)
+
+    def test_parallel_same_as_serial_signed_zero(self):
+        a = np.array([0., -0., 1.5, nan, -nan, -0., 0., nan])
+        b = np.array([1., 1., 2., 3., 3., 1., 2., 3.])
+        results = []
+        for n_threads in [1, 3]:
+            df = dx.DataFrame({'a': a, 'b': b, 'c': np.arange(8)})
+            with dx.options.options_context(n_threads=n_threads):
+                g = df.groupby(['a', 'b'])
+            results.append((g._group_labels, g._group_position))
+        np.testing.assert_array_equal(results[0][0], [0, 0, 1, 2, 2, 0, 3, 2])
+        np.testing.assert_array_equal(results[0][1], [0, 2, 3, 6])
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+
+
+class TestStringGroups:
+    df = dx.DataFrame({'a': ['x', 'y', None, 'y', 'x', None],
+                       'b': [1, 2, 1, 2, 1, 1],
+                       'c': [1.5, 2, 3, 4, 5, 6],
+                       'd': ['p', 'q', 'p', 'q', 'q', 'p']})
+
+    def test_one_column(self):
+        df1 = self.df.groupby('a').size()
+        df2 = dx.DataFrame({'a': ['x', 'y', None], 'size': [2, 2, 2]}, columns=['a', 'size'])
+        assert_frame_equal(df1, df2)
+
+    def test_string_columns(self):
+        df1 = self.df.groupby(['a', 'd']).sum()
+        df2 = dx.DataFrame({'a': ['x', 'y', None, 'x'],
+                            'd': ['p', 'q', 'p', 'q'],
+                            'b': [1, 4, 2, 1],
+                            'c': [1.5, 6, 9, 5]}, columns=['a', 'd', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+    def test_mixed_columns(self):
+        for n_threads in [1, 3]:
+            with dx.options.options_context(n_threads=n_threads):
+                df1 = self.df.groupby(['b', 'a', 'd']).sum()
+            df2 = dx.DataFrame({'b': [1, 2, 1, 1],
+                                'a': ['x', 'y', None, 'x'],
+                                'd': ['p', 'q', 'p', 'q'],
+                                'c': [1.5, 6, 9, 5]}, columns=['b', 'a', 'd', 'c'])
+            assert_frame_equal(df1, df2)
+
+    def test_copied_frame(self):
+        # copies have C-ordered blocks so each string column is strided
+        df = self.df.copy()
+        assert not df._data['S'].flags['F_CONTIGUOUS']
+        df1 = df.groupby('a').size()
+        df2 = self.df.groupby('a').size()
+        assert_frame_equal(df1, df2)
+
+        df1 = df.groupby('d').sum()
+        df2 = dx.DataFrame({'d': ['p', 'q'], 'b': [3, 5], 'c': [10.5, 11]},
+                           columns=['d', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+    def test_factorize(self):
+        groups, uniques = self.df.factorize('a')
+        np.testing.assert_array_equal(groups, [0, 1, 2, 1, 0, 2])
+        assert uniques.tolist() == ['x', 'y', None]
+
+
+class TestSortedGroups:
+    df = dx.DataFrame({'a': ['y', 'x', None, 'y', 'x', 'z'],
+                       'b': [2, 1, 1, 2, 3, 1],
+                       'c': [-1.5, 2, nan, 4, 5, 6],
+                       'd': [True, False, True, True, False, False]},
+                      columns=['a', 'b', 'c', 'd'])
+
+    def test_sort_engine(self):
+        df1 = self.df.groupby(['a', 'b'], engine='sort').size()
+        df2 = dx.DataFrame({'a': ['x', 'x', 'y', 'z', None],
+                            'b': [1, 3, 2, 1, 1],
+                            'size': [1, 1, 2, 1, 1]}, columns=['a', 'b', 'size'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.groupby('c', engine='sort').size()
+        df2 = dx.DataFrame({'c': [-1.5, 2, 4, 5, 6, nan], 'size': [1] * 6},
+                           columns=['c', 'size'])
+        assert_frame_equal(df1, df2)
+
+    def test_hash_engine_sorted(self):
+        for n_threads in [1, 3]:
+            with dx.options.options_context(n_threads=n_threads):
+                g1 = self.df.groupby(['d', 'a'], sort=True)
+            g2 = self.df.groupby(['d', 'a'], engine='sort')
+            np.testing.assert_array_equal(g1._group_labels, g2._group_labels)
+            np.testing.assert_array_equal(g1._group_position, g2._group_position)
+
+    def test_median_quantile(self):
+        df = dx.DataFrame({'g': [1, 2, 1, 2, 1, 2, 2],
+                           'x': [5, 1, 3, 2, 4, 10, 6],
+                           'y': [1.5, nan, nan, 2, 0, 3, 5]}, columns=['g', 'x', 'y'])
+        for engine in ['hash', 'sort']:
+            df1 = df.groupby('g', engine=engine).median()
+            df2 = dx.DataFrame({'g': [1, 2], 'x': [4., 4], 'y': [.75, 3]},
+                               columns=['g', 'x', 'y'])
+            assert_frame_equal(df1, df2)
+
+            df1 = df.groupby('g', engine=engine).quantile(.25)
+            df2 = dx.DataFrame({'g': [1, 2], 'x': [3.5, 1.75], 'y': [.375, 2.5]},
+                               columns=['g', 'x', 'y'])
+            assert_frame_equal(df1, df2)
+
+    def test_nunique(self):
+        df1 = self.df.groupby('d', engine='sort').nunique()
+        df2 = dx.DataFrame({'d': [False, True], 'a': [2, 1], 'b': [2, 2], 'c': [3, 2]},
+                           columns=['d', 'a', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+    def test_engine_error(self):
+        with pytest.raises(ValueError):
+            self.df.groupby('a', engine='tree')
+
+
+class TestGroupCache:
+
+    def test_reuse(self):
+        df = dx.DataFrame({'a': [1, 2, 1, 3], 'b': [1.5, 2, 3, 4]})
+        g1 = df.groupby('a')
+        g2 = df.groupby('a')
+        assert g1._group_labels is g2._group_labels
+        assert df.groupby('a', sort=True)._group_labels is not g1._group_labels
+
+        g3 = df.groupby('a', engine='sort')
+        g3.median()
+        assert df.groupby('a', engine='sort')._segments is g3._segments
+
+    def test_invalidate(self):
+        df = dx.DataFrame({'a': [1, 2, 1, 3], 'b': [1.5, 2, 3, 4]})
+        g1 = df.groupby('a')
+        df[:, 'a'] = [1, 1, 1, 3]
+        g2 = df.groupby('a')
+        np.testing.assert_array_equal(g2._group_labels, [0, 0, 0, 1])
+
+        df[:, 'c'] = 5
+        g3 = df.groupby('a')
+        assert g3._group_labels is not g2._group_labels
+
+        df.columns = ['b', 'a', 'c']
+        np.testing.assert_array_equal(df.groupby('a')._group_labels, [0, 1, 2, 3])
+
+    def test_cache_size(self):
+        df = dx.DataFrame({'a': [1, 2, 1, 3], 'b': [1.5, 2, 3, 4], 'c': [1, 1, 1, 1]})
+        with dx.options.options_context(group_cache_size=1):
+            g1 = df.groupby('a')
+            df.groupby('c')
+            assert df.groupby('a')._group_labels is not g1._group_labels
+            assert len(df._group_cache) == 1
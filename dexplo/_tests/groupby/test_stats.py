@@ -78,3 +78,89 @@ class TestValueCounts:
         df2 = dx.DataFrame({'DEPARTURE_DELAY': [nan, -4.0, -1.0, 22.0, -3.0, 3.0, 21.0, -2.0],
                             'count': [2, 2, 2, 2, 1, 1, 1, 1]})
         assert_frame_equal(df1, df2)
+
+
+class TestAgg:
+    df = dx.DataFrame({'g': [1, 2, 1, 2, 1, 3],
+                       'x': [1, 2, 3, 4, 5, 6],
+                       'y': [1.5, nan, 2, 3, 4, nan],
+                       'z': [True, False, True, True, False, True]},
+                      columns=['g', 'x', 'y', 'z'])
+
+    def test_fused(self):
+        df1 = self.df.groupby('g').agg(('sum', 'x', 'x_sum'), ('mean', 'y', 'y_mean'),
+                                       ('var', 'x', 'x_var'), ('max', 'y', 'y_max'),
+                                       ('count', 'y', 'y_count'), ('min', 'x', 'x_min'),
+                                       ('var', 'y', 'y_var', {'ddof': 0}), ('sum', 'z', 'z_sum'))
+        df2 = dx.DataFrame({'g': [1, 2, 3],
+                            'x_sum': [9, 6, 6],
+                            'y_mean': [2.5, 3, nan],
+                            'x_var': [4., 2, nan],
+                            'y_max': [4., 3, nan],
+                            'y_count': [3, 1, 0],
+                            'x_min': [1, 2, 6],
+                            'y_var': [7 / 6, 0, nan],
+                            'z_sum': [2, 1, 1]},
+                           columns=['g', 'x_sum', 'y_mean', 'x_var', 'y_max', 'y_count',
+                                    'x_min', 'y_var', 'z_sum'])
+        assert_frame_equal(df1, df2)
+
+
+class TestTransform:
+    df = dx.DataFrame({'g': [1, 2, 1, 2, 1, 1],
+                       'x': [1, 2, 3, 4, 3, 3],
+                       'y': [1.5, nan, 2, 3, 4, nan],
+                       's': ['a', 'b', 'a', None, 'd', 'c']},
+                      columns=['g', 'x', 'y', 's'])
+
+    def test_aggregations(self):
+        g = self.df.groupby('g')
+        df1 = g.transform('mean')
+        df2 = dx.DataFrame({'x': [2.5, 3, 2.5, 3, 2.5, 2.5],
+                            'y': [2.5, 3, 2.5, 3, 2.5, 2.5]}, columns=['x', 'y'])
+        assert_frame_equal(df1, df2)
+
+        df1 = g.transform('count')
+        df2 = dx.DataFrame({'x': [4, 2, 4, 2, 4, 4],
+                            'y': [3, 1, 3, 1, 3, 3],
+                            's': [4, 1, 4, 1, 4, 4]}, columns=['x', 'y', 's'])
+        assert_frame_equal(df1, df2)
+
+        df1 = g.transform('std', ddof=0)
+        df2 = dx.DataFrame({'x': [.75 ** .5, 1, .75 ** .5, 1, .75 ** .5, .75 ** .5],
+                            'y': [(7 / 6) ** .5, 0, (7 / 6) ** .5, 0, (7 / 6) ** .5,
+                                  (7 / 6) ** .5]}, columns=['x', 'y'])
+        assert_frame_equal(df1, df2)
+
+        df1 = g.transform('size')
+        df2 = dx.DataFrame({'size': [4, 2, 4, 2, 4, 4]})
+        assert_frame_equal(df1, df2)
+
+    def test_first_last_median(self):
+        g = self.df.groupby('g')
+        df1 = g.transform('last')
+        df2 = self.df[[5, 3, 5, 3, 5, 5], ['x', 'y', 's']]
+        assert_frame_equal(df1, df2)
+
+        df1 = g.transform('median')
+        df2 = dx.DataFrame({'x': [3., 3, 3, 3, 3, 3],
+                            'y': [2., 3, 2, 3, 2, 2]}, columns=['x', 'y'])
+        assert_frame_equal(df1, df2)
+
+    def test_rank(self):
+        g = self.df.groupby('g')
+        df1 = g.transform('rank')
+        df2 = dx.DataFrame({'x': [1, 1, 2, 2, 2, 2],
+                            'y': [1., nan, 2, 1, 3, nan],
+                            's': [1., 1, 1, nan, 4, 3]}, columns=['x', 'y', 's'])
+        assert_frame_equal(df1, df2)
+
+        df1 = g.transform('rank', method='average', ascending=False)
+        df2 = dx.DataFrame({'x': [4., 2, 2, 1, 2, 2],
+                            'y': [3., nan, 2, 1, 1, nan],
+                            's': [3.5, 1, 3.5, nan, 1, 2]}, columns=['x', 'y', 's'])
+        assert_frame_equal(df1, df2)
+
+    def test_bad_name(self):
+        with pytest.raises(ValueError):
+            self.df.groupby('g').transform('fake')
@@ -0,0 +1,55 @@
+import dexplo as de
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo.testing import assert_frame_equal
+
+
+@pytest.fixture
+def df():
+    return de.DataFrame({'a': [1, 2, 3],
+                         'b': [True, False, True],
+                         'c': ['x', None, 'y'],
+                         'd': np.array(['2019-01-01', 'NaT', '2019-01-03'],
+                                       dtype='datetime64[ns]'),
+                         'e': [1.5, nan, 3],
+                         'f': [4, 5, 6],
+                         'g': ['p', 'q', 'p'],
+                         'h': [7, 8, 9]},
+                        columns=list('abcdefgh'))
+
+
+class TestDXF(object):
+
+    def test_round_trip(self, df, tmpdir):
+        fp = str(tmpdir.join('df.dxf'))
+        df.to_dxf(fp)
+        df1 = de.read_dxf(fp)
+        assert_frame_equal(df, df1)
+
+        df2 = df[:0, :]
+        df2.to_dxf(fp)
+        assert_frame_equal(de.read_dxf(fp), df2)
+
+    def test_columns(self, df, tmpdir):
+        fp = str(tmpdir.join('df.dxf'))
+        df.to_dxf(fp)
+        for columns in [['h', 'g', 'a'], ['f', 'h'], ['e']]:
+            df1 = de.read_dxf(fp, columns=columns)
+            assert_frame_equal(df1, df[:, columns])
+
+        with pytest.raises(KeyError):
+            de.read_dxf(fp, columns=['z'])
+
+    def test_copy_on_write(self, df, tmpdir):
+        fp = str(tmpdir.join('df.dxf'))
+        df.to_dxf(fp)
+        df1 = de.read_dxf(fp)
+        df1[0, 'a'] = 100
+        assert_frame_equal(de.read_dxf(fp), df)
+
+    def test_not_dxf(self, tmpdir):
+        fp = tmpdir.join('df.csv')
+        fp.write('a,b\n1,2\n')
+        with pytest.raises(ValueError):
+            de.read_dxf(str(fp))
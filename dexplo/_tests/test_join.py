@@ -0,0 +1,167 @@
+import dexplo as de
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo.testing import assert_frame_equal
+
+
+@pytest.fixture
+def df1():
+    return de.DataFrame({'k': [1, 2, 2, 3],
+                         's': ['a', 'b', 'b', 'z'],
+                         'v': [1., 2, 3, 4]},
+                        columns=['k', 's', 'v'])
+
+
+@pytest.fixture
+def df2():
+    return de.DataFrame({'k': [2, 3, 3, 5],
+                         's': ['b', 'c', 'z', 'q'],
+                         'w': ['a', 'b', 'c', 'd']},
+                        columns=['k', 's', 'w'])
+
+
+class TestJoin(object):
+
+    def test_inner_multiple_keys(self, df1, df2):
+        df3 = df1.join(df2, on=['k', 's'])
+        df4 = de.DataFrame({'k': [2, 2, 3],
+                            's': ['b', 'b', 'z'],
+                            'v': [2., 3, 4],
+                            'w': ['a', 'a', 'c']},
+                           columns=['k', 's', 'v', 'w'])
+        assert_frame_equal(df3, df4)
+
+        # the common columns are used by default
+        assert_frame_equal(df1.join(df2), df4)
+
+    def test_left(self, df1, df2):
+        df3 = df1.join(df2, on=['k', 's'], how='left')
+        df4 = de.DataFrame({'k': [1, 2, 2, 3],
+                            's': ['a', 'b', 'b', 'z'],
+                            'v': [1., 2, 3, 4],
+                            'w': [None, 'a', 'a', 'c']},
+                           columns=['k', 's', 'v', 'w'])
+        assert_frame_equal(df3, df4)
+
+    def test_right(self, df1, df2):
+        df3 = df1.join(df2, on=['k', 's'], how='right')
+        df4 = de.DataFrame({'k': [2, 2, 3, 3, 5],
+                            's': ['b', 'b', 'c', 'z', 'q'],
+                            'v': [2., 3, nan, 4, nan],
+                            'w': ['a', 'a', 'b', 'c', 'd']},
+                           columns=['k', 's', 'v', 'w'])
+        assert_frame_equal(df3, df4)
+
+    def test_missing_values(self, df1):
+        df2 = de.DataFrame({'k': [3, 4],
+                            'd': np.array(['2019-01-01', '2019-01-02'], dtype='datetime64[ns]'),
+                            'b': [True, False],
+                            'i': [10, 20]},
+                           columns=['k', 'd', 'b', 'i'])
+        df3 = df1.join(df2, on='k', how='left')
+        df4 = de.DataFrame({'k': [1, 2, 2, 3],
+                            's': ['a', 'b', 'b', 'z'],
+                            'v': [1., 2, 3, 4],
+                            'd': np.array(['NaT', 'NaT', 'NaT', '2019-01-01'],
+                                          dtype='datetime64[ns]'),
+                            'b': [nan, nan, nan, True],
+                            'i': [nan, nan, nan, 10]},
+                           columns=['k', 's', 'v', 'd', 'b', 'i'])
+        df4 = df4.astype({'b': 'bool', 'i': 'int'})
+        assert_frame_equal(df3, df4)
+
+    def test_outer(self, df1, df2):
+        df3 = df1.join(df2, on=['k', 's'], how='outer')
+        df4 = de.DataFrame({'k': [1, 2, 2, 3, 3, 5],
+                            's': ['a', 'b', 'b', 'z', 'c', 'q'],
+                            'v': [1., 2, 3, 4, nan, nan],
+                            'w': [None, 'a', 'a', 'c', 'b', 'd']},
+                           columns=['k', 's', 'v', 'w'])
+        assert_frame_equal(df3, df4)
+
+    def test_semi_anti(self, df1, df2):
+        df3 = df1.join(df2, on=['k', 's'], how='semi')
+        assert_frame_equal(df3, df1[[1, 2, 3], :])
+
+        df4 = df1.join(df2, on=['k', 's'], how='anti')
+        assert_frame_equal(df4, df1[[0], :])
+
+    def test_mixed_numeric_keys(self, df1):
+        df2 = de.DataFrame({'key': [3., 1.],
+                            'x': [True, False]})
+        df3 = df1.join(df2, left_on='k', right_on='key')
+        df4 = de.DataFrame({'k': [1, 3],
+                            's': ['a', 'z'],
+                            'v': [1., 4],
+                            'key': [1., 3.],
+                            'x': [False, True]},
+                           columns=['k', 's', 'v', 'key', 'x'])
+        assert_frame_equal(df3, df4)
+
+    def test_outer_mixed_numeric_keys(self, df1):
+        df2 = de.DataFrame({'k': [3.5, 1., nan],
+                            'x': [True, False, True]},
+                           columns=['k', 'x'])
+        df3 = df1.join(df2, on='k', how='outer')
+        # the int keys become floats to hold the keys only in `df2`
+        df4 = de.DataFrame({'k': [1., 2, 2, 3, 3.5, nan],
+                            's': ['a', 'b', 'b', 'z', None, None],
+                            'v': [1., 2, 3, 4, nan, nan],
+                            'x': [False, nan, nan, nan, True, True]},
+                           columns=['k', 's', 'v', 'x'])
+        assert_frame_equal(df3, df4)
+
+        df3 = df1.join(df2, on='k', how='right')
+        df4 = de.DataFrame({'k': [3.5, 1., nan],
+                            's': [None, 'a', None],
+                            'v': [nan, 1., nan],
+                            'x': [True, False, True]},
+                           columns=['k', 's', 'v', 'x'])
+        assert_frame_equal(df3, df4)
+
+    def test_same_column_names(self, df1, df2):
+        df3 = df1.join(df2, on='k')
+        df4 = de.DataFrame({'k': [2, 2, 3, 3],
+                            's_x': ['b', 'b', 'z', 'z'],
+                            'v': [2., 3, 4, 4],
+                            's_y': ['b', 'b', 'c', 'z'],
+                            'w': ['a', 'a', 'b', 'c']},
+                           columns=['k', 's_x', 'v', 's_y', 'w'])
+        assert_frame_equal(df3, df4)
+
+    def test_merge(self, df1, df2):
+        # both are sorted on k and s so 'auto' uses the merge algorithm
+        for how in ['inner', 'left', 'right', 'outer', 'semi', 'anti']:
+            df3 = df1.join(df2, on=['k', 's'], how=how, algorithm='hash')
+            df4 = df1.join(df2, on=['k', 's'], how=how, algorithm='merge')
+            df5 = df1.join(df2, on=['k', 's'], how=how)
+            assert_frame_equal(df3, df4)
+            assert_frame_equal(df3, df5)
+
+    def test_merge_unsorted(self):
+        df1 = de.DataFrame({'k': [3, -1.5, 2, nan],
+                            'v': ['a', 'b', 'c', 'd']})
+        df2 = de.DataFrame({'k': [2, 3, -1.5, 3],
+                            'w': [1, 2, 3, 4]})
+        df3 = df1.join(df2, on='k', algorithm='merge')
+        df4 = de.DataFrame({'k': [-1.5, 2, 3, 3],
+                            'v': ['b', 'c', 'a', 'a'],
+                            'w': [3, 1, 2, 4]},
+                           columns=['k', 'v', 'w'])
+        assert_frame_equal(df3, df4)
+
+        df5 = df1.join(df2, on='k', how='left')
+        df6 = de.DataFrame({'k': [3, 3, -1.5, 2, nan],
+                            'v': ['a', 'a', 'b', 'c', 'd'],
+                            'w': [2, 4, 3, 1, nan]},
+                           columns=['k', 'v', 'w'])
+        assert_frame_equal(df5, df6)
+
+    def test_errors(self, df1, df2):
+        with pytest.raises(ValueError):
+            df1.join(df2, how='cross')
+        with pytest.raises(TypeError):
+            df1.join(df2, left_on='s', right_on='k')
+        with pytest.raises(ValueError):
+            df1.join(df2, algorithm='sort')
@@ -0,0 +1,227 @@
+import dexplo as de
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo import _functions
+from dexplo.testing import assert_frame_equal
+
+
+@pytest.fixture
+def csv_file(tmpdir):
+    lines = ['a,b,c,d']
+    for i in range(1000):
+        lines.append(f'{i},{i / 4},s{i % 7},{i % 3 == 0}')
+    fp = tmpdir.join('data.csv')
+    fp.write('\n'.join(lines) + '\n')
+    return str(fp)
+
+
+class TestReadCSV(object):
+
+    def test_threads(self, csv_file):
+        df1 = de.read_csv(csv_file)
+        df2 = de.read_csv(csv_file, n_threads=4)
+        assert_frame_equal(df1, df2)
+
+        i = np.arange(1000)
+        df3 = de.DataFrame({'a': i,
+                            'b': i / 4,
+                            'c': ['s' + str(x % 7) for x in i],
+                            'd': i % 3 == 0},
+                           columns=['a', 'b', 'c', 'd'])
+        assert_frame_equal(df2, df3)
+
+    def test_threads_options(self, csv_file):
+        df1 = de.read_csv(csv_file, usecols=['d', 'b'], skiprows=[1, 2, 3], n_threads=3)
+        df2 = de.read_csv(csv_file, usecols=['d', 'b'], skiprows=[1, 2, 3])
+        assert_frame_equal(df1, df2)
+
+        with de.options.options_context(n_threads=2):
+            df3 = de.read_csv(csv_file, header=-1, skiprows=1)
+        df4 = de.read_csv(csv_file, header=-1, skiprows=1, n_threads=1)
+        assert_frame_equal(df3, df4)
+
+    def test_threads_missing(self, tmpdir):
+        fp = tmpdir.join('missing.csv')
+        fp.write('a,b,c,d\n1,,x,\n,2.5,,\n3,nan,y,\n')
+        df1 = de.read_csv(str(fp), n_threads=2)
+        df2 = de.DataFrame({'a': [1, nan, 3],
+                            'b': [nan, 2.5, nan],
+                            'c': ['x', None, 'y'],
+                            'd': [nan, nan, nan]},
+                           columns=['a', 'b', 'c', 'd'])
+        assert_frame_equal(df1, df2)
+
+    def test_line_endings(self, tmpdir):
+        fp = tmpdir.join('crlf.csv')
+        fp.write_binary(b'a,b\r\n1,x\r\n2,y')
+        df1 = de.read_csv(str(fp))
+        df2 = de.DataFrame({'a': [1, 2], 'b': ['x', 'y']}, columns=['a', 'b'])
+        assert_frame_equal(df1, df2)
+
+        fp = tmpdir.join('empty.csv')
+        fp.write('')
+        df1 = de.read_csv(str(fp), header=-1)
+        assert df1.shape == (0, 1)
+
+    def test_short_and_blank_rows(self, tmpdir):
+        fp = tmpdir.join('short.csv')
+        fp.write('a,b,c\n1,x,2.5\n3,y\n\n4,z,1.0\n5\n')
+        df1 = de.DataFrame({'a': [1, 3, 4, 5],
+                            'b': ['x', 'y', 'z', None],
+                            'c': [2.5, nan, 1.0, nan]},
+                           columns=['a', 'b', 'c'])
+        for n_threads in [1, 3]:
+            df2 = de.read_csv(str(fp), n_threads=n_threads)
+            assert_frame_equal(df1, df2)
+
+        fp = tmpdir.join('short_crlf.csv')
+        fp.write_binary(b'a,b,c\r\n1,x,2.5\r\n3,y\r\n\r\n4,z,1.0\r\n5\r\n')
+        df2 = de.read_csv(str(fp), n_threads=2)
+        assert_frame_equal(df1, df2)
+
+    def test_short_rows_threads(self, tmpdir):
+        lines = ['a,b,c']
+        for i in range(1000):
+            if i % 10 == 0:
+                lines.append('')
+            elif i % 3 == 0:
+                lines.append(f'{i},s{i % 7}')
+            else:
+                lines.append(f'{i},s{i % 7},{i / 2}')
+        fp = tmpdir.join('short_many.csv')
+        fp.write('\n'.join(lines) + '\n')
+
+        i = np.array([i for i in range(1000) if i % 10 != 0])
+        df1 = de.DataFrame({'a': i,
+                            'b': ['s' + str(x % 7) for x in i],
+                            'c': np.where(i % 3 == 0, nan, i / 2)},
+                           columns=['a', 'b', 'c'])
+        for n_threads in [1, 4]:
+            df2 = de.read_csv(str(fp), n_threads=n_threads)
+            assert_frame_equal(df1, df2)
+
+        # blank lines still count as lines to skip
+        df2 = de.read_csv(str(fp), skiprows=[1, 2, 3])
+        assert_frame_equal(df1[2:, :], df2)
+
+    def test_empty_column_names(self, tmpdir):
+        fp = tmpdir.join('names.csv')
+        fp.write('a1,,b,b\n1,2,3,4\n')
+        df = de.read_csv(str(fp))
+        assert df.columns == ['a1', 'a1_0', 'b', 'b_0']
+
+    def test_file_closed(self, csv_file, monkeypatch):
+        closed = []
+        close_file = _functions._close_file
+        monkeypatch.setattr(_functions, '_close_file',
+                            lambda buf: closed.append(buf) or close_file(buf))
+        with pytest.raises(ValueError):
+            de.read_csv(csv_file, usecols=['z'])
+        assert len(closed) == 1 and closed[0].closed
+
+    def test_n_threads_error(self, csv_file):
+        with pytest.raises(ValueError):
+            de.read_csv(csv_file, n_threads=0)
+        with pytest.raises(TypeError):
+            de.read_csv(csv_file, n_threads=1.5)
+
+
+class TestReadCSVChunks(object):
+
+    def test_chunks(self, csv_file):
+        df = de.read_csv(csv_file)
+        for n_threads in [1, 3]:
+            dfs = list(de.read_csv(csv_file, chunksize=300, n_threads=n_threads))
+            assert [len(df1) for df1 in dfs] == [300, 300, 300, 100]
+            for i, df1 in enumerate(dfs):
+                assert_frame_equal(df1, df[i * 300: (i + 1) * 300, :])
+
+    def test_chunks_skiprows(self, csv_file):
+        df = de.read_csv(csv_file, skiprows=[1, 2, 3, 500], usecols=['c', 'a'], n_threads=2)
+        dfs = list(de.read_csv(csv_file, skiprows=[1, 2, 3, 500], usecols=['c', 'a'],
+                               chunksize=400))
+        assert [len(df1) for df1 in dfs] == [400, 400, 196]
+        for i, df1 in enumerate(dfs):
+            assert_frame_equal(df1, df[i * 400: (i + 1) * 400, :])
+
+    def test_chunks_promotion(self, tmpdir):
+        fp = tmpdir.join('promote.csv')
+        fp.write('a,b,c\n1,True,\n2,False,\n3.5,True,4\n4,1,\n')
+        df1, df2 = de.read_csv(str(fp), chunksize=2)
+        df3 = de.DataFrame({'a': [1, 2],
+                            'b': [True, False],
+                            'c': [nan, nan]},
+                           columns=['a', 'b', 'c'])
+        assert_frame_equal(df1, df3)
+
+        df4 = de.DataFrame({'a': [3.5, 4],
+                            'b': ['True', '1'],
+                            'c': [4.0, nan]},
+                           columns=['a', 'b', 'c'])
+        assert_frame_equal(df2, df4)
+
+    def test_chunks_short_and_blank_rows(self, tmpdir):
+        fp = tmpdir.join('short.csv')
+        fp.write('a,b,c\n1,x,2.5\n3,y\n\n4,z,1.0\n5\n\n')
+        df = de.read_csv(str(fp))
+        for n_threads in [1, 2]:
+            dfs = list(de.read_csv(str(fp), chunksize=2, n_threads=n_threads))
+            # blank lines are read but not returned
+            assert [len(df1) for df1 in dfs] == [2, 1, 1]
+            assert_frame_equal(dfs[0], df[:2, :])
+            assert_frame_equal(dfs[1], df[2:3, :])
+            assert_frame_equal(dfs[2], df[3:, :])
+
+    def test_chunks_file_closed(self, csv_file, monkeypatch):
+        opened = []
+        map_file = _functions._map_file
+        monkeypatch.setattr(_functions, '_map_file',
+                            lambda fp: opened.append(map_file(fp)) or opened[-1])
+
+        # the file is not mapped until iteration begins
+        chunks = de.read_csv(csv_file, chunksize=300)
+        assert opened == []
+        next(chunks)
+        assert not opened[0].closed
+        chunks.close()
+        assert opened[0].closed
+
+        chunks = de.read_csv(csv_file, chunksize=300, usecols=['z'])
+        with pytest.raises(ValueError):
+            next(chunks)
+        assert opened[1].closed
+
+    def test_chunksize_error(self, csv_file):
+        with pytest.raises(ValueError):
+            de.read_csv(csv_file, chunksize=0)
+        with pytest.raises(TypeError):
+            de.read_csv(csv_file, chunksize='10')
+
+
+class TestToCSV(object):
+
+    def test_to_csv(self, tmpdir):
+        df = de.DataFrame({'a': [1, -2, nan],
+                           'b': [True, False, True],
+                           'c': ['x', None, 'y'],
+                           'd': np.array(['2019-01-01', 'NaT', '2019-01-03T01:02'],
+                                         dtype='datetime64[ns]'),
+                           'e': [1.5, nan, 1e20]},
+                          columns=list('abcde'))
+        fp = tmpdir.join('out.csv')
+        df.to_csv(str(fp))
+        assert fp.read() == ('a,b,c,d,e\n'
+                             '1,True,x,2019-01-01T00:00:00.000000000,1.5\n'
+                             '-2,False,,,\n'
+                             ',True,y,2019-01-03T01:02:00.000000000,1e+20\n')
+
+    def test_round_trip(self, csv_file, tmpdir):
+        df = de.read_csv(csv_file)
+        df[:, 'e'] = np.random.RandomState(0).randn(len(df))
+        fp1 = str(tmpdir.join('out1.csv'))
+        fp2 = str(tmpdir.join('out2.csv'))
+        df.to_csv(fp1)
+        df.to_csv(fp2, n_threads=3, chunksize=70)
+        assert open(fp1, 'rb').read() == open(fp2, 'rb').read()
+        assert_frame_equal(de.read_csv(fp1), df)
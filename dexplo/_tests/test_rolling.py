@@ -0,0 +1,135 @@
+import dexplo as dx
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo import _rolling
+from dexplo.testing import assert_frame_equal
+
+
+class TestRollingStats:
+    df = dx.DataFrame({'a': [1, 5, 2, 8, 3],
+                       'b': [1.5, nan, 2., 4., 1.],
+                       'c': [True, False, True, True, False],
+                       's': ['x', 'y', 'x', 'z', 'y']},
+                      columns=['a', 'b', 'c', 's'])
+
+    def test_sum(self):
+        df1 = self.df.rolling(-1, 1).sum(['a', 'b', 'c'])
+        df2 = dx.DataFrame({'a': [6, 8, 15, 13, 11],
+                            'b': [1.5, 3.5, 6., 7., 5.],
+                            'c': [1, 2, 2, 2, 1]},
+                           columns=['a', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+    def test_min_max(self):
+        df1 = self.df.rolling(-2, 0).min(['a', 'b'])
+        df2 = dx.DataFrame({'a': [1, 1, 1, 2, 2],
+                            'b': [1.5, 1.5, 1.5, 2., 1.]},
+                           columns=['a', 'b'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.rolling(0, 2).max(['a', 'b'])
+        df2 = dx.DataFrame({'a': [5, 8, 8, 8, 3],
+                            'b': [2., 4., 4., 4., 1.]},
+                           columns=['a', 'b'])
+        assert_frame_equal(df1, df2)
+
+    def test_mean_count(self):
+        df1 = self.df.rolling(-1, 0).mean(['a', 'b'])
+        df2 = dx.DataFrame({'a': [1., 3., 3.5, 5., 5.5],
+                            'b': [1.5, 1.5, 2., 3., 2.5]},
+                           columns=['a', 'b'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.rolling(-1, 0).count(['b'])
+        df2 = dx.DataFrame({'b': [1, 1, 1, 2, 2]})
+        assert_frame_equal(df1, df2)
+
+    def test_var_std(self):
+        df1 = self.df.rolling(-1, 0).var(['a'])
+        df2 = dx.DataFrame({'a': [nan, 8., 4.5, 18., 12.5]})
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.rolling(-1, 0).std(['a'])
+        df2 = dx.DataFrame({'a': np.sqrt([nan, 8., 4.5, 18., 12.5])})
+        assert_frame_equal(df1, df2)
+
+    def test_median_quantile(self):
+        df1 = self.df.rolling(-1, 1).median(['a', 'b', 'c'])
+        df2 = dx.DataFrame({'a': [3., 2., 5., 3., 5.5],
+                            'b': [1.5, 1.75, 3., 2., 2.5],
+                            'c': [.5, 1., 1., 1., .5]},
+                           columns=['a', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.rolling(-2, 0).quantile(['a'], q=.25)
+        df2 = dx.DataFrame({'a': [1., 2., 1.5, 3.5, 2.5]})
+        assert_frame_equal(df1, df2)
+
+        with pytest.raises(ValueError):
+            self.df.rolling(-2, 0).quantile(['a'], q=2)
+
+    def test_nunique_mode(self):
+        df1 = self.df.rolling(-2, 0).nunique(['c', 's'])
+        df2 = dx.DataFrame({'c': [1, 2, 2, 2, 2],
+                            's': [1, 2, 2, 3, 3]},
+                           columns=['c', 's'])
+        assert_frame_equal(df1, df2)
+
+        df = dx.DataFrame({'a': [4, 1, 4, 1, 1, 2],
+                           'b': [2.5, nan, nan, 1., 1., 2.5]},
+                          columns=['a', 'b'])
+        df1 = df.rolling(-3, 0).mode(['a', 'b'])
+        df2 = dx.DataFrame({'a': [4, 1, 4, 1, 1, 1],
+                            'b': [2.5, 2.5, 2.5, 1., 1., 1.]},
+                           columns=['a', 'b'])
+        assert_frame_equal(df1, df2)
+
+    def test_wide_window(self):
+        rng = np.random.RandomState(2)
+        a = rng.rand(2000)
+        df = dx.DataFrame({'a': a})
+        df1 = df.rolling(-500, 0).max()
+        df2 = dx.DataFrame({'a': [a[max(0, i - 500):i + 1].max() for i in range(2000)]})
+        assert_frame_equal(df1, df2)
+
+        df1 = df.rolling(-500, 0).median()
+        df2 = dx.DataFrame({'a': [np.median(a[max(0, i - 500):i + 1]) for i in range(2000)]})
+        assert_frame_equal(df1, df2)
+
+    def test_kept_columns(self):
+        df1 = self.df.rolling(0, 1, kept_columns='s').sum('a')
+        df2 = dx.DataFrame({'s': ['x', 'y', 'x', 'z', 'y'],
+                            'a': [6, 7, 10, 11, 3]},
+                           columns=['s', 'a'])
+        assert_frame_equal(df1, df2)
+
+
+class TestRollingThreads:
+    rng = np.random.RandomState(0)
+    df = dx.DataFrame({'a': rng.rand(300),
+                       'b': rng.randint(-5, 5, 300),
+                       'c': rng.rand(300) > .5},
+                      columns=['a', 'b', 'c'])
+
+    @pytest.mark.parametrize('name', ['sum', 'prod', 'mean', 'count', 'min', 'max', 'var',
+                                      'median', 'nunique', 'mode'])
+    def test_columns(self, name):
+        df1 = getattr(self.df.rolling(-4, 2), name)(['a', 'b', 'c'])
+        with dx.options.options_context(n_threads=3):
+            df2 = getattr(self.df.rolling(-4, 2), name)(['a', 'b', 'c'])
+        assert_frame_equal(df1, df2)
+
+    @pytest.mark.parametrize('left, right', [(-4, 2), (0, 0), (-20, -10), (10, 30)])
+    def test_row_chunks(self, left, right, monkeypatch):
+        monkeypatch.setattr(_rolling, 'MIN_CHUNK_ROWS', 40)
+        for name in ['sum', 'min', 'max', 'count']:
+            df1 = getattr(self.df.rolling(left, right), name)(['b'])
+            with dx.options.options_context(n_threads=4):
+                df2 = getattr(self.df.rolling(left, right), name)(['b'])
+            assert_frame_equal(df1, df2)
+
+        df1 = self.df.rolling(left, right).agg(('mean', 'a', 'm'))
+        with dx.options.options_context(n_threads=4):
+            df2 = self.df.rolling(left, right).agg(('mean', 'a', 'm'))
+        assert_frame_equal(df1, df2)
@@ -1219,6 +1219,26 @@ class TestSummary(object):
                                           'max'])
         assert_frame_equal(df1, df2)
 
+    def test_describe_non_numeric(self):
+        df = dx.DataFrame({'a': ['x', 'y', None, 'y'],
+                           'b': [True, False, True, True],
+                           'c': [1, 2, 3, 4],
+                           'd': np.array([5, 3, 'NaT', 5], dtype='datetime64[ns]')})
+        df1 = df.describe(summary_type='non-numeric')
+        df2 = dx.DataFrame({'Column Name': ['a', 'b', 'd'],
+                            'Data Type': ['str', 'bool', 'datetime64[ns]'],
+                            'count': [3, 4, 3],
+                            'null %': [.25, 0, .25],
+                            'unique': [2, 2, 2],
+                            'top': ['y', 'True', '1970-01-01T00:00:00.000000005'],
+                            'freq': [2, 3, 2]},
+                           columns=['Column Name', 'Data Type', 'count', 'null %', 'unique',
+                                    'top', 'freq'])
+        assert_frame_equal(df1, df2)
+
+        with pytest.raises(ValueError):
+            df.describe(summary_type='other')
+
 
 class TestUnique(object):
 
@@ -1471,3 +1491,47 @@ class TestNUninque:
         df1 = df.nunique('columns', count_na=True)
         df2 = dx.DataFrame({'nunique': [3, 8, 10, 9, 9, 7, 9, 7]})
         assert_frame_equal(df1, df2)
+
+
+class TestThreadedAggs:
+    df = dx.DataFrame({'a': [0, 5, 6, -3, 1],
+                       'b': [0, 1.5, nan, 2, nan],
+                       'c': [True, False, True, True, False],
+                       'd': [10, 4, 4, 20, 3],
+                       'e': [nan, nan, nan, nan, nan],
+                       'f': [-1.5, 3.2, 0, 4, 1],
+                       'g': [False, False, True, True, True]})
+
+    def test_reductions(self):
+        for name in ['sum', 'mean', 'std', 'var', 'median', 'min', 'max', 'count',
+                     'cumsum', 'cummax', 'cummin']:
+            df1 = getattr(self.df, name)()
+            with dx.options.options_context(n_threads=3):
+                df2 = getattr(self.df, name)()
+            assert_frame_equal(df1, df2)
+
+        df1 = self.df.quantile(q=.3)
+        with dx.options.options_context(n_threads=3):
+            df2 = self.df.quantile(q=.3)
+        assert_frame_equal(df1, df2)
+
+    def test_median_int(self):
+        df = dx.DataFrame({'a': [5, 1, 4, 2], 'b': [3, 9, 1, 7]})
+        df1 = df.median()
+        df2 = dx.DataFrame({'a': [3.], 'b': [5.]})
+        assert_frame_equal(df1, df2)
+
+        # the data is not reordered while finding the median
+        assert_frame_equal(df, dx.DataFrame({'a': [5, 1, 4, 2], 'b': [3, 9, 1, 7]}))
+
+    def test_min_max_no_rows(self):
+        df = self.df[np.zeros(5, dtype='bool'), ['a', 'b', 'f']]
+        for name in ['min', 'max']:
+            for n_threads in [1, 2]:
+                with dx.options.options_context(n_threads=n_threads):
+                    df1 = getattr(df, name)()
+                df2 = dx.DataFrame({'a': np.array([np.iinfo('int64').min]),
+                                    'b': [nan],
+                                    'f': [nan]},
+                                   columns=['a', 'b', 'f'])
+                assert_frame_equal(df1, df2)
@@ -0,0 +1,440 @@
+import dexplo as dx
+import numpy as np
+from numpy import nan
+import pytest
+from dexplo.testing import assert_frame_equal
+from dexplo._libs import string_funcs as _sf
+from dexplo._libs.string_buffer import StringBuffer, merge_string_buffers
+
+
+class TestStringCategories:
+    df = dx.DataFrame({'a': [1, 2, 3, 4],
+                       's': ['ab', 'Cd', None, 'ab'],
+                       't': ['x', None, 'Xy', 'X'],
+                       'u': ['q', 'q', 'r', 'q']},
+                      columns=['a', 's', 't', 'u'])
+
+    def test_lower_upper(self):
+        df1 = self.df.str.lower()
+        df2 = dx.DataFrame({'s': ['ab', 'cd', None, 'ab'],
+                            't': ['x', None, 'xy', 'x'],
+                            'u': ['q', 'q', 'r', 'q']},
+                           columns=['s', 't', 'u'])
+        assert_frame_equal(df1, df2)
+
+        # 'x' and 'X' become the same category
+        assert df1._str_reverse_map[1] == [False, 'x', 'xy']
+
+        df1 = self.df.str.upper('t')
+        df2 = dx.DataFrame({'t': ['X', None, 'XY', 'X']})
+        assert_frame_equal(df1, df2)
+
+    def test_keep(self):
+        df1 = self.df.str.upper(['s', 't'], keep=True)
+        df2 = dx.DataFrame({'a': [1, 2, 3, 4],
+                            's': ['AB', 'CD', None, 'AB'],
+                            't': ['X', None, 'XY', 'X'],
+                            'u': ['q', 'q', 'r', 'q']},
+                           columns=['a', 's', 't', 'u'])
+        assert_frame_equal(df1, df2)
+
+    def test_contains(self):
+        df1 = self.df.str.contains(['s', 't'], pat='x', case=False)
+        df2 = dx.DataFrame({'s': [False, False, nan, False],
+                            't': [True, nan, True, True]},
+                           columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.contains(['s', 't'], pat='x', keep=True)
+        df2 = dx.DataFrame({'a': [1, 2, 3, 4],
+                            's': [False, False, nan, False],
+                            't': [True, nan, False, False],
+                            'u': ['q', 'q', 'r', 'q']},
+                           columns=['a', 's', 't', 'u'])
+        assert_frame_equal(df1, df2)
+
+    def test_len_find(self):
+        df1 = self.df.str.len(['s', 'u'])
+        df2 = dx.DataFrame({'s': [2., 2., nan, 2.],
+                            'u': [1., 1., 1., 1.]},
+                           columns=['s', 'u'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.len('u')
+        df2 = dx.DataFrame({'u': [1, 1, 1, 1]})
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.find('s', sub='d')
+        df2 = dx.DataFrame({'s': [-1., 1., nan, -1.]})
+        assert_frame_equal(df1, df2)
+
+    def test_replace_get(self):
+        df1 = self.df.str.replace(['s', 't'], pat='[a-z]', repl='-')
+        df2 = dx.DataFrame({'s': ['--', 'C-', None, '--'],
+                            't': ['-', None, 'X-', 'X']},
+                           columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.get(['s', 't'], i=1)
+        df2 = dx.DataFrame({'s': ['b', 'd', None, 'b'],
+                            't': [None, None, 'y', None]},
+                           columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+
+class TestCategoryCompaction:
+    df = dx.DataFrame({'a': [1, 2, 3, 4, 5, 6],
+                       's': ['f', 'b', 'c', None, 'e', 'a'],
+                       't': ['x', 'y', 'x', 'y', 'x', 'y']},
+                      columns=['a', 's', 't'])
+
+    def test_share_categories(self):
+        df1 = self.df[[1, 2, 4, 5], :]
+        assert df1._str_reverse_map[0] is self.df._str_reverse_map[0]
+        df2 = dx.DataFrame({'a': [2, 3, 5, 6],
+                            's': ['b', 'c', 'e', 'a'],
+                            't': ['y', 'x', 'x', 'y']},
+                           columns=['a', 's', 't'])
+        assert_frame_equal(df1, df2)
+
+        # few rows compared to the categories
+        df1 = df1[[0, 2], :]
+        assert df1._str_reverse_map[0] == [False, 'b', 'e']
+        assert df1._str_reverse_map[1] is self.df._str_reverse_map[1]
+
+    def test_compact_categories(self):
+        with dx.options.options_context(str_compact_fraction=0):
+            df1 = self.df[[1, 3], :]
+        assert len(df1._str_reverse_map[0]) == 6
+
+        df1 = df1.compact_categories()
+        assert df1._str_reverse_map == {0: [False, 'b'], 1: [False, 'y']}
+        df2 = dx.DataFrame({'a': [2, 4],
+                            's': ['b', None],
+                            't': ['y', 'y']},
+                           columns=['a', 's', 't'])
+        assert_frame_equal(df1, df2)
+
+    def test_unused_categories(self):
+        with dx.options.options_context(str_compact_fraction=0):
+            df = self.df[[1, 2, 3], ['s', 't']]
+
+        df1 = df.max()
+        df2 = dx.DataFrame({'s': ['c'], 't': ['y']}, columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+        df1 = df.min()
+        df2 = dx.DataFrame({'s': ['b'], 't': ['x']}, columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+        df1 = df.nunique()
+        df2 = dx.DataFrame({'s': [2], 't': [2]}, columns=['s', 't'])
+        assert_frame_equal(df1, df2)
+
+    def test_setitem_shared(self):
+        df = self.df.copy()
+        df1 = df[[0, 1, 2, 3], :]
+        df1[0, 's'] = 'z'
+        assert df[0, 's'] == 'f'
+        assert df1[0, 's'] == 'z'
+
+
+    def test_cumsum_shared(self):
+        df = dx.DataFrame({'a': [1, 2, 3, 4], 's': ['x', '', None, 'y']}, columns=['a', 's'])
+        srm = df._str_reverse_map[0].copy()
+        df1 = df[[1, 2, 3], ['s']]
+        assert df1._str_reverse_map[0] is df._str_reverse_map[0]
+        df2 = df1.cumsum()
+        assert df._str_reverse_map[0] == srm
+        df3 = dx.DataFrame({'s': ['', None, 'y']})
+        assert_frame_equal(df2, df3)
+
+        df2 = df[:, ['s']].cumsum()
+        df3 = dx.DataFrame({'s': ['x', 'x', None, 'xy']})
+        assert_frame_equal(df2, df3)
+        assert df._str_reverse_map[0] == srm
+
+
+class TestStringPool:
+    df1 = dx.DataFrame({'a': [1, 2, 3], 's': ['x', 'y', None]}, columns=['a', 's'])
+    df2 = dx.DataFrame({'a': [3, 2, 1], 's': ['z', 'y', 'x']}, columns=['a', 's'])
+
+    def test_to_string_pool(self):
+        df1 = self.df1.to_string_pool('test_pool')
+        df2 = self.df2.to_string_pool('test_pool')
+        pool = dx.string_pool('test_pool')
+        assert df1._str_reverse_map[0] is pool.strings
+        assert df2._str_reverse_map[0] is pool.strings
+        assert pool.strings == [False, 'x', 'y', 'z']
+        assert_frame_equal(df1, self.df1)
+        assert_frame_equal(df2, self.df2)
+
+        # selections and copies stay in the pool
+        assert df1[[0, 1], :]._str_reverse_map[0] is pool.strings
+        assert df1.copy()._str_reverse_map[0] is pool.strings
+        assert df1.compact_categories()._str_reverse_map[0] is pool.strings
+
+        with pytest.raises(TypeError):
+            dx.string_pool(5)
+
+    def test_equal(self):
+        df1 = self.df1.to_string_pool('test_pool')
+        df2 = self.df2.to_string_pool('test_pool')
+        df3 = df1[:, ['s']] == df2[:, ['s']]
+        df4 = self.df1[:, ['s']] == self.df2[:, ['s']]
+        assert_frame_equal(df3, df4)
+
+        df3 = df1[:, ['s']] != df2[:, ['s']]
+        df4 = self.df1[:, ['s']] != self.df2[:, ['s']]
+        assert_frame_equal(df3, df4)
+
+    def test_append_rows(self):
+        df1 = self.df1.to_string_pool('test_pool')
+        df2 = self.df2.to_string_pool('test_pool')
+        df3 = df1.append(df2)
+        df4 = dx.DataFrame({'a': [1, 2, 3, 3, 2, 1],
+                            's': ['x', 'y', None, 'z', 'y', 'x']},
+                           columns=['a', 's'])
+        assert_frame_equal(df3, df4)
+        assert df3._str_reverse_map[0] is dx.string_pool('test_pool').strings
+
+        # columns with their own categories are merged
+        df3 = self.df1.append(self.df2)
+        assert_frame_equal(df3, df4)
+
+    def test_join(self):
+        df1 = self.df1.to_string_pool('test_pool')
+        df2 = self.df2.to_string_pool('test_pool')
+        df3 = df1.join(df2, on='s')
+        df4 = self.df1.join(self.df2, on='s')
+        assert_frame_equal(df3, df4)
+
+
+class TestRegexCategories:
+    df = dx.DataFrame({'a': [1, 2, 3, 4],
+                       's': ['a-b', 'c', None, 'a-b-c'],
+                       't': ['x1y22', None, 'z', '3']},
+                      columns=['a', 's', 't'])
+
+    def test_split(self):
+        df1 = self.df.str.split('s', pat='-')
+        df2 = dx.DataFrame({'0': ['a', 'c', None, 'a'],
+                            '1': ['b', None, None, 'b'],
+                            '2': [None, None, None, 'c']},
+                           columns=['0', '1', '2'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.rsplit('s', pat='-', n=1)
+        df2 = dx.DataFrame({'0': ['a', 'c', None, 'a-b'],
+                            '1': ['b', None, None, 'c']},
+                           columns=['0', '1'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.str.split(['s', 't'], pat='-', keep=True)
+        df2 = dx.DataFrame({'a': [1, 2, 3, 4],
+                            's_0': ['a', 'c', None, 'a'],
+                            's_1': ['b', None, None, 'b'],
+                            's_2': [None, None, None, 'c'],
+                            't_0': ['x1y22', None, 'z', '3']},
+                           columns=['a', 's_0', 's_1', 's_2', 't_0'])
+        assert_frame_equal(df1, df2)
+
+    def test_findall(self):
+        df1 = self.df.str.findall('t', pat=r'\d+')
+        df2 = dx.DataFrame({'0': ['1', None, None, '3'],
+                            '1': ['22', None, None, None]},
+                           columns=['0', '1'])
+        assert_frame_equal(df1, df2)
+
+        # unused categories do not make columns
+        df1 = self.df[[1, 2], :].str.findall('t', pat=r'\d+')
+        assert df1.shape == (2, 0)
+
+    def test_cache(self):
+        df1 = self.df.str.replace('s', pat='-', repl='+')
+        df2 = self.df.str.replace('s', pat='-', repl='+')
+        assert df1._str_reverse_map[0] is df2._str_reverse_map[0]
+
+        df2 = self.df.str.replace('s', pat='-', repl='*')
+        assert df2._str_reverse_map[0] == [False, 'a*b', 'c', 'a*b*c']
+
+        with dx.options.options_context(str_cache_size=2):
+            self.df.str.contains(['s', 't'], pat='a')
+            self.df.str.count(['s', 't'], pat='a')
+            assert len(_sf._category_cache) == 2
+
+    def test_cache_pool_grows(self):
+        df = self.df.to_string_pool('test_regex_pool')
+        df.str.contains('s', pat='c')
+        # adds 'ccc' to the pool
+        df = df.append(dx.DataFrame({'a': [5], 's': ['ccc'], 't': ['y']},
+                                    columns=['a', 's', 't']))
+        df1 = df.str.contains('s', pat='c')
+        df2 = dx.DataFrame({'s': [False, True, nan, True, True]})
+        assert_frame_equal(df1, df2)
+
+
+class TestStringBuffer:
+    df = dx.DataFrame({'a': [1, 2, 3, 4, 5, 6],
+                       's': ['id3', 'id1', None, 'id20', 'id1', 'ü2'],
+                       't': ['x', 'y', 'x', 'y', 'x', 'y']},
+                      columns=['a', 's', 't'])
+
+    def test_buffer(self):
+        srm = self.df._str_reverse_map[0]
+        buf = StringBuffer.from_strings(srm)
+        assert len(buf) == len(srm)
+        assert buf == srm
+        assert list(buf) == srm
+        assert buf[0] is False
+        assert buf[-1] == 'ü2'
+        assert buf.index('id20') == srm.index('id20')
+        assert buf.argsort().tolist() == np.argsort(np.array(srm[1:], dtype='O')).tolist()
+        assert buf.take(np.array([0, 4, 2], dtype='int64')) == [False, 'ü2', 'id1']
+        assert buf.nbytes == len(buf.data) + 8 * len(buf.offsets)
+        with pytest.raises(ValueError):
+            buf.index('id4')
+        with pytest.raises(ValueError):
+            buf.index(None)
+        assert buf.index(False) == 0
+        assert 'ü2' in buf and False in buf
+        assert 'id4' not in buf and None not in buf
+
+    def test_index_many(self):
+        srm = [False] + ['s' + str(i) for i in range(5000)] + ['']
+        buf = StringBuffer.from_strings(srm)
+        assert [buf.index(val) for val in srm] == list(range(len(srm)))
+
+    def test_merge(self):
+        buf1 = StringBuffer.from_strings([False, 'x', 'ü', ''])
+        buf2 = StringBuffer.from_strings([False, 'z', 'x', '', 'w'])
+        buf, codes = merge_string_buffers([buf1, buf2])
+        assert buf == [False, 'x', 'ü', '', 'z', 'w']
+        assert codes[0].tolist() == [0, 1, 2, 3]
+        assert codes[1].tolist() == [0, 4, 1, 3, 5]
+
+    def test_to_string_buffer(self):
+        df1 = self.df.to_string_buffer()
+        assert isinstance(df1._str_reverse_map[0], StringBuffer)
+        assert isinstance(df1._str_reverse_map[1], StringBuffer)
+        assert_frame_equal(df1, self.df)
+
+        df1 = self.df.to_string_buffer('s')
+        assert isinstance(df1._str_reverse_map[0], StringBuffer)
+        assert isinstance(df1._str_reverse_map[1], list)
+
+        with pytest.raises(TypeError):
+            self.df.to_string_buffer('a')
+
+    def test_min_unique(self):
+        with dx.options.options_context(str_buffer_min_unique=3):
+            df = dx.DataFrame({'s': ['a', 'b', 'c'], 't': ['a', 'b', 'b']},
+                              columns=['s', 't'])
+        assert isinstance(df._str_reverse_map[0], StringBuffer)
+        assert isinstance(df._str_reverse_map[1], list)
+
+    def test_setitem(self):
+        df = self.df.to_string_buffer()
+        srm = df._str_reverse_map[0]
+        df[1, 's'] = 'id3'
+        assert df._str_reverse_map[0] is srm
+        df[0, 's'] = 'new'
+        df2 = dx.DataFrame({'a': [1, 2, 3, 4, 5, 6],
+                            's': ['new', 'id3', None, 'id20', 'id1', 'ü2'],
+                            't': ['x', 'y', 'x', 'y', 'x', 'y']},
+                           columns=['a', 's', 't'])
+        assert_frame_equal(df, df2)
+        assert srm == self.df._str_reverse_map[0]
+
+    def test_arithmetic(self):
+        df = self.df.to_string_buffer()[:, ['s', 't']]
+        df1 = self.df[:, ['s', 't']]
+        assert_frame_equal(df + 'z', df1 + 'z')
+        assert_frame_equal('z' + df, 'z' + df1)
+        assert_frame_equal(df * 2, df1 * 2)
+
+    def test_selection(self):
+        df = self.df.to_string_buffer()
+        df1 = df[[1, 4, 5], :]
+        assert df1._str_reverse_map[0] is df._str_reverse_map[0]
+        assert_frame_equal(df1, self.df[[1, 4, 5], :])
+
+        df1 = df[[5], :]
+        assert isinstance(df1._str_reverse_map[0], StringBuffer)
+        assert df1._str_reverse_map[0] == [False, 'ü2']
+        assert_frame_equal(df1, self.df[[5], :])
+
+        df1 = df.compact_categories()
+        assert isinstance(df1._str_reverse_map[0], StringBuffer)
+        assert_frame_equal(df1, self.df)
+
+    def test_sort_values(self):
+        df1 = self.df.to_string_buffer().sort_values('s')
+        df2 = dx.DataFrame({'a': [2, 5, 4, 1, 6, 3],
+                            's': ['id1', 'id1', 'id20', 'id3', 'ü2', None],
+                            't': ['y', 'x', 'y', 'x', 'y', 'x']},
+                           columns=['a', 's', 't'])
+        assert_frame_equal(df1, df2)
+
+        df1 = self.df.to_string_buffer().sort_values(['s', 'a'], ascending=False)
+        df2 = dx.DataFrame({'a': [6, 1, 4, 5, 2, 3],
+                            's': ['ü2', 'id3', 'id20', 'id1', 'id1', None],
+                            't': ['y', 'x', 'y', 'x', 'y', 'x']},
+                           columns=['a', 's', 't'])
+        assert_frame_equal(df1, df2)
+
+    def test_groupby(self):
+        df = self.df.to_string_buffer()
+        assert df._data['S'].flags['F_CONTIGUOUS']
+        for columns in ['s', 't', ['s', 't'], ['t', 'a', 's']]:
+            df1 = df.groupby(columns).size()
+            df2 = self.df.groupby(columns).size()
+            assert_frame_equal(df1, df2)
+
+        df1 = df.groupby('t').agg(('count', 's', 's_count'), ('sum', 'a', 'a_sum'))
+        df2 = dx.DataFrame({'t': ['x', 'y'],
+                            's_count': [2, 3],
+                            'a_sum': [9, 12]},
+                           columns=['t', 's_count', 'a_sum'])
+        assert_frame_equal(df1, df2)
+
+        # a copy has strided string columns
+        df1 = df.copy().groupby(['s', 't']).sum()
+        df2 = self.df.groupby(['s', 't']).sum()
+        assert_frame_equal(df1, df2)
+
+    def test_join_str(self):
+        df = self.df.to_string_buffer()
+        df1 = df.join(df, on='s')
+        df2 = self.df.join(self.df, on='s')
+        assert_frame_equal(df1, df2)
+
+        df1 = df.str.upper('s')
+        df2 = self.df.str.upper('s')
+        assert_frame_equal(df1, df2)
+
+    def test_to_csv(self, tmpdir):
+        fn1 = str(tmpdir.join('list.csv'))
+        fn2 = str(tmpdir.join('buffer.csv'))
+        self.df.to_csv(fn1)
+        self.df.to_string_buffer().to_csv(fn2)
+        with open(fn1, 'rb') as f1, open(fn2, 'rb') as f2:
+            assert f1.read() == f2.read()
+
+    def test_read_csv(self, tmpdir):
+        fn = str(tmpdir.join('ids.csv'))
+        n = 3000
+        ids = ['id' + str(i % 1000) for i in range(n)]
+        ids[5] = None
+        df = dx.DataFrame({'s': ids, 'a': np.arange(n)}, columns=['s', 'a'])
+        df.to_csv(fn)
+        for n_threads in [1, 3]:
+            with dx.options.options_context(str_buffer_min_unique=1000):
+                df1 = dx.read_csv(fn, n_threads=n_threads)
+            assert isinstance(df1._str_reverse_map[0], StringBuffer)
+            assert_frame_equal(df1, df)
+
+            with dx.options.options_context(str_buffer_min_unique=1001):
+                df1 = dx.read_csv(fn, n_threads=n_threads)
+            assert isinstance(df1._str_reverse_map[0], list)
+            assert_frame_equal(df1, df)
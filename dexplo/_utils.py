@@ -1,8 +1,12 @@
 import decimal
-from typing import List, Dict, Set, Any, Union, Tuple, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Set, Any, Union, Tuple, Iterable, Callable, Optional
 import numpy as np
 from numpy import ndarray
 from ._libs import validate_arrays as va
+from ._libs.string_buffer import StringBuffer
+from . import options
+from . import _string_pool
 
 _DT = {'i': 'int', 'f': 'float', 'b': 'bool', 'S': 'str',
        'M': 'datetime64[ns]', 'm': 'timedelta64[ns]'}
@@ -52,6 +56,11 @@ RowSelection = Union[int, slice, List[int], 'DataFrame']
 MIN_INT = np.iinfo('int64').min
 NaT = np.datetime64('NaT')
 
+# binary file format written by DataFrame.to_dxf
+DXF_MAGIC = b'DXF\x00'
+DXF_VERSION = 1
+DXF_ALIGN = 64
+
 
 class Column:
 
@@ -637,4 +646,53 @@ def validate_agg_func(name, dtype):
             raise ValueError(f'Function name {name} does not work for columns of type {dtype}')
 
 
+def get_n_threads(n_threads: Optional[int] = None) -> int:
+    if n_threads is None:
+        n_threads = options.options_dict['n_threads']
+    if not isinstance(n_threads, (int, np.integer)) or isinstance(n_threads, bool):
+        raise TypeError('`n_threads` must be a positive integer')
+    if n_threads < 1:
+        raise ValueError('`n_threads` must be a positive integer')
+    return int(n_threads)
+
+
+def thread_map(func: Callable, *iterables: Iterable, n_threads: int = 1) -> List[Any]:
+    """
+    Calls `func` on each item of `iterables` and returns a list of the results in order.
+    The Cython kernels release the GIL so the calls run in parallel when `n_threads` > 1
+    """
+    if n_threads == 1:
+        return list(map(func, *iterables))
+    with ThreadPoolExecutor(n_threads) as executor:
+        return list(executor.map(func, *iterables))
+
+
+def copy_str_reverse_list(srm: List) -> List:
+    # the strings of a pool or a StringBuffer are shared and never change
+    if isinstance(srm, StringBuffer) or _string_pool.pool_of(srm) is not None:
+        return srm
+    return srm.copy()
 
+
+def argsort_str_reverse_list(srm: List) -> ndarray:
+    """
+    Returns the positions of the categories after the missing value in sorted order,
+    counted from the first category
+    """
+    if isinstance(srm, StringBuffer):
+        return srm.argsort()
+    return np.argsort(np.array(srm[1:], dtype='O'))
+
+
+def maybe_string_buffer(srm: List) -> List:
+    """
+    Stores the categories of a new string column in a StringBuffer when there are at
+    least as many as the option `str_buffer_min_unique` and in a list otherwise.
+    `srm` may be a list or a StringBuffer
+    """
+    min_unique = options.options_dict['str_buffer_min_unique']
+    if min_unique is None or len(srm) - 1 < min_unique:
+        return list(srm) if isinstance(srm, StringBuffer) else srm
+    if isinstance(srm, StringBuffer):
+        return srm
+    return StringBuffer.from_strings(srm)
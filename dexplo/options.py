@@ -1,7 +1,12 @@
 options_dict = {'max_cols': 200,
                 'max_rows': 5,
                 'max_colwidth': 50,
-                'show_tail': False}
+                'show_tail': False,
+                'n_threads': 1,
+                'group_cache_size': 8,
+                'str_compact_fraction': .5,
+                'str_cache_size': 32,
+                'str_buffer_min_unique': 100_000}
 
 _head_method = False
 